@@ -8,7 +8,7 @@ import sys
 import time
 from collections.abc import AsyncGenerator, Callable, Iterator, Sequence
 from contextlib import asynccontextmanager, contextmanager, redirect_stderr, redirect_stdout
-from typing import Protocol
+from typing import Final, Protocol
 
 from fastapi import FastAPI, Request
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
@@ -17,6 +17,8 @@ from pydantic import BaseModel
 from cmk.utils import paths
 from cmk.utils.caching import cache_manager
 
+from cmk.fetchers.filecache import memory_cache
+
 from cmk.base import config
 from cmk.base.automations import AutomationExitCode
 
@@ -24,6 +26,10 @@ from ._cache import Cache
 from ._log import LOGGER, temporary_log_level
 from ._tracer import TRACER
 
+# Discovery, the service discovery preview and friends read the same agent
+# outputs again and again, keep them in memory.
+FILE_CACHE_MEMORY_SIZE: Final = 64 * 1024 * 1024
+
 
 class AutomationPayload(BaseModel, frozen=True):
     name: str
@@ -70,6 +76,8 @@ def get_application(
     @asynccontextmanager
     async def lifespan(_: FastAPI) -> AsyncGenerator[None, None]:
         app.state.last_reload_at = time.time()
+        memory_cache.max_size = FILE_CACHE_MEMORY_SIZE
+        config.watch_piggyback_data()
         config.load_all_plugins(
             local_checks_dir=paths.local_checks_dir, checks_dir=paths.checks_dir
         )
@@ -115,6 +123,12 @@ def get_application(
                 )
             else:
                 LOGGER.info("[automation] %s with args: %s processed.", payload.name, payload.args)
+            LOGGER.debug(
+                "[automation] file cache in memory: %s, %d bytes in %d entries",
+                memory_cache.stats,
+                memory_cache.size,
+                len(memory_cache),
+            )
 
             return AutomationResponse(exit_code=exit_code, output=output_buffer.getvalue())
 
@@ -266,7 +266,9 @@ class AutomationDiscovery(DiscoveryAutomation):
             on_error = OnError.IGNORE
 
         # `force_snmp_cache_refresh` overrides `use_outdated` for SNMP.
-        file_cache_options = FileCacheOptions(use_outdated=True)
+        file_cache_options = FileCacheOptions(
+            use_outdated=True, compress=config.compress_cache_files
+        )
 
         if len(args) < 2:
             raise MKAutomationError(
@@ -392,7 +394,9 @@ class AutomationSpecialAgentDiscoveryPreview(Automation):
     def execute(self, args: list[str]) -> ServiceDiscoveryPreviewResult:
         run_settings = DiagSpecialAgentInput.deserialize(sys.stdin.read())
         config_cache = config.get_config_cache()
-        file_cache_options = FileCacheOptions(use_outdated=False, use_only_cache=False)
+        file_cache_options = FileCacheOptions(
+            use_outdated=False, use_only_cache=False, compress=config.compress_cache_files
+        )
         password_store_file = Path(cmk.utils.paths.tmp_dir, f"passwords_temp_{uuid.uuid4()}")
         try:
             cmk.utils.password_store.save(run_settings.passwords, password_store_file)
@@ -441,7 +445,9 @@ class AutomationDiscoveryPreview(Automation):
         config_cache.ruleset_matcher.ruleset_optimizer.set_all_processed_hosts({host_name})
         on_error = OnError.RAISE if raise_errors else OnError.WARN
         file_cache_options = FileCacheOptions(
-            use_outdated=prevent_fetching, use_only_cache=prevent_fetching
+            use_outdated=prevent_fetching,
+            use_only_cache=prevent_fetching,
+            compress=config.compress_cache_files,
         )
         fetcher = CMKFetcher(
             config_cache,
@@ -699,7 +705,7 @@ automations.register(AutomationAutodiscovery())
 
 def _execute_autodiscovery() -> tuple[Mapping[HostName, DiscoveryResult], bool]:
     # pylint: disable=too-many-branches
-    file_cache_options = FileCacheOptions(use_outdated=True)
+    file_cache_options = FileCacheOptions(use_outdated=True, compress=config.compress_cache_files)
 
     if not (autodiscovery_queue := AutoQueue(autodiscovery_dir)):
         return {}, False
@@ -2176,7 +2182,7 @@ class AutomationDiagHost(Automation):
                 snmpv3_privacy_proto, snmpv3_privacy_password = args[13:15]
 
         # No caching option over commandline here.
-        file_cache_options = FileCacheOptions()
+        file_cache_options = FileCacheOptions(compress=config.compress_cache_files)
 
         if not ipaddress:
             if ConfigCache.ip_stack_config(host_name) is ip_lookup.IPStackConfig.NO_IP:
@@ -2729,7 +2735,7 @@ class AutomationGetAgentOutput(Automation):
         plugins = agent_based_register.get_previously_loaded_plugins()
 
         # No caching option over commandline here.
-        file_cache_options = FileCacheOptions()
+        file_cache_options = FileCacheOptions(compress=config.compress_cache_files)
 
         success = True
         output = ""
@@ -7,15 +7,21 @@
 
 from __future__ import annotations
 
+import collections
 import functools
+import io
 import itertools
 import logging
+import multiprocessing
+import sys
 import time
 from collections.abc import Callable, Container, Iterable, Iterator, Mapping, Sequence
+from contextlib import redirect_stderr, redirect_stdout
 from dataclasses import dataclass
 from functools import partial
+from multiprocessing.pool import AsyncResult, Pool
 from pathlib import Path
-from typing import Final, Literal
+from typing import Final, Literal, Self
 
 import livestatus
 
@@ -27,7 +33,7 @@ import cmk.utils.resulttype as result
 from cmk.utils import password_store, tty
 from cmk.utils.agentdatatype import AgentRawData
 from cmk.utils.check_utils import ParametersTypeAlias
-from cmk.utils.cpu_tracking import CPUTracker, Snapshot
+from cmk.utils.cpu_tracking import CPUTracker, phase_timer, Snapshot
 from cmk.utils.hostaddress import HostAddress, HostName
 from cmk.utils.ip_lookup import IPStackConfig
 from cmk.utils.log import console
@@ -60,7 +66,7 @@ from cmk.checkengine.checkresults import (
     UnsubmittableServiceCheckResult,
 )
 from cmk.checkengine.discovery import AutocheckEntry, DiscoveryPlugin, HostLabelPlugin
-from cmk.checkengine.fetcher import HostKey, SourceInfo, SourceType
+from cmk.checkengine.fetcher import FetcherFunction, HostKey, SourceInfo, SourceType
 from cmk.checkengine.inventory import InventoryPlugin, InventoryPluginName
 from cmk.checkengine.parameters import Parameters
 from cmk.checkengine.parser import HostSections, NO_SELECTION, parse_raw_data, SectionNameCollection
@@ -116,6 +122,7 @@ __all__ = [
     "get_aggregated_result",
     "HostLabelPluginMapper",
     "InventoryPluginMapper",
+    "PrefetchingFetcher",
     "SectionPluginMapper",
     "SpecialAgentFetcher",
 ]
@@ -415,6 +422,7 @@ class CMKFetcher:
                             ),
                             on_error=self.on_error if not is_cluster else OnError.RAISE,
                             oid_cache_dir=Path(cmk.utils.paths.snmp_scan_cache_dir),
+                            oid_cache_max_age=self.config_cache.snmp_scan_cache_max_age(),
                         ),
                         selected_sections=(
                             self.selected_sections if not is_cluster else NO_SELECTION
@@ -466,6 +474,89 @@ class CMKFetcher:
         )
 
 
+_Fetched = Sequence[
+    tuple[
+        SourceInfo,
+        result.Result[AgentRawData | SNMPRawData, Exception],
+        Snapshot,
+    ]
+]
+
+# Set in the worker processes of the PrefetchingFetcher.
+_prefetch_fetcher: FetcherFunction | None = None
+
+
+def _init_prefetch_worker(fetcher: FetcherFunction) -> None:
+    global _prefetch_fetcher
+    _prefetch_fetcher = fetcher
+
+
+def _prefetch(host_name: HostName) -> tuple[str, _Fetched]:
+    assert _prefetch_fetcher is not None
+    with redirect_stdout(output := io.StringIO()), redirect_stderr(output):
+        fetched = _prefetch_fetcher(host_name, ip_address=None)
+    return output.getvalue(), fetched
+
+
+class PrefetchingFetcher:
+    """Fetch the hosts ahead of time in at most `jobs` worker processes
+
+    The hosts are fetched in the order given, which must be the order in
+    which they are requested.  The console output of the fetchers is buffered
+    and only written when the host is requested, so that the output still
+    appears host by host.  Hosts that have not been prefetched are fetched
+    as usual.
+    """
+
+    def __init__(
+        self, fetcher: FetcherFunction, host_names: Iterable[HostName], *, jobs: int
+    ) -> None:
+        self.fetcher: Final = fetcher
+        self.jobs: Final = jobs
+        self._queue: Final = collections.deque(host_names)
+        self._pending: Final[dict[HostName, AsyncResult[tuple[str, _Fetched]]]] = {}
+        self._pool: Pool | None = None
+
+    def __enter__(self) -> Self:
+        # Fork, so that the fetcher and the loaded configuration are inherited.
+        self._pool = multiprocessing.get_context("fork").Pool(
+            self.jobs, initializer=_init_prefetch_worker, initargs=(self.fetcher,)
+        )
+        self._submit()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        self._pending.clear()
+
+    def _submit(self) -> None:
+        if self._pool is None:
+            return
+        # Keep the workers busy, but do not fetch too far ahead.
+        while self._queue and len(self._pending) < 2 * self.jobs:
+            host_name = self._queue.popleft()
+            self._pending[host_name] = self._pool.apply_async(_prefetch, (host_name,))
+
+    def __call__(self, host_name: HostName, *, ip_address: HostAddress | None) -> _Fetched:
+        if ip_address is not None or (pending := self._pending.pop(host_name, None)) is None:
+            return self.fetcher(host_name, ip_address=ip_address)
+
+        self._submit()
+        try:
+            output, fetched = pending.get()
+        except Exception as e:
+            # For example, the result could not be pickled.
+            console.debug(f"Prefetching {host_name} failed, fetching again: {e}")
+            return self.fetcher(host_name, ip_address=ip_address)
+
+        sys.stdout.write(output)
+        sys.stdout.flush()
+        return fetched
+
+
 class SectionPluginMapper(SectionMap[SectionPlugin]):
     def __init__(
         self,
@@ -884,7 +975,8 @@ def get_aggregated_result(
     params_kw = {} if plugin.check_default_parameters is None else {"params": parameters}
 
     try:
-        check_result = check_function(**item_kw, **params_kw, **section_kws)
+        with phase_timer.phase(f"plugin:{service.check_plugin_name}"):
+            check_result = check_function(**item_kw, **params_kw, **section_kws)
     except MKTimeout:
         raise
     except Exception:
@@ -934,6 +934,21 @@ class PackedConfigStore:
             return pickle.load(f)  # nosec B301 # BNS:c3c5e9
 
 
+# See watch_piggyback_data
+_watch_piggyback_data = False
+
+
+def watch_piggyback_data() -> None:
+    """Keep the piggyback meta data in an inotify-driven index
+
+    This is meant for long-running processes like the automation helper.  The
+    index uses inotify watches, and these are limited per user.  Short-lived
+    processes read the meta data they need from disk instead.
+    """
+    global _watch_piggyback_data
+    _watch_piggyback_data = True
+
+
 @contextlib.contextmanager
 def set_use_core_config(
     *, autochecks_dir: Path, discovered_host_labels_dir: Path
@@ -1751,6 +1766,8 @@ class ConfigCache:
         self.__label_sources: dict[HostName, LabelSources] = {}
         self.__notification_plugin_parameters: dict[tuple[HostName, str], Mapping[str, object]] = {}
         self.__snmp_backend: dict[HostName, SNMPBackendEnum] = {}
+        # Not part of the configuration, so it survives `initialize`.
+        self.__piggyback_meta_data_index: piggyback_backend.PiggybackMetaDataIndex | None = None
         self.initialize()
 
     def initialize(self) -> ConfigCache:
@@ -1954,6 +1971,8 @@ class ConfigCache:
                 ],
                 character_encoding=self._snmp_character_encoding(host_name),
                 snmp_backend=self.get_snmp_backend(host_name),
+                bulk_table_walks=snmp_bulk_table_walks,
+                max_concurrent_walks=snmp_max_concurrent_walks,
             ),
         )
         if backend_override:
@@ -2738,6 +2757,9 @@ class ConfigCache:
     def missing_sys_description(self, host_name: HostName) -> bool:
         return self.ruleset_matcher.get_host_bool_value(host_name, snmp_without_sys_descr)
 
+    def snmp_scan_cache_max_age(self) -> float:
+        return snmp_scan_cache_max_age
+
     def snmp_fetch_intervals(self, host_name: HostName) -> Mapping[SectionName, int | None]:
         """Return the configured fetch intervals of SNMP sections in seconds
 
@@ -3821,15 +3843,37 @@ class ConfigCache:
 
         raise NotImplementedError(effective_mode)
 
+    def _piggyback_meta_data_index(self) -> piggyback_backend.PiggybackMetaDataIndex | None:
+        if not _watch_piggyback_data:
+            return None
+        if (index := self.__piggyback_meta_data_index) is None:
+            index = self.__piggyback_meta_data_index = piggyback_backend.PiggybackMetaDataIndex(
+                cmk.utils.paths.omd_root
+            )
+        return index
+
     def get_piggybacked_hosts_time_settings(
         self, piggybacked_hostname: HostName | None = None
     ) -> Sequence[tuple[str | None, str, int]]:
-        all_sources = piggyback_backend.get_piggybacked_host_with_sources(cmk.utils.paths.omd_root)
-        used_sources = (
-            {m.source for sources in all_sources.values() for m in sources}
-            if piggybacked_hostname is None
-            else {m.source for m in all_sources.get(piggybacked_hostname, [])}
-        )
+        index = self._piggyback_meta_data_index()
+        if piggybacked_hostname is None:
+            all_sources = (
+                piggyback_backend.get_piggybacked_host_with_sources(cmk.utils.paths.omd_root)
+                if index is None
+                else index.get_piggybacked_host_with_sources()
+            )
+            used_sources = {m.source for sources in all_sources.values() for m in sources}
+        else:
+            used_sources = {
+                m.source
+                for m in (
+                    piggyback_backend.get_meta_data_for(
+                        piggybacked_hostname, cmk.utils.paths.omd_root
+                    )
+                    if index is None
+                    else index.get_sources_of(piggybacked_hostname)
+                )
+            }
 
         return [
             *(
@@ -4132,6 +4176,7 @@ class FetcherFactory:
             snmp_config=snmp_config,
             stored_walk_path=fetcher_config.stored_walk_path,
             walk_cache_path=fetcher_config.walk_cache_path,
+            walk_cache_max_age=snmp_walk_cache_max_age,
         )
 
     def _agent_port(self, host_name: HostName) -> int:
@@ -60,6 +60,7 @@ default_host_group = "check_mk"
 
 check_max_cachefile_age = 0  # per default do not use cache files when checking
 cluster_max_cachefile_age = 90  # secs.
+compress_cache_files = False  # write the agent and SNMP cache files compressed
 piggyback_max_cachefile_age = 3600  # secs
 # Ruleset for translating piggyback host names
 piggyback_translation: list[RuleSpec[TranslationOptions]] = []
@@ -69,6 +70,7 @@ simulation_mode = False
 fake_dns: str | None = None
 perfdata_format: Literal["pnp", "standard"] = "pnp"
 check_mk_perfdata_with_times = True
+check_mk_phase_times = False
 # TODO: Remove these options?
 debug_log = False  # deprecated
 monitoring_host: str | None = None  # deprecated
@@ -98,6 +100,11 @@ non_inline_snmp_hosts: list[RuleSpec[object]] = []
 snmp_limit_oid_range: list[RuleSpec[tuple[str, Sequence[RangeLimit]]]] = []
 # Ruleset to customize bulk size
 snmp_bulk_size: list[RuleSpec[int]] = []
+snmp_bulk_table_walks = False
+snmp_max_concurrent_walks = 1
+# Reuse the OIDs of SNMP scans and the cached walks for that many seconds (0: do not reuse)
+snmp_scan_cache_max_age = 0
+snmp_walk_cache_max_age = 0
 snmp_default_community = "public"
 snmp_communities: list[RuleSpec[SNMPCredentials]] = []
 # override the rule based configuration
@@ -12,6 +12,7 @@ import cmk.ccc.debug
 import cmk.ccc.version as cmk_version
 from cmk.ccc import crash_reporting
 from cmk.ccc.crash_reporting import CrashInfo
+from cmk.ccc.exceptions import MKFetcherError
 
 import cmk.utils.encoding
 import cmk.utils.paths
@@ -22,6 +23,8 @@ from cmk.utils.servicename import ServiceName
 
 from cmk.snmplib import SNMPBackendEnum
 
+from cmk.fetchers.filecache import read_cache_file
+
 from cmk.checkengine.checking import CheckPluginName
 
 from cmk.piggyback.backend import get_messages_for
@@ -193,8 +196,8 @@ def _read_agent_output(hostname: HostName) -> AgentRawData | None:
 
     cache_path = Path(cmk.utils.paths.tcp_cache_dir, hostname)
     try:
-        agent_outputs.append(cache_path.read_bytes())
-    except OSError:
+        agent_outputs.append(read_cache_file(cache_path))
+    except (OSError, MKFetcherError):
         pass
 
     # Note: this is not quite what the fetcher does :(
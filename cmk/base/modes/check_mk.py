@@ -12,7 +12,7 @@ import subprocess
 import sys
 import time
 from collections.abc import Callable, Container, Iterable, Mapping, Sequence
-from contextlib import suppress
+from contextlib import nullcontext, suppress
 from functools import partial
 from pathlib import Path
 from types import ModuleType
@@ -32,7 +32,7 @@ from cmk.utils import config_warnings, ip_lookup, log, tty
 from cmk.utils.auto_queue import AutoQueue
 from cmk.utils.check_utils import maincheckify
 from cmk.utils.config_path import LATEST_CONFIG
-from cmk.utils.cpu_tracking import CPUTracker
+from cmk.utils.cpu_tracking import CPUTracker, phase_timer
 from cmk.utils.diagnostics import (
     DiagnosticsModesParameters,
     OPT_CHECKMK_CONFIG_FILES,
@@ -81,6 +81,7 @@ from cmk.checkengine.checking import (
     CheckPluginName,
     execute_checkmk_checks,
     make_timing_results,
+    update_phase_histograms,
 )
 from cmk.checkengine.checkresults import ActiveCheckResult
 from cmk.checkengine.discovery import (
@@ -122,6 +123,7 @@ from cmk.base.checkers import (
     DiscoveryPluginMapper,
     HostLabelPluginMapper,
     InventoryPluginMapper,
+    PrefetchingFetcher,
     SectionPluginMapper,
 )
 from cmk.base.config import (
@@ -291,6 +293,9 @@ def _handle_fetcher_options(
     if options.get("no-tcp", False):
         file_cache_options = dataclasses.replace(file_cache_options, tcp_use_only_cache=True)
 
+    if config.compress_cache_files:
+        file_cache_options = dataclasses.replace(file_cache_options, compress=True)
+
     if options.get("usewalk", False):
         snmp_factory.force_stored_walks()
         ip_lookup.enforce_localhost()
@@ -1923,6 +1928,7 @@ def mode_check_discovery(
             make_timing_results(
                 tracker.duration,
                 tuple((f[0], f[2]) for f in fetched),
+                phase_times={},
                 perfdata_with_times=config.check_mk_perfdata_with_times,
             ),
         ]
@@ -2099,6 +2105,7 @@ _DiscoveryOptions = TypedDict(
         "detect-plugins": frozenset[str],
         "discover": int,
         "only-host-labels": bool,
+        "jobs": int,
     },
     total=False,
 )
@@ -2191,7 +2198,7 @@ def mode_discover(options: _DiscoveryOptions, args: list[str]) -> None:
         snmp_backend_override=snmp_backend_override,
         password_store_file=cmk.utils.password_store.pending_password_store_path(),
     )
-    for hostname in sorted(
+    hostnames_to_discover = sorted(
         _preprocess_hostnames(
             frozenset(hostnames),
             is_cluster=lambda hn: hn in config_cache.hosts_config.clusters,
@@ -2199,7 +2206,44 @@ def mode_discover(options: _DiscoveryOptions, args: list[str]) -> None:
             config_cache=config_cache,
             only_host_labels="only-host-labels" in options,
         )
-    ):
+    )
+    jobs = options.get("jobs", 1)
+    start = time.monotonic()
+    with (
+        PrefetchingFetcher(fetcher, hostnames_to_discover, jobs=jobs)
+        if jobs > 1
+        else nullcontext(fetcher)
+    ) as fetch_host:
+        _discover_hosts(
+            hostnames_to_discover,
+            options,
+            config_cache=config_cache,
+            plugins=plugins,
+            parser=parser,
+            fetcher=fetch_host,
+            run_plugin_names=run_plugin_names,
+            on_error=on_error,
+        )
+    if jobs > 1 and hostnames_to_discover:
+        duration = time.monotonic() - start
+        console.info(
+            f"Discovered {len(hostnames_to_discover)} hosts in {duration:.1f} s "
+            f"({len(hostnames_to_discover) / duration:.1f} hosts/s, {jobs} jobs)"
+        )
+
+
+def _discover_hosts(
+    hostnames: Iterable[HostName],
+    options: _DiscoveryOptions,
+    *,
+    config_cache: ConfigCache,
+    plugins: agent_based_register.AgentBasedPlugins,
+    parser: CMKParser,
+    fetcher: FetcherFunction,
+    run_plugin_names: Container[CheckPluginName],
+    on_error: OnError,
+) -> None:
+    for hostname in hostnames:
 
         def section_error_handling(
             section_name: SectionName,
@@ -2275,6 +2319,14 @@ modes.register(
                 short_option="L",
                 short_help="Restrict discovery to host labels only",
             ),
+            Option(
+                long_option="jobs",
+                short_option="j",
+                argument=True,
+                argument_descr="N",
+                argument_conv=int,
+                short_help="Fetch the data of up to N hosts in parallel",
+            ),
         ],
     )
 )
@@ -2403,7 +2455,11 @@ def mode_check(
         ) as value_store_manager,
     ):
         console.debug(f"Checkmk version {cmk_version.__version__}")
-        fetched = fetcher(hostname, ip_address=ipaddress)
+        phase_timer.reset(enabled=config.check_mk_phase_times)
+        with phase_timer.phase("fetching"):
+            fetched = fetcher(hostname, ip_address=ipaddress)
+        with phase_timer.phase("services"):
+            services = config_cache.configured_services(hostname)
         check_plugins = CheckPluginMapper(
             config_cache,
             value_store_manager,
@@ -2430,7 +2486,7 @@ def mode_check(
                 inventory_plugins=InventoryPluginMapper(),
                 inventory_parameters=config_cache.inventory_parameters,
                 params=config_cache.hwsw_inventory_parameters(hostname),
-                services=config_cache.configured_services(hostname),
+                services=services,
                 run_plugin_names=run_plugin_names,
                 get_check_period=partial(config_cache.check_period_of_service, hostname),
                 submitter=get_submitter_(
@@ -2449,9 +2505,15 @@ def mode_check(
             make_timing_results(
                 tracker.duration,
                 tuple((f[0], f[2]) for f in fetched),
+                phase_times=phase_timer.times,
                 perfdata_with_times=config.check_mk_perfdata_with_times,
             ),
         ]
+        if phase_timer.enabled:
+            with suppress(OSError):
+                update_phase_histograms(
+                    cmk.utils.paths.tmp_dir / "phase_times" / hostname, phase_timer.times
+                )
 
     if error_handler.result is not None:
         checks_result = (error_handler.result,)
@@ -2904,6 +2966,7 @@ def mode_inventory_as_check(
                 tracker.duration,
                 # FIXME: This is inconsistent with the other two calls.
                 (),  # nothing to add here, b/c fetching is triggered further down the call stack.
+                phase_times={},
                 perfdata_with_times=config.check_mk_perfdata_with_times,
             ),
         ]
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Compact file format of compiled aggregations
+
+The trees of a compiled aggregation are stored as flat arrays of integers,
+which refer to a table of strings and to a table of rule templates:
+
+    header      magic, offset and length of each of the following blocks
+    meta        marshaled id, computation options, visualization and groups
+    strings     all strings, joined by NUL characters
+    templates   marshaled list of the distinct rule attributes: id, pack id,
+                properties but the title, aggregation function and node visualization
+    nodes       five int32 per node, the nodes of all branches in preorder
+                leaf: LEAF, site, host, service (or -1), 0
+                rule: RULE, template, title, number of child nodes, number of required hosts
+    required    site and host of the required hosts of the rules, in preorder
+    branches    three int32 per branch: title, first node, first required host
+
+The integers are in native byte order, the files are local caches.  Files are
+read via a read only mmap, so the pages are shared by all processes reading
+them, and the branches can be loaded one at a time.  Strings and rule
+attributes are shared by all nodes of a loaded aggregation.
+"""
+
+import marshal
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from cmk.ccc import store
+from cmk.ccc.exceptions import MKGeneralException
+
+from cmk.bi.aggregation import BIAggregation
+from cmk.bi.lib import (
+    ABCBIAggregationFunction,
+    ABCBICompiledNode,
+    BIAggregationComputationOptions,
+    BIAggregationGroups,
+    bi_aggregation_function_registry,
+)
+from cmk.bi.rule_interface import BIRuleProperties
+from cmk.bi.trees import BICompiledAggregation, BICompiledLeaf, BICompiledRule
+
+_MAGIC = b"CMKBIAG\x01"
+_BLOCKS = ("meta", "strings", "templates", "nodes", "required", "branches")
+_HEADER = struct.Struct(f"<8s{2 * len(_BLOCKS)}Q")
+_NODE = struct.Struct("5i")
+_BRANCH = struct.Struct("3i")
+_REQUIRED_HOST = struct.Struct("2i")
+_LEAF = 0
+_RULE = 1
+
+_Rule = tuple[str, str, dict[str, Any], ABCBIAggregationFunction, dict[str, Any]]
+
+
+def file_version(stat: os.stat_result) -> str:
+    """Identifies the content of a file, as files are replaced and not modified when saved"""
+    return f"{stat.st_ino}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def dump_compiled_aggregation(compiled_aggregation: BICompiledAggregation) -> bytes:
+    return _Writer().dump(compiled_aggregation)
+
+
+def is_compact_file(path: Path) -> bool:
+    try:
+        with path.open("rb") as f:
+            return f.read(len(_MAGIC)) == _MAGIC
+    except FileNotFoundError:
+        return False
+
+
+def load_compiled_aggregation(path: Path) -> BICompiledAggregation:
+    """Load all branches of the aggregation, also from the pickled format of earlier versions"""
+    if not is_compact_file(path):
+        # Replaced with the next compilation
+        return BIAggregation.create_trees_from_schema(
+            store.load_object_from_pickle_file(path, default={})
+        )
+    compiled_aggregation_file = CompiledAggregationFile(path)
+    try:
+        return compiled_aggregation_file.load()
+    finally:
+        compiled_aggregation_file.close()
+
+
+class _Writer:
+    def __init__(self) -> None:
+        self._strings: dict[str, int] = {}
+        self._templates: dict[bytes, int] = {}
+        self._nodes = bytearray()
+        self._required = bytearray()
+        self._node_count = 0
+        self._required_count = 0
+
+    def dump(self, compiled_aggregation: BICompiledAggregation) -> bytes:
+        branches = bytearray()
+        for branch in compiled_aggregation.branches:
+            branches += _BRANCH.pack(
+                self._string(branch.properties.title), self._node_count, self._required_count
+            )
+            self._add_node(branch)
+
+        blocks = [
+            marshal.dumps(
+                {
+                    "id": compiled_aggregation.id,
+                    "computation_options": compiled_aggregation.computation_options.serialize(),
+                    "aggregation_visualization": compiled_aggregation.aggregation_visualization,
+                    "groups": compiled_aggregation.groups.serialize(),
+                }
+            ),
+            "\0".join(self._strings).encode("utf-8"),
+            marshal.dumps([marshal.loads(template) for template in self._templates]),
+            bytes(self._nodes),
+            bytes(self._required),
+            bytes(branches),
+        ]
+        header = []
+        offset = _HEADER.size
+        for block in blocks:
+            header += [offset, len(block)]
+            offset += len(block)
+        return b"".join([_HEADER.pack(_MAGIC, *header), *blocks])
+
+    def _add_node(self, node: ABCBICompiledNode) -> None:
+        self._node_count += 1
+        if isinstance(node, BICompiledLeaf):
+            self._nodes += _NODE.pack(
+                _LEAF,
+                self._string(node.site_id),
+                self._string(node.host_name),
+                -1 if node.service_description is None else self._string(node.service_description),
+                0,
+            )
+            return
+
+        if not isinstance(node, BICompiledRule):
+            raise MKGeneralException(f"Unable to store the compiled node {node}")
+
+        properties = node.properties.serialize()
+        title = properties.pop("title")
+        template = marshal.dumps(
+            (
+                node.id,
+                node.pack_id,
+                properties,
+                node.aggregation_function.serialize(),
+                node.node_visualization,
+            )
+        )
+        self._nodes += _NODE.pack(
+            _RULE,
+            self._templates.setdefault(template, len(self._templates)),
+            self._string(title),
+            len(node.nodes),
+            len(node.required_hosts),
+        )
+        for site_id, host_name in node.required_hosts:
+            self._required += _REQUIRED_HOST.pack(self._string(site_id), self._string(host_name))
+        self._required_count += len(node.required_hosts)
+        for child in node.nodes:
+            self._add_node(child)
+
+    def _string(self, value: str) -> int:
+        if (index := self._strings.get(value)) is None:
+            if "\0" in value:
+                raise MKGeneralException(f"Unable to store {value!r} in a compiled aggregation")
+            index = self._strings[value] = len(self._strings)
+        return index
+
+
+class CompiledAggregationFile:
+    """A compiled aggregation file, of which the branches are loaded on demand"""
+
+    def __init__(self, path: Path) -> None:
+        with path.open("rb") as f:
+            self.version = file_version(os.fstat(f.fileno()))
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, *header = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC:
+            raise MKGeneralException(f"Unknown format of compiled aggregation {path}")
+        self._blocks = {
+            name: (offset, offset + length)
+            for name, offset, length in zip(_BLOCKS, header[::2], header[1::2])
+        }
+        self._meta: dict[str, Any] = marshal.loads(self._block("meta"))
+        self._branches = list(_BRANCH.iter_unpack(self._block("branches")))
+        self._strings: list[str] | None = None
+        self._templates: list[tuple] | None = None
+        self._rules: list[_Rule | None] = []
+        self._properties: dict[tuple[int, int], BIRuleProperties] = {}
+        self._branch_index: dict[str, int] | None = None
+
+    @property
+    def aggregation_id(self) -> str:
+        return self._meta["id"]
+
+    def branch_titles(self) -> list[str]:
+        return list(self._get_branch_index())
+
+    def load(self) -> BICompiledAggregation:
+        compiled_aggregation = BICompiledAggregation(
+            self._meta["id"],
+            [self._load_branch(index) for index in range(len(self._branches))],
+            BIAggregationComputationOptions(self._meta["computation_options"]),
+            self._meta["aggregation_visualization"],
+            BIAggregationGroups(self._meta["groups"]),
+        )
+        compiled_aggregation.version = self.version
+        return compiled_aggregation
+
+    def load_branch(self, title: str) -> BICompiledRule | None:
+        if (index := self._get_branch_index().get(title)) is None:
+            return None
+        return self._load_branch(index)
+
+    def close(self) -> None:
+        self._map.close()
+
+    def _load_branch(self, index: int) -> BICompiledRule:
+        _title, first_node, first_required = self._branches[index]
+        if index + 1 < len(self._branches):
+            _next_title, end_node, end_required = self._branches[index + 1]
+        else:
+            end_node = (self._blocks["nodes"][1] - self._blocks["nodes"][0]) // _NODE.size
+            end_required = (
+                self._blocks["required"][1] - self._blocks["required"][0]
+            ) // _REQUIRED_HOST.size
+
+        nodes_start = self._blocks["nodes"][0]
+        required_start = self._blocks["required"][0]
+        branch = self._build_node(
+            _NODE.iter_unpack(
+                self._map[
+                    nodes_start + first_node * _NODE.size : nodes_start + end_node * _NODE.size
+                ]
+            ),
+            _REQUIRED_HOST.iter_unpack(
+                self._map[
+                    required_start + first_required * _REQUIRED_HOST.size : required_start
+                    + end_required * _REQUIRED_HOST.size
+                ]
+            ),
+            self._get_strings(),
+        )
+        assert isinstance(branch, BICompiledRule)
+        return branch
+
+    def _build_node(
+        self,
+        nodes: Iterator[tuple[Any, ...]],
+        required: Iterator[tuple[Any, ...]],
+        strings: list[str],
+    ) -> ABCBICompiledNode:
+        kind, first, second, third, fourth = next(nodes)
+        if kind == _LEAF:
+            return BICompiledLeaf(
+                strings[second], strings[first], None if third < 0 else strings[third]
+            )
+
+        rule_id, pack_id, properties, aggregation_function, node_visualization = self._get_rule(
+            first
+        )
+        if (rule_properties := self._properties.get((first, second))) is None:
+            rule_properties = self._properties[(first, second)] = BIRuleProperties(
+                {**properties, "title": strings[second]}
+            )
+        return BICompiledRule(
+            rule_id,
+            pack_id,
+            [self._build_node(nodes, required, strings) for _child in range(third)],
+            [
+                (strings[site_id], strings[host_name])
+                for site_id, host_name in (next(required) for _host in range(fourth))
+            ],
+            rule_properties,
+            aggregation_function,
+            node_visualization,
+        )
+
+    def _get_rule(self, index: int) -> _Rule:
+        if self._templates is None:
+            self._templates = marshal.loads(self._block("templates"))
+            self._rules = [None] * len(self._templates)
+        if (rule := self._rules[index]) is None:
+            rule_id, pack_id, properties, aggregation_function, node_visualization = (
+                self._templates[index]
+            )
+            rule = self._rules[index] = (
+                rule_id,
+                pack_id,
+                properties,
+                bi_aggregation_function_registry.instantiate(aggregation_function),
+                node_visualization,
+            )
+        return rule
+
+    def _get_strings(self) -> list[str]:
+        if self._strings is None:
+            self._strings = list(
+                map(sys.intern, self._block("strings").decode("utf-8").split("\0"))
+            )
+        return self._strings
+
+    def _get_branch_index(self) -> dict[str, int]:
+        if self._branch_index is None:
+            strings = self._get_strings()
+            self._branch_index = {
+                strings[title]: index
+                for index, (title, _node, _required) in enumerate(self._branches)
+            }
+        return self._branch_index
+
+    def _block(self, name: str) -> bytes:
+        start, end = self._blocks[name]
+        return self._map[start:end]
@@ -6,9 +6,11 @@
 from __future__ import annotations
 
 import ast
+import hashlib
 import os
 import pickle
 import time
+from collections.abc import Mapping
 from pathlib import Path
 from typing import TypedDict
 
@@ -23,10 +25,16 @@ from cmk.utils.paths import default_config_dir
 from cmk.utils.redis import get_redis_client
 
 from cmk.bi.aggregation import BIAggregation
+from cmk.bi.compiled_format import (
+    dump_compiled_aggregation,
+    file_version,
+    is_compact_file,
+    load_compiled_aggregation,
+)
 from cmk.bi.data_fetcher import BIStructureFetcher, get_cache_dir, SiteProgramStart
-from cmk.bi.lib import SitesCallback
+from cmk.bi.lib import BIHostData, SitesCallback
 from cmk.bi.packs import BIAggregationPacks
-from cmk.bi.searcher import BISearcher
+from cmk.bi.searcher import BIRecordingSearcher, BISearcher
 from cmk.bi.trees import BICompiledAggregation, BICompiledRule, FrozenBIInfo
 from cmk.bi.type_defs import frozen_aggregations_dir
 
@@ -37,6 +45,23 @@ class ConfigStatus(TypedDict):
     online_sites: set[SiteProgramStart]
 
 
+class AggregationDependencies(TypedDict):
+    pack_id: str
+    # Fingerprint of the aggregation and of all the rules it calls
+    config: str
+    # What the compiled aggregation depends on, see BIRecordingSearcher
+    hosts: set[str]
+    searches: list[dict]
+    patterns: set[str]
+    compile_time: float
+
+
+class CompilationState(TypedDict):
+    # Fingerprints of the structure data of all hosts
+    hosts: dict[str, str]
+    aggregations: dict[str, AggregationDependencies]
+
+
 path_compiled_aggregations = Path(get_cache_dir(), "compiled_aggregations")
 
 
@@ -49,6 +74,7 @@ class BICompiler:
         self._compiled_aggregations: dict[str, BICompiledAggregation] = {}
         self._path_compilation_lock = Path(get_cache_dir(), "compilation.LOCK")
         self._path_compilation_timestamp = Path(get_cache_dir(), "last_compilation")
+        self._path_compilation_state = Path(get_cache_dir(), "compilation_state")
         path_compiled_aggregations.mkdir(parents=True, exist_ok=True)
 
         self._redis_client: Redis[str] | None = None
@@ -57,7 +83,7 @@ class BICompiler:
     def _setup(self) -> None:
         self._bi_packs = BIAggregationPacks(self._bi_configuration_file)
         self._bi_structure_fetcher = BIStructureFetcher(self._sites_callback)
-        self.bi_searcher = BISearcher()
+        self.bi_searcher = BIRecordingSearcher()
 
     @property
     def compiled_aggregations(self) -> dict[str, BICompiledAggregation]:
@@ -169,11 +195,12 @@ class BICompiler:
             # the computation time may differ, which also means possibly changed computation options
             for branch in list(compiled_aggregation.branches):
                 if branch.properties.title in frozen_branch_names:
+                    frozen_branch_file = frozen_aggregations_dir / branch.properties.title
+                    version = file_version(frozen_branch_file.stat())
                     frozen_aggregation = BIAggregation.create_trees_from_schema(
-                        ast.literal_eval(
-                            (frozen_aggregations_dir / branch.properties.title).read_text()
-                        )
+                        ast.literal_eval(frozen_branch_file.read_text())
                     )
+                    frozen_aggregation.version = _unchanged_version(frozen_branch_file, version)
                     frozen_aggregation.frozen_info = FrozenBIInfo(
                         compiled_aggregation.id, branch.properties.title
                     )
@@ -198,9 +225,7 @@ class BICompiler:
                 continue
 
             self._logger.debug("Loading cached aggregation results %s" % aggr_id)
-            self._compiled_aggregations[aggr_id] = BIAggregation.create_trees_from_schema(
-                store.load_object_from_pickle_file(path_object, default={})
-            )
+            self._compiled_aggregations[aggr_id] = load_compiled_aggregation(path_object)
 
         self._compiled_aggregations = self._manage_frozen_branches(self._compiled_aggregations)
 
@@ -219,26 +244,9 @@ class BICompiler:
                 return
 
             self.prepare_for_compilation(current_configstatus["online_sites"])
-
-            # Compile the raw tree
-            all_aggregations_by_id: dict[str, BIAggregation] = {
-                x.id: x for x in self._bi_packs.get_all_aggregations()
-            }
-            for aggregation in all_aggregations_by_id.values():
-                start = time.time()
-                self._compiled_aggregations[aggregation.id] = aggregation.compile(self.bi_searcher)
-                self._logger.debug(f"Compilation of {aggregation.id} took {time.time() - start:f}")
+            self._compile_changed_aggregations()
             self._verify_aggregation_title_uniqueness(self._compiled_aggregations)
 
-            for aggr_id, compiled_aggr in self._compiled_aggregations.items():
-                start = time.time()
-                result = compiled_aggr.serialize()
-                self._logger.debug(
-                    "Schema dump %s took config took %f (%d branches)"
-                    % (aggr_id, time.time() - start, len(compiled_aggr.branches))
-                )
-                self._save_data(path_compiled_aggregations.joinpath(aggr_id), result)
-
             self._compiled_aggregations = self._manage_frozen_branches(self._compiled_aggregations)
             self._generate_part_of_aggregation_lookup(self._compiled_aggregations)
 
@@ -249,6 +257,119 @@ class BICompiler:
             str(self._path_compilation_timestamp), str(current_configstatus["configfile_timestamp"])
         )
 
+    def _compile_changed_aggregations(self) -> None:
+        """Compile the aggregations affected by configuration or structure changes
+
+        The others are loaded from the previous compilation. An aggregation is recompiled if it
+        or one of the rules it calls has changed, if one of the hosts it depends on has changed or
+        if a changed host is found by one of its searches.
+        """
+        previous_state = self._load_compilation_state()
+        hosts = self._bi_structure_fetcher.hosts
+        host_fingerprints = {
+            host_name: _host_fingerprint(host_data) for host_name, host_data in hosts.items()
+        }
+        changed_hosts = {
+            host_name
+            for host_name in host_fingerprints.keys() | previous_state["hosts"].keys()
+            if host_fingerprints.get(host_name) != previous_state["hosts"].get(host_name)
+        }
+
+        # Compiled aggregations are about to change, the state must not be used if this fails
+        self._path_compilation_state.unlink(missing_ok=True)
+        state = CompilationState(hosts=host_fingerprints, aggregations={})
+        compiled: list[str] = []
+        self._compiled_aggregations = {}
+        all_aggregations_by_id: dict[str, BIAggregation] = {
+            x.id: x for x in self._bi_packs.get_all_aggregations()
+        }
+        for aggregation in all_aggregations_by_id.values():
+            config_fingerprint = self._config_fingerprint(aggregation)
+            path = path_compiled_aggregations.joinpath(aggregation.id)
+            previous = previous_state["aggregations"].get(aggregation.id)
+            if (
+                previous is not None
+                and previous["config"] == config_fingerprint
+                and is_compact_file(path)
+                and not self._depends_on(previous, changed_hosts)
+            ):
+                self._logger.debug("Aggregation %s is not affected by changes" % aggregation.id)
+                self._compiled_aggregations[aggregation.id] = load_compiled_aggregation(path)
+                state["aggregations"][aggregation.id] = previous
+                continue
+
+            start = time.time()
+            self.bi_searcher.reset_recording()
+            compiled_aggregation = aggregation.compile(self.bi_searcher)
+            compile_time = time.time() - start
+            self._logger.debug(f"Compilation of {aggregation.id} took {compile_time:f}")
+            self._compiled_aggregations[aggregation.id] = compiled_aggregation
+            compiled.append(aggregation.id)
+            state["aggregations"][aggregation.id] = AggregationDependencies(
+                pack_id=aggregation.pack_id,
+                config=config_fingerprint,
+                hosts=set(self.bi_searcher.recorded_hosts),
+                searches=list(self.bi_searcher.recorded_searches.values()),
+                patterns=set(self.bi_searcher.recorded_patterns),
+                compile_time=compile_time,
+            )
+
+            start = time.time()
+            result = dump_compiled_aggregation(compiled_aggregation)
+            self._logger.debug(
+                "Dump %s took %f (%d branches)"
+                % (aggregation.id, time.time() - start, len(compiled_aggregation.branches))
+            )
+            store.save_bytes_to_file(path, result)
+            compiled_aggregation.version = file_version(path.stat())
+
+        self._logger.info(
+            "Compiled %d of %d aggregations in %f seconds"
+            % (
+                len(compiled),
+                len(state["aggregations"]),
+                sum(state["aggregations"][aggr_id]["compile_time"] for aggr_id in compiled),
+            )
+        )
+        self._save_data(self._path_compilation_state, state)
+
+    def _depends_on(self, dependencies: AggregationDependencies, changed_hosts: set[str]) -> bool:
+        if not changed_hosts:
+            return False
+        if not dependencies["hosts"].isdisjoint(changed_hosts):
+            return True
+        hosts = self._bi_structure_fetcher.hosts
+        searcher = BISearcher()
+        searcher.set_hosts(
+            {host_name: hosts[host_name] for host_name in changed_hosts if host_name in hosts}
+        )
+        return any(
+            searcher.search_hosts(conditions) for conditions in dependencies["searches"]
+        ) or any(
+            searcher.get_host_name_matches(list(searcher.hosts.values()), pattern)[0]
+            for pattern in dependencies["patterns"]
+        )
+
+    def _config_fingerprint(self, aggregation: BIAggregation) -> str:
+        rules = [
+            (bi_rule.pack_id, bi_rule.serialize())
+            for rule_id in sorted(self._bi_packs.get_rule_ids_of_aggregation(aggregation.id))
+            for bi_rule in [self._bi_packs.get_rule_mandatory(rule_id)]
+        ]
+        return _fingerprint((aggregation.pack_id, aggregation.serialize(), rules))
+
+    def _load_compilation_state(self) -> CompilationState:
+        return store.load_object_from_pickle_file(
+            self._path_compilation_state, default=CompilationState(hosts={}, aggregations={})
+        )
+
+    def get_compile_times(self) -> dict[str, float]:
+        """The time the last compilation of each aggregation took, in seconds"""
+        return {
+            aggr_id: dependencies["compile_time"]
+            for aggr_id, dependencies in self._load_compilation_state()["aggregations"].items()
+        }
+
     def _cleanup_vanished_aggregations(self) -> None:
         valid_aggregations = list(self._compiled_aggregations.keys())
         for path_object in path_compiled_aggregations.iterdir():
@@ -352,7 +473,7 @@ class BICompiler:
 
         return latest_timestamp
 
-    def _save_data(self, filepath: Path, data: dict) -> None:
+    def _save_data(self, filepath: Path, data: Mapping[str, object]) -> None:
         store.save_bytes_to_file(filepath, pickle.dumps(data))
 
     def _get_redis_client(self) -> Redis[str]:
@@ -421,3 +542,31 @@ class BICompiler:
             pipeline.delete(*obsolete_keys)
 
         pipeline.execute()
+
+
+def _host_fingerprint(host_data: BIHostData) -> str:
+    return _fingerprint(
+        (
+            host_data.site_id,
+            sorted(host_data.tags),
+            sorted(host_data.labels.items()),
+            host_data.folder,
+            sorted(
+                (description, sorted(service_data.tags), sorted(service_data.labels.items()))
+                for description, service_data in host_data.services.items()
+            ),
+            host_data.children,
+            host_data.parents,
+            host_data.alias,
+            host_data.name,
+        )
+    )
+
+
+def _unchanged_version(path: Path, version: str) -> str | None:
+    """The version of a file read before, unless it has been replaced in the meantime"""
+    return version if file_version(path.stat()) == version else None
+
+
+def _fingerprint(data: object) -> str:
+    return hashlib.sha256(repr(data).encode("utf-8")).hexdigest()
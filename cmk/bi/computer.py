@@ -4,16 +4,24 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import copy
-from collections.abc import Iterator
+import time
+from collections.abc import Iterator, Mapping
 from typing import NamedTuple
 
 from cmk.ccc.plugin_registry import Registry
 
 from cmk.utils.hostaddress import HostName
+from cmk.utils.log import logger
 from cmk.utils.servicename import ServiceName
 
 from cmk.bi.data_fetcher import BIStatusFetcher
-from cmk.bi.lib import NodeResultBundle, RequiredBIElement
+from cmk.bi.lib import (
+    ABCBIStatusFetcher,
+    BIHostSpec,
+    BIHostStatusInfoRow,
+    NodeResultBundle,
+    RequiredBIElement,
+)
 from cmk.bi.trees import BICompiledAggregation, BICompiledRule
 
 
@@ -54,15 +62,166 @@ class BIComputerPostprocessingRegistry(Registry[ABCPostprocessComputeResult]):
 bi_computer_postprocessing_registry = BIComputerPostprocessingRegistry()
 
 
+class BIResultCacheStatistics(NamedTuple):
+    hits: int
+    misses: int
+    # Sum of the compute times of the reused results
+    time_saved: float
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.hits} hits, {self.misses} misses (hit rate {self.hit_rate:.0%}), "
+            f"{self.time_saved:f}s of computation saved"
+        )
+
+
+# The host, whether the host itself is required and the required services of the host
+_StateLookup = tuple[BIHostSpec, bool, tuple[ServiceName, ...]]
+
+
+class _CachedResult(NamedTuple):
+    version: str
+    elements: tuple[RequiredBIElement, ...]
+    lookups: tuple[_StateLookup, ...]
+    state_key: tuple
+    result: NodeResultBundle | None
+    compute_time: float
+
+
+class BIResultCache:
+    """Results of computed branches, reused as long as the states they are based on are unchanged
+
+    A branch is identified by its aggregation, its title and the version of the compiled
+    aggregation, which changes whenever the aggregation is compiled again.  Aggregations without
+    a version are always computed.  The cache is meant to live as long as the process, so the
+    results of one request can be reused by the next ones.  The oldest results are dropped once
+    max_entries results are cached.
+    """
+
+    def __init__(self, max_entries: int = 50000) -> None:
+        self._max_entries = max_entries
+        self._entries: dict[tuple[str, str], _CachedResult] = {}
+        self._hits = 0
+        self._misses = 0
+        self._time_saved = 0.0
+
+    def statistics(self) -> BIResultCacheStatistics:
+        return BIResultCacheStatistics(self._hits, self._misses, self._time_saved)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def compute_branches(
+        self,
+        compiled_aggregation: BICompiledAggregation,
+        branches: list[BICompiledRule],
+        bi_status_fetcher: ABCBIStatusFetcher,
+    ) -> list[NodeResultBundle]:
+        if (version := compiled_aggregation.version) is None:
+            return compiled_aggregation.compute_branches(branches, bi_status_fetcher)
+
+        assumed_state_ids = set(bi_status_fetcher.assumed_states)
+        aggregation_results = []
+        for branch in branches:
+            key = (compiled_aggregation.id, branch.properties.title)
+            cached = self._entries.get(key)
+            if cached is not None and cached.version == version:
+                elements, lookups = cached.elements, cached.lookups
+            else:
+                cached = None
+                elements = tuple(branch.required_elements())
+                lookups = _state_lookups(elements)
+
+            use_assumed = not assumed_state_ids.isdisjoint(elements)
+            state_key = _state_key(lookups, bi_status_fetcher.states)
+            if use_assumed:
+                assumed_states = bi_status_fetcher.assumed_states
+                state_key += (
+                    tuple(assumed_states.get(element) for element in elements),
+                    # The outputs of assumed states are translated
+                    bi_status_fetcher.sites_callback.translate("Assumed to be %s"),
+                )
+
+            if cached is not None and cached.state_key == state_key:
+                self._hits += 1
+                self._time_saved += cached.compute_time
+                # The nested results still refer to the nodes of an earlier, equal branch
+                result = None if cached.result is None else cached.result._replace(instance=branch)
+            else:
+                self._misses += 1
+                start = time.perf_counter()
+                result = branch.compute(
+                    compiled_aggregation.computation_options,
+                    bi_status_fetcher,
+                    use_assumed=use_assumed,
+                )
+                self._store(
+                    key,
+                    _CachedResult(
+                        version, elements, lookups, state_key, result, time.perf_counter() - start
+                    ),
+                )
+
+            if result is not None:
+                aggregation_results.append(result)
+        return aggregation_results
+
+    def _store(self, key: tuple[str, str], cached: _CachedResult) -> None:
+        self._entries.pop(key, None)
+        if len(self._entries) >= self._max_entries:
+            del self._entries[next(iter(self._entries))]
+        self._entries[key] = cached
+
+
+def _state_lookups(elements: tuple[RequiredBIElement, ...]) -> tuple[_StateLookup, ...]:
+    hosts: dict[BIHostSpec, bool] = {}
+    services: dict[BIHostSpec, list[ServiceName]] = {}
+    for element in elements:
+        host_spec = BIHostSpec(element.site_id, element.host_name)
+        host_services = services.setdefault(host_spec, [])
+        if element.service_description is None:
+            hosts[host_spec] = True
+        else:
+            host_services.append(element.service_description)
+    return tuple(
+        (host_spec, hosts.get(host_spec, False), tuple(host_services))
+        for host_spec, host_services in services.items()
+    )
+
+
+def _state_key(
+    lookups: tuple[_StateLookup, ...], states: Mapping[BIHostSpec, BIHostStatusInfoRow]
+) -> tuple:
+    """Everything of the fetched states the computation of a branch is based on"""
+    return tuple(
+        None
+        if (row := states.get(host_spec)) is None
+        else (
+            # All columns of the host but its services, or only the downtime of the host
+            row[:7] if host_required else row.scheduled_downtime_depth,
+            tuple(map(row.services_with_fullstate.get, service_descriptions)),
+        )
+        for host_spec, host_required, service_descriptions in lookups
+    )
+
+
 class BIComputer:
     def __init__(
         self,
         compiled_aggregations: dict[str, BICompiledAggregation],
         bi_status_fetcher: BIStatusFetcher,
+        result_cache: BIResultCache | None = None,
     ) -> None:
         self._compiled_aggregations = compiled_aggregations
         self._bi_status_fetcher = bi_status_fetcher
+        self._result_cache = result_cache
         self._legacy_branch_cache: dict = {}
+        self._logger = logger.getChild("bi.computer")
 
     def compute_aggregation_result(
         self,
@@ -114,10 +273,17 @@ class BIComputer:
     ) -> list[tuple[BICompiledAggregation, list[NodeResultBundle]]]:
         results = []
         for compiled_aggregation, branches in required_aggregations:
-            node_result_bundles = compiled_aggregation.compute_branches(
-                branches,
-                self._bi_status_fetcher,
-            )
+            if self._result_cache is None:
+                node_result_bundles = compiled_aggregation.compute_branches(
+                    branches,
+                    self._bi_status_fetcher,
+                )
+            else:
+                node_result_bundles = self._result_cache.compute_branches(
+                    compiled_aggregation,
+                    branches,
+                    self._bi_status_fetcher,
+                )
 
             # Postprocess results. Custom user plugins may add additional information for each node
             node_result_bundles = list(
@@ -128,6 +294,9 @@ class BIComputer:
             )
 
             results.append((compiled_aggregation, node_result_bundles))
+
+        if self._result_cache is not None:
+            self._logger.debug("Result cache: %s", self._result_cache.statistics())
         return results
 
     def get_filtered_aggregation_branches(
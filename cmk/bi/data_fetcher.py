@@ -6,8 +6,9 @@
 import marshal
 import os
 import time
-from collections.abc import Mapping
+from collections.abc import Iterable, Mapping
 from pathlib import Path
+from typing import NamedTuple
 
 from livestatus import LivestatusColumn, LivestatusOutputFormat, LivestatusResponse, SiteId
 
@@ -301,7 +302,76 @@ class BIStructureFetcher:
 #   +----------------------------------------------------------------------+
 
 
+class BIStatusQuery(NamedTuple):
+    """A query of the status of hosts, it is sent to all its sites at once"""
+
+    sites: list[SiteId]
+    # None: all hosts of the sites, they are filtered afterwards
+    hosts: list[HostName] | None
+
+
+def plan_status_queries(
+    required_hosts: Iterable[BIHostSpec], chunk_size: int, full_fetch_threshold: int
+) -> list[BIStatusQuery]:
+    """Plan the queries fetching the status of the required hosts
+
+    The cmc slows down if the host filter gets too big.  From sites with more than
+    full_fetch_threshold required hosts all hosts are fetched, all other sites are queried for
+    their hosts in chunks of at most chunk_size hosts.  The chunks of different sites are combined
+    into queries of at most chunk_size hosts.
+
+    >>> plan_status_queries(
+    ...     [BIHostSpec(SiteId("a"), HostName(f"h{n}")) for n in range(3)]
+    ...     + [BIHostSpec(SiteId("b"), HostName("h"))]
+    ...     + [BIHostSpec(SiteId("c"), HostName(f"h{n}")) for n in range(5)],
+    ...     chunk_size=2,
+    ...     full_fetch_threshold=4,
+    ... )
+    [BIStatusQuery(sites=['c'], hosts=None), BIStatusQuery(sites=['a'], hosts=['h0', 'h1']), \
+BIStatusQuery(sites=['a', 'b'], hosts=['h2', 'h'])]
+    """
+    hosts_by_site: dict[SiteId, list[HostName]] = {}
+    for site_id, host_name in required_hosts:
+        hosts_by_site.setdefault(site_id, []).append(host_name)
+
+    full_fetch_sites = []
+    chunks: list[tuple[SiteId, list[HostName]]] = []
+    for site_id, host_names in sorted(hosts_by_site.items()):
+        if len(host_names) > full_fetch_threshold:
+            full_fetch_sites.append(site_id)
+            continue
+        host_names.sort()
+        chunks.extend(
+            (site_id, host_names[n : n + chunk_size]) for n in range(0, len(host_names), chunk_size)
+        )
+
+    queries = [BIStatusQuery(full_fetch_sites, None)] if full_fetch_sites else []
+    # First fit decreasing, every site at most once per query
+    filtered_queries: list[BIStatusQuery] = []
+    for site_id, host_names in sorted(chunks, key=lambda chunk: len(chunk[1]), reverse=True):
+        for query in filtered_queries:
+            assert query.hosts is not None
+            if site_id not in query.sites and len(query.hosts) + len(host_names) <= chunk_size:
+                query.sites.append(site_id)
+                query.hosts.extend(host_names)
+                break
+        else:
+            filtered_queries.append(BIStatusQuery([site_id], list(host_names)))
+    return queries + filtered_queries
+
+
 class BIStatusFetcher(ABCBIStatusFetcher):
+    def __init__(
+        self,
+        sites_callback: SitesCallback,
+        *,
+        chunk_size: int = 1000,
+        full_fetch_threshold: int = 5000,
+    ) -> None:
+        super().__init__(sites_callback)
+        self.chunk_size = chunk_size
+        self.full_fetch_threshold = full_fetch_threshold
+
     def set_assumed_states(self, assumed_states: dict) -> None:
         # Streamline format to site, host, service (may be None)
         self.assumed_states = {}
@@ -340,26 +410,43 @@ class BIStatusFetcher(ABCBIStatusFetcher):
             return {}
 
         # Query each site only for hosts that that site provides
-        req_hosts: set[HostName] = set()
-        req_sites: set[SiteId] = set()
-
-        for site, host, _service in required_elements:
-            req_hosts.add(host)
-            req_sites.add(site)
-
-        # TODO: the cmc slows down if the host filter gets too big
-        #       fetch all hosts if the filter exceeds 1000 hosts
-        host_filter = "".join(f"Filter: name = {host}\n" for host in req_hosts)
-        if len(req_hosts) > 1:
-            host_filter += f"Or: {len(req_hosts)}\n"
-
-        query = "GET hosts\nColumns: %s\n" % " ".join(self.get_status_columns()) + host_filter
         return self.create_bi_status_data(
-            self.sites_callback.query(
-                query, list(req_sites), output_format=LivestatusOutputFormat.JSON
+            self._query_hosts(
+                "GET hosts\nColumns: %s\n" % " ".join(self.get_status_columns()),
+                {BIHostSpec(site, host) for site, host, _service in required_elements},
+                LivestatusOutputFormat.JSON,
             )
         )
 
+    def _query_hosts(
+        self,
+        query: str,
+        required_hosts: set[BIHostSpec],
+        output_format: LivestatusOutputFormat = LivestatusOutputFormat.PYTHON,
+    ) -> LivestatusResponse:
+        """The rows of the required hosts, the query is extended by the host filters"""
+        # The queries are sent one after another: each one already reaches all of its sites
+        # in parallel, and the callbacks share a single connection whose site selection is
+        # global state (see cmk.gui.sites.only_sites), so they must not be run in threads.
+        rows = LivestatusResponse([])
+        for status_query in plan_status_queries(
+            required_hosts, self.chunk_size, self.full_fetch_threshold
+        ):
+            host_filter = ""
+            if status_query.hosts is not None:
+                host_filter = "".join(f"Filter: name = {host}\n" for host in status_query.hosts)
+                if len(status_query.hosts) > 1:
+                    host_filter += f"Or: {len(status_query.hosts)}\n"
+            # Hosts of the same name may exist on several sites
+            rows.extend(
+                row
+                for row in self.sites_callback.query(
+                    query + host_filter, status_query.sites, output_format=output_format
+                )
+                if BIHostSpec(row[0], row[1]) in required_hosts
+            )
+        return rows
+
     # This variant of the function is configured not with a list of
     # hosts but with a livestatus filter header and a list of columns
     # that need to be fetched in any case
@@ -399,17 +486,9 @@ class BIStatusFetcher(ABCBIStatusFetcher):
             remaining_hosts = missing_hosts
 
         if remaining_hosts:
-            remaining_sites = set()
-            host_filter = ""
-            for site_id, host in remaining_hosts:
-                remaining_sites.add(site_id)
-                host_filter += "Filter: name = %s\n" % host
-            if len(remaining_hosts) > 1:
-                host_filter += "Or: %d\n" % len(remaining_hosts)
             query = "GET hosts%s\n" % ("bygroup" if bygroup else "")
             query += "Columns: " + (" ".join(columns)) + "\n"
-            query += host_filter
-            data.extend(self.sites_callback.query(query, list(remaining_sites)))
+            data.extend(self._query_hosts(query, remaining_hosts))
 
         return self.create_bi_status_data(data, extra_columns=host_columns)
 
@@ -83,8 +83,7 @@ class BISearcher(ABCBISearcher):
         if pattern == "(.*)":
             return hosts, self._host_match_groups(hosts)
 
-        is_regex_match = any(map(lambda x: x in pattern, ["(", ")", "*", "$", "|", "[", "]"]))
-        if not is_regex_match:
+        if not _is_regex_pattern(pattern):
             host = self.hosts.get(pattern)
             if host:
                 return [host], {pattern: (pattern,)}
@@ -214,3 +213,90 @@ class BISearcher(ABCBISearcher):
             if matches_labels(service_data.labels, required_label_groups):
                 matched_services.append(service)
         return matched_services
+
+
+def _is_regex_pattern(pattern: str) -> bool:
+    return any(map(lambda x: x in pattern, ["(", ")", "*", "$", "|", "[", "]"]))
+
+
+class _RecordingHosts(dict[str, BIHostData]):
+    """The hosts of a searcher, recording which of them are looked up by name"""
+
+    def __init__(self, hosts: Mapping[str, BIHostData], recorded: set[str]) -> None:
+        super().__init__(hosts)
+        self._recorded = recorded
+
+    def __contains__(self, key: object) -> bool:
+        if isinstance(key, str):
+            self._recorded.add(key)
+        return super().__contains__(key)
+
+    def __getitem__(self, key: str) -> BIHostData:
+        self._recorded.add(key)
+        return super().__getitem__(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        self._recorded.add(key)
+        return super().get(key, default)
+
+
+class BIRecordingSearcher(BISearcher):
+    """A searcher which records what a compilation depends on
+
+    These are the hosts matched by any search or host name pattern, the hosts looked up by name,
+    the conditions of the host searches and the host name patterns searched for. Whether a host
+    matches only depends on the data of this host. So a compilation gives the same result as long
+    as none of the recorded hosts changes and no changed host matches a recorded search.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.recorded_hosts: set[str] = set()
+        self.recorded_searches: dict[str, dict] = {}
+        self.recorded_patterns: set[str] = set()
+        self._choosing_hosts = False
+
+    def set_hosts(self, hosts: dict[str, BIHostData]) -> None:
+        super().set_hosts(_RecordingHosts(hosts, self.recorded_hosts))
+
+    def reset_recording(self) -> None:
+        self.recorded_hosts.clear()
+        self.recorded_searches.clear()
+        self.recorded_patterns.clear()
+
+    def search_hosts(self, conditions: dict) -> list[BIHostSearchMatch]:
+        self.recorded_searches.setdefault(repr(conditions), conditions)
+        return super().search_hosts(conditions)
+
+    def filter_host_choice(
+        self,
+        hosts: list[BIHostData],
+        condition: dict,
+    ) -> tuple[list[BIHostData], dict]:
+        # The chosen hosts are filtered further, only the remaining ones are recorded.
+        self._choosing_hosts = True
+        try:
+            return super().filter_host_choice(hosts, condition)
+        finally:
+            self._choosing_hosts = False
+
+    def get_host_name_matches(
+        self,
+        hosts: list[BIHostData],
+        pattern: str,
+    ) -> tuple[list[BIHostData], dict]:
+        matched_hosts, matched_re_groups = super().get_host_name_matches(hosts, pattern)
+        if not self._choosing_hosts:
+            self.recorded_hosts.update(host.name for host in matched_hosts)
+            if _is_regex_pattern(pattern):
+                # Other patterns are looked up by name
+                self.recorded_patterns.add(pattern)
+        return matched_hosts, matched_re_groups
+
+    def filter_host_labels(
+        self, hosts: Iterable[BIHostData], required_label_groups: LabelGroups
+    ) -> Iterable[BIHostData]:
+        # This is the last filter of every host search
+        matched_hosts = list(super().filter_host_labels(hosts, required_label_groups))
+        self.recorded_hosts.update(host.name for host in matched_hosts)
+        return matched_hosts
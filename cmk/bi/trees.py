@@ -586,6 +586,8 @@ class BICompiledAggregation:
     ):
         self.id = aggregation_id
         self.frozen_info: FrozenBIInfo | None = None
+        # Identifies the compiled data this aggregation has been loaded from, see BIResultCache
+        self.version: str | None = None
         self.branches = branches
         self.computation_options = computation_options
         self.aggregation_visualization = aggregation_visualization
@@ -13,7 +13,7 @@ from ._plugin import (
     ServiceConfigurer,
     ServiceID,
 )
-from ._timing import make_timing_results
+from ._timing import make_timing_results, update_phase_histograms
 
 __all__ = [
     "AggregatedResult",
@@ -27,4 +27,5 @@ __all__ = [
     "ServiceConfigurer",
     "merge_enforced_services",
     "ServiceID",
+    "update_phase_histograms",
 ]
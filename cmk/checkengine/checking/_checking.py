@@ -10,6 +10,7 @@ from typing import NamedTuple
 
 import cmk.utils.paths
 from cmk.utils.agentdatatype import AgentRawData
+from cmk.utils.cpu_tracking import phase_timer
 from cmk.utils.everythingtype import EVERYTHING
 from cmk.utils.hostaddress import HostName
 from cmk.utils.log import console
@@ -70,39 +71,44 @@ def execute_checkmk_checks(
     exit_spec: ExitSpec,
     section_error_handling: Callable[[SectionName, Sequence[object]], str],
 ) -> Sequence[ActiveCheckResult]:
-    host_sections = parser(fetched)
-    host_sections_by_host = group_by_host(
-        ((HostKey(s.hostname, s.source_type), r.ok) for s, r in host_sections if r.is_ok()),
-        console.debug,
-    )
-    store_piggybacked_sections(host_sections_by_host, cmk.utils.paths.omd_root)
+    with phase_timer.phase("parsing"):
+        host_sections = parser(fetched)
+        host_sections_by_host = group_by_host(
+            ((HostKey(s.hostname, s.source_type), r.ok) for s, r in host_sections if r.is_ok()),
+            console.debug,
+        )
+    with phase_timer.phase("piggyback"):
+        store_piggybacked_sections(host_sections_by_host, cmk.utils.paths.omd_root)
     providers = make_providers(
         host_sections_by_host,
         section_plugins,
         error_handling=section_error_handling,
     )
-    service_results = list(
-        check_host_services(
-            hostname,
-            providers=providers,
-            services=services,
-            check_plugins=check_plugins,
-            run_plugin_names=run_plugin_names,
-            get_check_period=get_check_period,
+    with phase_timer.phase("checking"):
+        service_results = list(
+            check_host_services(
+                hostname,
+                providers=providers,
+                services=services,
+                check_plugins=check_plugins,
+                run_plugin_names=run_plugin_names,
+                get_check_period=get_check_period,
+            )
+        )
+    with phase_timer.phase("submission"):
+        submitter.submit(
+            Submittee(s.service.description, s.result, s.cache_info) for s in service_results
         )
-    )
-    submitter.submit(
-        Submittee(s.service.description, s.result, s.cache_info) for s in service_results
-    )
 
     if run_plugin_names is EVERYTHING:
-        _do_inventory_actions_during_checking_for(
-            hostname,
-            inventory_parameters=inventory_parameters,
-            inventory_plugins=inventory_plugins,
-            params=params,
-            providers=providers,
-        )
+        with phase_timer.phase("inventory"):
+            _do_inventory_actions_during_checking_for(
+                hostname,
+                inventory_parameters=inventory_parameters,
+                inventory_plugins=inventory_plugins,
+                params=params,
+                providers=providers,
+            )
     timed_results = [
         *summarizer(host_sections),
         *check_parsing_errors(
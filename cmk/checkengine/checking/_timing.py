@@ -3,23 +3,47 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import bisect
+import json
 from collections import defaultdict
-from collections.abc import Iterable
+from collections.abc import Iterable, Mapping
 from contextlib import suppress
-from typing import DefaultDict
+from pathlib import Path
+from typing import DefaultDict, Final
+
+from cmk.ccc import store
 
 from cmk.utils.cpu_tracking import Snapshot
 
 from cmk.checkengine.checkresults import ActiveCheckResult
 from cmk.checkengine.fetcher import FetcherType, SourceInfo
 
-__all__ = ["make_timing_results"]
+__all__ = ["make_timing_results", "update_phase_histograms"]
+
+# Upper bounds of the buckets of the phase histograms in seconds.  A last,
+# unbounded bucket takes the rest.
+PHASE_BUCKETS: Final = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
 
 
 def make_timing_results(
     total_times: Snapshot,
     fetched: Iterable[tuple[SourceInfo, Snapshot]],
     *,
+    phase_times: Mapping[str, float],
     perfdata_with_times: bool,
 ) -> ActiveCheckResult:
     summary: DefaultDict[str, Snapshot] = defaultdict(Snapshot.null)
@@ -53,4 +77,37 @@ def make_timing_results(
     for phase, duration in summary.items():
         perfdata.append(f"cmk_time_{phase}={duration.idle:.3f}")
 
+    # Only the phases of the pipeline, the times per section and per plugin
+    # would blow up the performance data.
+    for phase, seconds in phase_times.items():
+        if ":" not in phase:
+            perfdata.append(f"cmk_time_phase_{phase}={seconds:.3f}")
+
     return ActiveCheckResult(0, infotext, (), perfdata)
+
+
+def update_phase_histograms(path: Path, phase_times: Mapping[str, float]) -> None:
+    """Add the phase times of one run to the histograms stored at `path`
+
+    For every phase, the file holds the number of runs, the total time and
+    the number of runs per bucket of `PHASE_BUCKETS`, ready to be exported
+    as histogram.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with store.locked(path):
+        try:
+            stored = json.loads(path.read_text() or "{}")
+        except ValueError:
+            stored = {}
+        if stored.get("buckets") != list(PHASE_BUCKETS):
+            stored = {"buckets": list(PHASE_BUCKETS), "phases": {}}
+
+        for phase, seconds in phase_times.items():
+            histogram = stored["phases"].setdefault(
+                phase, {"count": 0, "sum": 0.0, "buckets": [0] * (len(PHASE_BUCKETS) + 1)}
+            )
+            histogram["count"] += 1
+            histogram["sum"] += seconds
+            histogram["buckets"][bisect.bisect_left(PHASE_BUCKETS, seconds)] += 1
+
+        store.save_text_to_file(path, json.dumps(stored))
@@ -8,7 +8,7 @@ from __future__ import annotations
 import abc
 import logging
 import time
-from collections.abc import Iterator, Mapping, MutableMapping, Sequence
+from collections.abc import Buffer, Iterable, Iterator, MutableMapping, Sequence
 from typing import Final, final, NamedTuple
 
 import cmk.ccc.debug
@@ -523,22 +523,57 @@ class AgentParser(Parser[AgentRawData, AgentRawDataSection]):
         *,
         selection: SectionNameCollection,
     ) -> HostSections[AgentRawDataSection]:
+        return self.parse_stream((raw_data,), selection=selection)
+
+    def parse_stream(
+        self,
+        chunks: Iterable[Buffer],
+        *,
+        selection: SectionNameCollection,
+    ) -> HostSections[AgentRawDataSection]:
+        """Parse the agent output while it arrives in chunks.
+
+        The chunks may be split anywhere, lines are reassembled here.
+        Completed host sections are decoded right away and their raw lines
+        dropped, so that only the section currently being received is kept
+        in its raw form.
+
+        """
         now = int(time.time())
 
-        raw_sections, piggyback_sections = self._parse_host_section(raw_data)
-        section_info = {
-            header.name: header
-            for header, _ in raw_sections
-            if selection is NO_SELECTION or header.name in selection
-        }
+        section_info: dict[SectionName, SectionMarker] = {}
+        sections: MutableSectionMap[list[AgentRawDataSectionElem]] = {}
 
-        def decode_sections(
-            sections: ImmutableSection,
-        ) -> MutableSectionMap[list[AgentRawDataSectionElem]]:
-            out: MutableSectionMap[list[AgentRawDataSectionElem]] = {}
-            for header, content in sections:
-                out.setdefault(header.name, []).extend(header.parse_line(line) for line in content)
-            return out
+        def decode_sections(raw_sections: ImmutableSection) -> None:
+            for header, content in raw_sections:
+                if not (selection is NO_SELECTION or header.name in selection):
+                    continue
+                section_info[header.name] = header
+                sections.setdefault(header.name, []).extend(
+                    header.parse_line(line) for line in content
+                )
+
+        parser: ParserState = NOOPParser(
+            self.hostname,
+            [],
+            {},
+            translation=self.translation,
+            encoding_fallback=self.encoding_fallback,
+            logger=self._logger,
+        )
+        tail = b""
+        for chunk in chunks:
+            lines = (tail + chunk if tail else bytes(chunk)).split(b"\n")
+            tail = lines.pop()
+            for line in lines:
+                parser = parser(line.rstrip(b"\r"))
+            # The last section may continue in the next chunk.
+            decode_sections(parser.sections[:-1])
+            del parser.sections[:-1]
+
+        parser = parser(tail.rstrip(b"\r"))
+        decode_sections(parser.sections)
+        piggyback_sections = parser.piggyback_sections
 
         def flatten_piggyback_section(
             sections: ImmutableSection,
@@ -567,11 +602,6 @@ class AgentParser(Parser[AgentRawData, AgentRawDataSection]):
                     ).encode(header.encoding)
                 yield from (bytes(line) for line in content)
 
-        sections = {
-            name: content
-            for name, content in decode_sections(raw_sections).items()
-            if selection is NO_SELECTION or name in selection
-        }
         piggybacked_raw_data = {
             header.hostname: list(
                 flatten_piggyback_section(
@@ -609,21 +639,3 @@ class AgentParser(Parser[AgentRawData, AgentRawDataSection]):
             cache_info=cache_info,
             piggybacked_raw_data=piggybacked_raw_data,
         )
-
-    def _parse_host_section(
-        self,
-        raw_data: AgentRawData,
-    ) -> tuple[ImmutableSection, Mapping[PiggybackMarker, ImmutableSection]]:
-        """Split agent output in chunks, splits lines by whitespaces."""
-        parser: ParserState = NOOPParser(
-            self.hostname,
-            [],
-            {},
-            translation=self.translation,
-            encoding_fallback=self.encoding_fallback,
-            logger=self._logger,
-        )
-        for line in raw_data.split(b"\n"):
-            parser = parser(line.rstrip(b"\r"))
-
-        return parser.sections, parser.piggyback_sections
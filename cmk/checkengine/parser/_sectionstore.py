@@ -3,10 +3,33 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+"""Persisted sections of a host
+
+The sections are stored in a single file per host:
+
+    header | section | section | ... | index
+
+The fixed size header points to the index, which maps every section name to
+the position of its pickled content and to its `created_at` and `valid_until`
+timestamps.  Readers map the file into memory, check the validity of the
+sections from the index and only unpickle the sections they need.
+
+Writers hold the lock of the file.  New sections and a new index are appended
+to the file and the header is updated last, so that the data a reader already
+found in the index is never overwritten.  The file is compacted, that is
+rewritten and atomically replaced, as soon as the superseded sections take up
+more space than the current ones.
+"""
+
 import logging
-from collections.abc import Callable
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+from collections.abc import Callable, Container, Iterable, Mapping
 from pathlib import Path
-from typing import Final, Generic, TypeVar
+from typing import Final, Generic, NamedTuple, TypeVar
 
 import cmk.ccc.store as _store
 
@@ -16,6 +39,78 @@ __all__ = ["SectionStore"]
 
 _T = TypeVar("_T")
 
+_MAGIC: Final = b"CMKSECT1"
+# magic, offset of the index, size of the index
+_HEADER: Final = struct.Struct("<8sQQ")
+# created_at, valid_until, offset of the content, size of the content, size of the name
+_ENTRY: Final = struct.Struct("<qqQQH")
+# Do not bother compacting files with less garbage.
+_MIN_GARBAGE: Final = 4096
+
+
+class _Entry(NamedTuple):
+    created_at: int
+    valid_until: int
+    offset: int
+    size: int
+
+
+def _pack_index(entries: Mapping[SectionName, _Entry]) -> bytes:
+    chunks = []
+    for section_name, entry in entries.items():
+        name = str(section_name).encode("utf-8")
+        chunks.append(_ENTRY.pack(*entry, len(name)))
+        chunks.append(name)
+    return b"".join(chunks)
+
+
+def _unpack_index(data: mmap.mmap | bytes, offset: int, size: int) -> dict[SectionName, _Entry]:
+    entries = {}
+    end = offset + size
+    while offset < end:
+        created_at, valid_until, section_offset, section_size, name_size = _ENTRY.unpack_from(
+            data, offset
+        )
+        offset += _ENTRY.size
+        name = SectionName(data[offset : offset + name_size].decode("utf-8"))
+        offset += name_size
+        entries[name] = _Entry(created_at, valid_until, section_offset, section_size)
+    return entries
+
+
+def _serialize(sections: Mapping[SectionName, tuple[int, int, bytes]]) -> bytes:
+    entries = {}
+    offset = _HEADER.size
+    for section_name, (created_at, valid_until, raw) in sections.items():
+        entries[section_name] = _Entry(created_at, valid_until, offset, len(raw))
+        offset += len(raw)
+    index = _pack_index(entries)
+    return b"".join(
+        (
+            _HEADER.pack(_MAGIC, offset, len(index)),
+            *(raw for _created_at, _valid_until, raw in sections.values()),
+            index,
+        )
+    )
+
+
+class _Snapshot(NamedTuple):
+    """The state of the store as seen by a reader"""
+
+    entries: Mapping[SectionName, _Entry]
+    data: mmap.mmap | bytes
+    size: int
+    # Files in the format of previous versions have to be rewritten.
+    appendable: bool
+
+    def raw(self, section_name: SectionName) -> bytes:
+        entry = self.entries[section_name]
+        return self.data[entry.offset : entry.offset + entry.size]
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
 
 class SectionStore(Generic[_T]):
     def __init__(
@@ -32,21 +127,206 @@ class SectionStore(Generic[_T]):
         return f"{type(self).__name__}({self.path!r}, logger={self._logger!r})"
 
     def store(self, sections: MutableSectionMap[tuple[int, int, _T]]) -> None:
+        """Replace all persisted sections"""
         if not sections:
             self._logger.debug("No persisted sections")
             self.path.unlink(missing_ok=True)
             return
 
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        _store.save_object_to_pickle_file(
-            self.path,
-            {str(k): v for k, v in sections.items()},
-        )
+        with _store.locked(self.path):
+            self._rewrite(
+                {
+                    section_name: (created_at, valid_until, pickle.dumps(content))
+                    for section_name, (created_at, valid_until, content) in sections.items()
+                }
+            )
         self._logger.debug("Stored persisted sections: %s", ", ".join(str(s) for s in sections))
 
-    def load(self) -> MutableSectionMap[tuple[int, int, _T]]:
+    def amend(
+        self,
+        sections: SectionMap[tuple[int, int, _T]],
+        *,
+        outdated: Callable[[int], bool] | None = None,
+    ) -> MutableSectionMap[tuple[int, int]]:
+        """Add or replace the given sections, keep the others unless they are outdated
+
+        Only the given sections are written.  The outdated sections are determined
+        by their `valid_until` while holding the lock.  Return the new index.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with _store.locked(self.path):
+            index = self._amend(sections, outdated)
+        self._logger.debug("Stored persisted sections: %s", ", ".join(str(s) for s in sections))
+        return index
+
+    def load_index(self) -> MutableSectionMap[tuple[int, int]]:
+        """Return `created_at` and `valid_until` of the persisted sections
+
+        The sections themselves are not loaded.
+        """
+        snapshot = self._read()
+        if snapshot is None:
+            return {}
+        try:
+            return {
+                section_name: (entry.created_at, entry.valid_until)
+                for section_name, entry in snapshot.entries.items()
+            }
+        finally:
+            snapshot.close()
+
+    def load(
+        self, selection: Container[SectionName] | None = None
+    ) -> MutableSectionMap[tuple[int, int, _T]]:
+        """Load the persisted sections, or only the selected ones"""
+        snapshot = self._read()
+        if snapshot is None:
+            return {}
+        try:
+            return {
+                section_name: (
+                    entry.created_at,
+                    entry.valid_until,
+                    pickle.loads(snapshot.raw(section_name)),  # nosec B301 # BNS:9a7128
+                )
+                for section_name, entry in snapshot.entries.items()
+                if selection is None or section_name in selection
+            }
+        finally:
+            snapshot.close()
+
+    def _read(self) -> _Snapshot | None:
+        try:
+            with self.path.open("rb") as f:
+                # Read the header before mapping the file: Everything it points to
+                # has been written before and is covered by the mapping.
+                header = f.read(_HEADER.size)
+                if not header:
+                    # Locking creates empty files.
+                    return None
+                if len(header) < _HEADER.size or not header.startswith(_MAGIC):
+                    return self._read_legacy()
+                _magic, index_offset, index_size = _HEADER.unpack(header)
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+
+        try:
+            entries = _unpack_index(data, index_offset, index_size)
+        except (struct.error, UnicodeDecodeError):
+            data.close()
+            self._logger.debug("Ignoring corrupt persisted sections: %s", self.path)
+            return None
+        return _Snapshot(entries, data, len(data), appendable=True)
+
+    def _read_legacy(self) -> _Snapshot | None:
+        """Read a pickled dict as written by previous versions"""
         raw_sections_data = _store.load_object_from_pickle_file(self.path, default={})
-        return {SectionName(k): v for k, v in raw_sections_data.items()}
+        if not raw_sections_data:
+            return None
+        data = _serialize(
+            {
+                SectionName(k): (created_at, valid_until, pickle.dumps(content))
+                for k, (created_at, valid_until, content) in raw_sections_data.items()
+            }
+        )
+        _magic, index_offset, index_size = _HEADER.unpack_from(data)
+        return _Snapshot(
+            _unpack_index(data, index_offset, index_size), data, len(data), appendable=False
+        )
+
+    def _amend(
+        self,
+        sections: SectionMap[tuple[int, int, _T]],
+        outdated: Callable[[int], bool] | None,
+    ) -> MutableSectionMap[tuple[int, int]]:
+        def keep(valid_until: int) -> bool:
+            return outdated is None or not outdated(valid_until)
+
+        new = {
+            section_name: (created_at, valid_until, pickle.dumps(content))
+            for section_name, (created_at, valid_until, content) in sections.items()
+            if keep(valid_until)
+        }
+        if (snapshot := self._read()) is None:
+            snapshot = _Snapshot({}, b"", 0, appendable=False)
+
+        try:
+            kept = {
+                section_name: entry
+                for section_name, entry in snapshot.entries.items()
+                if section_name not in sections and keep(entry.valid_until)
+            }
+            live = sum(entry.size for entry in kept.values()) + sum(
+                len(raw) for *_rest, raw in new.values()
+            )
+            # Superseded sections and indices
+            garbage = snapshot.size - _HEADER.size - sum(entry.size for entry in kept.values())
+            if not kept and not new:
+                self.path.unlink(missing_ok=True)
+            elif not snapshot.appendable or garbage > max(live, _MIN_GARBAGE):
+                self._rewrite(
+                    {
+                        **{
+                            section_name: (
+                                entry.created_at,
+                                entry.valid_until,
+                                snapshot.raw(section_name),
+                            )
+                            for section_name, entry in kept.items()
+                        },
+                        **new,
+                    }
+                )
+            else:
+                self._append(dict(kept), new)
+        finally:
+            snapshot.close()
+
+        return {
+            **{
+                section_name: (entry.created_at, entry.valid_until)
+                for section_name, entry in kept.items()
+            },
+            **{
+                section_name: (created_at, valid_until)
+                for section_name, (created_at, valid_until, _raw) in new.items()
+            },
+        }
+
+    def _append(
+        self,
+        entries: dict[SectionName, _Entry],
+        sections: Mapping[SectionName, tuple[int, int, bytes]],
+    ) -> None:
+        with self.path.open("r+b") as f:
+            offset = f.seek(0, os.SEEK_END)
+            for section_name, (created_at, valid_until, raw) in sections.items():
+                entries[section_name] = _Entry(created_at, valid_until, offset, len(raw))
+                offset += len(raw)
+            index = _pack_index(entries)
+            f.write(b"".join((*(raw for *_rest, raw in sections.values()), index)))
+            f.flush()
+            # Publish the new index only after it has been completely written.
+            f.seek(0)
+            f.write(_HEADER.pack(_MAGIC, offset, len(index)))
+
+    def _rewrite(self, sections: Mapping[SectionName, tuple[int, int, bytes]]) -> None:
+        with tempfile.NamedTemporaryFile(
+            "wb",
+            dir=self.path.parent,
+            prefix=f".{self.path.name}.new",
+            delete=False,
+        ) as tmp:
+            tmp_path = Path(tmp.name)
+            try:
+                tmp_path.chmod(0o660)
+                tmp.write(_serialize(sections))
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
+        tmp_path.rename(self.path)
 
     def update(
         self,
@@ -79,29 +359,26 @@ class SectionStore(Generic[_T]):
         now: int,
         keep_outdated: bool,
     ) -> MutableSectionMap[tuple[int, int, _T]]:
-        # TODO: This is not race condition free when modifying the data. Either remove
-        # the possible write here and simply ignore the outdated sections or lock when
-        # reading and unlock after writing
-        persisted_sections = self.load()
-
         new_sections = {
             section_name: persist_info + (section_content,)
             for section_name, section_content in sections.items()
             if (persist_info := lookup_persist(section_name)) is not None
         }
-        store_sections = bool(new_sections)
-        persisted_sections.update(new_sections)
-
-        if not keep_outdated:
-            for section_name in tuple(persisted_sections):
-                (_created_at, valid_until, _section_content) = persisted_sections[section_name]
-                if section_outdated(valid_until, now):
-                    store_sections = True
-                    del persisted_sections[section_name]
-
-        if store_sections:
-            self.store(persisted_sections)
-        return persisted_sections
+
+        def outdated(valid_until: int) -> bool:
+            return section_outdated(valid_until, now)
+
+        persisted_index = self.load_index()
+        if new_sections or (
+            not keep_outdated
+            and any(outdated(valid_until) for _created_at, valid_until in persisted_index.values())
+        ):
+            persisted_index = self.amend(new_sections, outdated=None if keep_outdated else outdated)
+
+        # Only load what is not superseded by the live data.
+        return self.load(
+            {section_name for section_name in persisted_index if section_name not in sections}
+        )
 
     def _add_persisted_sections(
         self,
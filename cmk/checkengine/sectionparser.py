@@ -13,6 +13,7 @@ from typing import Any, Final, Generic, NamedTuple, Self, TypeVar
 
 from cmk.ccc import debug
 
+from cmk.utils.cpu_tracking import phase_timer
 from cmk.utils.hostaddress import HostName
 from cmk.utils.sectionname import SectionMap, SectionName
 from cmk.utils.validatedstr import ValidatedString
@@ -118,7 +119,8 @@ class SectionsParser(Generic[_TSeq]):
             return None
 
         try:
-            return parse_function(list(raw_data))
+            with phase_timer.phase(f"section:{section_name}"):
+                return parse_function(list(raw_data))
         except Exception:
             if debug.enabled():
                 raise
@@ -337,6 +337,9 @@ class ConfigFromWATO(TypedDict):
     rules: Collection[Rule]
     sqlite_housekeeping_interval: int
     sqlite_freelist_size: int
+    sqlite_batch_size: int
+    sqlite_batch_delay: float
+    sqlite_durability: Literal["batched", "immediate"]
     snmp_credentials: Collection[SNMPCredential]
     socket_queue_len: int
     statistics_interval: int
@@ -56,6 +56,9 @@ def default_config() -> ConfigFromWATO:
         housekeeping_interval=60,
         sqlite_housekeeping_interval=3600,  # seconds ValueSpec Age
         sqlite_freelist_size=50 * 1024 * 1024,  # bytes ValueSpec FIlesize
+        sqlite_batch_size=1000,
+        sqlite_batch_delay=0.5,  # seconds
+        sqlite_durability="batched",
         statistics_interval=5,
         history_lifetime=365,  # days
         history_rotation="daily",
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+from collections.abc import Iterable, Iterator
+
+from .event import Event
+
+_Key = tuple[str | None, str, str]
+
+
+def _key(event: Event) -> _Key:
+    return event["rule_id"], event["host"], event["application"]
+
+
+class EventStore:
+    """The open events, indexed by event id, by rule id and by (rule id, host, application)
+
+    All indexes keep the events in the order they have been added, so the first
+    event of an index is the oldest one.  Events are mutable dicts: whoever
+    changes the host or the application of a stored event has to call `reindex`.
+    The views returned by `of_rule` and `of_key` must not be iterated while
+    events are added or removed.
+    """
+
+    def __init__(self, events: Iterable[Event] = ()) -> None:
+        self._by_id: dict[int, Event] = {}
+        self._by_rule: dict[str | None, dict[int, Event]] = {}
+        self._by_key: dict[_Key, dict[int, Event]] = {}
+        # The key an event is indexed by, it might have been changed in the event since.
+        self._keys: dict[int, _Key] = {}
+        for event in events:
+            self.add(event)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Event]:
+        return iter(self._by_id.values())
+
+    def to_list(self) -> list[Event]:
+        return list(self._by_id.values())
+
+    def get(self, eid: int) -> Event | None:
+        return self._by_id.get(eid)
+
+    def oldest(self) -> Event | None:
+        return next(iter(self._by_id.values()), None)
+
+    def of_rule(self, rule_id: str | None) -> Iterable[Event]:
+        return self._by_rule.get(rule_id, {}).values()
+
+    def of_key(self, rule_id: str | None, host: str, application: str) -> Iterable[Event]:
+        return self._by_key.get((rule_id, host, application), {}).values()
+
+    def add(self, event: Event) -> None:
+        eid = event["id"]
+        self._by_id[eid] = event
+        self._by_rule.setdefault(event["rule_id"], {})[eid] = event
+        self._keys[eid] = key = _key(event)
+        self._by_key.setdefault(key, {})[eid] = event
+
+    def remove(self, event: Event) -> bool:
+        """Remove the event, returns False if it is not stored"""
+        eid = event.get("id")
+        if eid is None or self._by_id.get(eid) is not event:
+            return False
+        del self._by_id[eid]
+        _discard(self._by_rule, event["rule_id"], eid)
+        _discard(self._by_key, self._keys.pop(eid), eid)
+        return True
+
+    def reindex(self, event: Event) -> None:
+        """Index the event by its current host and application"""
+        eid = event["id"]
+        if self._by_id.get(eid) is not event or (key := _key(event)) == self._keys[eid]:
+            return
+        _discard(self._by_key, self._keys[eid], eid)
+        self._keys[eid] = key
+        events = self._by_key.setdefault(key, {})
+        if events and next(reversed(events)) > eid:
+            # Keep the events ordered by age, as if it had been indexed like this from the start.
+            self._by_key[key] = dict(sorted([*events.items(), (eid, event)]))
+        else:
+            events[eid] = event
+
+
+def _discard[K](index: dict[K, dict[int, Event]], key: K, eid: int) -> None:
+    events = index[key]
+    del events[eid]
+    if not events:
+        del index[key]
@@ -51,6 +51,14 @@ class History(ABC):
     @abstractmethod
     def close(self) -> None: ...
 
+    def queue_depth(self) -> int:
+        """The number of added entries that have not been written yet"""
+        return 0
+
+    def flush_latency(self) -> float:
+        """The time in seconds the last write of queued entries took"""
+        return 0.0
+
 
 class TimedHistory(History):
     """Decorate History methods with timing information."""
@@ -89,6 +97,12 @@ class TimedHistory(History):
         with self._timing("close"):
             return self._history.close()
 
+    def queue_depth(self) -> int:
+        return self._history.queue_depth()
+
+    def flush_latency(self) -> float:
+        return self._history.flush_latency()
+
 
 def _log_event(
     config: Config, logger: Logger, event: Event, what: HistoryWhat, who: str, addinfo: str
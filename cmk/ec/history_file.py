@@ -3,15 +3,18 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import bisect
 import itertools
-import shlex
-import subprocess
+import mmap
+import os
+import re
 import threading
 import time
-from collections.abc import Callable, Iterable, Sequence
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
 from logging import Logger
 from pathlib import Path
-from typing import Any
+from typing import Any, Final
 
 from cmk.utils.log import VERBOSE
 from cmk.utils.render import date_and_time
@@ -82,7 +85,8 @@ class FileHistory(History):
         limit = query.limit
         self._logger.debug("Limit: %r", limit)
 
-        grep_pipeline = _grep_pipeline(filters)
+        line_filter = _line_filter(filters)
+        history_time_range = _history_time_range(filters)
 
         time_filters = [
             (f.operator_name, f.argument) for f in filters if f.column_name.split("_")[-1] == "time"
@@ -107,18 +111,23 @@ class FileHistory(History):
         # this # will lead into some lines of a single file to be limited in
         # wrong order. But this should be better than before.
         history_entries: list[Any] = []
-        for path in sorted(self._settings.paths.history_dir.value.glob("*.log"), reverse=True):
+        paths = sorted(self._settings.paths.history_dir.value.glob("*.log"), reverse=True)
+        _forget_time_indexes(paths)
+        for path in paths:
             if limit is not None and limit <= 0:
                 self._logger.debug("query limit reached")
                 break
             if not _intersects(time_range, _get_logfile_timespan(path)):
                 self._logger.debug("skipping history file %s because of time filters", path)
                 continue
-            tac = f"nl -b a {shlex.quote(str(path))} | tac"  # Process younger lines first
-            cmd = " | ".join([tac] + grep_pipeline)
-            self._logger.debug("preprocessing history file with command [%s]", cmd)
             new_entries = parse_history_file(
-                self._history_columns, path, query.filter_row, cmd, limit, self._logger
+                self._history_columns,
+                path,
+                query.filter_row,
+                line_filter=line_filter,
+                time_range=history_time_range,
+                limit=limit,
+                logger=self._logger,
             )
             history_entries += new_entries
             if limit is not None:
@@ -173,42 +182,59 @@ _GREPABLE_COLUMNS = {
 }
 
 
-def _grep_pipeline(filters: Iterable[QueryFilter]) -> list[str]:
+def _line_filter(filters: Iterable[QueryFilter]) -> Callable[[bytes], object]:
     """
-    Optimization: use grep in order to reduce amount of read lines based on some frequently used
-    filters. It's OK if the filters don't match 100% accurately on the right lines. If in doubt, you
-    can output more lines than necessary. This is only a kind of prefiltering.
+    Optimization: skip lines before decoding and parsing them, based on some frequently used
+    filters. It's OK if a line passes although none of its columns matches. If in doubt, let more
+    lines pass than necessary. This is only a kind of prefiltering.
 
-    >>> _grep_pipeline([])
-    []
+    >>> bool(_line_filter([])(b"1666942292.29\tNEW"))
+    True
 
-    >>> _grep_pipeline([QueryFilter("event_core_host", '=', lambda x: True, '|| ping')])
-    ["grep -F -e '|| ping'"]
+    >>> line_filter = _line_filter([QueryFilter("event_host", "=~", lambda x: True, "Heute")])
+    >>> bool(line_filter(b"1666942292.29\tNEW\t\t\t5\theute"))
+    True
+    >>> bool(line_filter(b"1666942292.29\tNEW"))
+    False
 
     """
-    return [
-        command
+    # A compiled pattern searches much faster than a Python function could, it is called for
+    # every line.  Case insensitive byte patterns only know about ASCII, so other case
+    # insensitive needles can't prefilter.
+    searches = [
+        re.compile(re.escape(str(f.argument).encode("utf-8"))).search
+        for f in filters
+        if f.column_name in _GREPABLE_COLUMNS and f.operator_name == "="
+    ] + [
+        re.compile(re.escape(needle.encode("ascii")), re.IGNORECASE).search
         for f in filters
         if f.column_name in _GREPABLE_COLUMNS
-        for command in [_grep_command(f.operator_name, str(f.argument))]
-        if command is not None
+        and f.operator_name == "=~"
+        and (needle := str(f.argument)).isascii()
     ]
+    if not searches:
+        return bool
+    if len(searches) == 1:
+        return searches[0]
 
+    def line_filter(line: bytes) -> bool:
+        return all(search(line) for search in searches)
 
-def _grep_command(operator_name: OperatorName, argument: str) -> str | None:
-    if operator_name == "=":
-        return f"grep -F {_grep_pattern(argument)}"
-    if operator_name == "=~":
-        return f"grep -F -i {_grep_pattern(argument)}"
-    if operator_name == "~":
-        return f"grep -E {_grep_pattern(argument)}"
-    if operator_name == "~~":
-        return f"grep -E -i {_grep_pattern(argument)}"
-    return None
+    return line_filter
 
 
-def _grep_pattern(argument: str) -> str:
-    return f"-e {shlex.quote(argument)}"
+def _history_time_range(filters: Iterable[QueryFilter]) -> tuple[float | None, float | None]:
+    """The range the history time of the entries passing the filters lies in"""
+    lower: float | None = None
+    upper: float | None = None
+    for f in filters:
+        if f.column_name != "history_time":
+            continue
+        if f.operator_name in ("=", ">", ">="):
+            lower = f.argument if lower is None else max(lower, f.argument)
+        if f.operator_name in ("=", "<", "<="):
+            upper = f.argument if upper is None else min(upper, f.argument)
+    return lower, upper
 
 
 def _greatest_lower_bound_for_filters(
@@ -260,34 +286,125 @@ def _intersects(
     return (lo2 is None or hi1 is None or lo2 <= hi1) and (lo1 is None or hi2 is None or lo1 <= hi2)
 
 
+# A time index entry is made for the first line after every that many bytes.
+_TIME_INDEX_STEP: Final = 64 * 1024
+# Lines are read backwards in blocks of about that many bytes.
+_READ_BLOCK_SIZE: Final = 256 * 1024
+
+
+@dataclass
+class _TimeIndex:
+    """A sparse index of a history file, which is only appended to
+
+    For a line every _TIME_INDEX_STEP bytes: its offset, line number and history time.
+    """
+
+    inode: int
+    # The indexed part of the file ends with its last complete line.
+    size: int = 0
+    lines: int = 0
+    offsets: list[int] = field(default_factory=list)
+    line_numbers: list[int] = field(default_factory=list)
+    times: list[float] = field(default_factory=list)
+
+    def update(self, data: mmap.mmap) -> None:
+        """Index the lines appended since the last update"""
+        end = data.rfind(b"\n", self.size) + 1
+        position = self.size
+        next_entry = self.offsets[-1] + _TIME_INDEX_STEP if self.offsets else 0
+        while (target := max(position, next_entry)) < end:
+            line_start = data.find(b"\n", target - 1, end) + 1 if target else 0
+            if line_start >= end:
+                break
+            self.lines += data[position:line_start].count(b"\n")
+            position = line_start
+            next_entry = line_start + _TIME_INDEX_STEP
+            try:
+                line_time = float(data[line_start : data.find(b"\t", line_start, end)])
+            except ValueError:
+                continue  # not a valid entry, index the next one
+            self.offsets.append(line_start)
+            self.line_numbers.append(self.lines + 1)
+            self.times.append(line_time)
+        if end > position:
+            self.lines += data[position:end].count(b"\n")
+            self.size = end
+
+    def lines_between(
+        self, data: mmap.mmap, time_range: tuple[float | None, float | None]
+    ) -> Iterator[tuple[int, bytes]]:
+        """The line numbers and lines that may lie in the time range, the youngest first"""
+        lower, upper = time_range
+        end, line_number = self.size, self.lines
+        if upper is not None and (i := bisect.bisect_right(self.times, upper)) < len(self.times):
+            # The lines from there on are younger than the upper bound.
+            end, line_number = self.offsets[i], self.line_numbers[i] - 1
+        start = 0
+        if lower is not None and (i := bisect.bisect_left(self.times, lower)) > 0:
+            # The lines before there are older than the lower bound.
+            start = self.offsets[i - 1]
+        # Read blocks of complete lines, splitting them is much cheaper than searching every line.
+        while end > start:
+            block_start = data.rfind(b"\n", start, max(start, end - _READ_BLOCK_SIZE)) + 1 or start
+            lines = data[block_start : end - 1].split(b"\n")
+            for offset, line in enumerate(reversed(lines)):
+                yield line_number - offset, line
+            end = block_start
+            line_number -= len(lines)
+
+
+_time_indexes: dict[Path, _TimeIndex] = {}
+
+
+def _forget_time_indexes(paths: Iterable[Path]) -> None:
+    for path in _time_indexes.keys() - set(paths):
+        del _time_indexes[path]
+
+
+def _read_lines(
+    path: Path, time_range: tuple[float | None, float | None]
+) -> Iterator[tuple[int, bytes]]:
+    """Read the lines of the history file backwards, skipping those outside the time range"""
+    with path.open("rb") as f:
+        stat = os.fstat(f.fileno())
+        if not stat.st_size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            index = _time_indexes.get(path)
+            if index is None or index.inode != stat.st_ino or index.size > stat.st_size:
+                index = _time_indexes[path] = _TimeIndex(stat.st_ino)
+            index.update(data)
+            yield from index.lines_between(data, time_range)
+
+
 def parse_history_file(
     history_columns: Sequence[tuple[str, Any]],
     path: Path,
     filter_row: Callable[[Sequence[Any]], bool],
-    cmd: str,
+    *,
+    line_filter: Callable[[bytes], object],
+    time_range: tuple[float | None, float | None],
     limit: int | None,
     logger: Logger,
 ) -> list[Any]:
+    """The entries of the history file passing the filters, the youngest first
+
+    At most limit + 1 entries are returned, the extra one tells that the limit is exceeded.
+    """
     entries: list[Any] = []
-    with subprocess.Popen(
-        cmd,
-        shell=True,  # nosec B602 # BNS:67522a
-        close_fds=True,
-        stdout=subprocess.PIPE,
-    ) as grep:
-        if grep.stdout is None:
-            raise Exception("Huh? stdout vanished...")
-
-        for line in grep.stdout:
-            if limit is not None and len(entries) > limit:
-                break
-            try:
-                parts: list[Any] = line.decode("utf-8").rstrip("\n").split("\t")
-                convert_history_line(history_columns, parts)
-                if filter_row(parts):
-                    entries.append(parts)
-            except Exception:
-                logger.exception("Invalid line '%s' in history file %s", line, path)
+    for line_number, line in _read_lines(path, time_range):
+        if limit is not None and len(entries) > limit:
+            break
+        if not line or not line_filter(line):
+            continue
+        try:
+            parts: list[Any] = line.decode("utf-8").split("\t")
+            parts.insert(0, line_number)
+            convert_history_line(history_columns, parts)
+            if filter_row(parts):
+                entries.append(parts)
+        except Exception:
+            logger.exception("Invalid line '%s' in history file %s", line, path)
 
     return entries
 
@@ -7,6 +7,7 @@
 import itertools
 import json
 import sqlite3
+import threading
 import time
 from collections.abc import Iterable, Sequence
 from dataclasses import dataclass
@@ -66,6 +67,10 @@ SQLITE_PRAGMAS = {
     "PRAGMA busy_timeout = 2000;": "2 seconds timeout for busy handler. Avoids database is locked errors",
 }
 
+_INSERT: Final = f"""INSERT INTO
+    history ({", ".join(TABLE_COLUMNS[1:])})
+        VALUES ({", ".join(itertools.repeat("?", len(TABLE_COLUMNS[1:])))});"""  # nosec B608 # BNS:6b6392
+
 SQLITE_INDEXES = [
     f"CREATE INDEX IF NOT EXISTS idx_{column} ON history ({column});" for column in INDEXED_COLUMNS
 ]
@@ -144,6 +149,15 @@ class SQLiteSettings:
 
 
 class SQLiteHistory(History):
+    """The history in an sqlite database
+
+    With the "batched" durability, added entries are queued and written in one
+    transaction when `sqlite_batch_size` of them are queued, or at the latest after
+    `sqlite_batch_delay` seconds.  Queued entries are lost if the process crashes.
+    Queries, housekeeping and closing write the queued entries first.  With the
+    "immediate" durability, every entry is committed before `add` returns.
+    """
+
     def __init__(
         self,
         settings: SQLiteSettings,
@@ -159,6 +173,11 @@ class SQLiteHistory(History):
         self._history_columns = history_columns
         self._last_housekeeping = 0.0
         self._page_size = 4096
+        # Protects the queue and the connection, which is used by several threads.
+        self._lock = threading.RLock()
+        self._queue: list[tuple[object, ...]] = []
+        self._flush_latency = 0.0
+        self._closed = threading.Event()
 
         if isinstance(self._settings.database, Path):
             self._settings.database.parent.mkdir(parents=True, exist_ok=True)
@@ -220,9 +239,15 @@ class SQLiteHistory(History):
             for index_statement in SQLITE_INDEXES:
                 connection.execute(index_statement)
 
+        if self._config["sqlite_durability"] == "batched":
+            threading.Thread(
+                target=self._write_queue_periodically, name="SQLiteHistory", daemon=True
+            ).start()
+
     def flush(self) -> None:
         """Delete all entries the history table."""
-        with self.conn as connection:
+        with self._lock, self.conn as connection:
+            self._queue.clear()
             connection.execute("DELETE FROM history;")
 
     def add(self, event: Event, what: HistoryWhat, who: str = "", addinfo: str = "") -> None:
@@ -230,22 +255,49 @@ class SQLiteHistory(History):
 
         No need to include the line column, as it is autoincremented.
         """
-        with self.conn as connection:
-            cur = connection.cursor()
-            cur.execute(
-                f"""INSERT INTO
-                    history ({', '.join(TABLE_COLUMNS[1:])})
-                        VALUES ({', '.join(itertools.repeat('?', len(TABLE_COLUMNS[1:])))});""",  # nosec B608 # BNS:6b6392
-                tuple(
-                    itertools.chain(
-                        (time.time(), what, who, addinfo),
-                        [
-                            event.get(colname.removeprefix("event_"), defval)
-                            for colname, defval in self._event_columns
-                        ],
-                    )
-                ),
+        entry = tuple(
+            itertools.chain(
+                (time.time(), what, who, addinfo),
+                [
+                    event.get(colname.removeprefix("event_"), defval)
+                    for colname, defval in self._event_columns
+                ],
             )
+        )
+        with self._lock:
+            self._queue.append(entry)
+            # Nothing writes the queue after closing: write now, so the closed connection complains.
+            if (
+                self._config["sqlite_durability"] == "immediate"
+                or len(self._queue) >= self._config["sqlite_batch_size"]
+                or self._closed.is_set()
+            ):
+                self.write_queue()
+
+    def write_queue(self) -> None:
+        """Write the queued entries to the history table in one transaction."""
+        with self._lock:
+            if not self._queue:
+                return
+            start = time.perf_counter()
+            with self.conn as connection:
+                connection.executemany(_INSERT, self._queue)
+            # Only now, so that the entries are written again after an error.
+            self._queue.clear()
+            self._flush_latency = time.perf_counter() - start
+
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def flush_latency(self) -> float:
+        return self._flush_latency
+
+    def _write_queue_periodically(self) -> None:
+        while not self._closed.wait(self._config["sqlite_batch_delay"]):
+            try:
+                self.write_queue()
+            except sqlite3.Error:
+                self._logger.exception("Cannot write the history entries")
 
     def add_entries(self, entries: Sequence[Sequence[object]]) -> None:
         """Add multiple entries to the history table.
@@ -253,14 +305,8 @@ class SQLiteHistory(History):
         Used only by the cmk-update-config during EC history migration to sqlite.
         The first column is the line number, which is autoincremented, so ignored in TABLE_COLUMNS.
         """
-        with self.conn as connection:
-            cur = connection.cursor()
-            cur.executemany(
-                f"""INSERT INTO
-                    history ({', '.join(TABLE_COLUMNS[1:])})
-                        VALUES ({', '.join(itertools.repeat('?', len(TABLE_COLUMNS[1:])))});""",  # nosec B608 # BNS:6b6392
-                (entry[1:] for entry in entries),
-            )
+        with self._lock, self.conn as connection:
+            connection.executemany(_INSERT, (entry[1:] for entry in entries))
 
     def get(self, query: QueryGET) -> Iterable[Sequence[object]]:
         """Retrieve entries from the history table.
@@ -271,10 +317,12 @@ class SQLiteHistory(History):
         if query.limit:
             sqlite_query += " LIMIT ?"
             sqlite_arguments += f" {query.limit + 1}"
-        with self.conn as connection:
-            cur = connection.cursor()
-            cur.execute(sqlite_query, sqlite_arguments)
-            return cur.fetchall()
+        with self._lock:
+            self.write_queue()
+            with self.conn as connection:
+                cur = connection.cursor()
+                cur.execute(sqlite_query, sqlite_arguments)
+                return cur.fetchall()
 
     def housekeeping(self) -> None:
         """Remove old entries from the history table.
@@ -284,11 +332,13 @@ class SQLiteHistory(History):
         now = time.time()
         if now - self._last_housekeeping > self._config["sqlite_housekeeping_interval"]:
             delta = now - timedelta(days=self._config["history_lifetime"]).total_seconds()
-            with self.conn as connection:
-                cur = connection.cursor()
-                cur.execute("DELETE FROM history WHERE time <= ?;", (delta,))
-            # should be executed outside of the transaction
-            self._vacuum()
+            with self._lock:
+                self.write_queue()
+                with self.conn as connection:
+                    cur = connection.cursor()
+                    cur.execute("DELETE FROM history WHERE time <= ?;", (delta,))
+                # should be executed outside of the transaction
+                self._vacuum()
             self._last_housekeeping = now
 
     def _vacuum(self) -> None:
@@ -305,6 +355,12 @@ class SQLiteHistory(History):
 
         Used during a new object instantiation,
         to avoid sqlite3.OperationalError: database is locked.
+        The queued entries are written before.
         """
-        self.conn.commit()
-        self.conn.close()
+        self._closed.set()
+        with self._lock:
+            try:
+                self.write_queue()
+                self.conn.commit()
+            finally:
+                self.conn.close()
@@ -64,6 +64,7 @@ from .config import (
 from .core_queries import HostInfo, query_hosts_scheduled_downtime_depth
 from .crash_reporting import CrashReportStore, ECCrashReport
 from .event import create_events_from_syslog_messages, Event, scrub_string
+from .event_store import EventStore
 from .helpers import ECLock, parse_bytes_into_syslog_messages
 from .history import ActiveHistoryPeriod, get_logfile, History, HistoryWhat, quote_tab, TimedHistory
 from .history_file import FileHistory
@@ -430,6 +431,7 @@ class EventServer(ECServerThread):
                 Perfcounters.status_columns(),
                 cls._replication_columns(),
                 cls._event_limit_columns(),
+                cls._history_columns(),
             )
         )
 
@@ -460,6 +462,13 @@ class EventServer(ECServerThread):
             ("status_event_limit_active_overall", False),
         ]
 
+    @classmethod
+    def _history_columns(cls) -> Columns:
+        return [
+            ("status_history_queue_depth", 0),
+            ("status_history_flush_latency", 0.0),
+        ]
+
     def get_status(self) -> Iterable[Sequence[object]]:
         return [
             [
@@ -467,6 +476,7 @@ class EventServer(ECServerThread):
                 *self._perfcounters.get_status(),
                 *self._add_replication_status(),
                 *self._add_event_limit_status(),
+                *self._add_history_status(),
             ]
         ]
 
@@ -500,6 +510,12 @@ class EventServer(ECServerThread):
             self.is_overall_event_limit_active(),
         ]
 
+    def _add_history_status(self) -> list[object]:
+        return [self._history.queue_depth(), self._history.flush_latency()]
+
+    def close_history(self) -> None:
+        self._history.close()
+
     def create_pipe(self) -> None:
         path = self.settings.paths.event_pipe.value
         with contextlib.suppress(Exception):
@@ -995,9 +1011,8 @@ class EventServer(ECServerThread):
                 # First look for case 1: rule that already have at least one hit
                 # and this events in the state "counting" exist.
                 events_to_delete: list[tuple[Event, HistoryWhat]] = []
-                events = self._event_status.events()
-                for event in events:
-                    if event["rule_id"] == rule["id"] and event["phase"] == "counting":
+                for event in self._event_status.events_of_rule(rule["id"]):
+                    if event["phase"] == "counting":
                         # time has elapsed. Now lets see if we have reached
                         # the necessary count:
                         if event["count"] < expect["count"]:  # no -> trigger alarm
@@ -1048,10 +1063,8 @@ class EventServer(ECServerThread):
             merge, reset_ack = merge  # type: ignore[unreachable]
 
         if merge != "never":
-            for event in self._event_status.events():
-                if event["rule_id"] == rule["id"] and (
-                    event["phase"] == "open" or (event["phase"] == "ack" and merge == "acked")
-                ):
+            for event in self._event_status.events_of_rule(rule["id"]):
+                if event["phase"] == "open" or (event["phase"] == "ack" and merge == "acked"):
                     merge_event = event
                     break
 
@@ -2556,7 +2569,7 @@ class EventStatus:
 
     def flush(self) -> None:
         # TODO: Improve types!
-        self._events: list[Event] = []
+        self._events = EventStore()
         self._next_event_id = 1
         self._rule_stats: dict[str, int] = {}
         # needed for expecting rules
@@ -2570,13 +2583,14 @@ class EventStatus:
 
     def events(self) -> list[Event]:
         # TODO: Improve type!
-        return self._events
+        return self._events.to_list()
 
     def event(self, eid: int) -> Event | None:
-        for event in self._events:
-            if event["id"] == eid:
-                return event
-        return None
+        return self._events.get(eid)
+
+    def events_of_rule(self, rule_id: str | None) -> Iterable[Event]:
+        """The events of the rule, oldest first. Do not add or remove events while iterating."""
+        return self._events.of_rule(rule_id)
 
     def interval_start(self, rule_id: str, interval: ExpectInterval) -> int:
         """
@@ -2621,14 +2635,14 @@ class EventStatus:
     def pack_status(self) -> PackedEventStatus:
         return PackedEventStatus(
             next_event_id=self._next_event_id,
-            events=self._events,
+            events=self._events.to_list(),
             rule_stats=self._rule_stats,
             interval_starts=self._interval_starts,
         )
 
     def unpack_status(self, status: PackedEventStatus) -> None:
         self._next_event_id = status["next_event_id"]
-        self._events = status["events"]
+        self._events = EventStore(status["events"])
         self._rule_stats = status["rule_stats"]
         self._interval_starts = status["interval_starts"]
 
@@ -2660,7 +2674,7 @@ class EventStatus:
             try:
                 status = ast.literal_eval(path.read_text(encoding="utf-8"))
                 self._next_event_id = status["next_event_id"]
-                self._events = status["events"]
+                events = status["events"]
                 self._rule_stats = status["rule_stats"]
                 self._interval_starts = status.get("interval_starts", {})
                 self._logger.info("Loaded event state from %s.", path)
@@ -2669,7 +2683,7 @@ class EventStatus:
                 raise
 
         # Add new columns and fix broken events
-        for event in self._events:
+        for event in events:
             event.setdefault("ipaddress", "")
             event.setdefault("host", HostName(""))
             event.setdefault("application", "")
@@ -2678,6 +2692,7 @@ class EventStatus:
             if "core_host" not in event:
                 event_server.add_core_host_to_event(event)
                 event["host_in_downtime"] = False
+        self._events = EventStore(events)
 
         # core_host is needed to initialize the status
         self._initialize_event_limit_status()
@@ -2718,7 +2733,7 @@ class EventStatus:
         self._perfcounters.count("events")
         event["id"] = self._next_event_id
         self._next_event_id += 1
-        self._events.append(event)
+        self._events.add(event)
         self.num_existing_events += 1
         self._count_event_add(event)
         self._history.add(event, "NEW")
@@ -2731,19 +2746,18 @@ class EventStatus:
         self._history.add(event, "ARCHIVED")
 
     def remove_event(self, event: Event, delete_reason: HistoryWhat, user: str = "") -> None:
-        try:
-            self._events.remove(event)
-            self._history.add(event, delete_reason, user)
-            self._count_event_remove(event)
-        except ValueError:
-            self._logger.exception("Cannot remove event %d: not present", event["id"])
+        if not self._events.remove(event):
+            self._logger.error("Cannot remove event %d: not present", event.get("id"))
+            return
+        self._history.add(event, delete_reason, user)
+        self._count_event_remove(event)
 
     # protected by self.lock
     def remove_oldest_event(self, ty: LimitKind, event: Event) -> None:
         if ty == "overall":
             self._logger.log(VERBOSE, "  Removing oldest event")
-            oldest_event = self._events[0]
-            self.remove_event(oldest_event, "AUTODELETE")
+            if (oldest_event := self._events.oldest()) is not None:
+                self.remove_event(oldest_event, "AUTODELETE")
         elif ty == "by_rule" and event["rule_id"] is not None:
             self._logger.log(VERBOSE, '  Removing oldest event of rule "%s"', event["rule_id"])
             self._remove_oldest_event_of_rule(event["rule_id"])
@@ -2753,10 +2767,8 @@ class EventStatus:
 
     # protected by self.lock
     def _remove_oldest_event_of_rule(self, rule_id: str) -> None:
-        for event in self._events:
-            if event["rule_id"] == rule_id:
-                self.remove_event(event, "AUTODELETE")
-                return
+        if (event := next(iter(self._events.of_rule(rule_id)), None)) is not None:
+            self.remove_event(event, "AUTODELETE")
 
     # protected by self.lock
     def _remove_oldest_event_of_host(self, hostname: str) -> None:
@@ -2791,10 +2803,8 @@ class EventStatus:
         """
         with self.lock:
             to_delete = []
-            for event in self._events:
-                if event["rule_id"] == rule["id"] and self.cancelling_match(
-                    match_groups, new_event, event, rule
-                ):
+            for event in self._cancel_candidates(new_event, match_groups, rule):
+                if self.cancelling_match(match_groups, new_event, event, rule):
                     # Fill a few fields of the cancelled event with data from
                     # the cancelling event so that action scripts have useful
                     # values and the logfile entry if more relevant.
@@ -2841,6 +2851,35 @@ class EventStatus:
             for e in to_delete:
                 self.remove_event(e, "CANCELLED")
 
+    def _cancel_candidates(
+        self, new_event: Event, match_groups: MatchGroups, rule: Rule
+    ) -> Iterable[Event]:
+        """The events of the rule that may be cancelled by the new event
+
+        Only events of the same host are cancelled, and of the same application
+        unless the rule cancels by application.  See cancelling_match.
+        """
+        if self._config["debug_rules"]:
+            # Let cancelling_match explain why the other events are not cancelled.
+            return list(self._events.of_rule(rule["id"]))
+        # Rewrite host and application with the *_ok match groups, just like
+        # cancelling_match does.
+        rewrite_groups = match_groups | MatchGroups(
+            match_groups_message=match_groups.get("match_groups_message_ok", ()),
+            match_groups_syslog_application=match_groups.get(
+                "match_groups_syslog_application_ok", ()
+            ),
+        )
+        host = new_event["host"]
+        if "set_host" in rule:
+            host = HostName(replace_groups(rule["set_host"], host, rewrite_groups))
+        if "cancel_application" in rule:
+            return [e for e in self._events.of_rule(rule["id"]) if e["host"] == host]
+        application = new_event["application"]
+        if "set_application" in rule:
+            application = replace_groups(rule["set_application"], application, rewrite_groups)
+        return list(self._events.of_key(rule["id"], host, application))
+
     def cancelling_match(  # pylint: disable=too-many-branches
         self, match_groups: MatchGroups, new_event: Event, event: Event, rule: Rule
     ) -> bool:
@@ -2967,10 +3006,11 @@ class EventStatus:
                 preserve["contact"] = found["contact"]
         found.update(event)
         found.update(preserve)
+        self._events.reindex(found)
 
     def count_expected_event(self, event_server: EventServer, event: Event) -> None:
-        for ev in self._events:
-            if ev["rule_id"] == event["rule_id"] and ev["phase"] == "counting":
+        for ev in self._events.of_rule(event["rule_id"]):
+            if ev["phase"] == "counting":
                 self.count_event_up(ev, event)
                 return
 
@@ -2987,31 +3027,35 @@ class EventStatus:
         since the event has been created because the count was too
         low in the specified period of time.
         """
-        for ev in self._events:
-            if ev["rule_id"] == event["rule_id"]:
-                if ev["phase"] == "ack" and not count["count_ack"]:
-                    continue  # skip acknowledged events
+        candidates = (
+            self._events.of_key(event["rule_id"], event["host"], event["application"])
+            if count["separate_host"] and count["separate_application"]
+            else self._events.of_rule(event["rule_id"])
+        )
+        for ev in candidates:
+            if ev["phase"] == "ack" and not count["count_ack"]:
+                continue  # skip acknowledged events
 
-                if count["separate_host"] and ev["host"] != event["host"]:
-                    continue  # treat events with separated hosts separately
+            if count["separate_host"] and ev["host"] != event["host"]:
+                continue  # treat events with separated hosts separately
 
-                if count["separate_application"] and ev["application"] != event["application"]:
-                    continue  # same for application
+            if count["separate_application"] and ev["application"] != event["application"]:
+                continue  # same for application
 
-                if count["separate_match_groups"] and ev["match_groups"] != event["match_groups"]:
-                    continue
+            if count["separate_match_groups"] and ev["match_groups"] != event["match_groups"]:
+                continue
 
-                count_duration = count.get("count_duration")
-                if count_duration is not None and ev["first"] + count_duration < event["time"]:
-                    # Counting has been discontinued on this event after a certain time
-                    continue
+            count_duration = count.get("count_duration")
+            if count_duration is not None and ev["first"] + count_duration < event["time"]:
+                # Counting has been discontinued on this event after a certain time
+                continue
 
-                if ev["host_in_downtime"] != event["host_in_downtime"]:
-                    continue  # treat events with different downtime states separately
+            if ev["host_in_downtime"] != event["host_in_downtime"]:
+                continue  # treat events with different downtime states separately
 
-                found = ev
-                self.count_event_up(found, event)
-                break
+            found = ev
+            self.count_event_up(found, event)
+            break
         else:
             event["count"] = 1
             event["phase"] = "counting"
@@ -3025,7 +3069,7 @@ class EventStatus:
         return None  # do not do event action
 
     def delete_events_by(self, predicate: Callable[[Event], bool], user: str) -> None:
-        for event in self._events[:]:
+        for event in self._events.to_list():
             if predicate(event):
                 event["phase"] = "closed"
                 if user:
@@ -3033,7 +3077,7 @@ class EventStatus:
                 self.remove_event(event, "DELETE", user)
 
     def get_events(self) -> Iterable[Event]:
-        return self._events
+        return self._events.to_list()
 
     def get_rule_stats(self) -> Iterable[tuple[str, int]]:
         return sorted(self._rule_stats.items(), key=lambda x: x[0])
@@ -3504,6 +3548,9 @@ def main() -> None:
         logger.log(VERBOSE, "Saving final event state")
         event_status.save_status()
 
+        logger.log(VERBOSE, "Writing the queued history entries")
+        event_server.close_history()
+
         logger.log(VERBOSE, "Cleaning up sockets")
         settings.paths.unix_socket.value.unlink()
         settings.paths.event_socket.value.unlink()
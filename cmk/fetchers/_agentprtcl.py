@@ -40,7 +40,7 @@ class TransportProtocol(Enum):
 
     @classmethod
     def from_bytes(cls, data: Buffer) -> Self:
-        return cls(memoryview(data)[:2])
+        return cls(bytes(memoryview(data)[:2]))
 
 
 class Version(Enum):
@@ -237,7 +237,7 @@ def _check_mac_and_decrypt(
         raise ValueError("Decryption failed: MAC mismatch")
 
     cipher = AesCbcCipher("decrypt", key, iv)
-    decrypted = cipher.update(bytes(ciphertext)) + cipher.finalize()
+    decrypted = cipher.update(ciphertext) + cipher.finalize()
 
     return AesCbcCipher.unpad_block(decrypted)
 
@@ -323,7 +323,7 @@ def _decrypt_aes_256_cbc_pbkdf2(ciphertext: Buffer, password: str) -> bytes:
     )
 
     cipher = AesCbcCipher("decrypt", key, iv)
-    decrypted = cipher.update(bytes(memoryview(ciphertext)[SALT_LENGTH:])) + cipher.finalize()
+    decrypted = cipher.update(memoryview(ciphertext)[SALT_LENGTH:]) + cipher.finalize()
 
     return AesCbcCipher.unpad_block(decrypted)
 
@@ -349,7 +349,7 @@ def _decrypt_aes_256_cbc_legacy(
     )
 
     cipher = AesCbcCipher("decrypt", key, iv)
-    decrypted = cipher.update(bytes(ciphertext)) + cipher.finalize()
+    decrypted = cipher.update(ciphertext) + cipher.finalize()
 
     return AesCbcCipher.unpad_block(decrypted)
 
@@ -7,6 +7,7 @@ import dataclasses
 import logging
 import time
 from collections.abc import Collection, Iterable, Iterator, Mapping, MutableMapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Final
 
@@ -16,12 +17,14 @@ from cmk.ccc.exceptions import MKFetcherError, MKTimeout
 from cmk.utils.sectionname import SectionMap, SectionName
 
 from cmk.snmplib import (
+    BackendSNMPTree,
     get_snmp_table,
     SNMPBackend,
     SNMPHostConfig,
     SNMPRawData,
     SNMPRawDataElem,
     SNMPRowInfo,
+    SNMPTable,
 )
 
 from cmk.checkengine.parser import SectionStore
@@ -29,6 +32,7 @@ from cmk.checkengine.parser import SectionStore
 from ._abstract import Fetcher, Mode
 from ._snmpscan import gather_available_raw_section_names, SNMPScanConfig
 from .snmp import make_backend, SNMPPluginStore
+from .snmp_backend import ClassicSNMPBackend
 
 __all__ = ["SNMPFetcher", "SNMPSectionMeta", "SNMPScanConfig"]
 
@@ -42,14 +46,19 @@ class WalkCache(MutableMapping[tuple[str, str, bool], SNMPRowInfo]):  # pylint:
     The fetched data is always saved to a file *if* the respective OID is marked as being cached
     by the plug-in using `OIDCached` (that is: if the save_to_cache attribute of the OID object
     is true).
+
+    The lookups of walks read from the files are counted in `reused`, as every one of them
+    saves a walk.
     """
 
-    __slots__ = ("_store", "_path", "_logger")
+    __slots__ = ("_store", "_path", "_logger", "_loaded", "reused")
 
     def __init__(self, walk_cache: Path, logger: logging.Logger) -> None:
         self._store: dict[tuple[str, str, bool], SNMPRowInfo] = {}
         self._path = walk_cache
         self._logger = logger
+        self._loaded: set[tuple[str, str, bool]] = set()
+        self.reused: set[tuple[str, str, bool]] = set()
 
     def _read_row(self, path: Path) -> SNMPRowInfo:
         return store.load_object_from_file(path, default=None)
@@ -66,6 +75,13 @@ class WalkCache(MutableMapping[tuple[str, str, bool], SNMPRowInfo]):  # pylint:
         name_parts = basename[3:].split("-", 1)
         return name_parts[0], name_parts[1]
 
+    @staticmethod
+    def _is_outdated(path: Path, max_age: float) -> bool:
+        try:
+            return path.stat().st_mtime < time.time() - max_age
+        except FileNotFoundError:
+            return True
+
     def _iterfiles(self) -> Iterable[Path]:
         return self._path.iterdir() if self._path.is_dir() else ()
 
@@ -73,9 +89,13 @@ class WalkCache(MutableMapping[tuple[str, str, bool], SNMPRowInfo]):  # pylint:
         return f"{type(self).__name__}({self._store!r})"
 
     def __getitem__(self, key: tuple[str, str, bool]) -> SNMPRowInfo:
-        return self._store.__getitem__(key)
+        value = self._store.__getitem__(key)
+        if key in self._loaded:
+            self.reused.add(key)
+        return value
 
     def __setitem__(self, key: tuple[str, str, bool], value: SNMPRowInfo) -> None:
+        self._loaded.discard(key)
         return self._store.__setitem__(key, value)
 
     def __delitem__(self, key: tuple[str, str, bool]) -> None:
@@ -91,10 +111,17 @@ class WalkCache(MutableMapping[tuple[str, str, bool], SNMPRowInfo]):  # pylint:
         for path in self._iterfiles():
             path.unlink(missing_ok=True)
 
-    def load(self) -> None:
-        """Try to read the OIDs data from cache files"""
+    def load(self, max_age: float | None = None) -> None:
+        """Try to read the OIDs data from cache files
+
+        Walks older than `max_age` seconds are removed instead.
+        """
         for path in self._iterfiles():
             fetchoid, context_hash = self._name2oid(path.name)
+            if max_age is not None and self._is_outdated(path, max_age):
+                self._logger.debug(f"  Removing outdated {fetchoid} from walk cache {path}")
+                path.unlink(missing_ok=True)
+                continue
 
             self._logger.debug(f"  Loading {fetchoid} from walk cache {path}")
             try:
@@ -107,12 +134,14 @@ class WalkCache(MutableMapping[tuple[str, str, bool], SNMPRowInfo]):  # pylint:
 
             if read_walk is not None:
                 self._store[(fetchoid, context_hash, True)] = read_walk
+                self._loaded.add((fetchoid, context_hash, True))
 
     def save(self) -> None:
         self._path.mkdir(parents=True, exist_ok=True)
 
         for (fetchoid, context_hash, save_flag), rowinfo in self._store.items():
-            if not save_flag:
+            # Rewriting the walks read from the files would keep them from expiring.
+            if not save_flag or (fetchoid, context_hash, save_flag) in self._loaded:
                 continue
 
             path = self._path / self._oid2name(fetchoid, context_hash)
@@ -152,6 +181,7 @@ class SNMPFetcher(Fetcher[SNMPRawData]):
         section_store_path: Path | str,
         stored_walk_path: Path | str,
         walk_cache_path: Path | str,
+        walk_cache_max_age: float,
         snmp_config: SNMPHostConfig,
     ) -> None:
         super().__init__()
@@ -160,6 +190,7 @@ class SNMPFetcher(Fetcher[SNMPRawData]):
         self.do_status_data_inventory: Final = do_status_data_inventory
         self.stored_walk_path: Final = Path(stored_walk_path)
         self.walk_cache_path: Final = Path(walk_cache_path)
+        self.walk_cache_max_age: Final = walk_cache_max_age
         self.snmp_config: Final = snmp_config
         self._logger: Final = logging.getLogger("cmk.helper.snmp")
         self._section_store = SectionStore[SNMPRawDataElem](
@@ -177,6 +208,7 @@ class SNMPFetcher(Fetcher[SNMPRawData]):
             and self.do_status_data_inventory == other.do_status_data_inventory
             and self.stored_walk_path == other.stored_walk_path
             and self.walk_cache_path == other.walk_cache_path
+            and self.walk_cache_max_age == other.walk_cache_max_age
             and self.snmp_config == other.snmp_config
         )
 
@@ -207,6 +239,7 @@ class SNMPFetcher(Fetcher[SNMPRawData]):
                     f"section_store_path={self.section_store_path!r}",
                     f"stored_walk_path={self.stored_walk_path!r}",
                     f"walk_cache_path={self.walk_cache_path!r}",
+                    f"walk_cache_max_age={self.walk_cache_max_age!r}",
                     f"snmp_config={self.snmp_config!r}",
                 )
             )
@@ -289,7 +322,7 @@ class SNMPFetcher(Fetcher[SNMPRawData]):
             raise TypeError("missing backend")
 
         now = int(time.time())
-        persisted_sections = self._section_store.load() if mode is Mode.CHECKING else {}
+        persisted_sections = self._section_store.load_index() if mode is Mode.CHECKING else {}
         section_names = self._get_selection(mode)
         section_names |= self._detect(
             select_from=self._get_detected_sections(mode) - section_names, backend=self._backend
@@ -301,35 +334,83 @@ class SNMPFetcher(Fetcher[SNMPRawData]):
         walk_cache = WalkCache(self.walk_cache_path / str(self._backend.hostname), self._logger)
         if mode is Mode.CHECKING:
             walk_cache_msg = "SNMP walk cache is enabled: Use any locally cached information"
-            walk_cache.load()
+            walk_cache.load(max_age=self.walk_cache_max_age or None)
+        elif self.walk_cache_max_age:
+            walk_cache_msg = (
+                "SNMP walk cache is enabled: Use information cached during the last "
+                f"{self.walk_cache_max_age:g}s"
+            )
+            walk_cache.load(max_age=self.walk_cache_max_age)
         else:
             walk_cache.clear()
             walk_cache_msg = "SNMP walk cache cleared"
 
-        fetched_data: dict[SectionName, SNMPRawDataElem] = {}
+        fetch_section_names = []
         for section_name in self._sort_section_names(section_names):
             try:
-                _from, until, _section = persisted_sections[section_name]
+                _from, until = persisted_sections[section_name]
                 if now > until:
                     raise LookupError(section_name)
             except LookupError:
                 self._logger.debug("%s: Fetching data (%s)", section_name, walk_cache_msg)
+                fetch_section_names.append(section_name)
 
-                fetched_data[section_name] = [
-                    get_snmp_table(
-                        section_name=section_name,
-                        tree=tree,
-                        walk_cache=walk_cache,
-                        backend=self._backend,
-                        log=self._logger.debug,
-                    )
-                    for tree in self.plugin_store[section_name].trees
-                ]
+        fetched_data = self._get_snmp_tables(fetch_section_names, walk_cache, self._backend)
+        self._logger.debug("%d SNMP walks saved by walk cache", len(walk_cache.reused))
 
         walk_cache.save()
 
         return fetched_data
 
+    def _get_snmp_tables(
+        self,
+        section_names: Sequence[SectionName],
+        walk_cache: WalkCache,
+        backend: SNMPBackend,
+    ) -> Mapping[SectionName, SNMPRawDataElem]:
+        trees = [
+            (section_name, tree)
+            for section_name in section_names
+            for tree in self.plugin_store[section_name].trees
+        ]
+
+        def get_table(section_name: SectionName, tree: BackendSNMPTree) -> Sequence[SNMPTable]:
+            return get_snmp_table(
+                section_name=section_name,
+                tree=tree,
+                walk_cache=walk_cache,
+                backend=backend,
+                log=self._logger.debug,
+            )
+
+        # Only the classic backend walks in subprocesses, the other backends
+        # would not gain anything from walking in threads.  Note that the
+        # stored walks are also used with the classic backend configured.
+        if (
+            not isinstance(backend, ClassicSNMPBackend)
+            or (max_workers := backend.config.max_concurrent_walks) <= 1
+            or len(trees) <= 1
+        ):
+            tables = [get_table(section_name, tree) for section_name, tree in trees]
+        else:
+            self._logger.debug("Walking %d trees, %d at a time", len(trees), max_workers)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                try:
+                    tables = list(executor.map(lambda args: get_table(*args), trees))
+                except BaseException:
+                    # The timeout is only raised in this thread.  End the walks of
+                    # the others, so that the pool is not waiting for them.
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    backend.kill_walks()
+                    raise
+
+        fetched_data: dict[SectionName, list[Sequence[SNMPTable]]] = {
+            section_name: [] for section_name in section_names
+        }
+        for (section_name, _tree), table in zip(trees, tables):
+            fetched_data[section_name].append(table)
+        return fetched_data
+
     @classmethod
     def _sort_section_names(
         cls,
@@ -4,8 +4,12 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 """SNMP caching"""
 
+import math
 import os
+import time
+from collections.abc import Mapping
 from pathlib import Path
+from typing import Final
 
 from cmk.ccc import store
 
@@ -14,15 +18,72 @@ from cmk.utils.hostaddress import HostAddress, HostName
 
 from cmk.snmplib import OID, SNMPDecodedString
 
+# Only keep the most recently fetched values of a host on disk.
+_MAX_PERSISTED_OIDS = 1000
+
+
+class SingleOIDCache(dict[OID, SNMPDecodedString | None]):
+    """The values of single OIDs of a host
+
+    The values remember when they have been fetched.  The lookups of values
+    fetched before the current scan are SNMP requests saved by the cache.
+    """
+
+    def __init__(
+        self, persisted: Mapping[OID, tuple[float, SNMPDecodedString | None]] | None = None
+    ) -> None:
+        persisted = persisted or {}
+        super().__init__({oid: value for oid, (_fetched_at, value) in persisted.items()})
+        self.fetched_at: Final = {oid: fetched_at for oid, (fetched_at, _v) in persisted.items()}
+        self.reused: Final[set[OID]] = set()
+        self._previous_scans: set[OID] = set(self)
+
+    def __getitem__(self, oid: OID) -> SNMPDecodedString | None:
+        value = super().__getitem__(oid)
+        if oid in self._previous_scans:
+            self.reused.add(oid)
+        return value
+
+    def __setitem__(self, oid: OID, value: SNMPDecodedString | None) -> None:
+        self.fetched_at[oid] = time.time()
+        self._previous_scans.discard(oid)
+        super().__setitem__(oid, value)
+
+    def start_scan(self, oldest: float) -> None:
+        """Forget the values fetched before `oldest` and reset the reuse counter
+
+        The failed gets (None) are only reused within a scan, see
+        `write_single_oid_cache`.
+        """
+        for oid, value in list(self.items()):
+            if value is None or self.fetched_at.get(oid, -math.inf) < oldest:
+                del self[oid]
+        for oid in self.fetched_at.keys() - self.keys():
+            del self.fetched_at[oid]
+        self._previous_scans = set(self)
+        self.reused.clear()
+
+
 # TODO: Replace this by generic caching
 _g_single_oid_hostname: HostName | None = None
 _g_single_oid_ipaddress: HostAddress | None = None
-_g_single_oid_cache: dict[OID, SNMPDecodedString | None] | None = None
+_g_single_oid_cache: SingleOIDCache | None = None
 
 
 def initialize_single_oid_cache(
-    host_name: HostName, ipaddress: HostAddress | None, from_disk: bool = False, *, cache_dir: Path
+    host_name: HostName,
+    ipaddress: HostAddress | None,
+    from_disk: bool = False,
+    *,
+    cache_dir: Path,
+    max_age: float | None = None,
 ) -> None:
+    """Initialize the cache for another host
+
+    With `from_disk`, the values fetched in previous runs are reused.  Values
+    older than `max_age` seconds are fetched again, also the ones kept in
+    memory from earlier scans of the same host.
+    """
     global _g_single_oid_cache, _g_single_oid_ipaddress, _g_single_oid_hostname
 
     if (
@@ -33,9 +94,15 @@ def initialize_single_oid_cache(
         _g_single_oid_hostname = host_name
         _g_single_oid_ipaddress = ipaddress
         if from_disk:
-            _g_single_oid_cache = _load_single_oid_cache(host_name, ipaddress, cache_dir=cache_dir)
+            _g_single_oid_cache = SingleOIDCache(
+                _load_single_oid_cache(host_name, ipaddress, cache_dir=cache_dir, max_age=max_age)
+            )
         else:
-            _g_single_oid_cache = {}
+            _g_single_oid_cache = SingleOIDCache()
+
+    _g_single_oid_cache.start_scan(
+        time.time() - max_age if from_disk and max_age is not None else -math.inf
+    )
 
 
 def write_single_oid_cache(
@@ -47,17 +114,37 @@ def write_single_oid_cache(
     if not os.path.exists(cache_dir):
         os.makedirs(cache_dir)
     cache_path = f"{cache_dir}/{host_name}.{ipaddress}"
-    store.save_object_to_file(cache_path, _g_single_oid_cache, pretty=False)
+    now = time.time()
+    # A failed get is not told apart from a missing OID, both are None.  Do not
+    # hide the sections of a host behind a single timeout for `max_age`.
+    persisted = sorted(
+        (
+            (oid, (_g_single_oid_cache.fetched_at.get(oid, now), value))
+            for oid, value in _g_single_oid_cache.items()
+            if value is not None
+        ),
+        key=lambda item: item[1][0],
+    )
+    store.save_object_to_file(cache_path, dict(persisted[-_MAX_PERSISTED_OIDS:]), pretty=False)
 
 
 def _load_single_oid_cache(
-    host_name: HostName, ipaddress: HostAddress | None, cache_dir: Path
-) -> dict[OID, SNMPDecodedString | None]:
+    host_name: HostName, ipaddress: HostAddress | None, cache_dir: Path, max_age: float | None
+) -> dict[OID, tuple[float, SNMPDecodedString | None]]:
     cache_path = cache_dir / f"{host_name}.{ipaddress}"
-    return store.load_object_from_file(cache_path, default={})
-
-
-def single_oid_cache() -> dict[OID, SNMPDecodedString | None]:
+    oldest = -math.inf if max_age is None else time.time() - max_age
+    persisted = {}
+    for oid, entry in store.load_object_from_file(cache_path, default={}).items():
+        # Caches written by previous versions only contain the values.
+        if not isinstance(entry, tuple):
+            continue
+        fetched_at, value = entry
+        if fetched_at >= oldest:
+            persisted[oid] = (fetched_at, value)
+    return persisted
+
+
+def single_oid_cache() -> SingleOIDCache:
     assert _g_single_oid_cache is not None
     return _g_single_oid_cache
 
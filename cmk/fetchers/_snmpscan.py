@@ -29,6 +29,8 @@ class SNMPScanConfig:
     on_error: OnError
     missing_sys_description: bool
     oid_cache_dir: Path
+    # Reuse the OIDs fetched by previous scans for that many seconds.
+    oid_cache_max_age: float = 0
 
 
 # gather auto_discovered check_plugin_names for this host
@@ -65,7 +67,11 @@ def _snmp_scan(
     backend: SNMPBackend,
 ) -> frozenset[SectionName]:
     snmp_cache.initialize_single_oid_cache(
-        backend.config.hostname, backend.config.ipaddress, cache_dir=scan_config.oid_cache_dir
+        backend.config.hostname,
+        backend.config.ipaddress,
+        from_disk=scan_config.oid_cache_max_age > 0,
+        cache_dir=scan_config.oid_cache_dir,
+        max_age=scan_config.oid_cache_max_age,
     )
     backend.logger.debug("  SNMP scan:")
 
@@ -80,6 +86,13 @@ def _snmp_scan(
         backend=backend,
     )
     _output_snmp_check_plugins("SNMP scan found", found_sections, backend.logger)
+    backend.logger.debug(
+        "   %-35s%d", "SNMP requests saved by OID cache", len(snmp_cache.single_oid_cache().reused)
+    )
+    if scan_config.missing_sys_description:
+        # Do not reuse the fake values once the description is available.
+        snmp_cache.single_oid_cache().pop(OID_SYS_DESCR, None)
+        snmp_cache.single_oid_cache().pop(OID_SYS_OBJ, None)
     snmp_cache.write_single_oid_cache(
         backend.config.hostname, backend.config.ipaddress, cache_dir=scan_config.oid_cache_dir
     )
@@ -29,7 +29,14 @@ from ._agentprtcl import (
     validate_agent_protocol,
 )
 
-__all__ = ["TCPFetcher", "TLSConfig"]
+__all__ = [
+    "ReceiveStats",
+    "TCPFetcher",
+    "TLSConfig",
+    "tls_session_cache",
+    "TLSSessionCache",
+    "TLSSessionStats",
+]
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -39,18 +46,135 @@ class TLSConfig:
     site_crt: Path
 
 
-def recvall(sock: socket.socket, flags: int = 0) -> bytes:
-    buffer = bytearray()
+@dataclass(kw_only=True)
+class ReceiveStats:
+    """Per connection accounting of the receive path
+
+    `copies` counts every full copy of the payload made on its way from the
+    socket to the `AgentRawData`, `reallocations` the number of times the
+    receive buffer had to grow.
+    """
+
+    bytes_received: int = 0
+    recv_calls: int = 0
+    reallocations: int = 0
+    copies: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.bytes_received} bytes in {self.recv_calls} reads, "
+            f"{self.reallocations} reallocations, {self.copies} copies"
+        )
+
+
+def recvall(
+    sock: socket.socket,
+    flags: int = 0,
+    *,
+    initial_size: int = 64 * 1024,
+    stats: ReceiveStats | None = None,
+) -> memoryview:
+    """Read from the socket until EOF
+
+    The data is read with `recv_into` into a preallocated buffer that is
+    doubled whenever it runs full.  The returned memoryview is a read-only
+    window on that buffer; no additional copy is made.
+    """
+    stats = ReceiveStats() if stats is None else stats
+    buffer = bytearray(initial_size)
+    size = 0
     try:
         while True:
-            data = sock.recv(4096, flags)
-            if not data:
+            if size == len(buffer):
+                buffer.extend(bytes(len(buffer)))
+                stats.reallocations += 1
+            with memoryview(buffer) as view:
+                nbytes = sock.recv_into(view[size:], len(buffer) - size, flags)
+            stats.recv_calls += 1
+            if not nbytes:
                 break
-            buffer += data
+            size += nbytes
     except OSError as e:
         raise MKFetcherError("Communication failed: %s" % e)
 
-    return bytes(buffer)
+    stats.bytes_received += size
+    return memoryview(buffer)[:size].toreadonly()
+
+
+@dataclass(kw_only=True)
+class TLSSessionStats:
+    full_handshakes: int = 0
+    resumed_handshakes: int = 0
+
+    def __str__(self) -> str:
+        return f"{self.resumed_handshakes} resumed and {self.full_handshakes} full TLS handshakes"
+
+
+class TLSSessionCache:
+    """Reuse the SSL contexts and the TLS sessions across connections
+
+    One `SSLContext` is kept per trust store and site certificate.  It is
+    built again whenever one of the files changes.  The last TLS session
+    of every agent controller is kept along with its context, so that the
+    next connection to the same controller resumes the session instead of
+    doing a full handshake.
+
+    Sessions cannot be written to disk, the cache lives as long as the
+    process, e.g. the fetcher helper.
+    """
+
+    def __init__(self) -> None:
+        self._contexts: dict[TLSConfig, tuple[tuple[int, int], ssl.SSLContext]] = {}
+        self._sessions: dict[tuple[TLSConfig, str], ssl.SSLSession] = {}
+        self.stats = TLSSessionStats()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}()"
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def context(self, tls_config: TLSConfig) -> ssl.SSLContext:
+        files = (
+            tls_config.ca_store.stat().st_mtime_ns,
+            tls_config.site_crt.stat().st_mtime_ns,
+        )
+        try:
+            cached_files, ctx = self._contexts[tls_config]
+        except KeyError:
+            pass
+        else:
+            if cached_files == files:
+                return ctx
+
+        ctx = ssl.create_default_context(cafile=str(tls_config.ca_store))
+        ctx.load_cert_chain(certfile=tls_config.site_crt)
+        self._contexts[tls_config] = files, ctx
+        # Sessions are bound to the context that created them.
+        self._sessions = {k: v for k, v in self._sessions.items() if k[0] != tls_config}
+        return ctx
+
+    def session(self, tls_config: TLSConfig, server_hostname: str) -> ssl.SSLSession | None:
+        return self._sessions.get((tls_config, server_hostname))
+
+    def update(self, tls_config: TLSConfig, ssock: ssl.SSLSocket) -> None:
+        """Remember the session of a connection
+
+        With TLS 1.3 the session ticket arrives after the handshake, so this
+        should be called after some data has been read.
+        """
+        if ssock.server_hostname is None or (session := ssock.session) is None:
+            return
+        self._sessions[(tls_config, ssock.server_hostname)] = session
+
+    def clear(self) -> None:
+        self._contexts.clear()
+        self._sessions.clear()
+        self.stats = TLSSessionStats()
+
+
+# The contexts and sessions of this process, see `TLSSessionCache`.
+tls_session_cache: Final = TLSSessionCache()
 
 
 def wrap_tls(sock: socket.socket, server_hostname: str, *, tls_config: TLSConfig) -> ssl.SSLSocket:
@@ -59,12 +183,20 @@ def wrap_tls(sock: socket.socket, server_hostname: str, *, tls_config: TLSConfig
         # However, if it's missing for some reason, we have to write it.
         write_cert_store(source_dir=tls_config.cas_dir, store_path=tls_config.ca_store)
     try:
-        ctx = ssl.create_default_context(cafile=str(tls_config.ca_store))
-        ctx.load_cert_chain(certfile=tls_config.site_crt)
-        return ctx.wrap_socket(sock, server_hostname=server_hostname)
+        ssock = tls_session_cache.context(tls_config).wrap_socket(
+            sock,
+            server_hostname=server_hostname,
+            session=tls_session_cache.session(tls_config, server_hostname),
+        )
     except ssl.SSLError as e:
         raise MKFetcherError("Error establishing TLS connection") from e
 
+    if ssock.session_reused:
+        tls_session_cache.stats.resumed_handshakes += 1
+    else:
+        tls_session_cache.stats.full_handshakes += 1
+    return ssock
+
 
 class TCPFetcher(Fetcher[AgentRawData]):
     def __init__(
@@ -88,6 +220,7 @@ class TCPFetcher(Fetcher[AgentRawData]):
         self.tls_config: Final = tls_config
         self._logger: Final = logging.getLogger("cmk.helper.tcp")
         self._socket: socket.socket | None = None
+        self.receive_stats = ReceiveStats()
 
     def __repr__(self) -> str:
         return (
@@ -154,10 +287,12 @@ class TCPFetcher(Fetcher[AgentRawData]):
         if sock is None:
             raise OSError(errno.ENOTCONN, os.strerror(errno.ENOTCONN))
 
+        self.receive_stats = ReceiveStats()
         controller_uuid = get_uuid_link_manager().get_uuid(self.host_name)
         agent_data = self._get_agent_data(
             sock, str(controller_uuid) if controller_uuid is not None else None
         )
+        self._logger.debug("[%s] Received: %s", self.host_name, self.receive_stats)
         return agent_data
 
     def _from_tls(
@@ -166,12 +301,22 @@ class TCPFetcher(Fetcher[AgentRawData]):
         self._logger.debug("Reading data from agent via TLS socket")
         with wrap_tls(sock, server_hostname, tls_config=self.tls_config) as ssock:
             self._logger.debug("Reading data from agent")
-            raw_agent_data = recvall(ssock)
+            raw_agent_data = recvall(ssock, stats=self.receive_stats)
+            tls_session_cache.update(self.tls_config, ssock)
+            self._logger.debug(
+                "%s TLS session, %s",
+                "Resumed" if ssock.session_reused else "New",
+                tls_session_cache.stats,
+            )
         try:
             agent_data = AgentCtlMessage.from_bytes(raw_agent_data).payload
         except ValueError as e:
             raise MKFetcherError(f"Failed to deserialize versioned agent data: {e!r}") from e
 
+        if not isinstance(agent_data, memoryview):
+            # The payload has been decompressed into a new buffer.
+            self.receive_stats.copies += 1
+
         if len(memoryview(agent_data)) <= 2:
             raise MKFetcherError("Empty payload from controller at %s:%d" % self.address)
 
@@ -212,18 +357,20 @@ class TCPFetcher(Fetcher[AgentRawData]):
             protocol, output = self._from_tls(sock, server_hostname)
         else:
             self._logger.debug("Reading data from agent")
-            output = recvall(sock, socket.MSG_WAITALL)
+            output = recvall(sock, socket.MSG_WAITALL, stats=self.receive_stats)
 
         if not memoryview(output):
             return AgentRawData(b"")  # nothing to to, validation will fail
 
         if protocol is TransportProtocol.PLAIN:
+            self.receive_stats.copies += 1
             return AgentRawData(protocol.value + output)  # bring back stolen bytes
 
         if (secret := self.pre_shared_secret) is None:
             raise MKFetcherError("Data is encrypted but no secret is known")
 
         self._logger.debug("Try to decrypt output")
+        self.receive_stats.copies += 1
         try:
             return AgentRawData(decrypt_by_agent_protocol(secret, protocol, output))
         except MKTimeout:
@@ -4,7 +4,17 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 from ._agent import AgentFileCache
-from ._cache import FileCache, FileCacheMode, FileCacheOptions, MaxAge, NoCache
+from ._cache import (
+    FileCache,
+    FileCacheMode,
+    FileCacheOptions,
+    MaxAge,
+    memory_cache,
+    MemoryCache,
+    MemoryCacheStats,
+    NoCache,
+    read_cache_file,
+)
 from ._snmp import SNMPFileCache
 
 __all__ = [
@@ -12,7 +22,11 @@ __all__ = [
     "FileCacheOptions",
     "FileCacheMode",
     "MaxAge",
+    "MemoryCache",
+    "MemoryCacheStats",
+    "memory_cache",
     "AgentFileCache",
     "SNMPFileCache",
     "NoCache",
+    "read_cache_file",
 ]
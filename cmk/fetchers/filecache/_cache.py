@@ -49,7 +49,10 @@ import abc
 import enum
 import logging
 import os
+import threading
 import time
+import zlib
+from collections import OrderedDict
 from collections.abc import Sized
 from dataclasses import dataclass
 from pathlib import Path
@@ -67,13 +70,42 @@ __all__ = [
     "FileCacheMode",
     "FileCacheOptions",
     "MaxAge",
+    "MemoryCache",
+    "MemoryCacheStats",
+    "memory_cache",
     "NoCache",
+    "read_cache_file",
 ]
 
 
 TFileCache = TypeVar("TFileCache", bound="FileCache")
 _TRawData = TypeVar("_TRawData", bound=Sized)
 
+# Prefix of the compressed cache files.  Neither agent outputs nor the SNMP
+# cache files start with a NUL byte, so that both formats can be read.
+_COMPRESSED_MAGIC: Final = b"\x00CMKZ"
+# Speed matters more than size, see tests/scripts/benchmark_file_cache_compression.py
+_COMPRESSION_LEVEL: Final = 1
+
+
+def _compress_cache_file(data: bytes) -> bytes:
+    return _COMPRESSED_MAGIC + zlib.compress(data, _COMPRESSION_LEVEL)
+
+
+def _decompress_cache_file(data: bytes) -> bytes:
+    """Return the contents of a cache file, compressed or not"""
+    if not data.startswith(_COMPRESSED_MAGIC):
+        return data
+    try:
+        return zlib.decompress(memoryview(data)[len(_COMPRESSED_MAGIC) :])
+    except zlib.error as e:
+        raise MKFetcherError(f"Cannot decompress cache file: {e}") from e
+
+
+def read_cache_file(path: Path) -> bytes:
+    """Read the contents of a cache file, compressed or not"""
+    return _decompress_cache_file(path.read_bytes())
+
 
 class MaxAge(NamedTuple):
     """Maximum age allowed for the cached data, in seconds"""
@@ -94,6 +126,90 @@ class MaxAge(NamedTuple):
         return self._asdict().get(mode.name.lower(), default)
 
 
+@dataclass(kw_only=True)
+class MemoryCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def __str__(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses, {self.evictions} evictions"
+
+
+class MemoryCache:
+    """LRU cache of the contents of the cache files
+
+    The entries are keyed by the path, the modification time and the size of
+    the files, so that a changed file is never served from memory.  The cache
+    is disabled as long as `max_size` (in bytes) is zero.
+
+    """
+
+    def __init__(self, max_size: int = 0) -> None:
+        self._max_size = max_size
+        self.size = 0
+        self.stats: Final = MemoryCacheStats()
+        self._entries: Final[OrderedDict[Path, tuple[tuple[int, int], bytes]]] = OrderedDict()
+        self._lock: Final = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._max_size!r})"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, max_size: int) -> None:
+        with self._lock:
+            self._max_size = max_size
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def get(self, path: Path, stat: os.stat_result) -> bytes | None:
+        if not self._max_size:
+            return None
+        with self._lock:
+            try:
+                key, data = self._entries[path]
+            except KeyError:
+                self.stats.misses += 1
+                return None
+            if key != (stat.st_mtime_ns, stat.st_size):
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.stats.hits += 1
+            return data
+
+    def put(self, path: Path, stat: os.stat_result, data: bytes) -> None:
+        if len(data) > self._max_size:
+            return
+        with self._lock:
+            if (old := self._entries.pop(path, None)) is not None:
+                self.size -= len(old[1])
+            self._entries[path] = ((stat.st_mtime_ns, stat.st_size), data)
+            self.size += len(data)
+            self._evict()
+
+    def _evict(self) -> None:
+        while self.size > self._max_size:
+            _path, (_key, data) = self._entries.popitem(last=False)
+            self.size -= len(data)
+            self.stats.evictions += 1
+
+
+# Shared by all file caches of the process, see `MemoryCache`.
+memory_cache: Final = MemoryCache()
+
+
 @enum.unique
 class FileCacheMode(enum.IntFlag):
     DISABLED = enum.auto()
@@ -111,6 +227,7 @@ class FileCache(Generic[_TRawData], abc.ABC):
         simulation: bool,
         use_only_cache: bool,
         file_cache_mode: FileCacheMode | int,
+        compress: bool = False,
     ) -> None:
         super().__init__()
         self.path_template: Final = path_template
@@ -121,6 +238,7 @@ class FileCache(Generic[_TRawData], abc.ABC):
         self.simulation = simulation
         self.use_only_cache = use_only_cache
         self.file_cache_mode = FileCacheMode(file_cache_mode)
+        self.compress = compress
         self._logger: Final = logging.getLogger("cmk.helper")
 
     def __repr__(self) -> str:
@@ -133,6 +251,7 @@ class FileCache(Generic[_TRawData], abc.ABC):
                     f"simulation={self.simulation}",
                     f"use_only_cache={self.use_only_cache}",
                     f"file_cache_mode={self.file_cache_mode.value}",
+                    f"compress={self.compress}",
                 )
             )
             + ")"
@@ -148,6 +267,7 @@ class FileCache(Generic[_TRawData], abc.ABC):
                 self.simulation == other.simulation,
                 self.use_only_cache == other.use_only_cache,
                 self.file_cache_mode == other.file_cache_mode,
+                self.compress == other.compress,
             )
         )
 
@@ -205,11 +325,13 @@ class FileCache(Generic[_TRawData], abc.ABC):
 
         path = self._make_path(self.path_template, mode=mode)
         try:
-            cachefile_age = time.time() - path.stat().st_mtime
+            stat = path.stat()
         except FileNotFoundError:
             self._logger.debug("Not using cache (does not exist)")
             return None
 
+        cachefile_age = time.time() - stat.st_mtime
+
         if cachefile_age > self.max_age.get(mode):
             self._logger.debug(
                 "Not using cache (Too old. Age is %d sec, allowed is %s sec)",
@@ -220,18 +342,23 @@ class FileCache(Generic[_TRawData], abc.ABC):
 
         # TODO: Use some generic store file read function to generalize error handling,
         # but there is currently no function that simply reads data from the file
-        try:
-            cache_file = path.read_bytes()
-        except FileNotFoundError:
-            self._logger.debug("Not using cache (Does not exist)")
-            return None
+        if (cache_file := memory_cache.get(path, stat)) is None:
+            try:
+                with path.open("rb") as f:
+                    stat = os.fstat(f.fileno())
+                    cache_file = f.read()
+            except FileNotFoundError:
+                self._logger.debug("Not using cache (Does not exist)")
+                return None
+            if cache_file and memory_cache.max_size:
+                memory_cache.put(path, stat, cache_file)
 
         if not cache_file:
             self._logger.debug("Not using cache (Empty)")
             return None
 
         self._logger.log(VERBOSE, "Using data from cache file %s", path)
-        return self._from_cache_file(cache_file)
+        return self._from_cache_file(_decompress_cache_file(cache_file))
 
     def write(self, raw_data: _TRawData, mode: Mode) -> None:
         if FileCacheMode.WRITE not in self.file_cache_mode or not self._do_cache(mode):
@@ -246,8 +373,11 @@ class FileCache(Generic[_TRawData], abc.ABC):
             raise MKGeneralException(f"Cannot create directory {path.parent!r}: {e}")
 
         self._logger.debug("Write data to cache file %s", path)
+        cache_file = self._to_cache_file(raw_data)
+        if self.compress:
+            cache_file = _compress_cache_file(cache_file)
         try:
-            _store.save_bytes_to_file(path, self._to_cache_file(raw_data))
+            _store.save_bytes_to_file(path, cache_file)
         except MKTimeout:
             raise
         except Exception as e:
@@ -291,6 +421,8 @@ class FileCacheOptions:
     use_only_cache: bool = False
     # Set by the --force option from inventory.
     keep_outdated: bool = False
+    # Write compressed cache files, reading them is transparent.
+    compress: bool = False
 
     def file_cache_mode(self) -> FileCacheMode:
         return FileCacheMode.DISABLED if self.disabled else FileCacheMode.READ_WRITE
@@ -3,9 +3,12 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import logging
 import subprocess
-from collections.abc import Iterable
-from typing import assert_never, Literal, TypeAlias
+import threading
+from collections import defaultdict
+from collections.abc import Iterable, Mapping, Sequence
+from typing import assert_never, Final, Literal, TypeAlias
 
 from cmk.ccc.exceptions import MKGeneralException, MKSNMPError, MKTimeout
 
@@ -13,7 +16,15 @@ from cmk.utils import tty
 from cmk.utils.log import VERBOSE
 from cmk.utils.sectionname import SectionName
 
-from cmk.snmplib import OID, SNMPBackend, SNMPContext, SNMPRawValue, SNMPRowInfo, SNMPVersion
+from cmk.snmplib import (
+    OID,
+    SNMPBackend,
+    SNMPContext,
+    SNMPHostConfig,
+    SNMPRawValue,
+    SNMPRowInfo,
+    SNMPVersion,
+)
 
 from ._utils import strip_snmp_value
 
@@ -23,6 +34,24 @@ CommandType: TypeAlias = Literal["snmpget", "snmpgetnext", "snmpwalk"]
 
 
 class ClassicSNMPBackend(SNMPBackend):
+    def __init__(self, snmp_config: SNMPHostConfig, logger: logging.Logger) -> None:
+        super().__init__(snmp_config, logger)
+        # The walks of several threads, see `kill_walks()`
+        self._walks: Final[set[subprocess.Popen[str]]] = set()
+        self._walks_killed = False
+        self._walks_lock: Final = threading.Lock()
+
+    def kill_walks(self) -> None:
+        """Kill the running walks and all walks started later on
+
+        MKTimeout is only raised in the main thread, the walks running in
+        other threads have to be ended this way.
+        """
+        with self._walks_lock:
+            self._walks_killed = True
+            for snmp_process in self._walks:
+                snmp_process.kill()
+
     def get(self, /, oid: OID, *, context: SNMPContext) -> SNMPRawValue | None:
         if oid.endswith(".*"):
             oid_prefix = oid[:-2]
@@ -120,12 +149,19 @@ class ClassicSNMPBackend(SNMPBackend):
         ) as snmp_process:
             assert snmp_process.stdout
             assert snmp_process.stderr
+            with self._walks_lock:
+                self._walks.add(snmp_process)
+                if self._walks_killed:
+                    snmp_process.kill()
             try:
                 rowinfo = self._get_rowinfo_from_walk_output(snmp_process.stdout)
                 error = snmp_process.stderr.read()
             except MKTimeout:
                 snmp_process.kill()
                 raise
+            finally:
+                with self._walks_lock:
+                    self._walks.discard(snmp_process)
 
         if snmp_process.returncode:
             self._logger.log(
@@ -136,6 +172,52 @@ class ClassicSNMPBackend(SNMPBackend):
             )
         return rowinfo
 
+    def walk_table(
+        self,
+        /,
+        oids: Sequence[OID],
+        *,
+        context: SNMPContext,
+        section_name: SectionName | None = None,
+        table_base_oid: OID | None = None,
+    ) -> Mapping[OID, SNMPRowInfo]:
+        """Walk the columns of a table
+
+        With bulk table walks, the columns that belong to the same table entry
+        are fetched with a single bulk walk over the entry, instead of one
+        process per column.  This fetches the columns that are not asked for as
+        well, but the GETBULK requests carry many rows at once.
+        """
+        if not (self.config.bulk_table_walks and self.config.use_bulkwalk):
+            return super().walk_table(
+                oids, context=context, section_name=section_name, table_base_oid=table_base_oid
+            )
+
+        columns_of_entry: dict[OID, list[OID]] = defaultdict(list)
+        for oid in oids:
+            columns_of_entry[oid.rsplit(".", 1)[0]].append(oid)
+
+        walked: dict[OID, SNMPRowInfo] = {}
+        for entry, columns in columns_of_entry.items():
+            if len(columns) == 1:
+                walked[columns[0]] = self.walk(
+                    columns[0],
+                    context=context,
+                    section_name=section_name,
+                    table_base_oid=table_base_oid,
+                )
+                continue
+
+            rows_of_column: dict[OID, SNMPRowInfo] = {column: [] for column in columns}
+            for row in self.walk(
+                entry, context=context, section_name=section_name, table_base_oid=table_base_oid
+            ):
+                column = f"{entry}.{row[0][len(entry) + 1 :].split('.', 1)[0]}"
+                if (rows := rows_of_column.get(column)) is not None:
+                    rows.append(row)
+            walked |= rows_of_column
+        return walked
+
     def _get_rowinfo_from_walk_output(self, lines: Iterable[str]) -> SNMPRowInfo:
         # Ugly(1): in some cases snmpwalk inserts line feed within one
         # dataset. This happens for example on hexdump outputs longer
@@ -4,10 +4,13 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 """Abstract classes and types."""
 
+import bisect
 import logging
+import threading
+from collections import OrderedDict
 from collections.abc import Sequence
 from pathlib import Path
-from typing import Final
+from typing import Final, NamedTuple
 
 from cmk.ccc.exceptions import MKException, MKGeneralException, MKSNMPError
 
@@ -20,6 +23,47 @@ from ._utils import strip_snmp_value
 __all__ = ["StoredWalkSNMPBackend"]
 
 
+class _WalkIndex(NamedTuple):
+    """The parsed walk, sorted by OID
+
+    `keys[n]` is the OID of `rows[n]` as tuple of integers.  All OIDs below
+    some prefix form a contiguous range that is found by bisection.
+    """
+
+    keys: Sequence[tuple[int, ...]]
+    rows: SNMPRowInfo
+
+
+# Walk files are parsed once per process and kept for the following walks.
+# An index belongs to one version of a file, identified by its path, mtime and
+# size.  The least recently used ones are dropped once their files add up to
+# more than this many bytes.
+_MAX_INDEXED_SIZE: Final = 32 * 1024 * 1024
+_indexes: Final[OrderedDict[tuple[Path, int, int], _WalkIndex]] = OrderedDict()
+# The SNMP fetcher may walk in several threads.
+_indexes_lock: Final = threading.Lock()
+
+
+def _get_index(key: tuple[Path, int, int]) -> _WalkIndex | None:
+    with _indexes_lock:
+        if (index := _indexes.get(key)) is not None:
+            _indexes.move_to_end(key)
+        return index
+
+
+def _add_index(key: tuple[Path, int, int], index: _WalkIndex) -> None:
+    path, _mtime, _size = key
+    with _indexes_lock:
+        for stale in [other for other in _indexes if other[0] == path]:
+            del _indexes[stale]
+        _indexes[key] = index
+
+        indexed_size = sum(size for _path, _mtime, size in _indexes)
+        while indexed_size > _MAX_INDEXED_SIZE and len(_indexes) > 1:
+            (_path, _mtime, size), _index = _indexes.popitem(last=False)
+            indexed_size -= size
+
+
 class StoredWalkSNMPBackend(SNMPBackend):
     def __init__(self, snmp_config: SNMPHostConfig, logger: logging.Logger, path: Path) -> None:
         super().__init__(snmp_config, logger)
@@ -57,34 +101,15 @@ class StoredWalkSNMPBackend(SNMPBackend):
             dot_star = False
 
         self._logger.debug(f"  Loading {oid}")
-        lines = self.read_walk_data()
-
-        begin = 0
-        end = len(lines)
-        hit = None
-        while end - begin > 0:
-            current = (begin + end) // 2
-            parts = lines[current].split(None, 1)
-            comp = parts[0]
-            hit = StoredWalkSNMPBackend._compare_oids(oid_prefix, comp)
-            if hit == 0:
-                break
-            if hit == 1:  # we are too low
-                begin = current + 1
-            else:
-                end = current
-
-        if hit != 0:
-            return []  # not found
-
-        rowinfo = StoredWalkSNMPBackend._collect_until(oid, oid_prefix, lines, current, -1)
-        rowinfo.reverse()
-        rowinfo += StoredWalkSNMPBackend._collect_until(oid, oid_prefix, lines, current + 1, 1)
+        index = self.read_walk_index()
+        prefix = StoredWalkSNMPBackend._to_bin_string(oid_prefix)
+        begin = bisect.bisect_left(index.keys, prefix)
+        end = bisect.bisect_left(index.keys, (*prefix[:-1], prefix[-1] + 1), begin)
 
         if dot_star:
-            return [rowinfo[0]]
+            return index.rows[begin : min(begin + 1, end)]
 
-        return rowinfo
+        return index.rows[begin:end]
 
     @staticmethod
     def read_walk_from_path(path: Path, logger: logging.Logger) -> Sequence[str]:
@@ -100,21 +125,41 @@ class StoredWalkSNMPBackend(SNMPBackend):
                     lines[-1] += line
         return lines
 
-    def read_walk_data(self) -> Sequence[str]:
+    def read_walk_index(self) -> _WalkIndex:
         try:
-            return self.read_walk_from_path(self.path, self._logger)
+            stat = self.path.stat()
+            key = (self.path, stat.st_mtime_ns, stat.st_size)
+            if (index := _get_index(key)) is not None:
+                return index
+
+            index = StoredWalkSNMPBackend._make_index(
+                self.read_walk_from_path(self.path, self._logger), self._logger
+            )
         except OSError:
             raise MKSNMPError(f"No snmpwalk file {self.path}")
 
+        _add_index(key, index)
+        return index
+
     @staticmethod
-    def _compare_oids(a: OID, b: OID) -> int:
-        aa = StoredWalkSNMPBackend._to_bin_string(a)
-        bb = StoredWalkSNMPBackend._to_bin_string(b)
-        if len(aa) <= len(bb) and bb[: len(aa)] == aa:
-            result = 0
-        else:
-            result = (aa > bb) - (aa < bb)
-        return result
+    def _make_index(lines: Sequence[str], logger: logging.Logger) -> _WalkIndex:
+        entries = []
+        for line in lines:
+            parts = line.split(None, 1)
+            oid = parts[0].removeprefix(".")
+            try:
+                key = StoredWalkSNMPBackend._to_bin_string(oid)
+            except MKGeneralException:
+                logger.debug(f"  Skipping invalid OID {oid}")
+                continue
+            value = strip_snmp_value(parts[1]) if len(parts) > 1 else b""
+            entries.append((key, ("." + oid, value)))
+        # The walks are sorted anyway, but better safe than sorry.
+        entries.sort(key=lambda entry: entry[0])
+        return _WalkIndex(
+            keys=[key for key, _row in entries],
+            rows=[row for _key, row in entries],
+        )
 
     @staticmethod
     def _to_bin_string(oid: OID) -> tuple[int, ...]:
@@ -124,33 +169,3 @@ class StoredWalkSNMPBackend(SNMPBackend):
             raise
         except Exception:
             raise MKGeneralException(f"Invalid OID {oid}")
-
-    @staticmethod
-    def _collect_until(
-        oid: OID, oid_prefix: OID, lines: Sequence[str], index: int, direction: int
-    ) -> SNMPRowInfo:
-        rows = []
-        # Handle case, where we run after the end of the lines list
-        if index >= len(lines):
-            if direction > 0:
-                return []
-            index -= 1
-        while True:
-            line = lines[index]
-            parts = line.split(None, 1)
-            o = parts[0]
-            if o.startswith("."):
-                o = o[1:]
-            if o == oid or o.startswith(oid_prefix + "."):
-                if len(parts) > 1:
-                    value = parts[1]
-                else:
-                    value = ""
-                # Fix for missing starting oids
-                rows.append(("." + o, strip_snmp_value(value)))
-                index += direction
-                if index < 0 or index >= len(lines):
-                    break
-            else:
-                break
-        return rows
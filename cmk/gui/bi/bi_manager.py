@@ -8,30 +8,43 @@ from pathlib import Path
 
 from livestatus import LivestatusOutputFormat, LivestatusResponse, SiteId
 
-from cmk.ccc import store
 from cmk.ccc.exceptions import MKGeneralException
 
 from cmk.utils.paths import default_config_dir
 
 from cmk.gui import sites
+from cmk.gui.config import active_config
 from cmk.gui.hooks import request_memoize
 from cmk.gui.i18n import _
 
-from cmk.bi.aggregation import BIAggregation
+from cmk.bi.compiled_format import (
+    CompiledAggregationFile,
+    is_compact_file,
+    load_compiled_aggregation,
+)
 from cmk.bi.compiler import BICompiler, path_compiled_aggregations
-from cmk.bi.computer import BIComputer
+from cmk.bi.computer import BIComputer, BIResultCache
 from cmk.bi.data_fetcher import BIStatusFetcher
 from cmk.bi.lib import SitesCallback
 from cmk.bi.trees import BICompiledAggregation, BICompiledRule
 
+# Computed results are reused by all requests handled by this process
+bi_result_cache = BIResultCache()
+
 
 class BIManager:
     def __init__(self) -> None:
         sites_callback = SitesCallback(all_sites_with_id_and_online, bi_livestatus_query, _)
         self.compiler = BICompiler(self.bi_configuration_file(), sites_callback)
         self.compiler.load_compiled_aggregations()
-        self.status_fetcher = BIStatusFetcher(sites_callback)
-        self.computer = BIComputer(self.compiler.compiled_aggregations, self.status_fetcher)
+        self.status_fetcher = BIStatusFetcher(
+            sites_callback,
+            chunk_size=active_config.bi_status_fetch["chunk_size"],
+            full_fetch_threshold=active_config.bi_status_fetch["full_fetch_threshold"],
+        )
+        self.computer = BIComputer(
+            self.compiler.compiled_aggregations, self.status_fetcher, bi_result_cache
+        )
 
     @classmethod
     def bi_configuration_file(cls) -> str:
@@ -62,15 +75,21 @@ def bi_livestatus_query(
 
 @request_memoize(maxsize=10000)
 def load_compiled_branch(aggr_id: str, branch_title: str) -> BICompiledRule:
-    compiled_aggregation = _load_compiled_aggregation(aggr_id)
-    for branch in compiled_aggregation.branches:
-        if branch.properties.title == branch_title:
-            return branch
+    if not is_compact_file(path_compiled_aggregations.joinpath(aggr_id)):
+        # Pickled by an earlier version, replaced with the next compilation
+        for branch in _load_compiled_aggregation(aggr_id).branches:
+            if branch.properties.title == branch_title:
+                return branch
+    elif compiled_branch := _compiled_aggregation_file(aggr_id).load_branch(branch_title):
+        return compiled_branch
     raise MKGeneralException(f"Branch {branch_title} not found in aggregation {aggr_id}")
 
 
+@request_memoize(maxsize=10000)
+def _compiled_aggregation_file(aggr_id: str) -> CompiledAggregationFile:
+    return CompiledAggregationFile(path_compiled_aggregations.joinpath(aggr_id))
+
+
 @request_memoize(maxsize=10000)
 def _load_compiled_aggregation(aggr_id: str) -> BICompiledAggregation:
-    return BIAggregation.create_trees_from_schema(
-        store.load_object_from_pickle_file(path_compiled_aggregations.joinpath(aggr_id), default={})
-    )
+    return load_compiled_aggregation(path_compiled_aggregations.joinpath(aggr_id))
@@ -9,7 +9,6 @@ from typing import Any, Literal
 
 from livestatus import OnlySites, SiteId
 
-from cmk.ccc import store
 from cmk.ccc.exceptions import MKGeneralException
 
 from cmk.utils.hostaddress import HostName
@@ -55,7 +54,7 @@ from cmk.gui.views.command.base import CommandSpecWithoutSite
 from cmk.gui.visuals import get_livestatus_filter_headers
 from cmk.gui.visuals.filter import Filter
 
-from cmk.bi.aggregation import BIAggregation
+from cmk.bi.compiled_format import load_compiled_aggregation
 from cmk.bi.computer import BIAggregationFilter
 from cmk.bi.data_fetcher import get_cache_dir
 from cmk.bi.lib import FrozenMarker
@@ -916,15 +915,17 @@ def convert_tree_to_frozen_diff_tree(row: Row) -> tuple[Row, bool]:
 
     # Load other aggregation from disk
     other_aggr_path = Path(get_cache_dir(), "compiled_aggregations", other_aggregation)
-    other_aggr = BIAggregation.create_trees_from_schema(
-        store.load_object_from_pickle_file(other_aggr_path, default={})
-    )
+    other_aggr = load_compiled_aggregation(other_aggr_path)
 
     aggregations_are_equal = True
     for bi_other_branch in other_aggr.branches:
         if bi_other_branch.properties.title == other_branch:
             aggregations_are_equal = combine_branches(bi_ref_branch, bi_other_branch)
 
+    if not aggregations_are_equal:
+        # The reference branch has been modified, its results must not be cached
+        bi_ref_aggregation.version = None
+
     required_aggregations = [(bi_ref_aggregation, [bi_ref_branch])]
     required_elements = bi_manager.computer.get_required_elements(required_aggregations)
     bi_manager.status_fetcher.update_states(required_elements)
@@ -104,6 +104,7 @@ from cmk.gui.valuespec import (
     DualListChoice,
     Filesize,
     FixedValue,
+    Float,
     Foldable,
     ID,
     Integer,
@@ -262,6 +263,9 @@ def register(
     config_var_registry.register(ConfigVariableEventConsoleServiceLevels)
     config_var_registry.register(ConfigVariableEventConsoleSqliteHousekeepingInterval)
     config_var_registry.register(ConfigVariableEventConsoleSqliteFreelistSize)
+    config_var_registry.register(ConfigVariableEventConsoleSqliteDurability)
+    config_var_registry.register(ConfigVariableEventConsoleSqliteBatchSize)
+    config_var_registry.register(ConfigVariableEventConsoleSqliteBatchDelay)
 
     rulespec_group_registry.register(RulespecGroupEventConsole)
     rulespec_registry.register(ECEventLimitRulespec)
@@ -4147,6 +4151,77 @@ class ConfigVariableEventConsoleSqliteFreelistSize(ConfigVariable):
         )
 
 
+class ConfigVariableEventConsoleSqliteDurability(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupEventConsoleGeneric
+
+    def domain(self) -> ABCConfigDomain:
+        return config_domain_registry["ec"]
+
+    def ident(self) -> str:
+        return "sqlite_durability"
+
+    def valuespec(self) -> ValueSpec:
+        return DropdownChoice(
+            title=_("Event Console history durability"),
+            help=_(
+                "The Event Console can write its history entries in batches, which keeps up "
+                "with a high number of incoming messages. Entries that have not been written "
+                "yet are lost if the Event Console crashes. Alternatively, every history "
+                "entry is written on its own before the Event Console continues."
+            ),
+            choices=[
+                ("batched", _("Write history entries in batches")),
+                ("immediate", _("Write every history entry immediately")),
+            ],
+        )
+
+
+class ConfigVariableEventConsoleSqliteBatchSize(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupEventConsoleGeneric
+
+    def domain(self) -> ABCConfigDomain:
+        return config_domain_registry["ec"]
+
+    def ident(self) -> str:
+        return "sqlite_batch_size"
+
+    def valuespec(self) -> ValueSpec:
+        return Integer(
+            title=_("Event Console history batch size"),
+            help=_(
+                "When writing the history in batches, the queued history entries are "
+                "written as soon as this many of them are queued."
+            ),
+            unit=_("entries"),
+            minvalue=1,
+        )
+
+
+class ConfigVariableEventConsoleSqliteBatchDelay(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupEventConsoleGeneric
+
+    def domain(self) -> ABCConfigDomain:
+        return config_domain_registry["ec"]
+
+    def ident(self) -> str:
+        return "sqlite_batch_delay"
+
+    def valuespec(self) -> ValueSpec:
+        return Float(
+            title=_("Event Console history batch delay"),
+            help=_(
+                "When writing the history in batches, the queued history entries are "
+                "written at the latest after this time."
+            ),
+            unit=_("seconds"),
+            minvalue=0.01,
+            maxvalue=60.0,
+        )
+
+
 class ConfigVariableEventConsoleStatisticsInterval(ConfigVariable):
     def group(self) -> type[ConfigVariableGroup]:
         return ConfigVariableGroupEventConsoleGeneric
@@ -625,6 +625,12 @@ class CREConfig:
             "line_style": "straight",
         }
     )
+    bi_status_fetch: dict[str, int] = field(
+        default_factory=lambda: {
+            "chunk_size": 1000,
+            "full_fetch_threshold": 5000,
+        }
+    )
     bi_layouts: dict[str, dict] = field(
         default_factory=lambda: {
             "templates": {},
@@ -154,6 +154,7 @@ def register(
     config_variable_registry.register(ConfigVariableStartURL)
     config_variable_registry.register(ConfigVariablePageHeading)
     config_variable_registry.register(ConfigVariableBIDefaultLayout)
+    config_variable_registry.register(ConfigVariableBIStatusFetch)
     config_variable_registry.register(ConfigVariablePagetitleDateFormat)
     config_variable_registry.register(ConfigVariableEscapePluginOutput)
     config_variable_registry.register(ConfigVariableDrawRuleIcon)
@@ -208,10 +209,16 @@ def register(
     config_variable_registry.register(ConfigVariableRestartLocking)
     config_variable_registry.register(ConfigVariableDelayPrecompile)
     config_variable_registry.register(ConfigVariableClusterMaxCachefileAge)
+    config_variable_registry.register(ConfigVariableCompressCacheFiles)
     config_variable_registry.register(ConfigVariablePiggybackMaxCachefileAge)
     config_variable_registry.register(ConfigVariableCheckMKPerfdataWithTimes)
+    config_variable_registry.register(ConfigVariableCheckMKPhaseTimes)
     config_variable_registry.register(ConfigVariableUseDNSCache)
     config_variable_registry.register(ConfigVariableChooseSNMPBackend)
+    config_variable_registry.register(ConfigVariableSNMPBulkTableWalks)
+    config_variable_registry.register(ConfigVariableSNMPMaxConcurrentWalks)
+    config_variable_registry.register(ConfigVariableSNMPScanCacheMaxAge)
+    config_variable_registry.register(ConfigVariableSNMPWalkCacheMaxAge)
     config_variable_registry.register(ConfigVariableUseInlineSNMP)
     config_variable_registry.register(ConfigVariableHTTPProxies)
     config_variable_group_registry.register(ConfigVariableGroupServiceDiscovery)
@@ -1039,6 +1046,49 @@ class ConfigVariableBIDefaultLayout(ConfigVariable):
         return [("round", _("Round")), ("straight", _("Straight")), ("elbow", _("Elbow"))]
 
 
+class ConfigVariableBIStatusFetch(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupUserInterface
+
+    def domain(self) -> ABCConfigDomain:
+        return ConfigDomainGUI()
+
+    def ident(self) -> str:
+        return "bi_status_fetch"
+
+    def valuespec(self) -> ValueSpec:
+        return Dictionary(
+            title=_("BI status queries"),
+            help=_(
+                "The status of the hosts of the shown BI aggregations is queried with a filter "
+                "for these hosts. Big host filters slow down the monitoring core, so they are "
+                "split into several queries."
+            ),
+            elements=[
+                (
+                    "chunk_size",
+                    Integer(
+                        title=_("Maximum number of hosts per query"),
+                        minvalue=1,
+                    ),
+                ),
+                (
+                    "full_fetch_threshold",
+                    Integer(
+                        title=_("Query all hosts of a site above"),
+                        help=_(
+                            "If more hosts of a site are required, the status of all hosts of "
+                            "this site is queried without a host filter."
+                        ),
+                        unit=_("hosts"),
+                        minvalue=1,
+                    ),
+                ),
+            ],
+            optional_keys=[],
+        )
+
+
 class ConfigVariablePagetitleDateFormat(ConfigVariable):
     def group(self) -> type[ConfigVariableGroup]:
         return ConfigVariableGroupUserInterface
@@ -3158,6 +3208,30 @@ class ConfigVariableClusterMaxCachefileAge(ConfigVariable):
         )
 
 
+class ConfigVariableCompressCacheFiles(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupCheckExecution
+
+    def domain(self) -> ABCConfigDomain:
+        return ConfigDomainCore()
+
+    def ident(self) -> str:
+        return "compress_cache_files"
+
+    def valuespec(self) -> ValueSpec:
+        return Checkbox(
+            title=_("Compress cache files"),
+            label=_("compress the cached agent and SNMP data"),
+            help=_(
+                "If you enable this option, then Checkmk compresses the agent outputs and "
+                "the SNMP data it stores in its cache files. This reduces the memory used "
+                "by the cache files in the temporary file system of the site considerably, "
+                "at the cost of some CPU time for every read and write. Cache files that "
+                "have been written before are read as they are."
+            ),
+        )
+
+
 class ConfigVariablePiggybackMaxCachefileAge(ConfigVariable):
     def group(self) -> type[ConfigVariableGroup]:
         return ConfigVariableGroupCheckExecution
@@ -3202,6 +3276,32 @@ class ConfigVariableCheckMKPerfdataWithTimes(ConfigVariable):
         )
 
 
+class ConfigVariableCheckMKPhaseTimes(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupCheckExecution
+
+    def domain(self) -> ABCConfigDomain:
+        return ConfigDomainCore()
+
+    def ident(self) -> str:
+        return "check_mk_phase_times"
+
+    def valuespec(self) -> ValueSpec:
+        return Checkbox(
+            title=_("Checkmk phase times"),
+            label=_("Measure the time spent in the phases of the Checkmk service"),
+            help=_(
+                "Enabling this option measures the time the Checkmk service spends in "
+                "fetching, parsing, looking up the services, checking, submitting and "
+                "inventorizing, as well as the time of every parse function and every check "
+                "plugin. The times are accumulated as histograms per host in "
+                "<tt>~/tmp/check_mk/phase_times</tt>. Together with the option <i>Checkmk "
+                "with times performance data</i>, the times of the phases are also returned "
+                "as performance data."
+            ),
+        )
+
+
 class ConfigVariableUseDNSCache(ConfigVariable):
     def group(self) -> type[ConfigVariableGroup]:
         return ConfigVariableGroupCheckExecution
@@ -3283,6 +3383,107 @@ class ConfigVariableChooseSNMPBackend(ConfigVariable):
         )
 
 
+class ConfigVariableSNMPBulkTableWalks(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupCheckExecution
+
+    def domain(self) -> ABCConfigDomain:
+        return ConfigDomainCore()
+
+    def ident(self) -> str:
+        return "snmp_bulk_table_walks"
+
+    def valuespec(self) -> ValueSpec:
+        return Checkbox(
+            title=_("SNMP bulk table walks"),
+            label=_("Walk all columns of a table at once (classic SNMP backend)"),
+            help=_(
+                "By default the classic SNMP backend runs one <tt>snmpbulkwalk</tt> per column "
+                "of a table. With this option, the columns that belong to the same table entry "
+                "are fetched with a single bulk walk over the entry. This saves many processes "
+                "on devices with large tables, e.g. switches with many ports, at the price of "
+                "also transferring the columns that are not needed. Hosts without bulk walks "
+                "are not affected."
+            ),
+        )
+
+
+class ConfigVariableSNMPMaxConcurrentWalks(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupCheckExecution
+
+    def domain(self) -> ABCConfigDomain:
+        return ConfigDomainCore()
+
+    def ident(self) -> str:
+        return "snmp_max_concurrent_walks"
+
+    def valuespec(self) -> ValueSpec:
+        return Integer(
+            title=_("Concurrent SNMP walks"),
+            label=_("Walk up to"),
+            unit=_("SNMP trees of a host at the same time (classic SNMP backend)"),
+            help=_(
+                "By default the classic SNMP backend walks the SNMP trees of a host one after "
+                "the other. With a value larger than one, independent trees are walked in "
+                "parallel. This shortens the fetching on devices with many sections, but "
+                "puts more load on the device."
+            ),
+            minvalue=1,
+            maxvalue=16,
+        )
+
+
+class ConfigVariableSNMPScanCacheMaxAge(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupCheckExecution
+
+    def domain(self) -> ABCConfigDomain:
+        return ConfigDomainCore()
+
+    def ident(self) -> str:
+        return "snmp_scan_cache_max_age"
+
+    def valuespec(self) -> ValueSpec:
+        return Age(
+            title=_("Reuse OIDs of SNMP scans"),
+            help=_(
+                "By default every SNMP scan, e.g. during the service discovery, fetches the "
+                "system description, the system object and all the other OIDs needed to detect "
+                "the sections of a device again. With a maximum age set here, the OIDs fetched "
+                "by a previous scan are reused until they are older than that. This saves many "
+                "SNMP requests per scan, but changes of the device (e.g. a firmware update) are "
+                "only detected after the values have expired. Set this to zero to always fetch "
+                "the OIDs."
+            ),
+            display=["days", "hours", "minutes"],
+        )
+
+
+class ConfigVariableSNMPWalkCacheMaxAge(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupCheckExecution
+
+    def domain(self) -> ABCConfigDomain:
+        return ConfigDomainCore()
+
+    def ident(self) -> str:
+        return "snmp_walk_cache_max_age"
+
+    def valuespec(self) -> ValueSpec:
+        return Age(
+            title=_("Maximum age of cached SNMP walks"),
+            help=_(
+                "Some sections mark columns of SNMP tables that rarely change to be cached. By "
+                "default these walks are reused until the next service discovery or inventory, "
+                "which fetch them again. With a maximum age set here, the cached walks are also "
+                "reused by the discovery and the inventory, and they are fetched again by the "
+                "checks once they are older than that. Set this to zero for the default."
+            ),
+            display=["days", "hours", "minutes"],
+        )
+
+
 class ConfigVariableUseInlineSNMP(ConfigVariable):
     def group(self) -> type[ConfigVariableGroup]:
         return ConfigVariableGroupCheckExecution
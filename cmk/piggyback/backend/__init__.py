@@ -4,15 +4,18 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 from ._config import Config, PiggybackTimeSettings
+from ._index import PiggybackMetaDataIndex
 from ._storage import (
     cleanup_piggyback_files,
     get_messages_for,
+    get_meta_data_for,
     get_piggybacked_host_with_sources,
     move_for_host_rename,
     PiggybackMessage,
     PiggybackMetaData,
     remove_source_status_file,
     store_piggyback_raw_data,
+    watch_new_message_batches,
     watch_new_messages,
 )
 
@@ -21,11 +24,14 @@ __all__ = [
     "Config",
     "PiggybackTimeSettings",
     "get_messages_for",
+    "get_meta_data_for",
     "get_piggybacked_host_with_sources",
     "move_for_host_rename",
     "PiggybackMessage",
     "PiggybackMetaData",
+    "PiggybackMetaDataIndex",
     "remove_source_status_file",
     "store_piggyback_raw_data",
+    "watch_new_message_batches",
     "watch_new_messages",
 ]
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import logging
+from collections.abc import Iterable, Mapping, Sequence
+from pathlib import Path
+from typing import Final
+
+from cmk.utils.hostaddress import HostName
+
+from . import _segments
+from ._inotify import Event, INotify, Masks, Watchee
+from ._paths import payload_dir, segment_dir, source_status_dir
+from ._storage import (
+    _files_in,
+    _get_mtime,
+    _get_piggybacked_host_folders,
+    _get_source_state_files,
+    _make_segment_meta_data,
+    get_meta_data_for,
+    get_piggybacked_host_with_sources,
+    PiggybackMetaData,
+)
+
+logger = logging.getLogger(__name__)
+
+# inotify watches are limited per user, and the piggyback hub needs them as well.
+# An index takes at most a small fraction of them.
+_MAX_USER_WATCHES: Final = Path("/proc/sys/fs/inotify/max_user_watches")
+_DEFAULT_MAX_USER_WATCHES: Final = 8192
+_WATCHES_FRACTION: Final = 16
+
+_DIR_MASK: Final = Masks.CREATE | Masks.DELETE | Masks.MOVED_FROM | Masks.MOVED_TO | Masks.ONLYDIR
+_FILE_MASK: Final = Masks.DELETE | Masks.MOVED_FROM | Masks.MOVED_TO | Masks.ONLYDIR
+
+
+def default_max_watches() -> int:
+    """The number of watches an index may use, a fraction of the user's limit"""
+    try:
+        max_user_watches = int(_MAX_USER_WATCHES.read_text())
+    except (OSError, ValueError):
+        max_user_watches = _DEFAULT_MAX_USER_WATCHES
+    return max_user_watches // _WATCHES_FRACTION
+
+
+class PiggybackMetaDataIndex:
+    """The piggyback meta data of the site, kept up to date by inotify
+
+    Building the index costs about as much as `get_piggybacked_host_with_sources`.
+    After that, only the changes reported by inotify are applied, so a query only
+    costs as much as its result.
+
+    Every piggybacked host folder needs a watch of its own.  If there are more of
+    them than `max_watches` (by default a small fraction of the user's limit,
+    sources with many piggybacked hosts are stored in segments, which need none),
+    or inotify fails, nothing is watched.  The sources
+    of a piggybacked host are then read from disk for every query, and querying all
+    piggybacked hosts crawls the directories.
+    """
+
+    def __init__(self, omd_root: Path, *, max_watches: int | None = None) -> None:
+        self._omd_root = omd_root
+        self._max_watches = default_max_watches() if max_watches is None else max_watches
+        # piggybacked host -> source -> last update, for the per-host files
+        self._files: dict[HostName, dict[HostName, int]] = {}
+        # source -> last contact, for the per-host files
+        self._last_contacts: dict[HostName, int] = {}
+        # source -> segment index, and piggybacked host -> sources stored in a segment
+        self._segments: dict[HostName, _segments.SegmentIndex] = {}
+        self._segment_sources: dict[HostName, set[HostName]] = {}
+
+        self._inotify: INotify | None = None
+        self._fixed_watches: dict[int, str] = {}
+        self._rebuild()
+
+    @property
+    def is_watching(self) -> bool:
+        return self._inotify is not None
+
+    def get_piggybacked_host_with_sources(self) -> Mapping[HostName, Sequence[PiggybackMetaData]]:
+        """All piggybacked hosts and the meta data of their sources"""
+        self.update()
+        if self._inotify is None:
+            return get_piggybacked_host_with_sources(self._omd_root)
+        return {
+            piggybacked: self._meta_data_of(piggybacked)
+            for piggybacked in self._files.keys() | self._segment_sources.keys()
+        }
+
+    def get_sources_of(self, piggybacked: HostName) -> Sequence[PiggybackMetaData]:
+        """The meta data of all sources of the piggybacked host"""
+        self.update()
+        if self._inotify is None:
+            return get_meta_data_for(piggybacked, self._omd_root)
+        return self._meta_data_of(piggybacked)
+
+    def update(self) -> None:
+        """Apply the changes that happened since the last update"""
+        if self._inotify is None:
+            return
+        try:
+            for event in self._inotify.read(timeout=0):
+                if event.type & Masks.Q_OVERFLOW:
+                    logger.debug("Too many piggyback changes, rebuilding the index")
+                    self._rebuild()
+                    return
+                self._apply(event)
+        except OSError as e:
+            self._stop_watching(str(e))
+
+    def _meta_data_of(self, piggybacked: HostName) -> Sequence[PiggybackMetaData]:
+        meta_data = [
+            PiggybackMetaData(
+                source=source,
+                piggybacked=piggybacked,
+                last_update=last_update,
+                last_contact=self._last_contacts.get(source),
+            )
+            for source, last_update in self._files.get(piggybacked, {}).items()
+        ]
+        meta_data.extend(
+            _make_segment_meta_data(index, piggybacked, index.hosts[piggybacked])
+            for source in self._segment_sources.get(piggybacked, ())
+            if piggybacked in (index := self._segments[source]).hosts
+        )
+        return sorted(meta_data, key=lambda m: m.source)
+
+    def _rebuild(self) -> None:
+        self._files.clear()
+        self._last_contacts.clear()
+        self._segments.clear()
+        self._segment_sources.clear()
+
+        if len(folders := _get_piggybacked_host_folders(self._omd_root)) > self._max_watches:
+            self._stop_watching(f"{len(folders)} piggybacked hosts have files")
+            return
+        try:
+            # Watch before reading, so that no change in between is lost.
+            self._watch()
+            for piggybacked_host_folder in folders:
+                self._add_folder(HostName(piggybacked_host_folder.name))
+        except OSError as e:
+            self._stop_watching(str(e))
+            return
+
+        for source_state_file in _get_source_state_files(self._omd_root):
+            self._update_last_contact(HostName(source_state_file.name))
+        for index in _segments.load_indexes(self._omd_root):
+            self._set_segment(index.source, index)
+
+    def _watch(self) -> None:
+        self._inotify = INotify()
+        self._fixed_watches = {}
+        for directory, kind in (
+            (payload_dir(self._omd_root), "payload"),
+            (source_status_dir(self._omd_root), "status"),
+            (segment_dir(self._omd_root), "segment"),
+        ):
+            directory.mkdir(mode=0o770, exist_ok=True, parents=True)
+            self._fixed_watches[self._inotify.add_watch(directory, _DIR_MASK).wd] = kind
+
+    def _stop_watching(self, reason: str) -> None:
+        logger.info("Not watching piggyback data, reading it for every query: %s", reason)
+        # Dropping the inotify instance releases all of its watches.
+        self._inotify = None
+        self._fixed_watches.clear()
+        self._files.clear()
+        self._last_contacts.clear()
+        self._segments.clear()
+        self._segment_sources.clear()
+
+    def _apply(self, event: Event) -> None:
+        if not event.name or event.name.startswith("."):
+            return
+        removed = bool(event.type & (Masks.DELETE | Masks.MOVED_FROM))
+        match self._fixed_watches.get(event.watchee.wd):
+            case "payload":
+                if not event.type & Masks.ISDIR:
+                    return
+                if removed:
+                    self._files.pop(HostName(event.name), None)
+                elif len(self._files) >= self._max_watches:
+                    raise OSError(f"more than {self._max_watches} piggybacked hosts have files")
+                else:
+                    self._add_folder(HostName(event.name))
+            case "status":
+                if removed:
+                    self._last_contacts.pop(HostName(event.name), None)
+                else:
+                    self._update_last_contact(HostName(event.name))
+            case "segment":
+                if event.name.endswith(".index"):
+                    source = HostName(event.name.removesuffix(".index"))
+                    self._set_segment(
+                        source, None if removed else _segments.load_index(source, self._omd_root)
+                    )
+            case None:
+                self._apply_to_folder(event.watchee, HostName(event.name), removed)
+
+    def _apply_to_folder(self, watchee: Watchee, source: HostName, removed: bool) -> None:
+        if (files := self._files.get(HostName(watchee.path.name))) is None:
+            return  # the folder is gone already
+        if removed or (mtime := _get_mtime(watchee.path / source)) is None:
+            files.pop(source, None)
+        else:
+            files[source] = mtime
+
+    def _add_folder(self, piggybacked: HostName) -> None:
+        assert self._inotify is not None
+        folder = payload_dir(self._omd_root) / piggybacked
+        try:
+            self._inotify.add_watch(folder, _FILE_MASK)
+        except FileNotFoundError:
+            return
+        self._files[piggybacked] = {
+            HostName(payload_file.name): mtime
+            for payload_file in _files_in(folder)
+            if (mtime := _get_mtime(payload_file)) is not None
+        }
+
+    def _update_last_contact(self, source: HostName) -> None:
+        if (mtime := _get_mtime(source_status_dir(self._omd_root) / source)) is None:
+            self._last_contacts.pop(source, None)
+        else:
+            self._last_contacts[source] = mtime
+
+    def _set_segment(self, source: HostName, index: _segments.SegmentIndex | None) -> None:
+        old = self._segments.pop(source, None)
+        self._discard_segment_source(source, old.hosts if old is not None else ())
+        if index is None:
+            return
+        self._segments[source] = index
+        for piggybacked in index.hosts:
+            self._segment_sources.setdefault(piggybacked, set()).add(source)
+
+    def _discard_segment_source(self, source: HostName, hosts: Iterable[HostName]) -> None:
+        for piggybacked in hosts:
+            if (sources := self._segment_sources.get(piggybacked)) is None:
+                continue
+            sources.discard(source)
+            if not sources:
+                del self._segment_sources[piggybacked]
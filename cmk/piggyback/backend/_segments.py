@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Segment files for sources with many piggybacked hosts
+
+Writing one file per piggybacked host does not scale for sources like vSphere or AWS,
+which send piggyback data for thousands of hosts every minute.  For every source such
+a store consists of two files in the segment directory:
+
+"segment":
+- tmp/check_mk/piggyback_segments/SOURCE.GENERATION.segment
+- the payloads of all piggybacked hosts, appended one after the other
+
+"index":
+- tmp/check_mk/piggyback_segments/SOURCE.index
+- the name of the current segment, the last contact with the source and the offset,
+  length, last update and store sequence number of the payload of every piggybacked host
+
+The index is replaced atomically and cached per process, so looking up the payload of a
+piggybacked host needs a single read once the index is known.  The segment only grows
+until more than half of it is outdated.  It is then replaced by a new generation holding
+the current payloads only.
+
+Please note that readers do not lock.  They have to deal with the segment of an index
+they have read being gone (see `read_payloads`).
+"""
+
+import json
+import os
+import tempfile
+import time
+from collections.abc import Iterator, Mapping, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Final, NamedTuple, Self
+
+from cmk.ccc import store
+
+from cmk.utils.hostaddress import HostName
+
+from ._paths import segment_dir
+
+# Sources sending piggyback data for at least that many hosts are stored in segments.
+SEGMENT_MIN_HOSTS: Final = 100
+
+# Do not bother to compact small segments.
+_MIN_COMPACTION_SIZE: Final = 64 * 1024
+
+_INDEX_SUFFIX: Final = ".index"
+
+
+class SegmentEntry(NamedTuple):
+    offset: int
+    length: int
+    last_update: int
+    # Identifies the store that brought the payload: the nanoseconds since the epoch, but
+    # always greater than the sequence numbers already in the index.
+    sequence: int
+
+
+@dataclass(frozen=True, kw_only=True)
+class SegmentIndex:
+    source: HostName
+    segment: str
+    last_contact: int | None
+    hosts: Mapping[HostName, SegmentEntry]
+
+    def serialize(self) -> bytes:
+        return json.dumps(
+            {
+                "segment": self.segment,
+                "last_contact": self.last_contact,
+                "hosts": self.hosts,
+            },
+            separators=(",", ":"),
+        ).encode()
+
+    @classmethod
+    def deserialize(cls, source: HostName, serialized: bytes, /) -> Self:
+        raw = json.loads(serialized)
+        return cls(
+            source=source,
+            segment=raw["segment"],
+            last_contact=raw["last_contact"],
+            hosts={HostName(h): SegmentEntry(*e) for h, e in raw["hosts"].items()},
+        )
+
+
+class _CachedIndex(NamedTuple):
+    stamp: tuple[int, int, int]
+    parsed: SegmentIndex
+
+
+# The parsed indexes of this process, keyed by their path.
+_index_cache: dict[str, _CachedIndex] = {}
+
+
+def _index_path(source: HostName, omd_root: Path) -> Path:
+    return segment_dir(omd_root) / f"{source}{_INDEX_SUFFIX}"
+
+
+def _lock_path(source: HostName, omd_root: Path) -> Path:
+    return segment_dir(omd_root) / f".{source}.lock"
+
+
+def has_index(source: HostName, omd_root: Path) -> bool:
+    return _index_path(source, omd_root).exists()
+
+
+def load_index(source: HostName, omd_root: Path) -> SegmentIndex | None:
+    return _load_index(str(_index_path(source, omd_root)), source)
+
+
+def load_indexes(omd_root: Path) -> Sequence[SegmentIndex]:
+    directory = str(segment_dir(omd_root))
+    try:
+        names = sorted(os.listdir(directory))
+    except FileNotFoundError:
+        return []
+    return [
+        index
+        for name in names
+        if name.endswith(_INDEX_SUFFIX) and not name.startswith(".")
+        if (index := _load_index(f"{directory}/{name}", HostName(name.removesuffix(_INDEX_SUFFIX))))
+        is not None
+    ]
+
+
+def _load_index(path: str, source: HostName) -> SegmentIndex | None:
+    # Plain strings and file descriptors: this is done for every piggybacked host.
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        _index_cache.pop(path, None)
+        return None
+    try:
+        stat = os.fstat(fd)
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if (cached := _index_cache.get(path)) is not None and cached.stamp == stamp:
+            return cached.parsed
+        with os.fdopen(fd, "rb", closefd=False) as f:
+            index = SegmentIndex.deserialize(source, f.read())
+    finally:
+        os.close(fd)
+
+    _index_cache[path] = _CachedIndex(stamp, index)
+    return index
+
+
+def read_payloads(
+    piggybacked: HostName, omd_root: Path
+) -> Iterator[tuple[SegmentIndex, SegmentEntry, bytes]]:
+    """Yield the payloads of all sources for the piggybacked host"""
+    for index in load_indexes(omd_root):
+        if (entry := index.hosts.get(piggybacked)) is None:
+            continue
+        if (payload := read_payload(index, entry, omd_root)) is not None:
+            yield index, entry, payload
+            continue
+        # The segment has been replaced in the meantime.
+        # Its successor is referenced by the current index.
+        if (
+            (current := load_index(index.source, omd_root)) is not None
+            and (entry := current.hosts.get(piggybacked)) is not None
+            and (payload := read_payload(current, entry, omd_root)) is not None
+        ):
+            yield current, entry, payload
+
+
+def read_payload(index: SegmentIndex, entry: SegmentEntry, omd_root: Path) -> bytes | None:
+    """Read the payload of an entry, if the segment of the index still exists"""
+    try:
+        fd = os.open(f"{segment_dir(omd_root)}/{index.segment}", os.O_RDONLY)
+    except FileNotFoundError:
+        return None
+    try:
+        return os.pread(fd, entry.length, entry.offset)
+    finally:
+        os.close(fd)
+
+
+def store_payloads(
+    source: HostName,
+    payloads: Mapping[HostName, bytes],
+    *,
+    last_update: int,
+    last_contact: int,
+    omd_root: Path,
+) -> None:
+    """Append the payloads to the segment of the source and update its index"""
+    directory = segment_dir(omd_root)
+    directory.mkdir(mode=0o770, exist_ok=True, parents=True)
+    with store.locked(_lock_path(source, omd_root)):
+        old = load_index(source, omd_root)
+        hosts = dict(old.hosts) if old is not None else {}
+        segment = old.segment if old is not None else _new_segment_name(source)
+        sequence = max([time.time_ns(), *(entry.sequence + 1 for entry in hosts.values())])
+        with (directory / segment).open("ab") as f:
+            offset = f.tell()
+            for piggybacked, payload in payloads.items():
+                hosts[piggybacked] = SegmentEntry(offset, len(payload), last_update, sequence)
+                offset += len(payload)
+            f.write(b"".join(payloads.values()))
+
+        index = SegmentIndex(source=source, segment=segment, last_contact=last_contact, hosts=hosts)
+        if _needs_compaction(index, size=offset):
+            index = _compact(index, payloads, omd_root)
+        _write_index(index, omd_root)
+
+    if old is not None and old.segment != index.segment:
+        (directory / old.segment).unlink(missing_ok=True)
+
+
+def _new_segment_name(source: HostName) -> str:
+    return f"{source}.{time.time_ns():x}.segment"
+
+
+def _needs_compaction(index: SegmentIndex, *, size: int) -> bool:
+    live = sum(entry.length for entry in index.hosts.values())
+    return size > _MIN_COMPACTION_SIZE and size > 2 * live
+
+
+def _compact(
+    index: SegmentIndex, payloads: Mapping[HostName, bytes], omd_root: Path
+) -> SegmentIndex:
+    """Write the current payloads to a new generation of the segment"""
+    directory = segment_dir(omd_root)
+    segment = _new_segment_name(index.source)
+    hosts = {}
+    offset = 0
+    with (directory / index.segment).open("rb") as old, (directory / segment).open("wb") as new:
+        for piggybacked, entry in index.hosts.items():
+            if (payload := payloads.get(piggybacked)) is None:
+                old.seek(entry.offset)
+                payload = old.read(entry.length)
+            new.write(payload)
+            hosts[piggybacked] = entry._replace(offset=offset, length=len(payload))
+            offset += len(payload)
+    return SegmentIndex(
+        source=index.source, segment=segment, last_contact=index.last_contact, hosts=hosts
+    )
+
+
+def _write_index(index: SegmentIndex, omd_root: Path) -> None:
+    path = _index_path(index.source, omd_root)
+    with tempfile.NamedTemporaryFile(
+        "wb", dir=path.parent, prefix=f".{path.name}.new", delete=False
+    ) as tmp:
+        tmp.write(index.serialize())
+    os.rename(tmp.name, path)
+
+
+def remove_last_contact(source: HostName, omd_root: Path) -> bool:
+    """Mark the data of the source as outdated
+
+    Returns whether there has been a contact to remove.
+    """
+    if not has_index(source, omd_root):
+        return False
+    with store.locked(_lock_path(source, omd_root)):
+        if (index := load_index(source, omd_root)) is None or index.last_contact is None:
+            return False
+        _write_index(
+            SegmentIndex(
+                source=source, segment=index.segment, last_contact=None, hosts=index.hosts
+            ),
+            omd_root,
+        )
+    return True
+
+
+def remove_index(source: HostName, omd_root: Path) -> None:
+    with store.locked(_lock_path(source, omd_root)):
+        if (index := load_index(source, omd_root)) is None:
+            return
+        _index_path(source, omd_root).unlink(missing_ok=True)
+        (segment_dir(omd_root) / index.segment).unlink(missing_ok=True)
+
+
+def cleanup_segments(cut_off_timestamp: float, omd_root: Path) -> Sequence[str]:
+    """Remove the payloads and last contacts that are older than the cut off
+
+    Returns the descriptions of what has been removed.
+    """
+    removed: list[str] = []
+    for source in (index.source for index in load_indexes(omd_root)):
+        with store.locked(_lock_path(source, omd_root)):
+            if (index := load_index(source, omd_root)) is None:
+                continue
+            hosts = {
+                piggybacked: entry
+                for piggybacked, entry in index.hosts.items()
+                if entry.last_update >= cut_off_timestamp
+            }
+            removed.extend(
+                f"{piggybacked} from {source}"
+                for piggybacked in index.hosts
+                if piggybacked not in hosts
+            )
+            last_contact = index.last_contact
+            if last_contact is not None and last_contact < cut_off_timestamp:
+                removed.append(f"last contact of {source}")
+                last_contact = None
+
+            if not hosts:
+                _index_path(source, omd_root).unlink(missing_ok=True)
+                (segment_dir(omd_root) / index.segment).unlink(missing_ok=True)
+                continue
+
+            if hosts != index.hosts or last_contact != index.last_contact:
+                _write_index(
+                    SegmentIndex(
+                        source=source,
+                        segment=index.segment,
+                        last_contact=last_contact,
+                        hosts=hosts,
+                    ),
+                    omd_root,
+                )
+    return removed
+
+
+def rename_host(omd_root: Path, old_host: HostName, new_host: HostName) -> Sequence[str]:
+    """Rename the host as a source and as a piggybacked host in all indexes"""
+    actions = []
+    for source in (index.source for index in load_indexes(omd_root)):
+        with store.locked(_lock_path(source, omd_root)):
+            if (index := load_index(source, omd_root)) is None or old_host not in index.hosts:
+                continue
+            hosts = dict(index.hosts)
+            hosts[new_host] = hosts.pop(old_host)
+            _write_index(
+                SegmentIndex(
+                    source=source,
+                    segment=index.segment,
+                    last_contact=index.last_contact,
+                    hosts=hosts,
+                ),
+                omd_root,
+            )
+            actions.append("piggyback-load")
+
+    if (index := load_index(old_host, omd_root)) is not None:
+        remove_index(new_host, omd_root)
+        with store.locked(_lock_path(old_host, omd_root)):
+            # The segment keeps its name, it is referenced by the index.
+            _write_index(
+                SegmentIndex(
+                    source=new_host,
+                    segment=index.segment,
+                    last_contact=index.last_contact,
+                    hosts=index.hosts,
+                ),
+                omd_root,
+            )
+            _index_path(old_host, omd_root).unlink(missing_ok=True)
+        actions.append("piggyback-pig")
+    return actions
@@ -17,8 +17,9 @@ from typing import Self
 
 from cmk.utils.hostaddress import HostAddress, HostName
 
+from . import _segments
 from ._inotify import Event, INotify, Masks
-from ._paths import payload_dir, source_status_dir
+from ._paths import payload_dir, segment_dir, source_status_dir
 
 logger = logging.getLogger(__name__)
 
@@ -66,27 +67,57 @@ class PiggybackMessage:
 # "source_hostname":
 # - Path(tmp/check_mk/piggyback/HOST/SOURCE).name
 # - Path(tmp/check_mk/piggyback_sources/SOURCE).name
+#
+# Sources sending data for many piggybacked hosts are stored in segments instead
+# (see _segments.py):
+# - tmp/check_mk/piggyback_segments/SOURCE.index
+# - tmp/check_mk/piggyback_segments/SOURCE.GENERATION.segment
 
 
 def watch_new_messages(omd_root: Path) -> Iterator[PiggybackMessage]:
     """Yields piggyback messages as they come in."""
+    for messages in watch_new_message_batches(omd_root, timeout=None):
+        yield from messages
+
+
+def watch_new_message_batches(
+    omd_root: Path, timeout: float | None
+) -> Iterator[Sequence[PiggybackMessage]]:
+    """Yields the piggyback messages that came in together.
+
+    If timeout is set, an empty batch is yielded after `timeout` seconds without messages.
+    """
 
     inotify = INotify()
     watch_for_new_piggybacked_hosts = inotify.add_watch(payload_dir(omd_root), Masks.CREATE)
     for folder in _get_piggybacked_host_folders(omd_root):
         inotify.add_watch(folder, Masks.MOVED_TO)
 
-    for event in inotify.read_forever():
-        # check if a new piggybacked host folder was created
-        if event.watchee == watch_for_new_piggybacked_hosts:
-            if event.type & Masks.CREATE:
-                inotify.add_watch(event.watchee.path / event.name, Masks.MOVED_TO)
-                # Handle all files already in the folder (we rather have duplicates than missing files)
-                yield from get_messages_for(HostAddress(event.name), omd_root)
-            continue
+    segment_dir(omd_root).mkdir(mode=0o770, exist_ok=True, parents=True)
+    watch_for_segment_indexes = inotify.add_watch(segment_dir(omd_root), Masks.MOVED_TO)
+    seen_entries = {index.source: dict(index.hosts) for index in _segments.load_indexes(omd_root)}
 
-        if message := _make_message_from_event(event, omd_root):
-            yield message
+    while True:
+        messages: list[PiggybackMessage] = []
+        for event in inotify.read(timeout):
+            if event.watchee == watch_for_segment_indexes:
+                messages.extend(_make_messages_from_index_event(event, seen_entries, omd_root))
+                continue
+
+            # check if a new piggybacked host folder was created
+            if event.watchee == watch_for_new_piggybacked_hosts:
+                if event.type & Masks.CREATE:
+                    inotify.add_watch(event.watchee.path / event.name, Masks.MOVED_TO)
+                    # Handle all files already in the folder
+                    # (we rather have duplicates than missing files)
+                    messages.extend(get_messages_for(HostAddress(event.name), omd_root))
+                continue
+
+            if message := _make_message_from_event(event, omd_root):
+                messages.append(message)
+
+        if messages or timeout is not None:
+            yield messages
 
 
 def _make_message_from_event(event: Event, omd_root: Path) -> PiggybackMessage | None:
@@ -109,6 +140,33 @@ def _make_message_from_event(event: Event, omd_root: Path) -> PiggybackMessage |
     )
 
 
+def _make_messages_from_index_event(
+    event: Event,
+    seen_entries: dict[HostName, dict[HostName, _segments.SegmentEntry]],
+    omd_root: Path,
+) -> Iterator[PiggybackMessage]:
+    if event.name.startswith(".") or not event.name.endswith(".index"):
+        return
+    source = HostName(event.name.removesuffix(".index"))
+    if (index := _segments.load_index(source, omd_root)) is None:
+        return
+
+    # Every store sets its sequence number on the payloads it brings.  Compaction moves
+    # the payloads, so the offsets are no sign of new data.  Neither is the last update,
+    # which has a resolution of one second.
+    seen = seen_entries.setdefault(source, {})
+    for piggybacked, entry in index.hosts.items():
+        if (previous := seen.get(piggybacked)) is not None and (
+            previous.sequence == entry.sequence
+        ):
+            continue
+        if (raw_data := _segments.read_payload(index, entry, omd_root)) is None:
+            # The segment has been replaced, the next index event will bring the payload.
+            continue
+        seen[piggybacked] = entry
+        yield PiggybackMessage(_make_segment_meta_data(index, piggybacked, entry), raw_data)
+
+
 def get_messages_for(
     piggybacked_hostname: HostAddress, omd_root: Path
 ) -> Sequence[PiggybackMessage]:
@@ -132,18 +190,50 @@ def get_messages_for(
         logger.debug("Read piggyback file '%s'", content_path)
         piggyback_data.append(PiggybackMessage(meta_data, raw_data))
 
-    return piggyback_data
+    for index, entry, raw_data in _segments.read_payloads(piggybacked_hostname, omd_root):
+        logger.debug("Read piggyback data of '%s' from segment", index.source)
+        piggyback_data.append(
+            PiggybackMessage(_make_segment_meta_data(index, piggybacked_hostname, entry), raw_data)
+        )
+
+    return sorted(piggyback_data, key=lambda message: message.meta.source)
 
 
 def get_piggybacked_host_with_sources(
     omd_root: Path,
 ) -> Mapping[HostAddress, Sequence[PiggybackMetaData]]:
     """Generates all piggyback pig/piggybacked host pairs"""
-    return {
-        piggybacked_host: _get_payload_meta_data(piggybacked_host, omd_root)
+    meta_data: dict[HostAddress, list[PiggybackMetaData]] = {
+        piggybacked_host: list(_get_payload_meta_data(piggybacked_host, omd_root))
         for piggybacked_host_folder in _get_piggybacked_host_folders(omd_root)
         if (piggybacked_host := HostAddress(piggybacked_host_folder.name))
     }
+    for index in _segments.load_indexes(omd_root):
+        for piggybacked_host, entry in index.hosts.items():
+            meta_data.setdefault(piggybacked_host, []).append(
+                _make_segment_meta_data(index, piggybacked_host, entry)
+            )
+    return {
+        piggybacked_host: sorted(meta_data[piggybacked_host], key=lambda m: m.source)
+        for piggybacked_host in sorted(meta_data)
+    }
+
+
+def get_meta_data_for(
+    piggybacked_hostname: HostName, omd_root: Path
+) -> Sequence[PiggybackMetaData]:
+    """The meta data of all sources of the piggybacked host, files and segments"""
+    return sorted(
+        [
+            *_get_payload_meta_data(piggybacked_hostname, omd_root),
+            *(
+                _make_segment_meta_data(index, piggybacked_hostname, entry)
+                for index in _segments.load_indexes(omd_root)
+                if (entry := index.hosts.get(piggybacked_hostname)) is not None
+            ),
+        ],
+        key=lambda m: m.source,
+    )
 
 
 def _remove_piggyback_file(piggyback_file_path: Path) -> bool:
@@ -158,7 +248,9 @@ def remove_source_status_file(source_hostname: HostName, omd_root: Path) -> bool
     """Remove the source_status_file of this piggyback host which will
     mark the piggyback data from this source as outdated."""
     source_status_path = _get_source_status_file_path(source_hostname, omd_root)
-    return _remove_piggyback_file(source_status_path)
+    removed_status_file = _remove_piggyback_file(source_status_path)
+    removed_last_contact = _segments.remove_last_contact(source_hostname, omd_root)
+    return removed_status_file or removed_last_contact
 
 
 def store_piggyback_raw_data(
@@ -173,6 +265,14 @@ def store_piggyback_raw_data(
         logger.debug("Received no piggyback data")
         remove_source_status_file(source_hostname, omd_root)
         return
+    if len(piggybacked_raw_data) >= _segments.SEGMENT_MIN_HOSTS or _segments.has_index(
+        source_hostname, omd_root
+    ):
+        _store_in_segment(
+            source_hostname, piggybacked_raw_data, message_timestamp, contact_timestamp, omd_root
+        )
+        return
+
     # Store the last contact with this piggyback source to be able to filter outdated data later
     # We use the mtime of this file later for comparison.
     # Only do this for hosts that sent piggyback data this turn.
@@ -195,6 +295,36 @@ def store_piggyback_raw_data(
         )
 
 
+def _store_in_segment(
+    source_hostname: HostName,
+    piggybacked_raw_data: Mapping[HostName, Sequence[bytes]],
+    message_timestamp: float,
+    contact_timestamp: float,
+    omd_root: Path,
+) -> None:
+    logger.debug("Storing piggyback data for %d hosts in segment", len(piggybacked_raw_data))
+    if not _segments.has_index(source_hostname, omd_root):
+        # The source is moved to a segment. Its files would shadow the new data.
+        _remove_source_files(source_hostname, omd_root)
+
+    _segments.store_payloads(
+        source_hostname,
+        {
+            piggybacked_hostname: b"%s\n" % b"\n".join(lines)
+            for piggybacked_hostname, lines in piggybacked_raw_data.items()
+        },
+        last_update=int(message_timestamp),
+        last_contact=int(contact_timestamp),
+        omd_root=omd_root,
+    )
+
+
+def _remove_source_files(source_hostname: HostName, omd_root: Path) -> None:
+    for piggybacked_host_folder in _get_piggybacked_host_folders(omd_root):
+        _remove_piggyback_file(piggybacked_host_folder / source_hostname)
+    remove_source_status_file(source_hostname, omd_root)
+
+
 def _write_file_with_mtime(
     file_path: Path,
     content: bytes,
@@ -253,6 +383,17 @@ def _get_payload_meta_data(
     return meta_data
 
 
+def _make_segment_meta_data(
+    index: _segments.SegmentIndex, piggybacked_hostname: HostName, entry: _segments.SegmentEntry
+) -> PiggybackMetaData:
+    return PiggybackMetaData(
+        source=index.source,
+        piggybacked=piggybacked_hostname,
+        last_update=entry.last_update,
+        last_contact=index.last_contact,
+    )
+
+
 def _get_piggybacked_host_folders(omd_root: Path) -> Sequence[Path]:
     return _files_in(payload_dir(omd_root))
 
@@ -316,6 +457,8 @@ def cleanup_piggyback_files(cut_off_timestamp: float, omd_root: Path) -> None:
 
     _cleanup_old_source_status_files(_get_source_state_files(omd_root), cut_off_timestamp)
     _cleanup_old_piggybacked_files(piggybacked_hosts_settings, cut_off_timestamp)
+    for removed in _segments.cleanup_segments(cut_off_timestamp, omd_root):
+        logger.debug("Piggyback data of %s too old. Removed it.", removed)
 
 
 def _cleanup_old_source_status_files(
@@ -410,6 +553,11 @@ def move_for_host_rename(omd_root: Path, old_host: str, new_host: str) -> tuple[
         yield "piggyback-pig"
 
     return tuple(
-        *_rename_piggybacked_dir(old_host, new_host),
-        *_rename_payload_file(piggyback_dir, old_host, new_host),
+        dict.fromkeys(
+            (
+                *_rename_piggybacked_dir(old_host, new_host),
+                *_rename_payload_file(piggyback_dir, old_host, new_host),
+                *_segments.rename_host(omd_root, HostName(old_host), HostName(new_host)),
+            )
+        )
     )
@@ -21,7 +21,12 @@ from cmk.messaging import QueueName, set_logging_level
 
 from .config import CONFIG_QUEUE, PiggybackHubConfig, save_config_on_message
 from .payload import (
+    BATCH_SUPPORT_QUEUE,
+    PayloadBatchSupport,
     PiggybackPayload,
+    PiggybackPayloadBatch,
+    save_batch_support_on_message,
+    save_payload_batch_on_message,
     save_payload_on_message,
     SendingPayloadProcess,
 )
@@ -96,7 +101,8 @@ def run_piggyback_hub(
     logger: logging.Logger, omd_root: Path, crash_report_callback: Callable[[], str]
 ) -> int:
     reload_config = make_event()
-    processes = (
+    processes: tuple[ReceivingProcess | SendingPayloadProcess, ...] = (
+        # Sites that have not been updated yet publish single payloads.
         ReceivingProcess(
             logger,
             omd_root,
@@ -106,6 +112,24 @@ def run_piggyback_hub(
             QueueName("payload"),
             message_ttl=600,
         ),
+        ReceivingProcess(
+            logger,
+            omd_root,
+            PiggybackPayloadBatch,
+            save_payload_batch_on_message(logger, omd_root),
+            crash_report_callback,
+            QueueName("payload_batch"),
+            message_ttl=600,
+        ),
+        ReceivingProcess(
+            logger,
+            omd_root,
+            PayloadBatchSupport,
+            save_batch_support_on_message(logger, omd_root, reload_config),
+            crash_report_callback,
+            BATCH_SUPPORT_QUEUE,
+            message_ttl=None,
+        ),
         SendingPayloadProcess(logger, omd_root, reload_config, crash_report_callback),
         ReceivingProcess(
             logger,
@@ -11,10 +11,12 @@ from pathlib import Path
 class PiggybackHubPaths:
     config: Path
     multisite_config: Path
+    batch_sites: Path
 
 
 def create_paths(root_path: Path) -> PiggybackHubPaths:
     return PiggybackHubPaths(
         config=root_path / "etc/check_mk/piggyback_hub.conf",
         multisite_config=root_path / "etc/check_mk/piggyback_hub.d/multisite.conf",
+        batch_sites=root_path / "var/check_mk/piggyback_hub/batch_sites.json",
     )
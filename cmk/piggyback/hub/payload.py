@@ -5,25 +5,29 @@
 
 import logging
 import multiprocessing
+import os
 import signal
-from collections.abc import Callable, Mapping, Sequence
+import time
+import zlib
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass, field
 from multiprocessing.synchronize import Event
 from pathlib import Path
-from typing import Self
+from typing import Final, Self
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 
 from cmk.utils.hostaddress import HostName
 
-from cmk.messaging import Channel, CMKConnectionError, DeliveryTag, RoutingKey
+from cmk.messaging import Channel, CMKConnectionError, DeliveryTag, QueueName, RoutingKey
 from cmk.piggyback.backend import (
     PiggybackMessage,
     store_piggyback_raw_data,
-    watch_new_messages,
+    watch_new_message_batches,
 )
 
 from .config import load_config, PiggybackHubConfig
-from .paths import create_paths
+from .paths import create_paths, PiggybackHubPaths
 from .utils import make_connection, make_log_and_exit
 
 
@@ -43,6 +47,176 @@ class PiggybackPayload(BaseModel):
         )
 
 
+PAYLOAD_ROUTE = RoutingKey("payload")
+PAYLOAD_BATCH_ROUTE = RoutingKey("payload_batch")
+BATCH_SUPPORT_ROUTE = RoutingKey("batch_support")
+
+BATCH_SUPPORT_QUEUE = QueueName("batch_support")
+
+# A batch for a site is published as soon as its first message is that old (seconds) ...
+BATCH_MAX_DELAY: Final = 1.0
+# ... or its raw data is that large (bytes).
+BATCH_MAX_SIZE: Final = 8 * 1024 * 1024
+# Log the batch statistics that often (seconds).
+_STATS_INTERVAL: Final = 300.0
+
+
+class PiggybackPayloadBatch(BaseModel):
+    """Piggyback payloads for one site, compressed into a single frame"""
+
+    model_config = ConfigDict(ser_json_bytes="base64", val_json_bytes="base64")
+
+    messages: int
+    frame: bytes
+
+    @classmethod
+    def from_payloads(cls, payloads: Sequence[PiggybackPayload]) -> Self:
+        return cls(messages=len(payloads), frame=zlib.compress(_PAYLOADS.dump_json(payloads)))
+
+    def payloads(self) -> Sequence[PiggybackPayload]:
+        return _PAYLOADS.validate_json(zlib.decompress(self.frame))
+
+
+_PAYLOADS: Final[TypeAdapter[Sequence[PiggybackPayload]]] = TypeAdapter(Sequence[PiggybackPayload])
+
+
+class PayloadBatchSupport(BaseModel):
+    """Announcement of a site that it receives payload batches
+
+    Sites that have not been updated yet neither send nor receive it. They
+    only receive single payloads.
+    """
+
+    site_id: str
+
+
+class _PersistedBatchSites(BaseModel):
+    sites: frozenset[str] = frozenset()
+
+
+def load_batch_sites(paths: PiggybackHubPaths) -> frozenset[str]:
+    """The sites that announced to receive payload batches"""
+    try:
+        persisted = _PersistedBatchSites.model_validate_json(paths.batch_sites.read_text())
+    except FileNotFoundError:
+        return frozenset()
+    return persisted.sites
+
+
+def _save_batch_sites(paths: PiggybackHubPaths, sites: frozenset[str]) -> None:
+    persisted = _PersistedBatchSites(sites=sites)
+    paths.batch_sites.parent.mkdir(mode=0o770, exist_ok=True, parents=True)
+    tmp_path = paths.batch_sites.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_text(f"{persisted.model_dump_json()}\n")
+    tmp_path.rename(paths.batch_sites)
+
+
+def save_batch_support_on_message(
+    logger: logging.Logger, omd_root: Path, reload_config: Event
+) -> Callable[[Channel[PayloadBatchSupport], DeliveryTag, PayloadBatchSupport], None]:
+    def _on_message(
+        channel: Channel[PayloadBatchSupport],
+        delivery_tag: DeliveryTag,
+        received: PayloadBatchSupport,
+    ) -> None:
+        paths = create_paths(omd_root)
+        if received.site_id not in (sites := load_batch_sites(paths)):
+            logger.info("Site '%s' receives payload batches", received.site_id)
+            _save_batch_sites(paths, sites | {received.site_id})
+            reload_config.set()
+        channel.acknowledge(delivery_tag)
+
+    return _on_message
+
+
+@dataclass
+class PayloadBatchStats:
+    batches: int = 0
+    messages: int = 0
+    raw_size: int = 0
+    compressed_size: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.batches} batches, {self.messages_per_batch:.1f} messages per batch, "
+            f"compression ratio {self.compression_ratio:.1f}"
+        )
+
+    @property
+    def messages_per_batch(self) -> float:
+        return self.messages / self.batches if self.batches else 0.0
+
+    @property
+    def compression_ratio(self) -> float:
+        return self.raw_size / self.compressed_size if self.compressed_size else 0.0
+
+
+@dataclass
+class _PendingBatch:
+    started: float
+    payloads: list[PiggybackPayload] = field(default_factory=list)
+    size: int = 0
+
+
+class PayloadBatcher:
+    """Collect the payloads for every target site
+
+    A batch is ready as soon as its first payload is `max_delay` seconds old,
+    or its raw data exceeds `max_size` bytes.
+    """
+
+    def __init__(self, max_delay: float = BATCH_MAX_DELAY, max_size: int = BATCH_MAX_SIZE) -> None:
+        self.max_delay: Final = max_delay
+        self.max_size: Final = max_size
+        self.stats: Final = PayloadBatchStats()
+        self._pending: dict[str, _PendingBatch] = {}
+
+    def __len__(self) -> int:
+        return sum(len(batch.payloads) for batch in self._pending.values())
+
+    def add(self, site_id: str, payload: PiggybackPayload, now: float) -> None:
+        batch = self._pending.setdefault(site_id, _PendingBatch(started=now))
+        batch.payloads.append(payload)
+        batch.size += sum(len(line) for lines in payload.raw_data.values() for line in lines)
+
+    def ready(
+        self, now: float, *, flush: bool = False
+    ) -> Iterable[tuple[str, PiggybackPayloadBatch]]:
+        """Yield the batches that are ready to be published
+
+        A batch is only dropped once the consumer asks for the next one, so a
+        batch that failed to be published is yielded again next time.
+        """
+        for site_id, batch in list(self._pending.items()):
+            if not (flush or batch.size >= self.max_size or now - batch.started >= self.max_delay):
+                continue
+            compressed = PiggybackPayloadBatch.from_payloads(batch.payloads)
+            yield site_id, compressed
+            del self._pending[site_id]
+            self.stats.batches += 1
+            self.stats.messages += len(batch.payloads)
+            self.stats.raw_size += batch.size
+            self.stats.compressed_size += len(compressed.frame)
+
+
+def _merge_payloads(payloads: Iterable[PiggybackPayload]) -> Sequence[PiggybackPayload]:
+    """Merge the payloads of a source that were sent together"""
+    merged: dict[tuple[HostName, int, int | None], dict[HostName, Sequence[bytes]]] = {}
+    for payload in payloads:
+        merged.setdefault(
+            (payload.source_host, payload.message_timestamp, payload.contact_timestamp), {}
+        ).update(payload.raw_data)
+    return [
+        PiggybackPayload(
+            source_host=source_host,
+            raw_data=raw_data,
+            message_timestamp=message_timestamp,
+            contact_timestamp=contact_timestamp,
+        )
+        for (source_host, message_timestamp, contact_timestamp), raw_data in merged.items()
+    ]
+
+
 def save_payload_on_message(
     logger: logging.Logger,
     omd_root: Path,
@@ -65,7 +239,40 @@ def save_payload_on_message(
     return _on_message
 
 
+def save_payload_batch_on_message(
+    logger: logging.Logger,
+    omd_root: Path,
+) -> Callable[[Channel[PiggybackPayloadBatch], DeliveryTag, PiggybackPayloadBatch], None]:
+    def _on_message(
+        channel: Channel[PiggybackPayloadBatch],
+        delivery_tag: DeliveryTag,
+        received: PiggybackPayloadBatch,
+    ) -> None:
+        payloads = _merge_payloads(received.payloads())
+        logger.debug(
+            "Received batch of %d payloads from %d source hosts", received.messages, len(payloads)
+        )
+        for payload in payloads:
+            store_piggyback_raw_data(
+                source_hostname=payload.source_host,
+                piggybacked_raw_data=payload.raw_data,
+                message_timestamp=payload.message_timestamp,
+                contact_timestamp=payload.contact_timestamp,
+                omd_root=omd_root,
+            )
+        channel.acknowledge(delivery_tag)
+
+    return _on_message
+
+
 class SendingPayloadProcess(multiprocessing.Process):
+    """Publish the piggyback payloads for other sites
+
+    The payloads are published in batches to all sites that announced to
+    receive them (see PayloadBatchSupport), and one by one to all other
+    sites.  This site announces its own support to all target sites.
+    """
+
     def __init__(
         self,
         logger: logging.Logger,
@@ -80,7 +287,7 @@ class SendingPayloadProcess(multiprocessing.Process):
         self.paths = create_paths(omd_root)
         self.reload_config = reload_config
         self.crash_report_callback = crash_report_callback
-        self.task_name = "publishing on queue 'payload'"
+        self.task_name = "publishing on queues 'payload' and 'payload_batch'"
 
     def run(self):
         self.logger.info("Starting: %s", self.task_name)
@@ -90,23 +297,39 @@ class SendingPayloadProcess(multiprocessing.Process):
         )
 
         config = load_config(self.paths)
+        batch_sites = load_batch_sites(self.paths)
         self.logger.debug("Loaded configuration: %r", config)
 
-        failed_message = None
+        batcher = PayloadBatcher()
+        stats_logged = time.monotonic()
         try:
             while True:
                 with make_connection(self.omd_root, self.logger, self.task_name) as conn:
                     try:
-                        channel = conn.channel(PiggybackPayload)
-                        if failed_message is not None:
-                            # Retry in case the first time the channel was not available after make_connection
-                            self._handle_message(channel, config, failed_message)
-                            failed_message = None
-                        for piggyback_message in watch_new_messages(self.omd_root):
-                            config = self._check_for_config_reload(config)
-                            self._handle_message(channel, config, piggyback_message)
+                        batch_channel = conn.channel(PiggybackPayloadBatch)
+                        payload_channel = conn.channel(PiggybackPayload)
+                        support_channel = conn.channel(PayloadBatchSupport)
+                        self._announce_batch_support(support_channel, config)
+                        # Publish what is left over from a failed connection first.
+                        self._publish_batches(
+                            batch_channel, payload_channel, batcher, batch_sites, flush=True
+                        )
+                        for messages in watch_new_message_batches(
+                            self.omd_root, timeout=batcher.max_delay
+                        ):
+                            if self.reload_config.is_set():
+                                config, batch_sites = self._reload_config()
+                                self._announce_batch_support(support_channel, config)
+                            now = time.monotonic()
+                            for message in messages:
+                                self._handle_message(batcher, config, message, now)
+                            self._publish_batches(
+                                batch_channel, payload_channel, batcher, batch_sites
+                            )
+                            if now - stats_logged >= _STATS_INTERVAL:
+                                self.logger.info("%s: %s", self.task_name.title(), batcher.stats)
+                                stats_logged = now
                     except CMKConnectionError as exc:
-                        failed_message = piggyback_message
                         self.logger.info("Reconnecting: %s: %s", self.task_name, exc)
         except CMKConnectionError as exc:
             self.logger.error("Connection error: %s: %s", self.task_name, exc)
@@ -116,11 +339,20 @@ class SendingPayloadProcess(multiprocessing.Process):
             self.logger.error(crash_report_msg)
             raise
 
+    def _announce_batch_support(
+        self, channel: Channel[PayloadBatchSupport], config: PiggybackHubConfig
+    ) -> None:
+        for site_id in sorted(set(config.targets.values())):
+            channel.publish_for_site(
+                site_id, PayloadBatchSupport(site_id=self.site), routing=BATCH_SUPPORT_ROUTE
+            )
+
     def _handle_message(
         self,
-        channel: Channel[PiggybackPayload],
+        batcher: PayloadBatcher,
         config: PiggybackHubConfig,
         message: PiggybackMessage,
+        now: float,
     ) -> None:
         if (site_id := config.targets.get(message.meta.piggybacked, self.site)) == self.site:
             return
@@ -132,14 +364,35 @@ class SendingPayloadProcess(multiprocessing.Process):
             message.meta.piggybacked,
             site_id,
         )
-        channel.publish_for_site(
-            site_id, PiggybackPayload.from_message(message), routing=RoutingKey("payload")
-        )
+        batcher.add(site_id, PiggybackPayload.from_message(message), now)
+
+    def _publish_batches(
+        self,
+        batch_channel: Channel[PiggybackPayloadBatch],
+        payload_channel: Channel[PiggybackPayload],
+        batcher: PayloadBatcher,
+        batch_sites: frozenset[str],
+        *,
+        flush: bool = False,
+    ) -> None:
+        for site_id, batch in batcher.ready(time.monotonic(), flush=flush):
+            self.logger.debug(
+                "%s: %d messages (%d bytes) for site '%s'",
+                self.task_name.title(),
+                batch.messages,
+                len(batch.frame),
+                site_id,
+            )
+            if site_id in batch_sites:
+                batch_channel.publish_for_site(site_id, batch, routing=PAYLOAD_BATCH_ROUTE)
+                continue
+            # The site has not been updated yet.
+            for payload in batch.payloads():
+                payload_channel.publish_for_site(site_id, payload, routing=PAYLOAD_ROUTE)
 
-    def _check_for_config_reload(self, current_config: PiggybackHubConfig) -> PiggybackHubConfig:
-        if not self.reload_config.is_set():
-            return current_config
+    def _reload_config(self) -> tuple[PiggybackHubConfig, frozenset[str]]:
         self.logger.info("Reloading configuration")
         config = load_config(self.paths)
+        batch_sites = load_batch_sites(self.paths)
         self.reload_config.clear()
-        return config
+        return config, batch_sites
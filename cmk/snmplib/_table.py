@@ -4,10 +4,10 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 """Provide methods to get an snmp table with or without caching"""
 
-import contextlib
 import hashlib
 from collections.abc import Callable, MutableMapping, Sequence
 from functools import partial
+from itertools import chain, pairwise
 from typing import assert_never
 
 from cmk.ccc.exceptions import MKGeneralException, MKSNMPError
@@ -58,6 +58,21 @@ def get_snmp_table(
     max_len = 0
     max_len_col = -1
 
+    walked = iter(
+        get_snmpwalks(
+            section_name,
+            tree.base,
+            [
+                (f"{tree.base}.{oid.column}", oid.save_to_cache)
+                for oid in tree.oids
+                if not isinstance(oid.column, SpecialColumn)
+            ],
+            walk_cache=walk_cache,
+            backend=backend,
+            log=log,
+        )
+    )
+
     for oid in tree.oids:
         fetchoid: OID = f"{tree.base}.{oid.column}"
         # column may be integer or string like "1.5.4.2.3"
@@ -78,15 +93,7 @@ def get_snmp_table(
             index_column = len(columns)
             index_format = oid.column
         else:
-            rowinfo = get_snmpwalk(
-                section_name,
-                tree.base,
-                fetchoid,
-                walk_cache=walk_cache,
-                save_walk_cache=oid.save_to_cache,
-                backend=backend,
-                log=log,
-            )
+            rowinfo = next(walked)
             if len(rowinfo) > max_len:
                 max_len_col = len(columns)
 
@@ -117,15 +124,11 @@ def get_snmp_table(
         for column, value_encoding in sanitized_columns
     ]
 
-    if not decoded_columns:
+    if not decoded_columns or not decoded_columns[0]:
         return []
 
     # Now construct table by swapping X and Y.
-    new_info = []
-    for index in range(len(decoded_columns[0])):
-        row = [c[index] for c in decoded_columns]
-        new_info.append(row)
-    return new_info
+    return [list(row) for row in zip(*decoded_columns)]
 
 
 def _make_index_rows(
@@ -160,20 +163,8 @@ def _extract_end_oid(prefix: OID, complete: OID) -> OID:
     return complete[len(prefix) :].lstrip(".")
 
 
-def _oid_to_intlist(oid: OID) -> list[int]:
-    return list(map(int, oid.split("."))) if oid else []
-
-
-def _cmp_oids(o1: OID, o2: OID) -> int:
-    return (_oid_to_intlist(o1) > _oid_to_intlist(o2)) - (_oid_to_intlist(o1) < _oid_to_intlist(o2))
-
-
-def _key_oids(o1: OID) -> list[int]:
-    return _oid_to_intlist(o1)
-
-
-def _key_oid_pairs(pair1: tuple[OID, SNMPRawValue]) -> list[int]:
-    return _oid_to_intlist(pair1[0].lstrip("."))
+def _oid_to_ints(oid: OID) -> tuple[int, ...]:
+    return tuple(map(int, oid.split("."))) if oid else ()
 
 
 def get_snmpwalk(
@@ -186,29 +177,55 @@ def get_snmpwalk(
     backend: SNMPBackend,
     log: Callable[[str], None],
 ) -> SNMPRowInfo:
+    return get_snmpwalks(
+        section_name,
+        base_oid,
+        [(fetchoid, save_walk_cache)],
+        walk_cache=walk_cache,
+        backend=backend,
+        log=log,
+    )[0]
+
+
+def get_snmpwalks(
+    section_name: SectionName | None,
+    base_oid: str,
+    fetchoids: Sequence[tuple[OID, bool]],
+    *,
+    walk_cache: MutableMapping[tuple[str, str, bool], SNMPRowInfo],
+    backend: SNMPBackend,
+    log: Callable[[str], None],
+) -> Sequence[SNMPRowInfo]:
+    """Walk the columns of a table, the ones in the walk cache excepted
+
+    `fetchoids` are the OIDs of the columns along with whether to keep them
+    in the walk cache.  The missing columns are walked together, so that
+    the backend may fetch them in fewer requests.
+    """
     contexts = backend.config.snmpv3_contexts_of(section_name).contexts
     context_string = "-".join(["no_context" if not c else c for c in contexts])
 
     # contexts are hashed in order not to exceed max pathname length
     context_hash = hashlib.shake_256(context_string.encode("utf-8")).hexdigest(15)
 
-    with contextlib.suppress(KeyError):
-        cache_info = walk_cache[(fetchoid, context_hash, save_walk_cache)]
-        log(f"Already fetched OID: {fetchoid}")
-        return cache_info
+    missing: dict[OID, SNMPRowInfo] = {}
+    for fetchoid, save_walk_cache in fetchoids:
+        if (fetchoid, context_hash, save_walk_cache) in walk_cache:
+            log(f"Already fetched OID: {fetchoid}")
+        else:
+            missing[fetchoid] = []
 
-    added_oids: set[OID] = set()
-    rowinfo: SNMPRowInfo = []
+    added_oids: dict[OID, set[OID]] = {fetchoid: set() for fetchoid in missing}
 
     skip: set[SNMPContext] = set()
     context_config = backend.config.snmpv3_contexts_of(section_name)
-    for context in context_config.contexts:
+    for context in context_config.contexts if missing else ():
         if context in skip:
             continue
 
         try:
-            rows = backend.walk(
-                fetchoid,
+            walked = backend.walk_table(
+                list(missing),
                 section_name=section_name,
                 table_base_oid=base_oid,
                 context=context,
@@ -221,26 +238,30 @@ def get_snmpwalk(
             skip.add(context)
             continue
 
-        # I've seen a broken device (Mikrotik Router), that broke after an
-        # update to RouterOS v6.22. It would return 9 time the same OID when
-        # .1.3.6.1.2.1.1.1.0 was being walked. We try to detect these situations
-        # by removing any duplicate OID information
-        if len(rows) > 1 and rows[0][0] == rows[1][0]:
-            log("Detected broken SNMP agent. Ignoring duplicate OID {rows[0][0]}.")
-            rows = rows[:1]
-
-        for row_oid, val in rows:
-            if row_oid in added_oids:
-                log(f"Duplicate OID found: {row_oid} ({val!r})")
-            else:
-                rowinfo.append((row_oid, val))
-                added_oids.add(row_oid)
-
-    if skip and not rowinfo:
+        for fetchoid, rowinfo in missing.items():
+            rows = walked[fetchoid]
+            # I've seen a broken device (Mikrotik Router), that broke after an
+            # update to RouterOS v6.22. It would return 9 time the same OID when
+            # .1.3.6.1.2.1.1.1.0 was being walked. We try to detect these situations
+            # by removing any duplicate OID information
+            if len(rows) > 1 and rows[0][0] == rows[1][0]:
+                log("Detected broken SNMP agent. Ignoring duplicate OID {rows[0][0]}.")
+                rows = rows[:1]
+
+            for row_oid, val in rows:
+                if row_oid in added_oids[fetchoid]:
+                    log(f"Duplicate OID found: {row_oid} ({val!r})")
+                else:
+                    rowinfo.append((row_oid, val))
+                    added_oids[fetchoid].add(row_oid)
+
+    if skip and not all(missing.values()):
         raise MKSNMPError("SNMP Error on %s: SNMP query timed out" % backend.config.hostname)
 
-    walk_cache[(fetchoid, context_hash, save_walk_cache)] = rowinfo
-    return rowinfo
+    for fetchoid, save_walk_cache in fetchoids:
+        if fetchoid in missing:
+            walk_cache[(fetchoid, context_hash, save_walk_cache)] = missing[fetchoid]
+    return [walk_cache[(fetchoid, context_hash, save)] for fetchoid, save in fetchoids]
 
 
 def _decode_column(
@@ -260,57 +281,40 @@ def _decode_column(
 
 
 def _sanitize_snmp_table_columns(columns: _ResultColumnsUnsanitized) -> _ResultColumnsSanitized:
-    # First compute the complete list of end-oids appearing in the output
-    # by looping all results and putting the endoids to a flat list
-    endoids: list[OID] = []
-    for fetchoid, row_info, value_encoding in columns:
-        for o, value in row_info:
-            endoid = _extract_end_oid(fetchoid, o)
-            if endoid not in endoids:
-                endoids.append(endoid)
-
-    # The list needs to be sorted to prevent problems when the first
-    # column has missing values in the middle of the tree.
-    if not _are_ascending_oids(endoids):
-        endoids.sort(key=_key_oids)
-        need_sort = True
-    else:
-        need_sort = False
+    end_oids = [
+        [o[len(fetchoid) :].lstrip(".") for o, _value in row_info]
+        for fetchoid, row_info, _value_encoding in columns
+    ]
 
-    # Now fill gaps in columns where some endois are missing
+    # Usually, all columns have the very same end-oids in ascending order.
+    # Comparing the lists is cheap, so we only need to build the complete
+    # index of the table if some column deviates from the first one.
+    index = end_oids[0] if end_oids else []
+    if all(eo == index for eo in end_oids) and _are_ascending_oids(index):
+        return [
+            ([value for _o, value in row_info], value_encoding)
+            for _fetchoid, row_info, value_encoding in columns
+        ]
+
+    # Merge the end-oids of all columns into the index of the table.  It
+    # needs to be sorted to prevent problems when the first column has
+    # missing values in the middle of the tree.
+    index = list(dict.fromkeys(chain.from_iterable(end_oids)))
+    if not _are_ascending_oids(index):
+        index.sort(key=_oid_to_ints)
+    positions = {eo: n for n, eo in enumerate(index)}
+
+    # Now align the values of every column to the index and fill the gaps
+    # where some end-oids are missing
     new_columns: _ResultColumnsSanitized = []
-    for fetchoid, row_info, value_encoding in columns:
-        # It might happen that end OIDs are not ordered. Fix the OID sorting to make
-        # it comparable to the already sorted endoids list. Otherwise we would get
-        # some mixups when filling gaps
-        if need_sort:
-            row_info.sort(key=_key_oid_pairs)
-
-        i = 0
-        new_column = []
-        # Loop all lines to fill holes in the middle of the list. All
-        # columns check the following lines for the correct endoid. If
-        # an endoid differs empty values are added until the hole is filled
-        for o, value in row_info:
-            eo = _extract_end_oid(fetchoid, o)
-            if len(row_info) != len(endoids):
-                while i < len(endoids) and endoids[i] != eo:
-                    new_column.append(b"")  # (beginoid + '.' +endoids[i], "" ) )
-                    i += 1
-            new_column.append(value)
-            i += 1
-
-        # At the end check if trailing OIDs are missing
-        while i < len(endoids):
-            new_column.append(b"")  # (beginoid + '.' +endoids[i], "") )
-            i += 1
+    for column_end_oids, (_fetchoid, row_info, value_encoding) in zip(end_oids, columns):
+        new_column = [b""] * len(index)
+        for eo, (_o, value) in zip(column_end_oids, row_info):
+            new_column[positions[eo]] = value
         new_columns.append((new_column, value_encoding))
 
     return new_columns
 
 
-def _are_ascending_oids(oid_list: list[OID]) -> bool:
-    for a in range(len(oid_list) - 1):
-        if _cmp_oids(oid_list[a], oid_list[a + 1]) > 0:  # == 0 should never happen
-            return False
-    return True
+def _are_ascending_oids(oid_list: Sequence[OID]) -> bool:
+    return all(a <= b for a, b in pairwise(map(_oid_to_ints, oid_list)))  # == should never happen
@@ -135,6 +135,10 @@ class SNMPHostConfig:
     snmpv3_contexts: Sequence[SNMPContextConfig]
     character_encoding: str | None
     snmp_backend: SNMPBackendEnum
+    # Walk the columns of a table with one bulk walk over the table entry.
+    bulk_table_walks: bool = False
+    # Walk up to this many trees at the same time.
+    max_concurrent_walks: int = 1
 
     @property
     def use_bulkwalk(self) -> bool:
@@ -221,6 +225,27 @@ class SNMPBackend(abc.ABC):
     ) -> SNMPRowInfo:
         return []
 
+    def walk_table(
+        self,
+        /,
+        oids: Sequence[OID],
+        *,
+        context: SNMPContext,
+        section_name: SectionName | None = None,
+        table_base_oid: OID | None = None,
+    ) -> Mapping[OID, SNMPRowInfo]:
+        """Walk the columns of a table
+
+        By default, every column is walked on its own.  Backends may fetch the
+        columns in fewer requests.
+        """
+        return {
+            oid: self.walk(
+                oid, context=context, section_name=section_name, table_base_oid=table_base_oid
+            )
+            for oid in oids
+        }
+
 
 class SpecialColumn(enum.IntEnum):
     # Until we remove all but the first, its worth having an enum
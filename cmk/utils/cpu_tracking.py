@@ -7,8 +7,10 @@ from __future__ import annotations
 
 import os
 import posix
+import time
 from collections.abc import Callable
 from dataclasses import dataclass
+from typing import Final
 
 
 @dataclass(frozen=True)
@@ -74,3 +76,63 @@ class CPUTracker:
     @property
     def duration(self) -> Snapshot:
         return self._end - self._start
+
+
+class _NoPhase:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: object) -> None:
+        return None
+
+
+_NO_PHASE: Final = _NoPhase()
+
+
+class _Phase:
+    __slots__ = ("_timer", "_name", "_start")
+
+    def __init__(self, timer: PhaseTimer, name: str) -> None:
+        self._timer = timer
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._timer.add(self._name, time.perf_counter() - self._start)
+
+
+class PhaseTimer:
+    """Accumulate the wall clock times of the phases of a run by name
+
+    Nothing is measured unless the timer is enabled.  The disabled timer
+    hands out a shared no-op context manager, so that the instrumentation
+    may stay in the hot paths.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.times: dict[str, float] = {}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(enabled={self.enabled!r})"
+
+    def phase(self, name: str) -> _Phase | _NoPhase:
+        return _Phase(self, name) if self.enabled else _NO_PHASE
+
+    def add(self, name: str, duration: float) -> None:
+        self.times[name] = self.times.get(name, 0.0) + duration
+
+    def reset(self, *, enabled: bool) -> None:
+        self.enabled = enabled
+        self.times.clear()
+
+
+# The phases of the current run.  Phases of the checking pipeline are named
+# plainly ("parsing", "checking", ...); the parse functions and the check
+# functions are timed as "section:<name>" and "plugin:<name>".
+phase_timer: Final = PhaseTimer()
@@ -171,6 +171,20 @@ class Eventconsolestatus(Table):
     )
     """The number of events received since startup of the Event Console"""
 
+    status_history_flush_latency = Column(
+        'status_history_flush_latency',
+        col_type='float',
+        description='The time in seconds the last write of queued history entries took',
+    )
+    """The time in seconds the last write of queued history entries took"""
+
+    status_history_queue_depth = Column(
+        'status_history_queue_depth',
+        col_type='int',
+        description='The number of history entries that have not been written yet',
+    )
+    """The number of history entries that have not been written yet"""
+
     status_message_rate = Column(
         'status_message_rate',
         col_type='float',
@@ -9,6 +9,8 @@ from collections.abc import Callable, Iterable, Iterator, Sequence
 from pathlib import Path
 from typing import Final, Literal, NamedTuple, Protocol, Self
 
+import numpy as np
+import numpy.typing as npt
 from pydantic import BaseModel
 
 from cmk.agent_based.prediction_backend import PredictionInfo
@@ -174,7 +176,7 @@ def _calculate_data_for_prediction(
     slices = [
         _forward_fill_resample(
             current_range,
-            values,
+            _Slice.from_values(values),
             range(youngest_range.start - shift, youngest_range.stop - shift, youngest_range.step),
         )
         for current_range, values, shift in raw_slices
@@ -187,29 +189,75 @@ def _calculate_data_for_prediction(
     )
 
 
-def _forward_fill_resample(
-    current_range: range, values: Sequence[float | None], new_range: range
-) -> Sequence[float | None]:
-    if current_range == new_range:
-        return values
+class _Slice(NamedTuple):
+    """The values of a time slice, NaN is a value like any other and None is missing"""
 
-    idx_max = len(values) - 1
-    return [
-        values[max(0, min(int((t - current_range.start) / current_range.step), idx_max))]
-        for t in new_range
-    ]
+    values: npt.NDArray[np.float64]
+    missing: npt.NDArray[np.bool_]
 
+    @classmethod
+    def from_values(cls, values: Sequence[float | None]) -> Self:
+        array = np.array(values, dtype=np.float64)
+        missing = np.isnan(array)
+        if values.count(None) != np.count_nonzero(missing):
+            # Some NaN values have been recorded as such
+            missing = np.array([value is None for value in values])
+        return cls(array, missing)
 
-def _data_stats(slices: Iterable[Iterable[float | None]]) -> list[DataStat | None]:
-    "Statistically summarize all the upsampled RRD data"
-    return [  # can't inline this b/c it is unit tested :-/
-        (
-            DataStat.from_values(point_line)
-            if (point_line := [x for x in time_column if x is not None])
-            else None
+
+def _forward_fill_resample(current_range: range, slice_: _Slice, new_range: range) -> _Slice:
+    if current_range == new_range:
+        return slice_
+
+    # Truncated towards zero, like int() does
+    indices = (
+        (np.arange(new_range.start, new_range.stop, new_range.step) - current_range.start)
+        / current_range.step
+    ).astype(np.intp)
+    np.clip(indices, 0, len(slice_.values) - 1, out=indices)
+    return _Slice(slice_.values[indices], slice_.missing[indices])
+
+
+def _data_stats(slices: Sequence[_Slice]) -> list[DataStat | None]:
+    """Statistically summarize all the upsampled RRD data
+
+    Computes the same as DataStat.from_values for each point in time, but for all of them at
+    once.  Only points with NaN values are summarized one by one, to get the very same result.
+    """
+    if not slices:
+        return []
+    length = min(len(slice_.values) for slice_ in slices)
+    present = ~np.stack([slice_.missing[:length] for slice_ in slices])
+    values = np.where(present, np.stack([slice_.values[:length] for slice_ in slices]), 0.0)
+
+    samples = np.count_nonzero(present, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        averages = values.sum(axis=0) / samples
+        stdevs = np.sqrt(
+            np.abs(np.square(values).sum(axis=0) - averages**2 * samples) / (samples - 1)
         )
-        for time_column in zip(*slices)
-    ]
+    minima = np.where(present, values, np.inf).min(axis=0)
+    maxima = np.where(present, values, -np.inf).max(axis=0)
+    with_nan = np.isnan(values).any(axis=0)
+
+    points: list[DataStat | None] = []
+    for index, (count, average, min_, max_, stdev, nan) in enumerate(
+        zip(
+            samples.tolist(),
+            averages.tolist(),
+            minima.tolist(),
+            maxima.tolist(),
+            stdevs.tolist(),
+            with_nan.tolist(),
+        )
+    ):
+        if count == 0:
+            points.append(None)
+        elif nan:
+            points.append(DataStat.from_values(values[present[:, index], index].tolist()))
+        else:
+            points.append(DataStat(average, min_, max_, None if count == 1 else stdev))
+    return points
 
 
 def _std_dev(point_line: Sequence[float], average: float) -> float | None:
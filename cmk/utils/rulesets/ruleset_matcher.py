@@ -7,10 +7,12 @@
 import contextlib
 import dataclasses
 from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from collections.abc import Set as AbstractSet
 from re import Pattern
 from typing import (
     Any,
     cast,
+    Final,
     Generic,
     NamedTuple,
     NotRequired,
@@ -96,7 +98,7 @@ PreprocessedPattern: TypeAlias = tuple[bool, Pattern[str]]
 PreprocessedServiceRuleset: TypeAlias = list[
     tuple[
         TRuleValue,
-        set[HostName],
+        "HostBitmap",
         LabelGroups,
         LabelGroupsCacheId,
         PreprocessedPattern,
@@ -460,6 +462,252 @@ _ConditionCacheID: TypeAlias = tuple[
 ]
 
 
+class HostIndex:
+    """Interns host names to dense integer positions
+
+    Sets of hosts are then represented as bitsets: bit ``n`` of a Python
+    integer is set if the host at position ``n`` is part of the set.
+    Host names not known to the index are never part of a bitset.
+    """
+
+    def __init__(self, hostnames: Iterable[HostName]) -> None:
+        self.hosts: Sequence[HostName] = sorted(hostnames)
+        self.positions: Mapping[HostName, int] = {
+            hostname: position for position, hostname in enumerate(self.hosts)
+        }
+        self.all_bits: Final = (1 << len(self.hosts)) - 1
+
+    def to_bits(self, hostnames: Iterable[HostName]) -> int:
+        return self.positions_to_bits(
+            position
+            for hostname in hostnames
+            if (position := self.positions.get(hostname)) is not None
+        )
+
+    @staticmethod
+    def positions_to_bits(positions: Iterable[int]) -> int:
+        # Setting the bits one by one on an integer would copy it every time.
+        buffer = bytearray()
+        for position in positions:
+            if (offset := position >> 3) >= len(buffer):
+                buffer.extend(bytes(offset + 1 - len(buffer)))
+            buffer[offset] |= 1 << (position & 7)
+        return int.from_bytes(buffer, "little")
+
+    def to_hosts(self, bits: int) -> Iterator[HostName]:
+        # bin() and str.find() are by far the fastest way to iterate the set
+        # bits of a large integer in pure Python.
+        reversed_bits = bin(bits)[:1:-1]
+        position = reversed_bits.find("1")
+        while position != -1:
+            yield self.hosts[position]
+            position = reversed_bits.find("1", position + 1)
+
+
+class HostBitmap(AbstractSet[HostName]):
+    """Immutable set of host names backed by a bitset of a `HostIndex`
+
+    A byte array copy of the bitset is created on the first membership test,
+    so that testing is O(1) instead of shifting a potentially large integer.
+    """
+
+    __slots__ = ("_index", "bits", "_lookup")
+
+    def __init__(self, index: HostIndex, bits: int) -> None:
+        self._index: Final = index
+        self.bits: Final = bits
+        self._lookup: bytes | None = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({set(self)!r})"
+
+    def __contains__(self, hostname: object) -> bool:
+        # This is the hot path of the service ruleset matching, keep it lean.
+        try:
+            position = self._index.positions[hostname]  # type: ignore[index]
+        except KeyError:
+            return False
+        if (lookup := self._lookup) is None:
+            lookup = self._lookup = self.bits.to_bytes((len(self._index.hosts) + 7) // 8, "little")
+        return lookup[position >> 3] >> (position & 7) & 1 == 1
+
+    def __iter__(self) -> Iterator[HostName]:
+        return self._index.to_hosts(self.bits)
+
+    def __len__(self) -> int:
+        return self.bits.bit_count()
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, HostBitmap) and other._index is self._index:
+            return self.bits == other.bits
+        return super().__eq__(other)
+
+    def __hash__(self) -> int:
+        return self._hash()
+
+
+class CompiledHostMatcher:
+    """Evaluates host conditions of rules with bitset operations
+
+    Inverted indexes map host tags, host labels and folders to the bitset
+    of the hosts having them (see `HostIndex`), so that a rule condition
+    reduces to a few integer operations instead of a loop over all hosts.
+    Host name regexes of a rule are merged to a single alternation and only
+    run against the hosts that passed all other conditions.
+    """
+
+    def __init__(
+        self,
+        host_index: HostIndex,
+        host_tags: Mapping[HostName, Iterable[tuple[TagGroupID, TagID]]],
+        host_paths: Mapping[HostName, str],
+        labels_of_host: Callable[[HostName], Labels],
+    ) -> None:
+        self._host_index = host_index
+        self._host_paths = host_paths
+        self._labels_of_host = labels_of_host
+        self.all_hosts = host_index.all_bits
+
+        tag_positions: dict[tuple[TagGroupID, TagID], list[int]] = {}
+        for hostname, position in host_index.positions.items():
+            for tag in host_tags.get(hostname, ()):
+                tag_positions.setdefault(tag, []).append(position)
+        self._tag_index = {
+            tag: HostIndex.positions_to_bits(positions) for tag, positions in tag_positions.items()
+        }
+
+        self._folder_index: dict[str, int] = {}
+        # Built lazily: computing the labels of a host is expensive.
+        self._label_index: dict[int, dict[tuple[str, str], int]] = {}
+
+    def clear_label_index(self) -> None:
+        self._label_index.clear()
+
+    def to_bits(self, hostnames: Iterable[HostName]) -> int:
+        return self._host_index.to_bits(hostnames)
+
+    def to_hosts(self, bits: int) -> Iterator[HostName]:
+        return self._host_index.to_hosts(bits)
+
+    def match(self, condition: RuleConditionsSpec, scope: int) -> int:
+        """Returns the bitset of the hosts within `scope` matching the condition"""
+        hostlist = condition.get("host_name")
+        if hostlist == []:
+            return 0  # Empty host list -> Nothing matches
+
+        bits = scope & self._folder_bits(condition.get("host_folder", "/"))
+        for taggroup_id, tag_condition in condition.get("host_tags", {}).items():
+            if not bits:
+                return 0
+            bits &= self._tag_condition_bits(taggroup_id, tag_condition)
+
+        if bits and (label_groups := condition.get("host_label_groups", [])):
+            bits &= self._label_groups_bits(label_groups, scope)
+
+        if bits and hostlist:
+            bits &= self._host_name_bits(hostlist, bits)
+
+        return bits
+
+    def _folder_bits(self, folder_path: str) -> int:
+        with contextlib.suppress(KeyError):
+            return self._folder_index[folder_path]
+
+        return self._folder_index.setdefault(
+            folder_path,
+            self.to_bits(
+                hostname
+                for hostname in self._host_index.hosts
+                if self._host_paths.get(hostname, "/").startswith(folder_path)
+            ),
+        )
+
+    def _tag_condition_bits(self, taggroup_id: TagGroupID, tag_condition: TagCondition) -> int:
+        if is_tag_condition_ne(tag_condition):
+            return self.all_hosts & ~self._tag_index.get(
+                (taggroup_id, cast(TagID, tag_condition["$ne"])), 0
+            )
+
+        if is_tag_condition_or(tag_condition):
+            return self._any_tag_bits(taggroup_id, tag_condition["$or"])
+
+        if is_tag_condition_nor(tag_condition):
+            return self.all_hosts & ~self._any_tag_bits(taggroup_id, tag_condition["$nor"])
+
+        if isinstance(tag_condition, dict):
+            raise NotImplementedError()
+
+        return self._tag_index.get((taggroup_id, cast(TagID, tag_condition)), 0)
+
+    def _any_tag_bits(self, taggroup_id: TagGroupID, tag_ids: Iterable[TagID | None]) -> int:
+        bits = 0
+        for tag_id in tag_ids:
+            bits |= self._tag_index.get((taggroup_id, cast(TagID, tag_id)), 0)
+        return bits
+
+    def _label_groups_bits(self, label_groups: LabelGroups, scope: int) -> int:
+        """Evaluate the label groups like `matches_labels` does for a single host"""
+        label_index = self._get_label_index(scope)
+        overall_bits = scope
+        for group_operator, label_group in label_groups:
+            group_bits = scope
+            for label_operator, label in label_group:
+                if not label:
+                    continue
+                try:
+                    key, value = label.split(":")
+                except Exception:
+                    raise NotImplementedError(f"Invalid label condition: {label}")
+                group_bits = _and_or_not_bits(
+                    group_bits, label_index.get((key, value), 0), label_operator
+                )
+            overall_bits = _and_or_not_bits(overall_bits, group_bits, group_operator)
+        return overall_bits
+
+    def _get_label_index(self, scope: int) -> Mapping[tuple[str, str], int]:
+        with contextlib.suppress(KeyError):
+            return self._label_index[scope]
+
+        label_positions: dict[tuple[str, str], list[int]] = {}
+        for hostname in self.to_hosts(scope):
+            position = self._host_index.positions[hostname]
+            for label in self._labels_of_host(hostname).items():
+                label_positions.setdefault(label, []).append(position)
+        return self._label_index.setdefault(
+            scope,
+            {
+                label: HostIndex.positions_to_bits(positions)
+                for label, positions in label_positions.items()
+            },
+        )
+
+    def _host_name_bits(self, hostlist: HostOrServiceConditions, candidates: int) -> int:
+        negate, entries = parse_negated_condition_list(hostlist)
+        names: list[HostName] = []
+        patterns: list[str] = []
+        for entry in entries:
+            if isinstance(entry, dict):
+                patterns.append(entry["$regex"])
+            else:
+                # Not validated: an invalid host name simply matches no host.
+                names.append(cast(HostName, entry))
+
+        bits = self.to_bits(names)
+        if patterns:
+            pattern = regex(combine_patterns(patterns))
+            bits |= self.to_bits(
+                hostname
+                for hostname in self.to_hosts(candidates & ~bits)
+                if hostname and pattern.match(hostname) is not None
+            )
+
+        if not negate:
+            return bits
+
+        # The generic agent host matches negated conditions only.
+        return (self.all_hosts & ~bits) | self.to_bits([HostName("")])
+
+
 class RulesetOptimizer:
     """Performs some precalculations on the configured rulesets to improve the
     processing performance"""
@@ -486,33 +734,20 @@ class RulesetOptimizer:
         self._builtin_host_labels_store = builtin_host_labels_store
 
         self._all_configured_hosts = all_configured_hosts
+        self._host_index = HostIndex(all_configured_hosts)
 
         # Contains all hostnames which are currently relevant for this cache.
         # Every active host or a subset of the active hosts when multiprocessing
         # is enabled.
-        self._all_processed_hosts = self._all_configured_hosts
+        self._all_processed_hosts = HostBitmap(self._host_index, self._host_index.all_bits)
 
-        # A factor which indicates how much hosts share the same host tag configuration (excluding folders).
-        # len(all_processed_hosts) / len(different tag combinations)
-        # It is used to determine the best rule evualation method
-        self._all_processed_hosts_similarity = 1.0
+        self._compiled_matcher = CompiledHostMatcher(
+            self._host_index, self._host_tags, self._host_paths, self.labels_of_host
+        )
 
         self.__service_ruleset_cache: dict[tuple[int, bool], PreprocessedServiceRuleset] = {}
         self.__host_ruleset_cache: dict[tuple[int, bool], Mapping[HostAddress, Sequence[Any]]] = {}
-        self._all_matching_hosts_match_cache: dict[
-            tuple[_ConditionCacheID, bool], set[HostName]
-        ] = {}
-
-        # Reference dirname -> hosts in this dir including subfolders
-        self._folder_host_lookup: dict[tuple[bool, str], set[HostName]] = {}
-
-        # Provides a list of hosts with the same hosttags, excluding the folder
-        self._hosts_grouped_by_tags: dict[tuple[tuple[TagGroupID, TagID], ...], set[HostName]] = {}
-        # Reference hostname -> tag group reference
-        self._host_grouped_ref: dict[HostName, tuple[tuple[TagGroupID, TagID], ...]] = {}
-
-        # TODO: Clean this one up?
-        self._initialize_host_lookup()
+        self._all_matching_hosts_match_cache: dict[tuple[_ConditionCacheID, bool], int] = {}
 
     def set_builtin_host_labels_store(
         self, builtin_host_labels_store: BuiltinHostLabelsStore
@@ -526,8 +761,9 @@ class RulesetOptimizer:
     def clear_caches(self) -> None:
         self.__host_ruleset_cache.clear()
         self._all_matching_hosts_match_cache.clear()
+        self._compiled_matcher.clear_label_index()
 
-    def all_processed_hosts(self) -> frozenset[HostName]:
+    def all_processed_hosts(self) -> HostBitmap:
         """Returns a set of all processed hosts"""
         return self._all_processed_hosts
 
@@ -544,26 +780,9 @@ class RulesetOptimizer:
 
         nodes_and_clusters = involved_clusters | involved_nodes | all_processed_hosts
 
-        # Only add references to configured hosts
-        nodes_and_clusters.intersection_update(self._all_configured_hosts)
-        self._all_processed_hosts = frozenset(nodes_and_clusters)
-
-        # The folder host lookup includes a list of all -processed- hosts within a given
-        # folder. Any update with set_all_processed hosts invalidates this cache, because
-        # the scope of relevant hosts has changed. This is -good-, since the values in this
-        # lookup are iterated one by one later on in all_matching_hosts
-        self._folder_host_lookup = {}
-
-        used_groups = {
-            self._host_grouped_ref.get(hostname, ()) for hostname in self._all_processed_hosts
-        }
-
-        if not used_groups:
-            self._all_processed_hosts_similarity = 1.0
-            return
-
-        self._all_processed_hosts_similarity = (
-            1.0 * len(self._all_processed_hosts) / len(used_groups)
+        # Only add references to configured hosts (the others are not in the index)
+        self._all_processed_hosts = HostBitmap(
+            self._host_index, self._host_index.to_bits(nodes_and_clusters)
         )
 
     def get_host_ruleset(
@@ -577,7 +796,9 @@ class RulesetOptimizer:
                 if is_disabled(rule):
                     continue
 
-                for hostname in self._all_matching_hosts(rule["condition"], with_foreign_hosts):
+                for hostname in self._host_index.to_hosts(
+                    self._matching_hosts_bits(rule["condition"], with_foreign_hosts)
+                ):
                     host_values.setdefault(hostname, []).append(rule["value"])
 
             return host_values
@@ -653,89 +874,39 @@ class RulesetOptimizer:
 
         return negate, regex(combine_patterns(pattern_parts))
 
-    def _all_matching_hosts(  # pylint: disable=too-many-branches
+    def _all_matching_hosts(
         self, condition: RuleConditionsSpec, with_foreign_hosts: bool
-    ) -> set[HostName]:
+    ) -> HostBitmap:
         """Returns a set containing the names of hosts that match the given
         tags and hostlist conditions."""
-        hostlist = condition.get("host_name")
-        tag_conditions: Mapping[TagGroupID, TagCondition] = condition.get("host_tags", {})
-        label_groups: LabelGroups = condition.get("host_label_groups", [])
-        rule_path = condition.get("host_folder", "/")
+        return HostBitmap(
+            self._host_index, self._matching_hosts_bits(condition, with_foreign_hosts)
+        )
 
+    def _matching_hosts_bits(self, condition: RuleConditionsSpec, with_foreign_hosts: bool) -> int:
         cache_id = (
             RulesetOptimizer._condition_cache_id(
-                hostlist,
-                tag_conditions,
-                label_groups,
-                rule_path,
+                condition.get("host_name"),
+                condition.get("host_tags", {}),
+                condition.get("host_label_groups", []),
+                condition.get("host_folder", "/"),
             ),
             with_foreign_hosts,
         )
-
-        try:
+        with contextlib.suppress(KeyError):
             return self._all_matching_hosts_match_cache[cache_id]
-        except KeyError:
-            pass
-
-        # Thin out the valid hosts further. If the rule is located in a folder
-        # we only need the intersection of the folders hosts and the previously determined valid_hosts
-        valid_hosts = self._get_hosts_within_folder(rule_path, with_foreign_hosts)
-
-        if tag_conditions and hostlist is None and not label_groups:
-            # TODO: Labels could also be optimized like the tags
-            matched_by_tags = self._match_hosts_by_tags(cache_id, valid_hosts, tag_conditions)
-            if matched_by_tags is not None:
-                return matched_by_tags
-
-        matching: set[HostName] = set()
-        only_specific_hosts = (
-            hostlist is not None
-            and not isinstance(hostlist, dict)
-            and all(not isinstance(x, dict) for x in hostlist)
-        )
-
-        if hostlist == []:
-            pass  # Empty host list -> Nothing matches
-
-        elif not tag_conditions and not label_groups and not hostlist:
-            # If no tags are specified and the hostlist only include @all (all hosts)
-            matching = valid_hosts
 
-        elif (
-            not tag_conditions and not label_groups and only_specific_hosts and hostlist is not None
-        ):
-            # If no tags are specified and there are only specific hosts we already have the matches
-            matching = valid_hosts.intersection(hostlist)
-
-        else:
-            # If the rule has only exact host restrictions, we can thin out the list of hosts to check
-            if only_specific_hosts and hostlist is not None:
-                hosts_to_check = valid_hosts.intersection(hostlist)
-            else:
-                hosts_to_check = valid_hosts
-
-            for hostname in hosts_to_check:
-                # When no tag matching is requested, do not filter by tags. Accept all hosts
-                # and filter only by hostlist
-                if tag_conditions and not matches_host_tags(
-                    self._host_tags[hostname],
-                    tag_conditions,
-                ):
-                    continue
-
-                if label_groups:
-                    host_labels = self.labels_of_host(hostname)
-                    if not matches_labels(host_labels, label_groups):
-                        continue
-
-                if not matches_host_name(hostlist, hostname):
-                    continue
-
-                matching.add(hostname)
-
-        self._all_matching_hosts_match_cache[cache_id] = matching
-        return matching
+        return self._all_matching_hosts_match_cache.setdefault(
+            cache_id,
+            self._compiled_matcher.match(
+                condition,
+                (
+                    self._host_index.all_bits
+                    if with_foreign_hosts
+                    else self._all_processed_hosts.bits
+                ),
+            ),
+        )
 
     @staticmethod
     def _condition_cache_id(
@@ -771,99 +942,6 @@ class RulesetOptimizer:
             rule_path,
         )
 
-    # TODO: Generalize this optimization: Build some kind of key out of the tag conditions
-    # (positive, negative, ...). Make it work with the new tag group based "$or" handling.
-    def _match_hosts_by_tags(
-        self,
-        cache_id: tuple[_ConditionCacheID, bool],
-        valid_hosts: set[HostName],
-        tag_conditions: Mapping[TagGroupID, TagCondition],
-    ) -> set[HostName] | None:
-        matching = set()
-        negative_match_tags = set()
-        positive_match_tags = set()
-        for taggroup_id, tag_condition in tag_conditions.items():
-            if isinstance(tag_condition, dict):
-                if "$ne" in tag_condition:
-                    negative_match_tags.add(
-                        (
-                            taggroup_id,
-                            cast(TagConditionNE, tag_condition)["$ne"],
-                        )
-                    )
-                    continue
-
-                if "$or" in tag_condition:
-                    return None  # Can not be optimized, makes _all_matching_hosts proceed
-
-                if "$nor" in tag_condition:
-                    return None  # Can not be optimized, makes _all_matching_hosts proceed
-
-                raise NotImplementedError()
-
-            positive_match_tags.add((taggroup_id, tag_condition))
-
-        # TODO:
-        # if has_specific_folder_tag or self._all_processed_hosts_similarity < 3.0:
-        if self._all_processed_hosts_similarity < 3.0:
-            # Without shared folders
-            for hostname in valid_hosts:
-                if positive_match_tags <= self._host_tags[
-                    hostname
-                ] and not negative_match_tags.intersection(self._host_tags[hostname]):
-                    matching.add(hostname)
-
-            self._all_matching_hosts_match_cache[cache_id] = matching
-            return matching
-
-        # With shared folders
-        checked_hosts: set[str] = set()
-        for hostname in valid_hosts:
-            if hostname in checked_hosts:
-                continue
-
-            hosts_with_same_tag = self._filter_hosts_with_same_tags_as_host(hostname, valid_hosts)
-            checked_hosts.update(hosts_with_same_tag)
-
-            if positive_match_tags <= self._host_tags[
-                hostname
-            ] and not negative_match_tags.intersection(self._host_tags[hostname]):
-                matching.update(hosts_with_same_tag)
-
-        self._all_matching_hosts_match_cache[cache_id] = matching
-        return matching
-
-    def _filter_hosts_with_same_tags_as_host(
-        self,
-        hostname: HostName,
-        hosts: set[HostName],
-    ) -> set[HostName]:
-        return self._hosts_grouped_by_tags[self._host_grouped_ref[hostname]].intersection(hosts)
-
-    def _get_hosts_within_folder(self, folder_path: str, with_foreign_hosts: bool) -> set[HostName]:
-        cache_id = with_foreign_hosts, folder_path
-        if cache_id not in self._folder_host_lookup:
-            hosts_in_folder = set()
-            relevant_hosts = (
-                self._all_configured_hosts if with_foreign_hosts else self._all_processed_hosts
-            )
-
-            for hostname in relevant_hosts:
-                host_path = self._host_paths.get(hostname, "/")
-                if host_path.startswith(folder_path):
-                    hosts_in_folder.add(hostname)
-
-            self._folder_host_lookup[cache_id] = hosts_in_folder
-            return hosts_in_folder
-
-        return self._folder_host_lookup[cache_id]
-
-    def _initialize_host_lookup(self) -> None:
-        for hostname in self._all_configured_hosts:
-            group_ref = tuple(sorted(self._host_tags[hostname]))
-            self._hosts_grouped_by_tags.setdefault(group_ref, set()).add(hostname)
-            self._host_grouped_ref[hostname] = group_ref
-
     def labels_of_host(self, hostname: HostName) -> Labels:
         """Returns the effective set of host labels from all available sources
 
@@ -1077,6 +1155,16 @@ def matches_labels(object_labels: Labels, required_label_groups: LabelGroups) ->
     return overall_match
 
 
+def _and_or_not_bits(given_bits: int, new_bits: int, operator: AndOrNotLiteral) -> int:
+    match operator:
+        case "and":
+            return given_bits & new_bits
+        case "or":
+            return given_bits | new_bits
+        case "not":
+            return given_bits & ~new_bits
+
+
 def _and_or_not_group_match(
     given_group_match: bool, new_single_match: bool, operator: AndOrNotLiteral
 ) -> bool:
@@ -252,6 +252,7 @@ def save_tmpfs_dump(site_dir: str, site_tmp_dir: str) -> None:
     save_paths = [
         Path(site_tmp_dir) / "check_mk" / "piggyback",
         Path(site_tmp_dir) / "check_mk" / "piggyback_sources",
+        Path(site_tmp_dir) / "check_mk" / "piggyback_segments",
         Path(site_tmp_dir) / "check_mk" / "counters",
     ]
 
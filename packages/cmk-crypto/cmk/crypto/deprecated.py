@@ -5,6 +5,7 @@
 
 """Deprecated crypto utilities that should not be used in new code"""
 
+from collections.abc import Buffer
 from typing import Literal
 
 from cryptography.hazmat.primitives.asymmetric import padding
@@ -27,7 +28,7 @@ class AesCbcCipher:
             else Cipher(algorithms.AES(key), modes.CBC(iv)).decryptor()
         )
 
-    def update(self, data: bytes) -> bytes:
+    def update(self, data: Buffer) -> bytes:
         return self._cipher.update(data)
 
     def finalize(self) -> bytes:
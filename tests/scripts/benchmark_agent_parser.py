@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Compare the batch and the streaming mode of the AgentParser.
+
+A synthetic agent output of the requested size is written to a temporary
+file.  Every mode is then run in a fresh process, so that the reported peak
+RSS is not skewed by the previous run.
+
+    python3 tests/scripts/benchmark_agent_parser.py --size-mb 50
+"""
+
+import argparse
+import logging
+import multiprocessing
+import resource
+import tempfile
+import time
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+
+from cmk.utils.agentdatatype import AgentRawData
+from cmk.utils.hostaddress import HostName
+
+from cmk.checkengine.parser import AgentParser, AgentRawDataSectionElem, NO_SELECTION, SectionStore
+
+
+def _write_agent_output(path: Path, size: int) -> None:
+    line = b"root 1234 0.0 0.1 /usr/bin/some-daemon --with --a --few --arguments\n"
+    with path.open("wb") as f:
+        written = n = 0
+        while written < size:
+            block = b"<<<section_%d>>>\n" % n + line * 1000
+            written += f.write(block)
+            n += 1
+
+
+def _read_chunks(path: Path, chunk_size: int) -> Iterator[bytes]:
+    with path.open("rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def _run(mode: str, path: Path, store_path: Path, chunk_size: int) -> tuple[float, int]:
+    parser = AgentParser(
+        HostName("benchmark"),
+        SectionStore[Sequence[AgentRawDataSectionElem]](store_path, logger=logging.getLogger()),
+        host_check_interval=60,
+        keep_outdated=True,
+        translation={},
+        encoding_fallback="utf-8",
+        logger=logging.getLogger(),
+    )
+    start = time.perf_counter()
+    if mode == "batch":
+        parser.parse(AgentRawData(path.read_bytes()), selection=NO_SELECTION)
+    else:
+        parser.parse_stream(_read_chunks(path, chunk_size), selection=NO_SELECTION)
+    return time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--chunk-size", type=int, default=64 * 1024)
+    args = parser.parse_args()
+
+    with (
+        tempfile.TemporaryDirectory() as tmpdir,
+        multiprocessing.Pool(1, maxtasksperchild=1) as pool,
+    ):
+        path = Path(tmpdir, "agent_output")
+        _write_agent_output(path, args.size_mb * 1024 * 1024)
+        for mode in ("batch", "stream"):
+            wall_time, max_rss = pool.apply(
+                _run, (mode, path, Path(tmpdir, f"store_{mode}"), args.chunk_size)
+            )
+            print(f"{mode:>6}: {wall_time:7.2f} s, peak RSS {max_rss / 1024:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
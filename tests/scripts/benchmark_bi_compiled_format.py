@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Store and load a compiled BI aggregation of many hosts.
+
+The sample aggregation is compiled for hosts with 20 services each and stored
+as pickled schema, as it was before, and in the compact format.  Reported are
+the file sizes, the time to load all branches and a single one and the memory
+taken by the loaded trees.
+
+    OMD_ROOT=$(mktemp -d) OMD_SITE=heute python3 tests/scripts/benchmark_bi_compiled_format.py \\
+        --hosts 10000
+"""
+
+import argparse
+import copy
+import gc
+import pickle
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from livestatus import LivestatusOutputFormat, LivestatusResponse, SiteId
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.bi.aggregation import BIAggregation
+from cmk.bi.compiled_format import (
+    CompiledAggregationFile,
+    dump_compiled_aggregation,
+    load_compiled_aggregation,
+)
+from cmk.bi.data_fetcher import BIStructureFetcher
+from cmk.bi.lib import SitesCallback
+from cmk.bi.packs import BIAggregationPacks
+from cmk.bi.sample_configs import bi_sample_config
+from cmk.bi.searcher import BISearcher
+from cmk.bi.trees import BICompiledAggregation
+
+_SERVICES = [
+    f"{service} {n}"
+    for service in ("Filesystem", "Interface", "OMD performance", "Check_MK", "Uptime")
+    for n in range(4)
+]
+
+
+def _query(
+    query: str,
+    only_sites: list[SiteId] | None = None,
+    output_format: LivestatusOutputFormat = LivestatusOutputFormat.PYTHON,
+    fetch_full_data: bool = False,
+) -> LivestatusResponse:
+    return LivestatusResponse([])
+
+
+_SITES_CALLBACK = SitesCallback(lambda: [], _query, lambda s: s)
+
+
+class _Packs(BIAggregationPacks):
+    def __init__(self) -> None:
+        super().__init__("")
+        config: dict[str, Any] = copy.deepcopy(bi_sample_config)
+        for aggregation in config["packs"][0]["aggregations"]:
+            aggregation["computation_options"]["disabled"] = False
+        self._load_config(config)
+
+    def load_config(self) -> None:
+        pass
+
+
+def _compile(hosts: int) -> BICompiledAggregation:
+    structure_fetcher = BIStructureFetcher(_SITES_CALLBACK)
+    structure_fetcher.add_site_data(
+        SiteId("heute"),
+        {
+            name: (
+                "heute",
+                {("tcp", "tcp"), ("criticality", "prod")},
+                {"cmk/os_family": "linux"},
+                "",
+                {service: (set(), {}) for service in _SERVICES},
+                (),
+                (),
+                name,
+                name,
+            )
+            for n in range(hosts)
+            for name in [HostName(f"host{n:05d}")]
+        },
+    )
+    bi_searcher = BISearcher()
+    bi_searcher.set_hosts(structure_fetcher.hosts)
+    aggregation = _Packs().get_aggregation("default_aggregation")
+    assert aggregation is not None
+    return aggregation.compile(bi_searcher)
+
+
+def _measure(what: str, load: Callable[[], object]) -> None:
+    gc.collect()
+    start = time.perf_counter()
+    load()
+    duration = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    loaded = load()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del loaded
+    print(f"    {what:<32} {duration * 1000:9.1f} ms {memory / 2**20:9.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, default=10_000)
+    args = parser.parse_args()
+
+    compiled_aggregation = _compile(args.hosts)
+    title = compiled_aggregation.branches[len(compiled_aggregation.branches) // 2].properties.title
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pickled = Path(tmpdir, "pickled")
+        pickled.write_bytes(pickle.dumps(compiled_aggregation.serialize()))
+        compact = Path(tmpdir, "compact")
+        compact.write_bytes(dump_compiled_aggregation(compiled_aggregation))
+        del compiled_aggregation
+
+        print(f"{args.hosts} branches")
+        print(f"    pickled file {pickled.stat().st_size / 2**20:9.1f} MiB")
+        print(f"    compact file {compact.stat().st_size / 2**20:9.1f} MiB")
+
+        def load_pickled() -> BICompiledAggregation:
+            return BIAggregation.create_trees_from_schema(pickle.loads(pickled.read_bytes()))
+
+        def load_pickled_branch() -> object:
+            for branch in load_pickled().branches:
+                if branch.properties.title == title:
+                    return branch
+            return None
+
+        _measure("pickled, all branches", load_pickled)
+        _measure("compact, all branches", lambda: load_compiled_aggregation(compact))
+        _measure("pickled, one branch", load_pickled_branch)
+        _measure("compact, one branch", lambda: CompiledAggregationFile(compact).load_branch(title))
+
+
+if __name__ == "__main__":
+    main()
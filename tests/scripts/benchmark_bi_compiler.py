@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Compile BI aggregations after typical changes.
+
+The sample BI pack is given aggregations which each search a share of the
+hosts by a host name regex.  All aggregations are compiled once, which is what
+every compilation took before, then again after no change, after a changed
+host, a new host and an edited aggregation.  The compile times of the
+aggregations are reported by the compiler.
+
+    OMD_ROOT=$(mktemp -d) OMD_SITE=heute python3 tests/scripts/benchmark_bi_compiler.py \\
+        --hosts 30000 --aggregations 300
+"""
+
+import argparse
+import copy
+import time
+from typing import Any
+
+from livestatus import LivestatusOutputFormat, LivestatusResponse, SiteId
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.bi.compiler import BICompiler
+from cmk.bi.lib import SitesCallback
+from cmk.bi.packs import BIAggregationPacks
+from cmk.bi.sample_configs import bi_sample_config
+
+
+def _query(
+    query: str,
+    only_sites: list[SiteId] | None = None,
+    output_format: LivestatusOutputFormat = LivestatusOutputFormat.PYTHON,
+    fetch_full_data: bool = False,
+) -> LivestatusResponse:
+    return LivestatusResponse([])
+
+
+class _Packs(BIAggregationPacks):
+    def __init__(self, aggregations: int, pattern_of_first: str) -> None:
+        super().__init__("")
+        config: dict[str, Any] = copy.deepcopy(bi_sample_config)
+        template = config["packs"][0]["aggregations"][0]
+        config["packs"][0]["aggregations"] = [
+            _aggregation(template, n, pattern_of_first if n == 0 else f"host{n:04d}-.*")
+            for n in range(aggregations)
+        ]
+        self._load_config(config)
+
+    def load_config(self) -> None:
+        pass
+
+
+def _aggregation(template: dict[str, Any], n: int, pattern: str) -> dict[str, Any]:
+    aggregation = copy.deepcopy(template)
+    aggregation["id"] = f"aggr{n}"
+    aggregation["computation_options"]["disabled"] = False
+    aggregation["groups"]["names"] = [f"Group {n}"]
+    aggregation["node"]["search"]["conditions"]["host_choice"] = {
+        "type": "host_name_regex",
+        "pattern": pattern,
+    }
+    aggregation["node"]["action"]["params"]["arguments"] = ["$HOSTNAME$"]
+    return aggregation
+
+
+def _host(name: str, alias: str) -> tuple:
+    services: dict[str, tuple[set[str], dict[str, str]]] = {
+        f"{service} {n}": (set(), {})
+        for service in ("Filesystem", "Interface", "OMD performance", "Check_MK", "Uptime")
+        for n in range(4)
+    }
+    return (
+        "heute",
+        {("tcp", "tcp"), ("criticality", "prod")},
+        {"cmk/os_family": "linux"},
+        "",
+        services,
+        (),
+        (),
+        alias,
+        name,
+    )
+
+
+def _compile(bi_compiler: BICompiler, structure: dict[HostName, tuple], what: str) -> None:
+    fetcher = bi_compiler._bi_structure_fetcher
+    fetcher.cleanup()
+    fetcher.add_site_data(SiteId("heute"), structure)
+    bi_compiler.bi_searcher.set_hosts(fetcher.hosts)
+    compile_times = bi_compiler.get_compile_times()
+    start = time.perf_counter()
+    bi_compiler._compile_changed_aggregations()
+    duration = time.perf_counter() - start
+    compiled = [
+        aggr_id
+        for aggr_id, compile_time in bi_compiler.get_compile_times().items()
+        if compile_times.get(aggr_id) != compile_time
+    ]
+    print(f"    {what:<24} {len(compiled):>5} compiled {duration:9.3f} s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, default=10_000)
+    parser.add_argument("--aggregations", type=int, default=100)
+    args = parser.parse_args()
+
+    structure = {
+        name: _host(name, name)
+        for n in range(args.hosts)
+        for name in [HostName(f"host{n % args.aggregations:04d}-{n}")]
+    }
+    bi_compiler = BICompiler("", SitesCallback(lambda: [], _query, lambda s: s))
+    bi_compiler._bi_packs = _Packs(args.aggregations, "host0000-.*")
+    print(f"{args.hosts} hosts, {args.aggregations} aggregations")
+
+    _compile(bi_compiler, structure, "everything")
+    compile_times = sorted(bi_compiler.get_compile_times().values())
+    print(
+        f"    per aggregation: median {compile_times[len(compile_times) // 2] * 1000:.1f} ms, "
+        f"slowest {compile_times[-1] * 1000:.1f} ms"
+    )
+    _compile(bi_compiler, structure, "no change")
+    structure[HostName("host0001-1")] = _host("host0001-1", "new alias")
+    _compile(bi_compiler, structure, "changed host")
+    structure[HostName("host0002-new")] = _host("host0002-new", "new host")
+    _compile(bi_compiler, structure, "new host")
+    bi_compiler._bi_packs = _Packs(args.aggregations, "host0000-1.*")
+    _compile(bi_compiler, structure, "edited aggregation")
+
+
+if __name__ == "__main__":
+    main()
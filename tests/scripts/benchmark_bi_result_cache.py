@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Compute the BI aggregations of the sample BI pack in consecutive requests.
+
+Every host gets one branch of the sample aggregation with 20 services.  Each
+request fetches the states again, between the requests the state of a share of
+the hosts changes.  The computation of all branches is timed without and with
+the result cache, for the latter the hit rate and the compute time saved as
+reported by the cache are shown.
+
+    OMD_ROOT=$(mktemp -d) OMD_SITE=heute python3 tests/scripts/benchmark_bi_result_cache.py \\
+        --hosts 5000 --changed 0 0.01 0.1 1
+"""
+
+import argparse
+import copy
+import gc
+import time
+from typing import Any
+
+from livestatus import LivestatusOutputFormat, LivestatusResponse, LivestatusRow, SiteId
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.bi.computer import BIComputer, BIResultCache
+from cmk.bi.data_fetcher import BIStatusFetcher, BIStructureFetcher
+from cmk.bi.lib import SitesCallback
+from cmk.bi.packs import BIAggregationPacks
+from cmk.bi.sample_configs import bi_sample_config
+from cmk.bi.searcher import BISearcher
+from cmk.bi.trees import BICompiledAggregation
+
+_SERVICES = [
+    f"{service} {n}"
+    for service in ("Filesystem", "Interface", "OMD performance", "Check_MK", "Uptime")
+    for n in range(4)
+]
+
+
+def _query(
+    query: str,
+    only_sites: list[SiteId] | None = None,
+    output_format: LivestatusOutputFormat = LivestatusOutputFormat.PYTHON,
+    fetch_full_data: bool = False,
+) -> LivestatusResponse:
+    return LivestatusResponse([])
+
+
+_SITES_CALLBACK = SitesCallback(lambda: [], _query, lambda s: s)
+
+
+class _Packs(BIAggregationPacks):
+    def __init__(self) -> None:
+        super().__init__("")
+        config: dict[str, Any] = copy.deepcopy(bi_sample_config)
+        for aggregation in config["packs"][0]["aggregations"]:
+            aggregation["computation_options"]["disabled"] = False
+        self._load_config(config)
+
+    def load_config(self) -> None:
+        pass
+
+
+def _compile(hosts: list[HostName]) -> BICompiledAggregation:
+    structure_fetcher = BIStructureFetcher(_SITES_CALLBACK)
+    structure_fetcher.add_site_data(
+        SiteId("heute"),
+        {
+            name: (
+                "heute",
+                {("tcp", "tcp"), ("criticality", "prod")},
+                {"cmk/os_family": "linux"},
+                "",
+                {service: (set(), {}) for service in _SERVICES},
+                (),
+                (),
+                name,
+                name,
+            )
+            for name in hosts
+        },
+    )
+    bi_searcher = BISearcher()
+    bi_searcher.set_hosts(structure_fetcher.hosts)
+    aggregation = _Packs().get_aggregation("default_aggregation")
+    assert aggregation is not None
+    compiled_aggregation = aggregation.compile(bi_searcher)
+    # As if loaded by the BI compiler
+    compiled_aggregation.version = "1"
+    return compiled_aggregation
+
+
+def _status_rows(hosts: list[HostName], request: int, changed: float) -> LivestatusResponse:
+    # The first hosts change their state with every request
+    changing = int(len(hosts) * changed)
+    rows = []
+    for n, host_name in enumerate(hosts):
+        state = request % 3 if n < changing else 0
+        services = [[service, state, 1, "OK", state, 1, 1, 0, 0, 1] for service in _SERVICES]
+        rows.append(LivestatusRow(["heute", host_name, 0, 1, 0, "UP", 0, 1, 0, services]))
+    return LivestatusResponse(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument(
+        "--changed", type=float, nargs="+", default=[0, 0.01, 0.1, 1], help="share of hosts"
+    )
+    args = parser.parse_args()
+
+    hosts = [HostName(f"host{n:05d}") for n in range(args.hosts)]
+    compiled_aggregation = _compile(hosts)
+    branches = compiled_aggregation.branches
+    print(f"{len(branches)} branches, {args.requests} requests")
+
+    for changed in args.changed:
+        result_cache = BIResultCache()
+        durations: dict[str, float] = {"uncached": 0.0, "cached": 0.0}
+        for request in range(args.requests):
+            bi_status_fetcher = BIStatusFetcher(_SITES_CALLBACK)
+            bi_status_fetcher.states = bi_status_fetcher.create_bi_status_data(
+                _status_rows(hosts, request, changed)
+            )
+            for what, cache in (("uncached", None), ("cached", result_cache)):
+                bi_computer = BIComputer({}, bi_status_fetcher, cache)
+                gc.collect()
+                start = time.perf_counter()
+                bi_computer.compute_results([(compiled_aggregation, branches)])
+                durations[what] += time.perf_counter() - start
+
+        statistics = result_cache.statistics()
+        print(
+            f"    {changed:>5.0%} changed: "
+            f"uncached {durations['uncached'] / args.requests * 1000:7.1f} ms, "
+            f"cached {durations['cached'] / args.requests * 1000:7.1f} ms per request, "
+            f"hit rate {statistics.hit_rate:4.0%}, "
+            f"saved {statistics.time_saved / args.requests * 1000:7.1f} ms per request"
+        )
+
+
+if __name__ == "__main__":
+    main()
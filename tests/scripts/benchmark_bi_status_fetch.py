@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Fetch the status of the hosts required by BI views.
+
+The sites are simulated: they answer host status queries with a row of 20
+services per host, filtered by the host filter of the query.  Reported are the
+number of queries, the biggest host filter, the host filter lines all sites
+had to evaluate and the rows sent by the sites (which is what the monitoring
+cores have to deal with) and the time the fetcher takes to build the queries
+and to process the answers.
+
+    python3 tests/scripts/benchmark_bi_status_fetch.py --sites 5 --hosts 12000 \\
+        --required 1000 10000 50000
+"""
+
+import argparse
+import random
+import time
+
+from livestatus import LivestatusOutputFormat, LivestatusResponse, LivestatusRow, SiteId
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.bi.data_fetcher import BIStatusFetcher
+from cmk.bi.lib import RequiredBIElement, SitesCallback
+
+_FILTER = "Filter: name = "
+
+
+class _Sites:
+    def __init__(self, sites: int, hosts: int) -> None:
+        services = [[f"Service {n}", 0, 1, "OK", 0, 1, 1, 0, 0, 1] for n in range(20)]
+        self.rows = {
+            SiteId(f"site{s}"): {
+                HostName(f"host{s}-{n}"): LivestatusRow(
+                    [f"site{s}", f"host{s}-{n}", 0, 1, 0, "OK", 0, 1, 0, services]
+                )
+                for n in range(hosts)
+            }
+            for s in range(sites)
+        }
+        self.queries = 0
+        self.biggest_filter = 0
+        self.filter_lines = 0
+        self.rows_sent = 0
+
+    def query(
+        self,
+        query: str,
+        only_sites: list[SiteId] | None = None,
+        output_format: LivestatusOutputFormat = LivestatusOutputFormat.PYTHON,
+        fetch_full_data: bool = False,
+    ) -> LivestatusResponse:
+        filtered = [
+            HostName(line[len(_FILTER) :])
+            for line in query.splitlines()
+            if line.startswith(_FILTER)
+        ]
+        self.queries += 1
+        self.biggest_filter = max(self.biggest_filter, len(filtered))
+        self.filter_lines += len(filtered) * len(only_sites or self.rows)
+        rows: list[LivestatusRow] = []
+        for site_id in only_sites or self.rows:
+            site_rows = self.rows[site_id]
+            if filtered:
+                rows.extend(site_rows[h] for h in filtered if h in site_rows)
+            else:
+                rows.extend(site_rows.values())
+        self.rows_sent += len(rows)
+        return LivestatusResponse(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sites", type=int, default=5)
+    parser.add_argument("--hosts", type=int, default=12_000, help="hosts per site")
+    parser.add_argument("--required", type=int, nargs="+", default=[1000, 10_000, 50_000])
+    args = parser.parse_args()
+
+    sites = _Sites(args.sites, args.hosts)
+    all_hosts = [
+        (site_id, host_name) for site_id in sites.rows for host_name in sites.rows[site_id]
+    ]
+    print(f"{args.sites} sites with {args.hosts} hosts each")
+    for required in args.required:
+        required_elements = {
+            RequiredBIElement(site_id, host_name, None)
+            for site_id, host_name in random.Random(required).sample(all_hosts, required)
+        }
+        sites.queries = sites.biggest_filter = sites.filter_lines = sites.rows_sent = 0
+        fetcher = BIStatusFetcher(SitesCallback(lambda: [], sites.query, lambda s: s))
+        start = time.perf_counter()
+        fetcher.update_states(required_elements)
+        duration = time.perf_counter() - start
+        assert len(fetcher.states) == required
+        print(
+            f"    {required:>6} required hosts: {sites.queries:>3} queries, "
+            f"biggest host filter {sites.biggest_filter:>6}, "
+            f"{sites.filter_lines:>6} filter lines, {sites.rows_sent:>6} rows sent, "
+            f"{duration * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Throughput of counting and cancelling events with many open events.
+
+The event status is filled with open events of many rules, hosts and
+applications.  Then messages of counting rules are counted, and messages of
+rules with cancelling conditions cancel events (or find nothing to cancel, which
+is the common case).  History entries are not written.
+
+    OMD_SITE=heute python3 tests/scripts/benchmark_ec_event_status.py --events 10000 100000
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+
+from cmk.utils.hostaddress import HostName
+
+import cmk.ec.export as ec
+from cmk.ec.config import Count, EventLimit, EventLimits, MatchGroups, ServiceLevel
+from cmk.ec.event import Event
+from cmk.ec.helpers import ECLock
+from cmk.ec.history import History, HistoryWhat
+from cmk.ec.main import (
+    default_slave_status_master,
+    EventServer,
+    EventStatus,
+    make_config,
+    StatusTableEvents,
+)
+from cmk.ec.perfcounters import Perfcounters
+from cmk.ec.query import QueryGET
+from cmk.ec.settings import create_settings
+
+_RULES = 100
+_HOSTS = 1000
+_APPLICATIONS = 10
+
+_COUNT = Count(
+    count=1_000_000,
+    period=3600,
+    algorithm="interval",
+    count_duration=None,
+    count_ack=False,
+    separate_host=True,
+    separate_application=True,
+    separate_match_groups=False,
+)
+
+
+class _NoHistory(History):
+    def flush(self) -> None:
+        pass
+
+    def add(self, event: Event, what: HistoryWhat, who: str = "", addinfo: str = "") -> None:
+        pass
+
+    def get(self, query: QueryGET) -> Iterable[Sequence[object]]:
+        return ()
+
+    def housekeeping(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def _rule(n: int) -> ec.Rule:
+    return ec.Rule(
+        actions=[],
+        actions_in_downtime=True,
+        autodelete=False,
+        cancel_action_phases="always",
+        cancel_actions=[],
+        comment="",
+        description="",
+        disabled=False,
+        docu_url="",
+        id=f"rule{n % _RULES}",
+        invert_matching=False,
+        sl=ServiceLevel(precedence="message", value=0),
+    )
+
+
+def _event(n: int) -> Event:
+    now = time.time()
+    return Event(
+        rule_id=f"rule{n % _RULES}",
+        text=f"message {n}",
+        phase="open",
+        count=1,
+        time=now,
+        first=now,
+        last=now,
+        comment="",
+        host=HostName(f"host{n % _HOSTS}"),
+        ipaddress="127.0.0.1",
+        application=f"app{n % _APPLICATIONS}",
+        pid=0,
+        priority=3,
+        facility=1,
+        match_groups=(),
+        core_host=None,
+        host_in_downtime=False,
+    )
+
+
+def _event_status(omd_root: Path) -> tuple[EventStatus, EventServer]:
+    settings = create_settings("1.2.3i45", omd_root, ["mkeventd"])
+    config = make_config(ec.default_config())
+    no_limit = EventLimit(action="delete_oldest", limit=10_000_000)
+    config["event_limit"] = EventLimits(by_host=no_limit, by_rule=no_limit, overall=no_limit)
+    perfcounters = Perfcounters(logging.getLogger("cmk.mkeventd.lock.perfcounters"))
+    history = _NoHistory()
+    logger = logging.getLogger("cmk.mkeventd")
+    event_status = EventStatus(settings, config, perfcounters, history, logger)
+    event_server = EventServer(
+        logger,
+        settings,
+        config,
+        default_slave_status_master(),
+        perfcounters,
+        ECLock(logger),
+        history,
+        event_status,
+        StatusTableEvents.columns,
+        False,
+    )
+    return event_status, event_server
+
+
+def _report(what: str, messages: int, duration: float) -> None:
+    print(f"    {what:<32} {messages / duration:12.0f} events/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--messages", type=int, default=10_000)
+    args = parser.parse_args()
+
+    for open_events in args.events:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            event_status, event_server = _event_status(Path(tmpdir))
+            for n in range(open_events):
+                event_status.new_event(_event(n))
+            print(f"{open_events} open events")
+
+            messages = [_event(n) | {"phase": "counting"} for n in range(args.messages)]
+            start = time.perf_counter()
+            for message in messages:
+                event_status.count_event(event_server, message, _COUNT)
+            _report("count", len(messages), time.perf_counter() - start)
+
+            # Cancel messages of hosts without any open events of the rule
+            messages = [_event(n) | {"host": HostName("ok")} for n in range(args.messages)]
+            start = time.perf_counter()
+            for n, message in enumerate(messages):
+                event_status.cancel_events(event_server, [], message, MatchGroups(), _rule(n))
+            _report("cancel (nothing to cancel)", len(messages), time.perf_counter() - start)
+
+            messages = [_event(n) for n in range(args.messages)]
+            start = time.perf_counter()
+            for n, message in enumerate(messages):
+                event_status.cancel_events(event_server, [], message, MatchGroups(), _rule(n))
+            _report("cancel", len(messages), time.perf_counter() - start)
+            print(f"    {len(event_status.events())} events left open")
+
+
+if __name__ == "__main__":
+    main()
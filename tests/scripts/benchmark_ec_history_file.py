@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Query the file based event console history.
+
+Daily history files are written with the given number of entries each, then
+the queries of the GUI history views are timed: the latest entries, the
+latest entries of a host and the entries of an hour one week ago.  Every query
+runs twice, the second run profits from the time index.
+
+    OMD_SITE=heute python3 tests/scripts/benchmark_ec_history_file.py --days 30 --entries 100000
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from cmk.utils.hostaddress import HostName
+
+import cmk.ec.export as ec
+from cmk.ec.history import quote_tab
+from cmk.ec.history_file import FileHistory
+from cmk.ec.main import make_config, StatusTableEvents, StatusTableHistory
+from cmk.ec.query import QueryGET, StatusTable
+from cmk.ec.settings import create_settings
+
+_DAY = 86400
+_END = 1_700_000_000 // _DAY * _DAY
+
+
+def _write_history(history_dir: Path, days: int, entries: int) -> None:
+    history_dir.mkdir(parents=True)
+    for day in range(days):
+        start = _END - (days - day) * _DAY
+        lines = []
+        for n in range(entries):
+            event = ec.Event(
+                id=day * entries + n,
+                host=HostName(f"host{n % 1000:04d}"),
+                text=f"Something happened to service {n % 37}, please have a look",
+                application="logwatch",
+                phase="closed",
+            )
+            columns = [
+                quote_tab(str(start + n * _DAY / entries)),
+                b"NEW",
+                b"",
+                b"",
+                *(
+                    quote_tab(event.get(name[6:], default))
+                    for name, default in StatusTableEvents.columns
+                ),
+            ]
+            lines.append(b"\t".join(columns) + b"\n")
+        (history_dir / f"{start}.log").write_bytes(b"".join(lines))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--entries", type=int, default=100_000)
+    args = parser.parse_args()
+
+    logger = logging.getLogger("cmk.mkeventd")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        settings = create_settings("1.2.3i45", Path(tmpdir), ["mkeventd"])
+        _write_history(settings.paths.history_dir.value, args.days, args.entries)
+        history = FileHistory(
+            settings,
+            make_config(ec.default_config()) | {"history_lifetime": 10_000},
+            logger,
+            StatusTableEvents.columns,
+            StatusTableHistory.columns,
+        )
+
+        def get_table(name: str) -> StatusTable:
+            return StatusTableHistory(logger, history)
+
+        print(f"{args.days} history files with {args.entries} entries each")
+        week_ago = _END - 7 * _DAY
+        for what, headers in (
+            ("latest 1000", ["Limit: 1000"]),
+            ("latest 100 of a host", ["Filter: event_host = host0042", "Limit: 100"]),
+            (
+                "an hour a week ago",
+                [
+                    f"Filter: history_time >= {week_ago}",
+                    f"Filter: history_time < {week_ago + 3600}",
+                ],
+            ),
+        ):
+            query = QueryGET(get_table, ["GET history", *headers], logger)
+            for run in ("first", "second"):
+                start = time.perf_counter()
+                rows = len(list(history.get(query)))
+                duration = time.perf_counter() - start
+                print(f"    {what:<24} {run:<6} {rows:>6} rows {duration * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Compare plain and compressed agent and SNMP cache files.
+
+For an agent output and a synthetic SNMP cache file, the size of the cache
+file and the time to write and read it through the AgentFileCache and the
+SNMPFileCache are reported with and without compression.  The size of the
+cache file is what it costs on the tmpfs of the site.
+
+    python3 tests/scripts/benchmark_file_cache_compression.py \\
+        --agent-output tests/integration/cmk/base/test-files/linux-agent-output
+"""
+
+import argparse
+import tempfile
+import time
+from collections.abc import Sized
+from pathlib import Path
+
+from cmk.utils.agentdatatype import AgentRawData
+from cmk.utils.sectionname import SectionName
+
+from cmk.snmplib import SNMPRawData
+
+from cmk.fetchers import Mode
+from cmk.fetchers.filecache import (
+    AgentFileCache,
+    FileCache,
+    FileCacheMode,
+    MaxAge,
+    SNMPFileCache,
+)
+
+_DEFAULT_AGENT_OUTPUT = (
+    Path(__file__).parent.parent / "integration/cmk/base/test-files/linux-agent-output"
+)
+
+
+def _snmp_raw_data(interfaces: int) -> SNMPRawData:
+    return {
+        SectionName("if64"): [
+            [
+                [
+                    str(n),
+                    f"GigabitEthernet0/{n}",
+                    "6",
+                    "1000000000",
+                    "1",
+                    str(n * 7919),
+                    str(n * 104729),
+                    "0",
+                    "0",
+                    str(n * 15485863),
+                    "0",
+                    "0",
+                    f"uplink port {n}",
+                    f"00:1a:2b:3c:{n // 256:02x}:{n % 256:02x}",
+                ]
+                for n in range(1, interfaces + 1)
+            ]
+        ]
+    }
+
+
+def _measure(file_cache: FileCache, raw_data: Sized, rounds: int) -> tuple[int, float, float]:
+    path = Path(file_cache.path_template)
+    start = time.process_time()
+    for _n in range(rounds):
+        file_cache.write(raw_data, Mode.CHECKING)
+    write_time = (time.process_time() - start) / rounds
+
+    start = time.process_time()
+    for _n in range(rounds):
+        assert file_cache.read(Mode.CHECKING) == raw_data
+    read_time = (time.process_time() - start) / rounds
+    return path.stat().st_size, write_time, read_time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--agent-output", type=Path, default=_DEFAULT_AGENT_OUTPUT)
+    parser.add_argument("--interfaces", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    samples: list[tuple[str, type[FileCache], Sized]] = [
+        ("agent", AgentFileCache, AgentRawData(args.agent_output.read_bytes())),
+        ("snmp", SNMPFileCache, _snmp_raw_data(args.interfaces)),
+    ]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, file_cache_type, raw_data in samples:
+            plain_size = 0
+            for compress in (False, True):
+                file_cache = file_cache_type(
+                    path_template=str(Path(tmpdir, f"{name}-{compress}")),
+                    max_age=MaxAge.unlimited(),
+                    simulation=False,
+                    use_only_cache=False,
+                    file_cache_mode=FileCacheMode.READ_WRITE,
+                    compress=compress,
+                )
+                size, write_time, read_time = _measure(file_cache, raw_data, args.rounds)
+                plain_size = plain_size or size
+                print(
+                    f"{name:>5} {'zlib' if compress else 'plain':>5}: "
+                    f"{size / 1024:8.1f} KiB ({size / plain_size:6.1%}), "
+                    f"write {write_time * 1000:6.2f} ms, read {read_time * 1000:6.2f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Compare single and batched piggyback hub payloads.
+
+The piggyback data of a vCenter (one esx_vsphere_vm section per VM) is
+serialized the way the piggyback hub publishes it: one message per VM, or
+batches of messages compressed into a single frame.  Reported are the bytes
+on the wire, the number of messages and the time to serialize and to
+deserialize all of them.
+
+    python3 tests/scripts/benchmark_piggyback_hub_batches.py --vms 5000 --batch-sizes 10 100 1000
+"""
+
+import argparse
+import time
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.piggyback.hub.payload import PiggybackPayload, PiggybackPayloadBatch
+
+
+def _payloads(vms: int) -> list[PiggybackPayload]:
+    return [
+        PiggybackPayload(
+            source_host=HostName("vcenter"),
+            raw_data={
+                HostName(f"vm{n:05d}"): [
+                    b"<<<esx_vsphere_vm>>>",
+                    *(
+                        b"config.hardware.device.%d virtualDisk|%d|thin|datastore%d"
+                        % (d, n * d, n % 16)
+                        for d in range(20)
+                    ),
+                    b"guest.toolsRunningStatus guestToolsRunning",
+                    b"runtime.powerState poweredOn",
+                    b"summary.quickStats.overallCpuUsage %d" % (n * 7 % 5000),
+                    b"summary.quickStats.guestMemoryUsage %d" % (n * 13 % 65536),
+                ]
+            },
+            message_timestamp=1_700_000_000,
+            contact_timestamp=1_700_000_000,
+        )
+        for n in range(vms)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vms", type=int, default=5000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    payloads = _payloads(args.vms)
+
+    start = time.perf_counter()
+    messages = [p.model_dump_json().encode() for p in payloads]
+    serialized = time.perf_counter() - start
+    start = time.perf_counter()
+    for message in messages:
+        PiggybackPayload.model_validate_json(message)
+    deserialized = time.perf_counter() - start
+    single_size = sum(map(len, messages))
+    print(
+        f"single:     {len(messages):>6} messages, {single_size / 1024:9.1f} KiB, "
+        f"serialize {serialized * 1000:7.1f} ms, deserialize {deserialized * 1000:7.1f} ms"
+    )
+
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        messages = [
+            PiggybackPayloadBatch.from_payloads(payloads[n : n + batch_size])
+            .model_dump_json()
+            .encode()
+            for n in range(0, len(payloads), batch_size)
+        ]
+        serialized = time.perf_counter() - start
+        start = time.perf_counter()
+        for message in messages:
+            PiggybackPayloadBatch.model_validate_json(message).payloads()
+        deserialized = time.perf_counter() - start
+        size = sum(map(len, messages))
+        print(
+            f"batch {batch_size:>4}: {len(messages):>6} messages, {size / 1024:9.1f} KiB "
+            f"({single_size / size:4.1f}x smaller), "
+            f"serialize {serialized * 1000:7.1f} ms, deserialize {deserialized * 1000:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
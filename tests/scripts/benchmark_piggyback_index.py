@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Query the piggyback meta data of a site with many piggybacked hosts.
+
+The piggybacked hosts are spread over small sources (one file per piggybacked
+host) or over large sources (stored in segments).  Reported are the directory
+crawl of `get_piggybacked_host_with_sources`, building the
+PiggybackMetaDataIndex, querying it for all hosts, querying it once per host
+(what the config generation does) and a query after one source sent new data.
+
+    python3 tests/scripts/benchmark_piggyback_index.py --hosts 50000
+"""
+
+import argparse
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.piggyback.backend import (
+    get_piggybacked_host_with_sources,
+    PiggybackMetaDataIndex,
+    store_piggyback_raw_data,
+)
+
+
+def _store(omd_root: Path, hosts: int, hosts_per_source: int, timestamp: float) -> None:
+    piggybacked = [HostName(f"vm{n:06d}") for n in range(hosts)]
+    for start in range(0, hosts, hosts_per_source):
+        store_piggyback_raw_data(
+            HostName(f"source{start // hosts_per_source:04d}"),
+            {
+                host: (b"<<<esx_vsphere_vm>>>",)
+                for host in piggybacked[start : start + hosts_per_source]
+            },
+            message_timestamp=timestamp,
+            contact_timestamp=timestamp,
+            omd_root=omd_root,
+        )
+
+
+def _timed(what: str, function: Callable[[], object]) -> None:
+    start = time.perf_counter()
+    function()
+    print(f"    {what:<24} {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, default=50_000)
+    args = parser.parse_args()
+
+    for layout, hosts_per_source in (("files", 50), ("segments", 10_000)):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            omd_root = Path(tmpdir)
+            _store(omd_root, args.hosts, hosts_per_source, 1_700_000_000)
+            print(f"{args.hosts} piggybacked hosts, {hosts_per_source} per source ({layout})")
+            _timed("crawl", lambda: get_piggybacked_host_with_sources(omd_root))
+            index = PiggybackMetaDataIndex(omd_root)
+            _timed("build index", lambda: PiggybackMetaDataIndex(omd_root))
+            print(f"    {'watching' if index.is_watching else 'not watching (too many folders)'}")
+            _timed("query all", index.get_piggybacked_host_with_sources)
+            _timed(
+                "query every host",
+                lambda: [index.get_sources_of(HostName(f"vm{n:06d}")) for n in range(args.hosts)],
+            )
+            _store(omd_root, hosts_per_source, hosts_per_source, 1_700_000_060)
+            _timed("update after new data", index.update)
+            assert index.get_piggybacked_host_with_sources() == get_piggybacked_host_with_sources(
+                omd_root
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Store and read the piggyback data of a source with many piggybacked hosts.
+
+A source like a vCenter sends piggyback data for all of its VMs every minute.
+The time to store a few rounds of that data and the time to read the data of
+every piggybacked host (what the fetchers of the piggybacked hosts do) are
+reported, once with one file per piggybacked host and once with a segment.
+
+    python3 tests/scripts/benchmark_piggyback_store.py --hosts 1000 10000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.piggyback.backend import _segments, get_messages_for, store_piggyback_raw_data
+
+_PAYLOAD = tuple(b"<<<esx_vsphere_vm>>>\nline %d of the VM section" % n for n in range(20))
+
+
+def _measure(omd_root: Path, hosts: int, rounds: int) -> tuple[float, float]:
+    source = HostName("vcenter")
+    piggybacked = [HostName(f"vm{n:06d}") for n in range(hosts)]
+    start = time.perf_counter()
+    for n in range(rounds):
+        store_piggyback_raw_data(
+            source,
+            {host: _PAYLOAD for host in piggybacked},
+            message_timestamp=1_700_000_000 + 60 * n,
+            contact_timestamp=1_700_000_000 + 60 * n,
+            omd_root=omd_root,
+        )
+    stored = (time.perf_counter() - start) / rounds
+
+    start = time.perf_counter()
+    for host in piggybacked:
+        assert len(get_messages_for(host, omd_root)) == 1
+    return stored, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[1000, 10_000])
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    for hosts in args.hosts:
+        for layout, min_hosts in (("files", sys.maxsize), ("segment", 1)):
+            _segments.SEGMENT_MIN_HOSTS = min_hosts  # type: ignore[misc]
+            with tempfile.TemporaryDirectory() as tmpdir:
+                stored, read = _measure(Path(tmpdir), hosts, args.rounds)
+            print(
+                f"{hosts:>6} hosts, {layout:>7}: store {stored * 1000:8.1f} ms, "
+                f"read all {read * 1000:8.1f} ms ({read / hosts * 1e6:6.1f} us/host)"
+            )
+
+
+if __name__ == "__main__":
+    main()
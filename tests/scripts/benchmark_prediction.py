@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Compute predictions over long horizons, as done at midnight for predictive levels.
+
+The recorded data is made up like the RRDs deliver it: one value every 5 minutes
+for the last 10 days and one every 30 minutes before, with some values missing.
+For each grouping the predictions of a number of metrics are computed with the
+previous pure Python implementation and with the NumPy based one, and the
+largest relative difference of their results is reported.
+
+    python3 tests/scripts/benchmark_prediction.py --horizon 90 --metrics 100
+"""
+
+import argparse
+import gc
+import random
+import time
+from collections.abc import Callable, Iterable, Sequence
+
+from cmk.utils.prediction import _prediction
+from cmk.utils.prediction._grouping import PeriodName, time_slices
+
+_DAY = 86400
+
+_RawSlices = Sequence[tuple[range, Sequence[float | None], int]]
+
+
+def _previous_calculate_data_for_prediction(
+    youngest_range: range, raw_slices: _RawSlices
+) -> _prediction.PredictionData:
+    slices = [
+        _previous_forward_fill_resample(
+            current_range,
+            values,
+            range(youngest_range.start - shift, youngest_range.stop - shift, youngest_range.step),
+        )
+        for current_range, values, shift in raw_slices
+    ]
+    return _prediction.PredictionData(
+        points=_previous_data_stats(slices),
+        start=youngest_range.start,
+        step=youngest_range.step,
+    )
+
+
+def _previous_forward_fill_resample(
+    current_range: range, values: Sequence[float | None], new_range: range
+) -> Sequence[float | None]:
+    if current_range == new_range:
+        return values
+    idx_max = len(values) - 1
+    return [
+        values[max(0, min(int((t - current_range.start) / current_range.step), idx_max))]
+        for t in new_range
+    ]
+
+
+def _previous_data_stats(
+    slices: Iterable[Iterable[float | None]],
+) -> list[_prediction.DataStat | None]:
+    return [
+        (
+            _prediction.DataStat.from_values(point_line)
+            if (point_line := [x for x in time_column if x is not None])
+            else None
+        )
+        for time_column in zip(*slices)
+    ]
+
+
+def _raw_slices(now: int, horizon: int, period: PeriodName, rng: random.Random) -> _RawSlices:
+    time_windows = time_slices(now, horizon * _DAY, period)
+    from_time = time_windows[0][0]
+    raw_slices = []
+    for start, end in time_windows:
+        step = 300 if now - start < 10 * _DAY else 1800
+        window = range(start - start % step, end + step - end % step, step)
+        values = [None if rng.random() < 0.02 else rng.uniform(0, 100) for _t in window]
+        raw_slices.append((window, values, from_time - start))
+    return raw_slices
+
+
+def _time(
+    calculate: Callable[[range, _RawSlices], _prediction.PredictionData],
+    metrics: Sequence[_RawSlices],
+) -> tuple[float, list[_prediction.PredictionData]]:
+    gc.collect()
+    start = time.perf_counter()
+    predictions = [calculate(raw_slices[0][0], raw_slices) for raw_slices in metrics]
+    return time.perf_counter() - start, predictions
+
+
+def _relative_difference(
+    previous: Sequence[_prediction.PredictionData], current: Sequence[_prediction.PredictionData]
+) -> float:
+    difference = 0.0
+    for previous_prediction, current_prediction in zip(previous, current):
+        for previous_point, current_point in zip(
+            previous_prediction.points, current_prediction.points
+        ):
+            assert (previous_point is None) == (current_point is None)
+            for a, b in zip(previous_point or (), current_point or ()):
+                assert (a is None) == (b is None)
+                if a is not None and b is not None and a != b:
+                    difference = max(difference, abs(a - b) / max(abs(a), abs(b)))
+    return difference
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--horizon", type=int, default=90, help="days")
+    parser.add_argument("--metrics", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    now = int(time.time()) // _DAY * _DAY
+    periods: Sequence[PeriodName] = ("hour", "wday")
+    for period in periods:
+        metrics = [_raw_slices(now, args.horizon, period, rng) for _metric in range(args.metrics)]
+        previous_time, previous = _time(_previous_calculate_data_for_prediction, metrics)
+        current_time, current = _time(_prediction._calculate_data_for_prediction, metrics)
+        print(
+            f"{period:>5}: {len(metrics[0])} slices, {args.metrics} metrics: "
+            f"previous {previous_time / args.metrics * 1000:7.2f} ms, "
+            f"numpy {current_time / args.metrics * 1000:7.2f} ms per metric, "
+            f"speedup {previous_time / current_time:5.1f}, "
+            f"max. relative difference {_relative_difference(previous, current):.1e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
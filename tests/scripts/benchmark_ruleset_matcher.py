@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmark the host ruleset matching of the RulesetMatcher.
+
+Synthetic hosts with folders, tags and labels are matched against a set of
+rulesets using tag, label, folder and host name conditions.  The time to
+answer `get_host_values` and `service_extra_conf` for all hosts is compared
+to evaluating every rule host by host with the `matches_*` functions.  With
+`--trace-memory` the peak memory allocated by the RulesetMatcher is reported
+as well (tracemalloc slows down the run considerably).
+
+    python3 tests/scripts/benchmark_ruleset_matcher.py --hosts 10000 50000 100000
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from collections.abc import Callable, Mapping, Sequence
+
+from cmk.utils.hostaddress import HostName
+from cmk.utils.labels import BuiltinHostLabelsStore, HostLabelValueDict, Labels
+from cmk.utils.rulesets.ruleset_matcher import (
+    LabelManager,
+    matches_host_name,
+    matches_host_tags,
+    matches_labels,
+    RuleConditionsSpec,
+    RulesetMatcher,
+    RuleSpec,
+)
+from cmk.utils.tags import TagGroupID, TagID
+
+_FOLDERS = [f"/site{s}/dc{d}/" for s in range(5) for d in range(10)]
+_TAGS = {TagGroupID(f"group{g}"): [TagID(f"tag{g}_{t}") for t in range(4)] for g in range(8)}
+_LABELS = {f"label{n}": [f"value{v}" for v in range(5)] for n in range(5)}
+
+
+class _NoBuiltinHostLabelsStore(BuiltinHostLabelsStore):
+    def load(self) -> Mapping[str, HostLabelValueDict]:
+        return {}
+
+
+def _make_hosts(
+    count: int, rnd: random.Random
+) -> tuple[
+    list[HostName],
+    dict[HostName, str],
+    dict[HostName, Mapping[TagGroupID, TagID]],
+    dict[HostName, Labels],
+]:
+    hosts = [HostName(f"host{n:06d}") for n in range(count)]
+    paths = {hn: rnd.choice(_FOLDERS) for hn in hosts}
+    tags = {hn: {g: rnd.choice(ts) for g, ts in _TAGS.items()} for hn in hosts}
+    labels = {hn: {k: rnd.choice(vs) for k, vs in _LABELS.items()} for hn in hosts}
+    return hosts, paths, tags, labels
+
+
+def _make_condition(rnd: random.Random) -> RuleConditionsSpec:
+    condition: RuleConditionsSpec = {}
+    if rnd.random() < 0.5:
+        condition["host_folder"] = rnd.choice(_FOLDERS)
+    group = rnd.choice(list(_TAGS))
+    match rnd.randrange(4):
+        case 0:
+            condition["host_tags"] = {group: rnd.choice(_TAGS[group])}
+        case 1:
+            condition["host_tags"] = {group: {"$ne": rnd.choice(_TAGS[group])}}
+        case 2:
+            condition["host_tags"] = {group: {"$or": rnd.sample(_TAGS[group], 2)}}
+    if rnd.random() < 0.3:
+        key = rnd.choice(list(_LABELS))
+        condition["host_label_groups"] = [("and", [("and", f"{key}:{rnd.choice(_LABELS[key])}")])]
+    if rnd.random() < 0.2:
+        condition["host_name"] = [{"$regex": f"host0{rnd.randrange(10)}"}]
+    return condition
+
+
+def _make_rulesets(
+    rnd: random.Random, rulesets: int, rules: int
+) -> Sequence[Sequence[RuleSpec[int]]]:
+    return [
+        [
+            {"id": f"{r}-{n}", "value": n, "condition": _make_condition(rnd), "options": {}}
+            for n in range(rules)
+        ]
+        for r in range(rulesets)
+    ]
+
+
+def _naive(
+    hosts: Sequence[HostName],
+    paths: Mapping[HostName, str],
+    tags: Mapping[HostName, Mapping[TagGroupID, TagID]],
+    labels: Mapping[HostName, Labels],
+) -> Callable[[Sequence[Sequence[RuleSpec[int]]]], None]:
+    host_tags = {hn: set(t.items()) for hn, t in tags.items()}
+
+    def run(rulesets: Sequence[Sequence[RuleSpec[int]]]) -> None:
+        for ruleset in rulesets:
+            for hostname in hosts:
+                for rule in ruleset:
+                    condition = rule["condition"]
+                    _matches = (
+                        paths[hostname].startswith(condition.get("host_folder", "/"))
+                        and matches_host_tags(host_tags[hostname], condition.get("host_tags", {}))
+                        and matches_labels(labels[hostname], condition.get("host_label_groups", []))
+                        and matches_host_name(condition.get("host_name"), hostname)
+                    )
+
+    return run
+
+
+def _compiled(
+    hosts: Sequence[HostName],
+    paths: Mapping[HostName, str],
+    tags: Mapping[HostName, Mapping[TagGroupID, TagID]],
+    labels: Mapping[HostName, Labels],
+) -> Callable[[Sequence[Sequence[RuleSpec[int]]]], None]:
+    matcher = RulesetMatcher(
+        host_tags=dict(tags),
+        host_paths=paths,
+        label_manager=LabelManager(
+            explicit_host_labels=dict(labels),
+            host_label_rules=[],
+            service_label_rules=[],
+            discovered_labels_of_service=lambda *_: {},
+        ),
+        all_configured_hosts=frozenset(hosts),
+        clusters_of={},
+        nodes_of={},
+        builtin_host_labels_store=_NoBuiltinHostLabelsStore(),
+    )
+    # Do not measure the disk accesses for the discovered labels.
+    for hostname in hosts:
+        matcher.labels_of_host(hostname)
+
+    def run(rulesets: Sequence[Sequence[RuleSpec[int]]]) -> None:
+        for ruleset in rulesets:
+            for hostname in hosts:
+                matcher.get_host_values(hostname, ruleset)
+                matcher.service_extra_conf(hostname, "Service", ruleset)
+
+    return run
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    parser.add_argument("--rulesets", type=int, default=20)
+    parser.add_argument("--rules", type=int, default=50)
+    parser.add_argument("--skip-naive", action="store_true")
+    parser.add_argument("--trace-memory", action="store_true")
+    args = parser.parse_args()
+
+    for count in args.hosts:
+        rnd = random.Random(count)
+        hosts, paths, tags, labels = _make_hosts(count, rnd)
+        rulesets = _make_rulesets(rnd, args.rulesets, args.rules)
+        for name, impl in (("naive", _naive), ("compiled", _compiled)):
+            if name == "naive" and args.skip_naive:
+                continue
+            if args.trace_memory:
+                tracemalloc.start()
+            run = impl(hosts, paths, tags, labels)
+            start = time.perf_counter()
+            run(rulesets)
+            result = f"{count:>7} hosts, {name:>8}: {time.perf_counter() - start:7.2f} s"
+            if args.trace_memory:
+                _current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                result += f", peak {peak / 1024 / 1024:7.1f} MiB"
+            print(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Assemble large SNMP tables like the MAC address table of a switch.
+
+A backend serving a synthetic dot1qTpFdbTable (VLAN and MAC address as
+index) is walked with `get_snmp_table`.  The time to assemble the table and
+the time to iterate all of its rows (what a parse function does) are
+reported separately, once for complete columns and once with every tenth
+entry missing in one of the columns.
+
+    python3 tests/scripts/benchmark_snmp_table.py --rows 10000 100000 200000
+"""
+
+import argparse
+import logging
+import time
+from collections.abc import Mapping, Sequence
+
+from cmk.utils.hostaddress import HostAddress, HostName
+from cmk.utils.sectionname import SectionName
+
+from cmk.snmplib import (
+    BackendOIDSpec,
+    BackendSNMPTree,
+    get_snmp_table,
+    OID,
+    SNMPBackend,
+    SNMPBackendEnum,
+    SNMPHostConfig,
+    SNMPRowInfo,
+    SNMPVersion,
+    SpecialColumn,
+)
+
+_BASE = ".1.3.6.1.2.1.17.7.1.2.2.1"
+_TREE = BackendSNMPTree(
+    base=_BASE,
+    oids=[
+        BackendOIDSpec(SpecialColumn.END, "string", False),
+        BackendOIDSpec("2", "string", False),
+        BackendOIDSpec("3", "string", False),
+    ],
+)
+
+
+class _FdbBackend(SNMPBackend):
+    def __init__(self, rows: int, gaps: bool) -> None:
+        super().__init__(_snmp_config(), logging.getLogger())
+        indexes = [
+            f"{1 + n // 4096}.0.26.43.{n // 65536 % 256}.{n // 256 % 256}.{n % 256}"
+            for n in range(rows)
+        ]
+        self._columns = {
+            f"{_BASE}.2": [
+                (f"{_BASE}.2.{i}", str(n % 48 + 1).encode()) for n, i in enumerate(indexes)
+            ],
+            f"{_BASE}.3": [
+                (f"{_BASE}.3.{i}", b"3")
+                for n, i in enumerate(indexes)
+                if not (gaps and n % 10 == 0)
+            ],
+        }
+
+    def get(self, /, oid: OID, *, context: str) -> None:
+        return None
+
+    def walk(self, /, oid: OID, *, context: str, **kw: object) -> SNMPRowInfo:
+        return list(self._columns[oid])
+
+    def walk_table(
+        self, /, oids: Sequence[OID], *, context: str, **kw: object
+    ) -> Mapping[OID, SNMPRowInfo]:
+        return {oid: self.walk(oid, context=context) for oid in oids}
+
+
+def _snmp_config() -> SNMPHostConfig:
+    return SNMPHostConfig(
+        is_ipv6_primary=False,
+        hostname=HostName("switch"),
+        ipaddress=HostAddress("127.0.0.1"),
+        credentials="public",
+        port=161,
+        bulkwalk_enabled=True,
+        snmp_version=SNMPVersion.V2C,
+        bulk_walk_size_of=10,
+        timing={},
+        oid_range_limits={},
+        snmpv3_contexts=[],
+        character_encoding=None,
+        snmp_backend=SNMPBackendEnum.CLASSIC,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 200_000])
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        for gaps in (False, True):
+            backend = _FdbBackend(rows, gaps)
+            start = time.perf_counter()
+            table = get_snmp_table(
+                section_name=SectionName("fdb"),
+                tree=_TREE,
+                walk_cache={},
+                backend=backend,
+                log=lambda msg: None,
+            )
+            assembled = time.perf_counter() - start
+            start = time.perf_counter()
+            assert sum(1 for _row in table) == rows
+            iterated = time.perf_counter() - start
+            print(
+                f"{rows:>7} rows, {'with gaps' if gaps else 'complete':>9}: "
+                f"assemble {assembled * 1000:8.1f} ms, iterate {iterated * 1000:8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Replay the interface sections of simulated devices from stored walks.
+
+For every device, a stored walk with the system group and a full ifTable
+and ifXTable is written.  The SNMP requests of a check cycle of the if64
+and if64adm sections (detection gets and one walk per column) are then
+replayed from the StoredWalkSNMPBackend.  The first cycle includes reading
+the walk files, the following ones are reported separately.
+
+    python3 tests/scripts/benchmark_stored_walk.py --devices 100 --interfaces 1000
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from cmk.utils.hostaddress import HostAddress, HostName
+
+from cmk.snmplib import SNMPBackendEnum, SNMPHostConfig, SNMPVersion
+
+from cmk.fetchers.snmp_backend import StoredWalkSNMPBackend
+
+from cmk.plugins.lib.if64 import BASE_OID, END_OIDS
+
+_IF_TABLE = ".1.3.6.1.2.1.2.2.1"
+_IFX_TABLE = ".1.3.6.1.2.1.31.1.1.1"
+_DETECT_OIDS = (".1.3.6.1.2.1.1.1.0", ".1.3.6.1.2.1.1.2.0", ".1.3.6.1.2.1.31.1.1.1.6.*")
+_WALK_OIDS = (
+    *(f"{BASE_OID}.{column if isinstance(column, str) else column.column}" for column in END_OIDS),
+    f"{BASE_OID}.2.2.1.7",  # if64adm
+    ".1.3.6.1.2.1.1.3.0",  # sysUpTime
+)
+
+
+def _write_walk(path: Path, interfaces: int) -> None:
+    lines = [
+        '.1.3.6.1.2.1.1.1.0 "Simulated switch"',
+        ".1.3.6.1.2.1.1.2.0 .1.3.6.1.4.1.9.1.1208",
+        ".1.3.6.1.2.1.1.3.0 123456789",
+    ]
+    for column in range(1, 23):
+        for n in range(1, interfaces + 1):
+            match column:
+                case 2:
+                    value = f'"GigabitEthernet0/{n}"'
+                case 6:
+                    value = f'"00 1A 2B 3C {n // 256:02X} {n % 256:02X} "'
+                case _:
+                    value = str(n * column)
+            lines.append(f"{_IF_TABLE}.{column}.{n} {value}")
+    for column in range(1, 20):
+        for n in range(1, interfaces + 1):
+            value = f'"uplink port {n}"' if column == 18 else str(n * column * 7919)
+            lines.append(f"{_IFX_TABLE}.{column}.{n} {value}")
+    path.write_text("\n".join(lines) + "\n")
+
+
+def _snmp_config(host_name: str) -> SNMPHostConfig:
+    return SNMPHostConfig(
+        is_ipv6_primary=False,
+        hostname=HostName(host_name),
+        ipaddress=HostAddress("127.0.0.1"),
+        credentials="public",
+        port=161,
+        bulkwalk_enabled=True,
+        snmp_version=SNMPVersion.V2C,
+        bulk_walk_size_of=10,
+        timing={},
+        oid_range_limits={},
+        snmpv3_contexts=[],
+        character_encoding=None,
+        snmp_backend=SNMPBackendEnum.STORED_WALK,
+    )
+
+
+def _replay(paths: list[Path]) -> float:
+    start = time.perf_counter()
+    for path in paths:
+        # One backend per device and check cycle, just like the fetcher.
+        backend = StoredWalkSNMPBackend(_snmp_config(path.name), logging.getLogger(), path)
+        for oid in _DETECT_OIDS:
+            backend.get(oid, context="")
+        for oid in _WALK_OIDS:
+            backend.walk(oid, context="")
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--interfaces", type=int, default=1000)
+    parser.add_argument("--cycles", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = [Path(tmpdir, f"device{n:04d}") for n in range(args.devices)]
+        for path in paths:
+            _write_walk(path, args.interfaces)
+
+        first = _replay(paths)
+        following = sum(_replay(paths) for _n in range(args.cycles)) / args.cycles
+        print(
+            f"{args.devices} devices, {args.interfaces} interfaces, "
+            f"{len(_DETECT_OIDS)} gets and {len(_WALK_OIDS)} walks per device"
+        )
+        print(f"    first cycle: {first:7.2f} s ({first / args.devices * 1000:7.2f} ms/device)")
+        print(
+            f"following cycles: {following:7.2f} s "
+            f"({following / args.devices * 1000:7.2f} ms/device)"
+        )
+
+
+if __name__ == "__main__":
+    main()
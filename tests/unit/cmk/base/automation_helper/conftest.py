@@ -3,12 +3,25 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+from collections.abc import Iterator
+
 import pytest
 from fakeredis import FakeRedis
 
+from cmk.fetchers.filecache import memory_cache, MemoryCacheStats
+
 from cmk.base.automation_helper._cache import Cache
 
 
 @pytest.fixture(name="cache")
 def get_cache() -> Cache:
     return Cache.setup(client=FakeRedis())
+
+
+@pytest.fixture(autouse=True)
+def reset_memory_cache(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    """The application enables the file cache in memory, which is global to the process"""
+    monkeypatch.setattr(memory_cache, "_max_size", memory_cache.max_size)
+    monkeypatch.setattr(memory_cache, "stats", MemoryCacheStats())
+    yield
+    memory_cache.clear()
@@ -6,7 +6,7 @@
 # pylint: disable=protected-access
 
 import time
-from collections.abc import Iterable, Mapping
+from collections.abc import Iterable, Mapping, Sequence
 from typing import Literal
 
 import pytest
@@ -14,10 +14,15 @@ from pytest import MonkeyPatch
 
 from tests.testlib.base_configuration_scenario import Scenario
 
-from cmk.utils.hostaddress import HostName
+import cmk.utils.resulttype as result
+from cmk.utils.agentdatatype import AgentRawData
+from cmk.utils.cpu_tracking import Snapshot
+from cmk.utils.hostaddress import HostAddress, HostName
+
+from cmk.snmplib import SNMPRawData
 
 from cmk.checkengine.checkresults import ServiceCheckResult, SubmittableServiceCheckResult
-from cmk.checkengine.fetcher import HostKey, SourceType
+from cmk.checkengine.fetcher import FetcherType, HostKey, SourceInfo, SourceType
 from cmk.checkengine.parameters import TimespecificParameters, TimespecificParameterSet
 
 from cmk.base import checkers, config
@@ -278,3 +283,42 @@ def test_prediction_injection() -> None:
             ("my_reference_metric", *prediction),
         )
     }
+
+
+class _SlowFetcher:
+    def __init__(self, delays: Mapping[HostName, float]) -> None:
+        self.delays = delays
+
+    def __call__(
+        self, host_name: HostName, *, ip_address: HostAddress | None
+    ) -> Sequence[
+        tuple[SourceInfo, result.Result[AgentRawData | SNMPRawData, Exception], Snapshot]
+    ]:
+        time.sleep(self.delays.get(host_name, 0.0))
+        print(f"fetching {host_name}")
+        return [
+            (
+                SourceInfo(host_name, ip_address, "agent", FetcherType.TCP, SourceType.HOST),
+                result.OK(AgentRawData(b"<<<%s>>>" % host_name.encode())),
+                Snapshot.null(),
+            )
+        ]
+
+
+def test_prefetching_fetcher(capsys: pytest.CaptureFixture[str]) -> None:
+    host_names = [HostName(f"host{n}") for n in range(4)]
+    fetcher = _SlowFetcher({host_names[0]: 0.2})
+    with checkers.PrefetchingFetcher(fetcher, host_names, jobs=2) as prefetching_fetcher:
+        fetched = [prefetching_fetcher(host_name, ip_address=None) for host_name in host_names]
+        # Not prefetched
+        extra = prefetching_fetcher(HostName("extra"), ip_address=None)
+
+    assert fetched == [fetcher(host_name, ip_address=None) for host_name in host_names]
+    assert extra == fetcher(HostName("extra"), ip_address=None)
+    assert capsys.readouterr().out.splitlines()[:5] == [
+        "fetching host0",
+        "fetching host1",
+        "fetching host2",
+        "fetching host3",
+        "fetching extra",
+    ]
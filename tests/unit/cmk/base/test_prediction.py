@@ -206,7 +206,52 @@ def approx(value_in: float) -> float:
 def test_data_stats(
     slices: list[Sequence[float | None]], result: Sequence[DataStat | None]
 ) -> None:
-    assert _prediction._data_stats(slices) == result
+    assert _prediction._data_stats([_prediction._Slice.from_values(s) for s in slices]) == result
+
+
+def test_data_stats_nan() -> None:
+    nan = float("nan")
+    slices = [[nan, 1.0, None, 2.0], [1.0, nan, None, None]]
+
+    # NaN is a value, while None is missing. Also min and max depend on the order of the values
+    assert repr(_prediction._data_stats([_prediction._Slice.from_values(s) for s in slices])) == (
+        repr(
+            [
+                DataStat(nan, nan, nan, nan),
+                DataStat(nan, 1.0, 1.0, nan),
+                None,
+                DataStat(2.0, 2.0, 2.0, None),
+            ]
+        )
+    )
+
+
+def test_data_stats_of_each_point() -> None:
+    slices = [
+        [None if (n * 7 + i) % 13 == 0 else ((n * 37 + i * 11) % 101) / 3 for i in range(50)]
+        for n in range(90)
+    ]
+
+    for point, time_column in zip(
+        _prediction._data_stats([_prediction._Slice.from_values(s) for s in slices]),
+        zip(*slices),
+    ):
+        assert point == pytest.approx(
+            DataStat.from_values([x for x in time_column if x is not None]), rel=1e-12
+        )
+
+
+def test_forward_fill_resample() -> None:
+    resampled = _prediction._forward_fill_resample(
+        range(100, 140, 10),
+        _prediction._Slice.from_values([1.0, None, 3.0, 4.0]),
+        range(85, 160, 5),
+    )
+
+    assert [
+        None if missing else value
+        for value, missing in zip(resampled.values.tolist(), resampled.missing.tolist())
+    ] == [1.0] * 5 + [None] * 2 + [3.0] * 2 + [4.0] * 6
 
 
 class TestPredictionStore:
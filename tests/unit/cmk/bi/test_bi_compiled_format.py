@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import pickle
+from pathlib import Path
+
+import pytest
+
+from livestatus import SiteId
+
+from cmk.bi.compiled_format import (
+    CompiledAggregationFile,
+    dump_compiled_aggregation,
+    is_compact_file,
+    load_compiled_aggregation,
+)
+from cmk.bi.data_fetcher import BIStructureFetcher
+from cmk.bi.packs import BIAggregationPacks
+from cmk.bi.searcher import BISearcher
+from cmk.bi.trees import BICompiledAggregation, BICompiledLeaf
+
+from .bi_test_data import sample_config
+
+
+@pytest.fixture(name="compiled_aggregation")
+def _compiled_aggregation(
+    bi_packs_sample_config: BIAggregationPacks,
+    bi_structure_fetcher: BIStructureFetcher,
+    bi_searcher: BISearcher,
+) -> BICompiledAggregation:
+    bi_structure_fetcher.add_site_data(SiteId("heute"), sample_config.bi_structure_states)
+    bi_searcher.set_hosts(bi_structure_fetcher.hosts)
+    bi_aggregation = bi_packs_sample_config.get_aggregation("default_aggregation")
+    assert bi_aggregation is not None
+    return bi_aggregation.compile(bi_searcher)
+
+
+def test_load_compiled_aggregation(
+    compiled_aggregation: BICompiledAggregation, tmp_path: Path
+) -> None:
+    path = tmp_path / "default_aggregation"
+    path.write_bytes(dump_compiled_aggregation(compiled_aggregation))
+    assert is_compact_file(path)
+
+    loaded = load_compiled_aggregation(path)
+
+    assert loaded.serialize() == compiled_aggregation.serialize()
+    assert loaded.version is not None
+    # Strings are shared by all nodes
+    for branch in loaded.branches:
+        leaves = [
+            info.node_ref
+            for info in branch.get_identifiers((), set())
+            if isinstance(info.node_ref, BICompiledLeaf)
+        ]
+        assert len(leaves) > 1
+        assert all(leaf.host_name is leaves[0].host_name for leaf in leaves)
+
+
+def test_load_branch(compiled_aggregation: BICompiledAggregation, tmp_path: Path) -> None:
+    path = tmp_path / "default_aggregation"
+    path.write_bytes(dump_compiled_aggregation(compiled_aggregation))
+    compiled_aggregation_file = CompiledAggregationFile(path)
+
+    assert compiled_aggregation_file.aggregation_id == "default_aggregation"
+    assert compiled_aggregation_file.branch_titles() == ["Host heute", "Host heute_clone"]
+    branch = compiled_aggregation_file.load_branch("Host heute_clone")
+    assert branch is not None
+    assert branch.serialize() == compiled_aggregation.branches[1].serialize()
+    assert compiled_aggregation_file.load_branch("Host morgen") is None
+    compiled_aggregation_file.close()
+
+
+def test_load_pickled_aggregation(
+    compiled_aggregation: BICompiledAggregation, tmp_path: Path
+) -> None:
+    path = tmp_path / "default_aggregation"
+    path.write_bytes(pickle.dumps(compiled_aggregation.serialize()))
+    assert not is_compact_file(path)
+    assert not is_compact_file(tmp_path / "missing")
+
+    loaded = load_compiled_aggregation(path)
+
+    assert loaded.serialize() == compiled_aggregation.serialize()
+    assert loaded.version is None
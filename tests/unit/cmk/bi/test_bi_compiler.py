@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import copy
+import logging
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from livestatus import SiteId
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.bi import compiler
+from cmk.bi.compiler import BICompiler
+
+from .bi_test_data import sample_config
+from .conftest import DUMMY_SITES_CALLBACK, MockBIAggregationPack
+
+_PACKS_CONFIG: dict[str, Any] = sample_config.bi_packs_config
+
+
+def _aggregation(aggr_id: str, host_choice: dict[str, str]) -> dict[str, Any]:
+    aggregation = copy.deepcopy(_PACKS_CONFIG["packs"][0]["aggregations"][0])
+    aggregation["id"] = aggregation["groups"]["names"][0] = aggr_id
+    aggregation["node"]["search"]["conditions"]["host_choice"] = host_choice
+    return aggregation
+
+
+def _packs_config(groups_of_heute: str = "heute") -> dict[str, Any]:
+    packs_config = copy.deepcopy(_PACKS_CONFIG)
+    packs_config["packs"][0]["aggregations"] = [
+        _aggregation("all", {"type": "all_hosts"}),
+        _aggregation("heute", {"type": "host_name_regex", "pattern": "heute"}),
+        _aggregation("clone", {"type": "host_name_regex", "pattern": "heute_clone"}),
+    ]
+    packs_config["packs"][0]["aggregations"][1]["groups"]["names"] = [groups_of_heute]
+    return packs_config
+
+
+@pytest.fixture(name="bi_compiler")
+def fixture_bi_compiler(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> BICompiler:
+    monkeypatch.setattr(compiler, "path_compiled_aggregations", tmp_path)
+    bi_compiler = BICompiler("", DUMMY_SITES_CALLBACK)
+    monkeypatch.setattr(bi_compiler, "_path_compilation_state", tmp_path / "state")
+    bi_compiler._bi_packs = MockBIAggregationPack(_packs_config())
+    return bi_compiler
+
+
+def _compile(
+    bi_compiler: BICompiler,
+    structure: dict[HostName, tuple],
+    caplog: pytest.LogCaptureFixture,
+) -> str:
+    bi_compiler._bi_structure_fetcher.cleanup()
+    bi_compiler._bi_structure_fetcher.add_site_data(SiteId("heute"), structure)
+    bi_compiler.bi_searcher.set_hosts(bi_compiler._bi_structure_fetcher.hosts)
+    caplog.clear()
+    with caplog.at_level(logging.INFO, logger="cmk.bi.compiler"):
+        bi_compiler._compile_changed_aggregations()
+    return caplog.records[-1].getMessage()
+
+
+def test_compile_only_affected_aggregations(
+    bi_compiler: BICompiler, caplog: pytest.LogCaptureFixture
+) -> None:
+    structure = copy.deepcopy(sample_config.bi_structure_states)
+    assert _compile(bi_compiler, structure, caplog).startswith("Compiled 3 of 3 aggregations")
+    assert bi_compiler.get_compile_times().keys() == {"all", "heute", "clone"}
+    assert _compile(bi_compiler, structure, caplog).startswith("Compiled 0 of 3 aggregations")
+
+    # The clone is part of "all" and "clone"
+    structure[HostName("heute_clone")] = structure[HostName("heute_clone")][:-2] + (
+        "new alias",
+        "heute_clone",
+    )
+    assert _compile(bi_compiler, structure, caplog).startswith("Compiled 2 of 3 aggregations")
+    assert [b.properties.title for b in bi_compiler.compiled_aggregations["all"].branches] == [
+        "Host heute",
+        "Host heute_clone",
+    ]
+
+    # A new host only matches the search of "all"
+    structure[HostName("morgen")] = structure[HostName("heute")][:-2] + ("morgen", "morgen")
+    assert _compile(bi_compiler, structure, caplog).startswith("Compiled 1 of 3 aggregations")
+    assert len(bi_compiler.compiled_aggregations["all"].branches) == 3
+    assert len(bi_compiler.compiled_aggregations["heute"].branches) == 1
+
+    bi_compiler._bi_packs = MockBIAggregationPack(_packs_config(groups_of_heute="today"))
+    assert _compile(bi_compiler, structure, caplog).startswith("Compiled 1 of 3 aggregations")
+    assert bi_compiler.compiled_aggregations["heute"].groups.names == ["today"]
+
+
+def test_versions_of_compiled_aggregations(
+    bi_compiler: BICompiler, caplog: pytest.LogCaptureFixture
+) -> None:
+    structure = copy.deepcopy(sample_config.bi_structure_states)
+    _compile(bi_compiler, structure, caplog)
+    versions = {k: v.version for k, v in bi_compiler.compiled_aggregations.items()}
+    assert None not in versions.values()
+
+    _compile(bi_compiler, structure, caplog)
+    assert {k: v.version for k, v in bi_compiler.compiled_aggregations.items()} == versions
+
+    bi_compiler._bi_packs = MockBIAggregationPack(_packs_config(groups_of_heute="today"))
+    _compile(bi_compiler, structure, caplog)
+    assert bi_compiler.compiled_aggregations["heute"].version != versions["heute"]
+    assert bi_compiler.compiled_aggregations["all"].version == versions["all"]
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import logging
+
+import pytest
+
+from livestatus import LivestatusResponse, LivestatusRow, SiteId
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.bi.computer import BIComputer, BIResultCache, BIResultCacheStatistics
+from cmk.bi.data_fetcher import BIStatusFetcher, BIStructureFetcher
+from cmk.bi.lib import NodeResultBundle
+from cmk.bi.packs import BIAggregationPacks
+from cmk.bi.searcher import BISearcher
+from cmk.bi.trees import BICompiledAggregation
+
+from .bi_test_data import sample_config
+
+
+@pytest.fixture(name="compiled_aggregation")
+def _compiled_aggregation(
+    bi_packs_sample_config: BIAggregationPacks,
+    bi_structure_fetcher: BIStructureFetcher,
+    bi_searcher: BISearcher,
+) -> BICompiledAggregation:
+    bi_structure_fetcher.add_site_data(SiteId("heute"), sample_config.bi_structure_states)
+    bi_searcher.set_hosts(bi_structure_fetcher.hosts)
+    bi_aggregation = bi_packs_sample_config.get_aggregation("default_aggregation")
+    assert bi_aggregation is not None
+    compiled_aggregation = bi_aggregation.compile(bi_searcher)
+    compiled_aggregation.version = "1"
+    return compiled_aggregation
+
+
+def _compute(
+    bi_computer: BIComputer, compiled_aggregation: BICompiledAggregation
+) -> list[NodeResultBundle]:
+    ((_compiled_aggregation, results),) = bi_computer.compute_results(
+        [(compiled_aggregation, compiled_aggregation.branches)]
+    )
+    return results
+
+
+def _status_rows(discovery_state: int) -> LivestatusResponse:
+    """The sample status rows with another state of the discovery service of host heute"""
+    rows = []
+    for row in sample_config.bi_status_rows:
+        if row[1] == "heute":
+            services = [
+                [service[0], discovery_state, *service[2:]]
+                if service[0] == "Check_MK Discovery"
+                else service
+                for service in row[9]
+            ]
+            row = LivestatusRow([*row[:9], services, *row[10:]])
+        rows.append(row)
+    return LivestatusResponse(rows)
+
+
+def test_result_cache_reuses_unchanged_branches(
+    compiled_aggregation: BICompiledAggregation, bi_status_fetcher: BIStatusFetcher
+) -> None:
+    result_cache = BIResultCache()
+    bi_status_fetcher.states = bi_status_fetcher.create_bi_status_data(_status_rows(1))
+    first = _compute(BIComputer({}, bi_status_fetcher, result_cache), compiled_aggregation)
+    assert [r.actual_result.state for r in first] == [1, 1]
+    assert result_cache.statistics()[:2] == (0, 2)
+
+    # The next request loads the same aggregation and fetches the states again
+    bi_status_fetcher.states = bi_status_fetcher.create_bi_status_data(_status_rows(1))
+    second = _compute(BIComputer({}, bi_status_fetcher, result_cache), compiled_aggregation)
+    assert second == first
+    statistics = result_cache.statistics()
+    assert statistics[:2] == (2, 2)
+    assert statistics.hit_rate == 0.5
+    assert statistics.time_saved > 0
+
+    # Only the branch of host heute has to be computed again
+    bi_status_fetcher.states = bi_status_fetcher.create_bi_status_data(_status_rows(0))
+    third = _compute(BIComputer({}, bi_status_fetcher, result_cache), compiled_aggregation)
+    assert third == _compute(BIComputer({}, bi_status_fetcher), compiled_aggregation)
+    assert third[0] != first[0]
+    assert third[1] == first[1]
+    assert result_cache.statistics()[:2] == (3, 3)
+
+
+def test_result_cache_computes_changed_aggregations(
+    compiled_aggregation: BICompiledAggregation, bi_status_fetcher: BIStatusFetcher
+) -> None:
+    result_cache = BIResultCache()
+    bi_computer = BIComputer({}, bi_status_fetcher, result_cache)
+    bi_status_fetcher.states = bi_status_fetcher.create_bi_status_data(_status_rows(1))
+    _compute(bi_computer, compiled_aggregation)
+
+    compiled_aggregation.version = "2"
+    _compute(bi_computer, compiled_aggregation)
+    compiled_aggregation.version = None
+    _compute(bi_computer, compiled_aggregation)
+
+    assert result_cache.statistics() == BIResultCacheStatistics(0, 4, 0.0)
+
+
+def test_result_cache_statistics_are_logged(
+    compiled_aggregation: BICompiledAggregation,
+    bi_status_fetcher: BIStatusFetcher,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    bi_computer = BIComputer({}, bi_status_fetcher, BIResultCache())
+    bi_status_fetcher.states = bi_status_fetcher.create_bi_status_data(_status_rows(1))
+    with caplog.at_level(logging.DEBUG, logger="cmk.bi.computer"):
+        _compute(bi_computer, compiled_aggregation)
+        _compute(bi_computer, compiled_aggregation)
+
+    assert "Result cache: 2 hits, 2 misses (hit rate 50%)" in caplog.text
+
+
+def test_result_cache_assumed_states(
+    compiled_aggregation: BICompiledAggregation, bi_status_fetcher: BIStatusFetcher
+) -> None:
+    result_cache = BIResultCache()
+    bi_computer = BIComputer({}, bi_status_fetcher, result_cache)
+    bi_status_fetcher.states = bi_status_fetcher.create_bi_status_data(_status_rows(1))
+    _compute(bi_computer, compiled_aggregation)
+
+    discovery = (SiteId("heute"), HostName("heute"), "Check_MK Discovery")
+    for state in (0, 2):
+        bi_status_fetcher.set_assumed_states({discovery: state})
+        assumed = _compute(bi_computer, compiled_aggregation)
+        assert assumed == _compute(BIComputer({}, bi_status_fetcher), compiled_aggregation)
+        assert assumed[0].assumed_result is not None
+
+    # Only the branch of host heute depends on the assumed state
+    assert result_cache.statistics()[:2] == (2, 4)
+
+
+def test_result_cache_drops_the_oldest_results(
+    compiled_aggregation: BICompiledAggregation, bi_status_fetcher: BIStatusFetcher
+) -> None:
+    result_cache = BIResultCache(max_entries=1)
+    bi_computer = BIComputer({}, bi_status_fetcher, result_cache)
+    bi_status_fetcher.states = bi_status_fetcher.create_bi_status_data(_status_rows(1))
+    _compute(bi_computer, compiled_aggregation)
+    _compute(bi_computer, compiled_aggregation)
+
+    assert result_cache.statistics()[:2] == (0, 4)
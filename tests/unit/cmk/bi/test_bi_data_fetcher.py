@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+from livestatus import LivestatusOutputFormat, LivestatusResponse, LivestatusRow, SiteId
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.bi.data_fetcher import BIStatusFetcher
+from cmk.bi.lib import BIHostSpec, RequiredBIElement, SitesCallback
+
+_HOSTS = {
+    SiteId("a"): [HostName(f"a{n}") for n in range(5)] + [HostName("shared")],
+    SiteId("b"): [HostName(f"b{n}") for n in range(3)] + [HostName("shared")],
+}
+
+
+class _Livestatus:
+    def __init__(self) -> None:
+        self.queries: list[tuple[list[SiteId], str]] = []
+
+    def query(
+        self,
+        query: str,
+        only_sites: list[SiteId] | None = None,
+        output_format: LivestatusOutputFormat = LivestatusOutputFormat.PYTHON,
+        fetch_full_data: bool = False,
+    ) -> LivestatusResponse:
+        assert only_sites is not None
+        self.queries.append((only_sites, query))
+        filtered = {line[len("Filter: name = ") :] for line in query.splitlines()[2:]}
+        return LivestatusResponse(
+            [
+                LivestatusRow([site_id, host_name, 0, 1, 0, "OK", 0, 1, 0, []])
+                for site_id in only_sites
+                for host_name in _HOSTS[site_id]
+                if not filtered or host_name in filtered
+            ]
+        )
+
+
+def test_get_status_info_in_chunks() -> None:
+    livestatus = _Livestatus()
+    fetcher = BIStatusFetcher(
+        SitesCallback(lambda: [], livestatus.query, lambda s: s),
+        chunk_size=2,
+        full_fetch_threshold=3,
+    )
+    fetcher.update_states(
+        {RequiredBIElement(SiteId("a"), HostName(name), None) for name in ("a0", "a1", "a2", "a3")}
+        | {
+            RequiredBIElement(SiteId("b"), HostName("b0"), None),
+            RequiredBIElement(SiteId("b"), HostName("shared"), "Uptime"),
+        }
+    )
+
+    assert set(fetcher.states) == {
+        BIHostSpec(SiteId("a"), HostName(name)) for name in ("a0", "a1", "a2", "a3")
+    } | {BIHostSpec(SiteId("b"), HostName("b0")), BIHostSpec(SiteId("b"), HostName("shared"))}
+    assert [(sites, query.count("Filter:")) for sites, query in livestatus.queries] == [
+        (["a"], 0),
+        (["b"], 2),
+    ]
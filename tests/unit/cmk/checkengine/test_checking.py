@@ -3,8 +3,14 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import json
 from collections.abc import Mapping
 from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+
+from cmk.utils.cpu_tracking import Snapshot
 
 from cmk.utils.hostaddress import HostAddress
 from cmk.utils.servicename import ServiceName
@@ -14,9 +20,11 @@ from cmk.checkengine.checking import (
     check_plugins_missing_data,
     CheckPluginName,
     ConfiguredService,
+    make_timing_results,
     merge_enforced_services,
     ServiceConfigurer,
     ServiceID,
+    update_phase_histograms,
 )
 from cmk.checkengine.checkresults import UnsubmittableServiceCheckResult
 from cmk.checkengine.exitspec import ExitSpec
@@ -270,3 +278,38 @@ def test_aggregate_enforced_services_merge() -> None:
             True,
         ),
     )
+
+
+def test_timing_results_phase_perfdata() -> None:
+    result = make_timing_results(
+        Snapshot.null(),
+        (),
+        phase_times={"parsing": 0.25, "plugin:uptime": 0.5},
+        perfdata_with_times=True,
+    )
+    assert "cmk_time_phase_parsing=0.250" in result.metrics
+    assert not any("uptime" in metric for metric in result.metrics)
+
+
+def test_timing_results_no_phase_perfdata_without_times() -> None:
+    result = make_timing_results(
+        Snapshot.null(),
+        (),
+        phase_times={"parsing": 0.25},
+        perfdata_with_times=False,
+    )
+    assert result.metrics == ("execution_time=0.000",)
+
+
+def test_update_phase_histograms(tmp_path: Path) -> None:
+    path = tmp_path / "phase_times" / "heute"
+    update_phase_histograms(path, {"parsing": 0.002, "checking": 20.0})
+    update_phase_histograms(path, {"parsing": 0.0005})
+
+    stored = json.loads(path.read_text())
+    parsing = stored["phases"]["parsing"]
+    assert parsing["count"] == 2
+    assert parsing["sum"] == pytest.approx(0.0025)
+    assert parsing["buckets"][:3] == [1, 1, 0]
+    assert stored["phases"]["checking"]["buckets"][-1] == 1
+    assert len(parsing["buckets"]) == len(stored["buckets"]) + 1
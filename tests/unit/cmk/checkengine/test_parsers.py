@@ -539,15 +539,20 @@ class TestAgentParser:
         monkeypatch: pytest.MonkeyPatch,
     ) -> None:
         monkeypatch.setattr(time, "time", lambda c=itertools.count(1000, 50): next(c))
+        monkeypatch.setattr(
+            SectionStore,
+            "load_index",
+            lambda self: {SectionName("persisted"): (42, 69)},
+        )
         monkeypatch.setattr(
             SectionStore,
             "load",
-            lambda self: {
+            lambda self, selection=None: {
                 SectionName("persisted"): (42, 69, [["content"]]),
             },
         )
         # Patch IO:
-        monkeypatch.setattr(SectionStore, "store", lambda self, sections: None)
+        monkeypatch.setattr(SectionStore, "amend", lambda self, sections, *, outdated: {})
 
         raw_data = AgentRawData(
             b"\n".join(
@@ -731,6 +736,41 @@ class TestAgentParser:
         }
         assert store.load() == {}
 
+    @pytest.mark.parametrize("chunk_size", [1, 2, 7, 1024])
+    def test_parse_stream_matches_parse(self, parser, monkeypatch, chunk_size):
+        monkeypatch.setattr(time, "time", lambda: 1000)
+        monkeypatch.setattr(parser, "cache_piggybacked_data_for", 900)
+        raw_data = AgentRawData(
+            b"\r\n".join(
+                (
+                    b"<<<a>>>",
+                    b"a 1",
+                    b"<<<b:sep(124)>>>",
+                    b"b|2",
+                    b"<<<<piggy>>>>",
+                    b"<<<c>>>",
+                    b"c 3",
+                    b"<<<<>>>>",
+                    b"<<<a>>>",
+                    b"a 4",
+                    b"",
+                )
+            )
+        )
+        chunks = (
+            memoryview(raw_data)[n : n + chunk_size] for n in range(0, len(raw_data), chunk_size)
+        )
+
+        ahs = parser.parse_stream(chunks, selection=NO_SELECTION)
+        assert ahs.sections == {
+            SectionName("a"): [["a", "1"], ["a", "4"]],
+            SectionName("b"): [["b", "2"]],
+        }
+        assert ahs.piggybacked_raw_data == {
+            "piggy": [b"<<<c:cached(1000,900)>>>", b"c 3"],
+        }
+        assert ahs == parser.parse(raw_data, selection=NO_SELECTION)
+
 
 class ParserStateAdapter(ParserState):
     def __init__(self, *, translation: TranslationOptions | None = None):
@@ -917,15 +957,20 @@ class TestSNMPParser:
     ) -> None:
         monkeypatch.setattr(time, "time", lambda c=itertools.count(1000, 50): next(c))
         monkeypatch.setattr(parser, "persist_periods", defaultdict(lambda: 33))
+        monkeypatch.setattr(
+            SectionStore,
+            "load_index",
+            lambda self: {SectionName("persisted"): (42, 69)},
+        )
         monkeypatch.setattr(
             SectionStore,
             "load",
-            lambda self: {
+            lambda self, selection=None: {
                 SectionName("persisted"): (42, 69, [["content"]]),
             },
         )
         # Patch IO:
-        monkeypatch.setattr(SectionStore, "store", lambda self, sections: None)
+        monkeypatch.setattr(SectionStore, "amend", lambda self, sections, *, outdated: {})
 
         raw_data = sections
 
@@ -945,8 +990,23 @@ class MockStore(SectionStore):
     def store(self, sections):
         self._sections = copy.copy(sections)
 
-    def load(self):
-        return copy.copy(self._sections)
+    def amend(self, sections, *, outdated=None):
+        self._sections = {
+            name: entry
+            for name, entry in {**self._sections, **sections}.items()
+            if outdated is None or not outdated(entry[1])
+        }
+        return self.load_index()
+
+    def load_index(self):
+        return {name: entry[:2] for name, entry in self._sections.items()}
+
+    def load(self, selection=None):
+        return {
+            name: entry
+            for name, entry in self._sections.items()
+            if selection is None or name in selection
+        }
 
 
 class TestAgentPersistentSectionHandling:
@@ -6,7 +6,6 @@
 
 import datetime
 import logging
-import shlex
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
@@ -18,7 +17,8 @@ import cmk.ec.export as ec
 from cmk.ec.config import Config
 from cmk.ec.history import _current_history_period
 from cmk.ec.history_file import (
-    _grep_pipeline,
+    _line_filter,
+    _TIME_INDEX_STEP,
     convert_history_line,
     FileHistory,
     parse_history_file,
@@ -95,17 +95,56 @@ def test_history_parse(tmp_path: Path) -> None:
         predicate=lambda x: True,
         argument="1",
     )
-    tac = f"nl -b a {shlex.quote(str(path))} | tac"
-    cmd = " | ".join([tac] + _grep_pipeline([filter_]))
 
     new_entries = parse_history_file(
         StatusTableHistory.columns,
         path,
         lambda x: True,
-        cmd,
-        None,
-        logging.getLogger("cmk.mkeventd"),
+        line_filter=_line_filter([filter_]),
+        time_range=(None, None),
+        limit=None,
+        logger=logging.getLogger("cmk.mkeventd"),
     )
 
     assert len(new_entries) == 4
+    assert new_entries[0][0] == 4
     assert new_entries[0][1] == 1666942292.3000507
+
+
+def _query(history: FileHistory, *headers: str) -> list[list[object]]:
+    logger = logging.getLogger("cmk.mkeventd")
+
+    def get_table(name: str) -> StatusTable:
+        assert name == "history"
+        return StatusTableHistory(logger, history)
+
+    query = QueryGET(get_table, ["GET history", *headers], logger)
+    return [list(row) for row in history.get(query)]
+
+
+# All entries go to the same daily history file, whatever the time zone.
+_NOON = 1_700_049_600
+
+
+def test_file_get_time_range_and_limit(history: FileHistory) -> None:
+    """Entries are found with the time index, the youngest first, and reading stops at the limit."""
+    # About four index entries per history file
+    entries = 4 * _TIME_INDEX_STEP // 100
+    for n in range(entries):
+        with time_machine.travel(_NOON + n, tick=False):
+            history.add(event=ec.Event(host=HostName(f"host{n % 10}"), text="x" * 50), what="NEW")
+
+    rows = _query(
+        history, f"Filter: history_time >= {_NOON + 1000}", f"Filter: history_time < {_NOON + 1010}"
+    )
+    assert [row[1] for row in rows] == [_NOON + n for n in range(1009, 999, -1)]
+    assert [row[0] for row in rows] == list(range(1010, 1000, -1))
+
+    host3 = [n for n in reversed(range(entries)) if n % 10 == 3]
+    rows = _query(history, "Filter: event_host = host3", "Limit: 5")
+    assert [row[1] for row in rows] == [_NOON + n for n in host3[:6]]
+
+    with time_machine.travel(_NOON + entries, tick=False):
+        history.add(event=ec.Event(host=HostName("host3"), text="x" * 50), what="NEW")
+    rows = _query(history, "Filter: event_host = host3", "Limit: 1")
+    assert [row[0] for row in rows] == [entries + 1, host3[0] + 1]
@@ -6,15 +6,19 @@
 
 import logging
 import sqlite3
+import time
 from collections.abc import Iterator
+from pathlib import Path
+from typing import Literal, Self
 
 import pytest
 
 from cmk.utils.hostaddress import HostName
 
 import cmk.ec.export as ec
-from cmk.ec.history_sqlite import filters_to_sqlite_query, SQLiteHistory
-from cmk.ec.main import StatusTableHistory
+from cmk.ec.config import Config
+from cmk.ec.history_sqlite import filters_to_sqlite_query, SQLiteHistory, SQLiteSettings
+from cmk.ec.main import StatusTableEvents, StatusTableHistory
 from cmk.ec.query import QueryFilter, QueryGET, StatusTable
 
 
@@ -208,6 +212,7 @@ def test_housekeeping(history_sqlite: SQLiteHistory) -> None:
     event2 = ec.Event(host=HostName("ABC2"), text="Event2 text", core_host=HostName("ABC"))
     history_sqlite.add(event=event1, what="NEW")
     history_sqlite.add(event=event2, what="NEW")
+    history_sqlite.write_queue()
 
     with history_sqlite.conn as connection:
         cur = connection.cursor()
@@ -218,3 +223,141 @@ def test_housekeeping(history_sqlite: SQLiteHistory) -> None:
         history_sqlite.housekeeping()
         cur.execute("SELECT count(*) FROM history;")
         assert cur.fetchone()["count(*)"] == 1
+
+
+def _written(history: SQLiteHistory) -> int:
+    with history.conn as connection:
+        return int(connection.execute("SELECT count(*) FROM history;").fetchone()[0])
+
+
+def _history_sqlite(
+    settings: ec.Settings,
+    config: Config,
+    database: Literal[":memory:"] | Path,
+    *,
+    batch_size: int = 1000,
+    batch_delay: float = 60,
+    durability: Literal["batched", "immediate"] = "batched",
+) -> SQLiteHistory:
+    return SQLiteHistory(
+        SQLiteSettings.from_settings(settings, database=database),
+        config
+        | {
+            "archive_mode": "sqlite",
+            "sqlite_batch_size": batch_size,
+            "sqlite_batch_delay": batch_delay,
+            "sqlite_durability": durability,
+        },
+        logging.getLogger("cmk.mkeventd"),
+        StatusTableEvents.columns,
+        StatusTableHistory.columns,
+    )
+
+
+def test_add_in_batches(settings: ec.Settings, config: Config, tmp_path: Path) -> None:
+    history = _history_sqlite(settings, config, tmp_path / "history.sqlite", batch_size=3)
+    event = ec.Event(host=HostName("ABC1"), text="Event1 text", core_host=HostName("ABC"))
+
+    history.add(event=event, what="NEW")
+    history.add(event=event, what="DELETE")
+    assert history.queue_depth() == 2
+    assert _written(history) == 0
+
+    history.add(event=event, what="NEW")
+    assert history.queue_depth() == 0
+    assert _written(history) == 3
+
+    history.add(event=event, what="DELETE")
+    history.close()
+
+    history = _history_sqlite(settings, config, tmp_path / "history.sqlite")
+    assert _written(history) == 4
+    history.close()
+
+
+class _LockedConnection:
+    """A connection to a database that is locked by someone else"""
+
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        self._connection = connection
+
+    def __enter__(self) -> Self:
+        self._connection.__enter__()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._connection.__exit__(*exc_info)
+
+    def executemany(self, *_args: object) -> None:
+        raise sqlite3.OperationalError("database is locked")
+
+    def commit(self) -> None:
+        self._connection.commit()
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def test_write_queue_keeps_entries_on_error(
+    settings: ec.Settings, config: Config, tmp_path: Path
+) -> None:
+    history = _history_sqlite(settings, config, tmp_path / "history.sqlite")
+    event = ec.Event(host=HostName("ABC1"), text="Event1 text", core_host=HostName("ABC"))
+    history.add(event=event, what="NEW")
+    history.add(event=event, what="DELETE")
+
+    connection = history.conn
+    history.conn = _LockedConnection(connection)  # type: ignore[assignment]
+    with pytest.raises(sqlite3.OperationalError):
+        history.write_queue()
+    assert history.queue_depth() == 2
+
+    history.conn = connection
+    history.write_queue()
+    assert history.queue_depth() == 0
+    assert _written(history) == 2
+    history.close()
+
+
+def test_close_closes_connection_on_error(
+    settings: ec.Settings, config: Config, tmp_path: Path
+) -> None:
+    history = _history_sqlite(settings, config, tmp_path / "history.sqlite")
+    history.add(event=ec.Event(host=HostName("ABC1"), text="Event1 text"), what="NEW")
+
+    connection = history.conn
+    history.conn = _LockedConnection(connection)  # type: ignore[assignment]
+    with pytest.raises(sqlite3.OperationalError):
+        history.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        connection.execute("SELECT count(*) FROM history;")
+
+
+def test_add_after_close_raises(settings: ec.Settings, config: Config) -> None:
+    history = _history_sqlite(settings, config, ":memory:")
+    history.close()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        history.add(event=ec.Event(host=HostName("ABC1"), text="Event1 text"), what="NEW")
+
+
+def test_add_writes_queue_after_delay(settings: ec.Settings, config: Config) -> None:
+    history = _history_sqlite(settings, config, ":memory:", batch_delay=0.01)
+    history.add(event=ec.Event(host=HostName("ABC1"), text="Event1 text"), what="NEW")
+
+    for _attempt in range(100):
+        if _written(history):
+            break
+        time.sleep(0.01)
+    assert _written(history) == 1
+    assert history.queue_depth() == 0
+    history.close()
+
+
+def test_add_immediately(settings: ec.Settings, config: Config) -> None:
+    history = _history_sqlite(settings, config, ":memory:", durability="immediate")
+    history.add(event=ec.Event(host=HostName("ABC1"), text="Event1 text"), what="NEW")
+
+    assert history.queue_depth() == 0
+    assert _written(history) == 1
+    history.close()
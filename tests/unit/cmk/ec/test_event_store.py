@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+from tests.unit.cmk.ec.helpers import new_event
+
+from cmk.utils.hostaddress import HostName
+
+import cmk.ec.export as ec
+from cmk.ec.config import Count, MatchGroups, ServiceLevel
+from cmk.ec.event_store import EventStore
+from cmk.ec.main import EventServer, EventStatus
+
+RULE = ec.Rule(
+    actions=[],
+    actions_in_downtime=True,
+    autodelete=False,
+    cancel_action_phases="always",
+    cancel_actions=[],
+    comment="",
+    description="",
+    disabled=False,
+    docu_url="",
+    id="815",
+    invert_matching=False,
+    sl=ServiceLevel(precedence="message", value=0),
+)
+
+COUNT = Count(
+    count=3,
+    period=60,
+    algorithm="interval",
+    count_duration=None,
+    count_ack=False,
+    separate_host=True,
+    separate_application=True,
+    separate_match_groups=False,
+)
+
+
+def _event(eid: int, rule_id: str, host: str, application: str = "") -> ec.Event:
+    return new_event(
+        ec.Event(
+            id=eid,
+            rule_id=rule_id,
+            host=HostName(host),
+            application=application,
+            core_host=None,
+            host_in_downtime=False,
+        )
+    )
+
+
+def test_indexes() -> None:
+    events = [
+        _event(1, "r1", "h1", "a1"),
+        _event(2, "r2", "h1", "a1"),
+        _event(3, "r1", "h1", "a1"),
+        _event(4, "r1", "h2", "a1"),
+    ]
+    store = EventStore(events)
+
+    assert store.get(3) is events[2]
+    assert store.get(5) is None
+    assert store.oldest() is events[0]
+    assert list(store.of_rule("r1")) == [events[0], events[2], events[3]]
+    assert list(store.of_key("r1", "h1", "a1")) == [events[0], events[2]]
+    assert not list(store.of_key("r2", "h2", "a1"))
+
+    assert store.remove(events[0])
+    assert not store.remove(events[0])
+    assert not store.remove(_event(2, "r2", "h1", "a1"))  # not the stored one
+    assert store.to_list() == events[1:]
+    assert list(store.of_key("r1", "h1", "a1")) == [events[2]]
+
+
+def test_reindex_keeps_the_age_order() -> None:
+    events = [_event(1, "r1", "h1"), _event(2, "r1", "h2"), _event(3, "r1", "h2")]
+    store = EventStore(events)
+
+    events[0]["host"] = HostName("h2")
+    store.reindex(events[0])
+
+    assert not list(store.of_key("r1", "h1", ""))
+    assert list(store.of_key("r1", "h2", "")) == events
+
+
+def test_count_event(event_status: EventStatus, event_server: EventServer) -> None:
+    for host in ("h1", "h2", "h1", "h1"):
+        found = event_status.count_event(
+            event_server, _event(0, "815", host) | {"phase": "counting"}, COUNT
+        )
+
+    assert found is not None
+    assert found["count"] == 3
+    assert [(e["host"], e["count"], e["phase"]) for e in event_status.events()] == [
+        ("h1", 3, "open"),
+        ("h2", 1, "counting"),
+    ]
+
+
+def test_count_event_of_changing_hosts(
+    event_status: EventStatus, event_server: EventServer
+) -> None:
+    count = COUNT | {"separate_host": False}
+    event_status.count_event(event_server, _event(0, "815", "h1"), count)
+    event_status.count_event(event_server, _event(0, "815", "h2"), count)
+
+    (event,) = event_status.events()
+    assert event["host"] == "h2"
+    assert list(event_status.events_of_rule("815")) == [event]
+
+
+def test_cancel_events(event_status: EventStatus, event_server: EventServer) -> None:
+    for host, application in (("h1", "a1"), ("h1", "a2"), ("h2", "a1")):
+        event_status.new_event(_event(0, "815", host, application))
+    event_status.new_event(_event(0, "other", "h1", "a1"))
+
+    event_status.cancel_events(event_server, [], _event(0, "815", "h1", "a1"), MatchGroups(), RULE)
+
+    assert [(e["rule_id"], e["host"], e["application"]) for e in event_status.events()] == [
+        ("815", "h1", "a2"),
+        ("815", "h2", "a1"),
+        ("other", "h1", "a1"),
+    ]
+
+
+def test_cancel_events_by_application(event_status: EventStatus, event_server: EventServer) -> None:
+    for host, application in (("h1", "a1"), ("h1", "a2"), ("h2", "a1")):
+        event_status.new_event(_event(0, "815", host, application))
+
+    event_status.cancel_events(
+        event_server,
+        [],
+        _event(0, "815", "h1", "a3"),
+        MatchGroups(),
+        RULE | {"cancel_application": "a3"},
+    )
+
+    assert [(e["host"], e["application"]) for e in event_status.events()] == [("h2", "a1")]
+
+
+def test_cancel_events_with_rewritten_host(
+    event_status: EventStatus, event_server: EventServer
+) -> None:
+    event_status.new_event(_event(0, "815", "srv1"))
+    event_status.new_event(_event(0, "815", "srv2"))
+
+    event_status.cancel_events(
+        event_server,
+        [],
+        _event(0, "815", "syslog-relay"),
+        MatchGroups(match_groups_message_ok=("srv1",)),
+        RULE | {"set_host": "\\1"},
+    )
+
+    assert [e["host"] for e in event_status.events()] == ["srv2"]
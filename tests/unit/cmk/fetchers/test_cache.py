@@ -5,9 +5,16 @@
 
 import json
 import logging
+import os
+import pickle
+from pathlib import Path
+
+import pytest
+
+from cmk.utils.sectionname import SectionName
 
 from cmk.fetchers import Mode
-from cmk.fetchers.filecache import MaxAge
+from cmk.fetchers.filecache import MaxAge, MemoryCache, MemoryCacheStats
 
 from cmk.checkengine.parser import SectionStore
 
@@ -24,6 +31,138 @@ class TestSectionStore:
             str,
         )
 
+    @pytest.fixture
+    def store(self, tmp_path: Path) -> SectionStore[list[str]]:
+        return SectionStore[list[str]](tmp_path / "store", logger=logging.getLogger("test"))
+
+    def test_load_missing(self, store: SectionStore[list[str]]) -> None:
+        assert store.load_index() == {}
+        assert store.load() == {}
+
+    def test_store_and_load(self, store: SectionStore[list[str]]) -> None:
+        store.store({SectionName("one"): (1, 2, ["1"]), SectionName("two"): (3, 4, ["2"])})
+
+        assert store.load_index() == {SectionName("one"): (1, 2), SectionName("two"): (3, 4)}
+        assert store.load() == {
+            SectionName("one"): (1, 2, ["1"]),
+            SectionName("two"): (3, 4, ["2"]),
+        }
+        assert store.load({SectionName("two")}) == {SectionName("two"): (3, 4, ["2"])}
+
+    def test_store_nothing_removes_file(self, store: SectionStore[list[str]]) -> None:
+        store.store({SectionName("one"): (1, 2, ["1"])})
+        store.store({})
+        assert not store.path.exists()
+
+    def test_amend_appends(self, store: SectionStore[list[str]]) -> None:
+        store.store({SectionName("one"): (1, 2, ["1"]), SectionName("two"): (3, 4, ["2"])})
+        before = store.path.read_bytes()
+
+        assert store.amend({SectionName("two"): (5, 6, ["2 new"])}) == {
+            SectionName("one"): (1, 2),
+            SectionName("two"): (5, 6),
+        }
+
+        after = store.path.read_bytes()
+        # Only the header has been rewritten.
+        assert after[24 : len(before)] == before[24:]
+        assert store.load() == {
+            SectionName("one"): (1, 2, ["1"]),
+            SectionName("two"): (5, 6, ["2 new"]),
+        }
+
+    def test_amend_removes_outdated(self, store: SectionStore[list[str]]) -> None:
+        store.store({SectionName("one"): (1, 2, ["1"]), SectionName("two"): (3, 4, ["2"])})
+
+        assert store.amend(
+            {SectionName("three"): (5, 6, ["3"])}, outdated=lambda valid_until: valid_until < 3
+        ) == {SectionName("two"): (3, 4), SectionName("three"): (5, 6)}
+        assert store.load() == {
+            SectionName("two"): (3, 4, ["2"]),
+            SectionName("three"): (5, 6, ["3"]),
+        }
+
+        store.amend({}, outdated=lambda valid_until: True)
+        assert not store.path.exists()
+
+    def test_amend_compacts(self, store: SectionStore[list[str]]) -> None:
+        store.store({SectionName("keep"): (0, 0, ["x" * 1024])})
+        sizes = []
+        for n in range(100):
+            store.amend({SectionName("update"): (n, n, ["y" * 1024])})
+            sizes.append(store.path.stat().st_size)
+
+        assert max(sizes) < 10 * 1024
+        assert store.load() == {
+            SectionName("keep"): (0, 0, ["x" * 1024]),
+            SectionName("update"): (99, 99, ["y" * 1024]),
+        }
+
+    def test_load_legacy_format(self, store: SectionStore[list[str]]) -> None:
+        store.path.write_bytes(pickle.dumps({"one": (1, 2, ["1"]), "two": (3, 4, ["2"])}))
+
+        assert store.load_index() == {SectionName("one"): (1, 2), SectionName("two"): (3, 4)}
+        assert store.load({SectionName("one")}) == {SectionName("one"): (1, 2, ["1"])}
+
+        store.amend({SectionName("three"): (5, 6, ["3"])})
+        assert store.load() == {
+            SectionName("one"): (1, 2, ["1"]),
+            SectionName("two"): (3, 4, ["2"]),
+            SectionName("three"): (5, 6, ["3"]),
+        }
+
+
+class TestMemoryCache:
+    @staticmethod
+    def _stat(path: Path) -> os.stat_result:
+        path.write_bytes(b"")
+        return path.stat()
+
+    def test_disabled(self, tmp_path: Path) -> None:
+        cache = MemoryCache()
+        stat = self._stat(tmp_path / "file")
+        cache.put(tmp_path / "file", stat, b"data")
+
+        assert cache.get(tmp_path / "file", stat) is None
+        assert cache.stats == MemoryCacheStats()
+
+    def test_get_checks_stat(self, tmp_path: Path) -> None:
+        cache = MemoryCache(16)
+        stat = self._stat(tmp_path / "file")
+        cache.put(tmp_path / "file", stat, b"data")
+
+        assert cache.get(tmp_path / "file", stat) == b"data"
+        os.utime(tmp_path / "file", ns=(0, 1))
+        assert cache.get(tmp_path / "file", (tmp_path / "file").stat()) is None
+        assert cache.stats == MemoryCacheStats(hits=1, misses=1)
+
+    def test_evicts_least_recently_used(self, tmp_path: Path) -> None:
+        cache = MemoryCache(10)
+        stats = {name: self._stat(tmp_path / name) for name in ("a", "b", "c")}
+        cache.put(tmp_path / "a", stats["a"], b"aaaa")
+        cache.put(tmp_path / "b", stats["b"], b"bbbb")
+        assert cache.get(tmp_path / "a", stats["a"]) == b"aaaa"
+
+        cache.put(tmp_path / "c", stats["c"], b"cccc")
+
+        assert cache.size == 8
+        assert cache.get(tmp_path / "b", stats["b"]) is None
+        assert cache.get(tmp_path / "a", stats["a"]) == b"aaaa"
+        assert cache.get(tmp_path / "c", stats["c"]) == b"cccc"
+        assert cache.stats == MemoryCacheStats(hits=3, misses=1, evictions=1)
+
+    def test_shrink(self, tmp_path: Path) -> None:
+        cache = MemoryCache(10)
+        stat = self._stat(tmp_path / "file")
+        cache.put(tmp_path / "file", stat, b"data")
+        cache.put(tmp_path / "large", stat, b"too large for the cache")
+
+        cache.max_size = 2
+
+        assert not cache
+        assert cache.size == 0
+        assert cache.stats == MemoryCacheStats(evictions=1)
+
 
 class TestMaxAge:
     def test_repr(self) -> None:
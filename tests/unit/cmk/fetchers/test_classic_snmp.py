@@ -5,17 +5,19 @@
 
 # pylint: disable=protected-access
 
+import threading
+import time
 from collections.abc import Sequence
 from typing import NamedTuple
 
 import pytest
 
-from cmk.ccc.exceptions import MKGeneralException
+from cmk.ccc.exceptions import MKGeneralException, MKSNMPError
 
 from cmk.utils.hostaddress import HostAddress, HostName
 from cmk.utils.log import logger
 
-from cmk.snmplib import SNMPBackendEnum, SNMPHostConfig, SNMPVersion
+from cmk.snmplib import SNMPBackendEnum, SNMPHostConfig, SNMPRowInfo, SNMPVersion
 
 import cmk.fetchers.snmp_backend.classic as classic_snmp
 from cmk.fetchers.snmp_backend import ClassicSNMPBackend
@@ -331,3 +333,102 @@ def test_priv_proto(proto: str, result: str) -> None:
 def test_priv_proto_unknown(proto: str) -> None:
     with pytest.raises(MKGeneralException):
         classic_snmp._priv_proto_for(proto)
+
+
+class TestWalkTable:
+    @staticmethod
+    def _backend(monkeypatch: pytest.MonkeyPatch, *, bulk_table_walks: bool) -> ClassicSNMPBackend:
+        rows = [
+            (f".1.2.1.{column}.{index}", f"{column}/{index}".encode())
+            for column in (1, 2, 3)
+            for index in (1, 2)
+        ] + [(".1.3.1.0", b"scalar")]
+        backend = ClassicSNMPBackend(
+            SNMPHostConfig(
+                is_ipv6_primary=False,
+                hostname=HostName("localhost"),
+                ipaddress=HostAddress("127.0.0.1"),
+                credentials="public",
+                port=161,
+                bulkwalk_enabled=True,
+                snmp_version=SNMPVersion.V2C,
+                bulk_walk_size_of=10,
+                timing={},
+                oid_range_limits={},
+                snmpv3_contexts=[],
+                character_encoding=None,
+                snmp_backend=SNMPBackendEnum.CLASSIC,
+                bulk_table_walks=bulk_table_walks,
+            ),
+            logger,
+        )
+        backend.walked = []  # type: ignore[attr-defined]
+
+        def walk(oid: str, **_kw: object) -> SNMPRowInfo:
+            backend.walked.append(oid)  # type: ignore[attr-defined]
+            return [row for row in rows if row[0].startswith(f"{oid}.")]
+
+        monkeypatch.setattr(backend, "walk", walk)
+        return backend
+
+    @pytest.mark.parametrize("bulk_table_walks", [True, False])
+    def test_walk_table(self, monkeypatch: pytest.MonkeyPatch, bulk_table_walks: bool) -> None:
+        backend = self._backend(monkeypatch, bulk_table_walks=bulk_table_walks)
+        assert backend.walk_table([".1.2.1.1", ".1.2.1.3", ".1.3.1"], context="") == {
+            ".1.2.1.1": [(".1.2.1.1.1", b"1/1"), (".1.2.1.1.2", b"1/2")],
+            ".1.2.1.3": [(".1.2.1.3.1", b"3/1"), (".1.2.1.3.2", b"3/2")],
+            ".1.3.1": [(".1.3.1.0", b"scalar")],
+        }
+        assert backend.walked == (  # type: ignore[attr-defined]
+            [".1.2.1", ".1.3.1"] if bulk_table_walks else [".1.2.1.1", ".1.2.1.3", ".1.3.1"]
+        )
+
+
+class TestKillWalks:
+    @pytest.fixture(name="backend")
+    def fixture_backend(self, monkeypatch: pytest.MonkeyPatch) -> ClassicSNMPBackend:
+        backend = ClassicSNMPBackend(
+            SNMPHostConfig(
+                is_ipv6_primary=False,
+                hostname=HostName("localhost"),
+                ipaddress=HostAddress("127.0.0.1"),
+                credentials="public",
+                port=161,
+                bulkwalk_enabled=True,
+                snmp_version=SNMPVersion.V2C,
+                bulk_walk_size_of=10,
+                timing={},
+                oid_range_limits={},
+                snmpv3_contexts=[],
+                character_encoding=None,
+                snmp_backend=SNMPBackendEnum.CLASSIC,
+            ),
+            logger,
+        )
+        # A walk that does not end on its own
+        monkeypatch.setattr(backend, "_snmp_base_command", lambda *_: ["sh", "-c", "exec sleep 60"])
+        return backend
+
+    def test_kill_running_walk(self, backend: ClassicSNMPBackend) -> None:
+        errors: list[Exception] = []
+
+        def walk() -> None:
+            try:
+                backend.walk(".1.2.3", context="")
+            except MKSNMPError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=walk)
+        thread.start()
+        while not backend._walks and thread.is_alive():
+            time.sleep(0.01)
+        backend.kill_walks()
+        thread.join(timeout=10)
+
+        assert not thread.is_alive()
+        assert len(errors) == 1
+
+    def test_walk_after_kill_walks(self, backend: ClassicSNMPBackend) -> None:
+        backend.kill_walks()
+        with pytest.raises(MKSNMPError):
+            backend.walk(".1.2.3", context="")
@@ -8,7 +8,9 @@ from __future__ import annotations
 
 import os
 import socket
-from collections.abc import Sequence, Sized
+import ssl
+import threading
+from collections.abc import Iterator, Sequence, Sized
 from pathlib import Path
 from typing import Generic, NamedTuple, NoReturn, TypeAlias, TypeVar
 
@@ -20,6 +22,7 @@ from cmk.ccc.exceptions import MKFetcherError, MKTimeout, OnError
 
 import cmk.utils.resulttype as result
 from cmk.utils.agentdatatype import AgentRawData
+from cmk.utils.certs import RootCA
 from cmk.utils.hostaddress import HostAddress, HostName
 from cmk.utils.sectionname import SectionMap, SectionName
 
@@ -49,13 +52,24 @@ from cmk.fetchers import (
     TCPFetcher,
     TLSConfig,
 )
+from cmk.fetchers._agentprtcl import CompressionType, TransportProtocol, Version
 from cmk.fetchers._ipmi import IPMISensor
+from cmk.fetchers._tcp import (
+    ReceiveStats,
+    recvall,
+    tls_session_cache,
+    TLSSessionCache,
+    wrap_tls,
+)
 from cmk.fetchers.filecache import (
     AgentFileCache,
     FileCache,
     FileCacheMode,
     MaxAge,
+    memory_cache,
+    MemoryCacheStats,
     NoCache,
+    read_cache_file,
     SNMPFileCache,
 )
 from cmk.fetchers.snmp import SNMPPluginStore, SNMPPluginStoreItem
@@ -148,6 +162,57 @@ class TestAgentFileCache_and_SNMPFileCache:
         assert clone.file_cache_mode is FileCacheMode.READ_WRITE
         assert clone.read(mode) == raw_data
 
+    def test_read_write_compressed(
+        self,
+        file_cache: FileCache,
+        path: Path,
+        raw_data: AgentRawData | SNMPRawData,
+    ) -> None:
+        mode = Mode.DISCOVERY
+        file_cache.file_cache_mode = FileCacheMode.READ_WRITE
+        file_cache.compress = True
+
+        file_cache.write(raw_data, mode)
+
+        assert path.read_bytes().startswith(b"\x00CMKZ")
+        assert file_cache.read(mode) == raw_data
+
+        # Plain files are still read.
+        clone = clone_file_cache(file_cache)
+        assert not clone.compress
+        clone.write(raw_data, mode)
+        assert not path.read_bytes().startswith(b"\x00CMKZ")
+        assert file_cache.read(mode) == raw_data
+
+    def test_read_from_memory(
+        self,
+        file_cache: FileCache,
+        path: Path,
+        raw_data: AgentRawData | SNMPRawData,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(memory_cache, "_max_size", 1024)
+        monkeypatch.setattr(memory_cache, "stats", MemoryCacheStats())
+        mode = Mode.DISCOVERY
+        file_cache.file_cache_mode = FileCacheMode.READ_WRITE
+        file_cache.write(raw_data, mode)
+
+        try:
+            assert file_cache.read(mode) == raw_data
+            assert memory_cache.stats == MemoryCacheStats(misses=1)
+
+            assert clone_file_cache(file_cache).read(mode) == raw_data
+            assert memory_cache.stats == MemoryCacheStats(hits=1, misses=1)
+
+            # A modified file is read again.
+            file_cache.write(raw_data, mode)
+            os.utime(path, ns=(0, 1))
+            monkeypatch.setattr(file_cache, "max_age", MaxAge.unlimited())
+            assert file_cache.read(mode) == raw_data
+            assert memory_cache.stats == MemoryCacheStats(hits=1, misses=2)
+        finally:
+            memory_cache.clear()
+
     def test_read_only(
         self,
         file_cache: FileCache,
@@ -178,6 +243,21 @@ class TestAgentFileCache_and_SNMPFileCache:
 _TRawData = TypeVar("_TRawData", bound=Sized)
 
 
+@pytest.mark.parametrize("compress", [True, False])
+def test_read_cache_file(tmp_path: Path, compress: bool) -> None:
+    path = tmp_path / "host"
+    AgentFileCache(
+        path_template=str(path),
+        max_age=MaxAge.unlimited(),
+        simulation=False,
+        use_only_cache=False,
+        file_cache_mode=FileCacheMode.READ_WRITE,
+        compress=compress,
+    ).write(AgentRawData(b"<<<check_mk>>>\nagent raw data"), Mode.CHECKING)
+
+    assert read_cache_file(path) == b"<<<check_mk>>>\nagent raw data"
+
+
 class StubFileCache(Generic[_TRawData], FileCache[_TRawData]):
     """Holds the data to be cached in-memory for testing"""
 
@@ -369,6 +449,7 @@ class TestSNMPFetcherDeserialization:
             section_store_path="/tmp/db",
             stored_walk_path=tmp_path,
             walk_cache_path=tmp_path,
+            walk_cache_max_age=0,
             snmp_config=SNMPHostConfig(
                 is_ipv6_primary=False,
                 hostname=HostName("bob"),
@@ -444,6 +525,7 @@ class TestSNMPFetcherFetch:
         path: Path,
         sections: SectionMap[SNMPSectionMeta] | None = None,
         do_status_data_inventory: bool = False,
+        max_concurrent_walks: int = 1,
     ) -> SNMPFetcher:
         return SNMPFetcher(
             sections={} if sections is None else sections,
@@ -456,6 +538,7 @@ class TestSNMPFetcherFetch:
             section_store_path="/tmp/db",
             stored_walk_path=path,
             walk_cache_path=path,
+            walk_cache_max_age=0,
             snmp_config=SNMPHostConfig(
                 is_ipv6_primary=False,
                 hostname=HostName("bob"),
@@ -470,9 +553,67 @@ class TestSNMPFetcherFetch:
                 snmpv3_contexts=[],
                 character_encoding=None,
                 snmp_backend=SNMPBackendEnum.CLASSIC,
+                max_concurrent_walks=max_concurrent_walks,
             ),
         )
 
+    @pytest.mark.parametrize("max_concurrent_walks", [1, 4])
+    def test_fetch_from_io_concurrent_walks(
+        self, tmp_path: Path, monkeypatch: MonkeyPatch, max_concurrent_walks: int
+    ) -> None:
+        monkeypatch.setattr(snmp, "get_snmp_table", lambda tree, **__: [[tree.base]])
+        fetcher = self.create_fetcher(
+            path=tmp_path,
+            sections={
+                SectionName(name): SNMPSectionMeta(checking=True, disabled=False, redetect=False)
+                for name in ("pim", "pam", "pum")
+            },
+            max_concurrent_walks=max_concurrent_walks,
+        )
+        file_cache = SNMPFileCache(
+            path_template=os.devnull,
+            max_age=MaxAge.unlimited(),
+            simulation=False,
+            use_only_cache=False,
+            file_cache_mode=FileCacheMode.DISABLED,
+        )
+        assert get_raw_data(file_cache, fetcher, Mode.CHECKING) == result.OK(
+            {
+                SectionName("pim"): [[[".1.1.1"]]],
+                SectionName("pam"): [[[".1.2.3"]]],
+                SectionName("pum"): [[[".2.2.2"]], [[".3.3.3"]]],
+            }
+        )
+
+    def test_fetch_from_io_stored_walks_are_not_concurrent(
+        self, tmp_path: Path, monkeypatch: MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(snmp, "get_snmp_table", lambda tree, **__: [[tree.base]])
+        monkeypatch.setattr(snmp, "ThreadPoolExecutor", lambda **_: pytest.fail("concurrent"))
+        monkeypatch.setattr("cmk.fetchers.snmp._force_stored_walks", True)
+        (tmp_path / "bob").touch()
+        fetcher = self.create_fetcher(
+            path=tmp_path,
+            sections={
+                SectionName(name): SNMPSectionMeta(checking=True, disabled=False, redetect=False)
+                for name in ("pim", "pam")
+            },
+            max_concurrent_walks=4,
+        )
+        file_cache = SNMPFileCache(
+            path_template=os.devnull,
+            max_age=MaxAge.unlimited(),
+            simulation=False,
+            use_only_cache=False,
+            file_cache_mode=FileCacheMode.DISABLED,
+        )
+        assert get_raw_data(file_cache, fetcher, Mode.CHECKING) == result.OK(
+            {
+                SectionName("pim"): [[[".1.1.1"]]],
+                SectionName("pam"): [[[".1.2.3"]]],
+            }
+        )
+
     def test_fetch_from_io_non_empty(self, tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
         table = [["1"]]
         monkeypatch.setattr(snmp, "get_snmp_table", lambda *_, **__: table)
@@ -705,6 +846,7 @@ class TestSNMPFetcherFetchCache:
             section_store_path="/tmp/db",
             stored_walk_path=tmp_path,
             walk_cache_path=tmp_path,
+            walk_cache_max_age=0,
             snmp_config=SNMPHostConfig(
                 is_ipv6_primary=False,
                 hostname=HostName("bob"),
@@ -757,6 +899,11 @@ class _MockSock:
         self._used += len(use)
         return use
 
+    def recv_into(self, buffer: memoryview, nbytes: int = 0, *_flags: int) -> int:
+        use = self.recv(nbytes or len(buffer))
+        buffer[: len(use)] = use
+        return len(use)
+
     def __enter__(self, *_args: object) -> _MockSock:
         return self
 
@@ -764,6 +911,83 @@ class _MockSock:
         pass
 
 
+class TestRecvAll:
+    def test_empty(self) -> None:
+        stats = ReceiveStats()
+        assert recvall(_MockSock(b""), stats=stats) == b""  # type: ignore[arg-type]
+        assert stats.bytes_received == 0
+
+    def test_grows_buffer(self) -> None:
+        data = bytes(range(256)) * 100
+        stats = ReceiveStats()
+        received = recvall(_MockSock(data), initial_size=1024, stats=stats)  # type: ignore[arg-type]
+        assert isinstance(received, memoryview)
+        assert received == data
+        assert stats.bytes_received == len(data)
+        assert stats.reallocations == 5
+        assert stats.copies == 0
+
+
+@pytest.fixture(name="tls_config")
+def fixture_tls_config(tmp_path: Path) -> TLSConfig:
+    ca = RootCA.load_or_create(tmp_path / "ca.pem", "Test CA", key_size=2048)
+    ca.issue_and_store_certificate(tmp_path / "controller.pem", "controller", key_size=2048)
+    ca.issue_and_store_certificate(tmp_path / "site.pem", "site", key_size=2048)
+    return TLSConfig(cas_dir=tmp_path, ca_store=tmp_path / "ca.pem", site_crt=tmp_path / "site.pem")
+
+
+@pytest.fixture(name="server_ctx")
+def fixture_server_ctx(tls_config: TLSConfig) -> ssl.SSLContext:
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.load_cert_chain(tls_config.cas_dir / "controller.pem")
+    return ctx
+
+
+@pytest.fixture(name="clear_tls_session_cache")
+def fixture_clear_tls_session_cache() -> Iterator[None]:
+    tls_session_cache.clear()
+    yield
+    tls_session_cache.clear()
+
+
+@pytest.mark.usefixtures("clear_tls_session_cache")
+class TestTLSSessionCache:
+    @staticmethod
+    def _connect(tls_config: TLSConfig, server_ctx: ssl.SSLContext) -> bool:
+        client, server = socket.socketpair()
+
+        def serve() -> None:
+            with server_ctx.wrap_socket(server, server_side=True) as ssock:
+                ssock.sendall(b"payload")
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+        with wrap_tls(client, "controller", tls_config=tls_config) as ssock:
+            assert bytes(recvall(ssock)) == b"payload"
+            tls_session_cache.update(tls_config, ssock)
+            resumed = bool(ssock.session_reused)
+        thread.join()
+        return resumed
+
+    def test_context_is_reused(self, tls_config: TLSConfig) -> None:
+        cache = TLSSessionCache()
+        assert cache.context(tls_config) is cache.context(tls_config)
+
+    def test_context_is_rebuilt_on_change(self, tls_config: TLSConfig) -> None:
+        cache = TLSSessionCache()
+        ctx = cache.context(tls_config)
+        stat = tls_config.site_crt.stat()
+        os.utime(tls_config.site_crt, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        assert cache.context(tls_config) is not ctx
+
+    def test_session_is_resumed(self, tls_config: TLSConfig, server_ctx: ssl.SSLContext) -> None:
+        assert self._connect(tls_config, server_ctx) is False
+        assert len(tls_session_cache) == 1
+        assert self._connect(tls_config, server_ctx) is True
+        assert tls_session_cache.stats.full_handshakes == 1
+        assert tls_session_cache.stats.resumed_handshakes == 1
+
+
 class TestTCPFetcher:
     @pytest.fixture
     def fetcher(self, tmp_path: Path) -> TCPFetcher:
@@ -784,6 +1008,42 @@ class TestTCPFetcher:
     def test_repr(self, fetcher: TCPFetcher) -> None:
         assert isinstance(repr(fetcher), str)
 
+    def test_get_agent_data_plain(self, fetcher: TCPFetcher) -> None:
+        sock = _MockSock(b"<<<section>>>\nline")
+        assert fetcher._get_agent_data(sock, None) == b"<<<section>>>\nline"  # type: ignore[arg-type]
+        assert fetcher.receive_stats.bytes_received == len(b"<section>>>\nline")
+        assert fetcher.receive_stats.copies == 1
+
+    @pytest.mark.usefixtures("clear_tls_session_cache")
+    def test_get_agent_data_tls(self, tls_config: TLSConfig, server_ctx: ssl.SSLContext) -> None:
+        client, server = socket.socketpair()
+
+        def serve() -> None:
+            server.sendall(TransportProtocol.TLS.value)
+            with server_ctx.wrap_socket(server, server_side=True) as ssock:
+                ssock.sendall(
+                    bytes(Version.V1)
+                    + bytes(CompressionType.UNCOMPRESSED)
+                    + b"<<<section>>>\nline"
+                )
+
+        fetcher = TCPFetcher(
+            family=socket.AF_INET,
+            address=(HostAddress("1.2.3.4"), 6556),
+            host_name=HostName("irrelevant_for_this_test"),
+            timeout=0.1,
+            encryption_handling=TCPEncryptionHandling.ANY_AND_PLAIN,
+            pre_shared_secret=None,
+            tls_config=tls_config,
+        )
+        thread = threading.Thread(target=serve)
+        thread.start()
+        with client:
+            agent_data = fetcher._get_agent_data(client, "controller")
+        thread.join()
+
+        assert agent_data == b"<<<section>>>\nline"
+
     def test_with_cached_does_not_open(self, tmp_path: Path) -> None:
         file_cache = StubFileCache[AgentRawData](
             path_template=os.devnull,
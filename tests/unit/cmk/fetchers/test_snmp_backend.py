@@ -10,7 +10,12 @@ from pathlib import Path
 
 import pytest
 
+from cmk.utils.hostaddress import HostAddress, HostName
+
+from cmk.snmplib import SNMPBackendEnum, SNMPHostConfig, SNMPVersion
+
 import cmk.fetchers.snmp_backend._utils as utils
+import cmk.fetchers.snmp_backend.stored_walk as stored_walk
 from cmk.fetchers.snmp_backend import StoredWalkSNMPBackend
 
 
@@ -27,22 +32,81 @@ def test_strip_snmp_value(value: str, expected: bytes) -> None:
     assert utils.strip_snmp_value(value) == expected
 
 
+def _snmp_config() -> SNMPHostConfig:
+    return SNMPHostConfig(
+        is_ipv6_primary=False,
+        hostname=HostName("bob"),
+        ipaddress=HostAddress("1.2.3.4"),
+        credentials="public",
+        port=42,
+        bulkwalk_enabled=True,
+        snmp_version=SNMPVersion.V2C,
+        bulk_walk_size_of=0,
+        timing={},
+        oid_range_limits={},
+        snmpv3_contexts=[],
+        character_encoding=None,
+        snmp_backend=SNMPBackendEnum.STORED_WALK,
+    )
+
+
 @pytest.mark.usefixtures("create_files")
 class TestStoredWalkSNMPBackend:
+    @pytest.fixture
+    def backend(self, tmpdir: Path) -> StoredWalkSNMPBackend:
+        path = Path(tmpdir) / "walkdata" / "3.txt"
+        path.write_text('.1.2.3 foo\n.1.2.3.4 bar\n.1.2.10 baz\n.1.20 qux\n.1.3.1 "01 02 03 "\n')
+        return StoredWalkSNMPBackend(_snmp_config(), logging.getLogger("test"), path)
+
     @pytest.mark.parametrize(
-        "a, b, result",
+        "oid, expected",
         [
-            ("1.2.3", "1.2.3", 0),
-            ("1.2.3", ".1.2.3", 0),
-            (".1.2.3", "1.2.3", 0),
-            (".1.2.3", ".1.2.3", 0),
-            ("1.2.3", "1.2.3.4", 0),
-            ("1.2.3.4", "1.2.3", 1),
-            ("1.2.3", "4.5.6", -1),
+            ("1.2.3", [(".1.2.3", b"foo"), (".1.2.3.4", b"bar")]),
+            (".1.2.3", [(".1.2.3", b"foo"), (".1.2.3.4", b"bar")]),
+            (".1.2.3.4", [(".1.2.3.4", b"bar")]),
+            (".1.2", [(".1.2.3", b"foo"), (".1.2.3.4", b"bar"), (".1.2.10", b"baz")]),
+            (".1.2.1", []),
+            (".1.2.*", [(".1.2.3", b"foo")]),
+            (".1.3", [(".1.3.1", b"\x01\x02\x03")]),
+            (".4.5.6", []),
         ],
     )
-    def test_compare_oids(self, a: str, b: str, result: int) -> None:
-        assert StoredWalkSNMPBackend._compare_oids(a, b) == result
+    def test_walk(
+        self, backend: StoredWalkSNMPBackend, oid: str, expected: list[tuple[str, bytes]]
+    ) -> None:
+        assert backend.walk(oid, context="") == expected
+
+    def test_get(self, backend: StoredWalkSNMPBackend) -> None:
+        assert backend.get(".1.2.3.4", context="") == b"bar"
+        assert backend.get(".1.2.3", context="") is None
+        assert backend.get(".1.2.*", context="") == b"foo"
+
+    def test_walk_reads_file_once(
+        self, backend: StoredWalkSNMPBackend, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        backend.walk(".1.2", context="")
+        monkeypatch.setattr(backend, "read_walk_from_path", lambda *args: pytest.fail("reread"))
+        assert backend.walk(".1.20", context="") == [(".1.20", b"qux")]
+
+    def test_walk_rereads_changed_file(self, backend: StoredWalkSNMPBackend) -> None:
+        assert backend.walk(".1.20", context="") == [(".1.20", b"qux")]
+        backend.path.write_text(".1.20 quux\n")
+        assert backend.walk(".1.20", context="") == [(".1.20", b"quux")]
+        assert [key for key in stored_walk._indexes if key[0] == backend.path] == [
+            (backend.path, backend.path.stat().st_mtime_ns, backend.path.stat().st_size)
+        ]
+
+    def test_indexes_are_limited_by_size(
+        self, backend: StoredWalkSNMPBackend, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        other = StoredWalkSNMPBackend(
+            _snmp_config(), logging.getLogger("test"), backend.path.parent / "1.txt"
+        )
+        monkeypatch.setattr(stored_walk, "_MAX_INDEXED_SIZE", backend.path.stat().st_size)
+        backend.walk(".1.20", context="")
+        other.walk(".1.2", context="")
+
+        assert [path for path, _mtime, _size in stored_walk._indexes] == [other.path]
 
     def test_read_walk_data(self, tmpdir: Path) -> None:
         assert StoredWalkSNMPBackend.read_walk_from_path(
@@ -6,9 +6,13 @@
 # pylint: disable=protected-access
 
 import logging
+import os
+import time
 from collections.abc import Iterable, MutableMapping
 from pathlib import Path
 
+import pytest
+
 from cmk.snmplib import SNMPRowInfo
 
 from cmk.fetchers._snmp import WalkCache
@@ -48,3 +52,43 @@ class TestWalkCache:
         assert (fetchoid, "12c3d4a", True) in cache
         cache.save()
         assert path in cache.mock_stored_on_fs
+
+    def test_load_reuses_saved_walks(self, tmp_path: Path) -> None:
+        walk_cache = WalkCache(tmp_path, logging.getLogger())
+        walk_cache[(".1.2.3", "ctx", True)] = [(".1.2.3.1", b"cached")]
+        walk_cache[(".1.2.4", "ctx", False)] = [(".1.2.4.1", b"volatile")]
+        walk_cache.save()
+
+        walk_cache = WalkCache(tmp_path, logging.getLogger())
+        walk_cache.load()
+        assert list(walk_cache) == [(".1.2.3", "ctx", True)]
+        assert not walk_cache.reused
+
+        assert walk_cache[(".1.2.3", "ctx", True)] == [(".1.2.3.1", b"cached")]
+        assert walk_cache.reused == {(".1.2.3", "ctx", True)}
+
+    def test_load_removes_outdated_walks(self, tmp_path: Path) -> None:
+        walk_cache = WalkCache(tmp_path, logging.getLogger())
+        walk_cache[(".1.2.3", "ctx", True)] = [(".1.2.3.1", b"old")]
+        walk_cache[(".1.2.4", "ctx", True)] = [(".1.2.4.1", b"new")]
+        walk_cache.save()
+        old = time.time() - 120
+        os.utime(tmp_path / "OID.1.2.3-ctx", (old, old))
+
+        walk_cache = WalkCache(tmp_path, logging.getLogger())
+        walk_cache.load(max_age=60)
+        assert list(walk_cache) == [(".1.2.4", "ctx", True)]
+        assert not (tmp_path / "OID.1.2.3-ctx").exists()
+
+    def test_save_keeps_loaded_walks_unchanged(self, tmp_path: Path) -> None:
+        walk_cache = WalkCache(tmp_path, logging.getLogger())
+        walk_cache[(".1.2.3", "ctx", True)] = [(".1.2.3.1", b"cached")]
+        walk_cache.save()
+        old = time.time() - 120
+        os.utime(tmp_path / "OID.1.2.3-ctx", (old, old))
+
+        walk_cache = WalkCache(tmp_path, logging.getLogger())
+        walk_cache.load()
+        walk_cache.save()
+        # The walk must expire one day, so its age is not reset.
+        assert (tmp_path / "OID.1.2.3-ctx").stat().st_mtime == pytest.approx(old)
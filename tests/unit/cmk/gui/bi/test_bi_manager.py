@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import pickle
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from livestatus import SiteId
+
+from tests.unit.cmk.bi.bi_test_data import sample_config
+from tests.unit.cmk.bi.conftest import DUMMY_SITES_CALLBACK, MockBIAggregationPack
+
+from cmk.ccc.exceptions import MKGeneralException
+
+from cmk.gui.bi import bi_manager
+
+from cmk.bi.compiled_format import dump_compiled_aggregation
+from cmk.bi.data_fetcher import BIStructureFetcher
+from cmk.bi.searcher import BISearcher
+from cmk.bi.trees import BICompiledAggregation
+
+
+@pytest.fixture(name="compiled_aggregation")
+def fixture_compiled_aggregation() -> BICompiledAggregation:
+    structure_fetcher = BIStructureFetcher(DUMMY_SITES_CALLBACK)
+    structure_fetcher.add_site_data(SiteId("heute"), sample_config.bi_structure_states)
+    searcher = BISearcher()
+    searcher.set_hosts(structure_fetcher.hosts)
+    bi_packs = MockBIAggregationPack(sample_config.bi_packs_config)
+    bi_aggregation = bi_packs.get_aggregation("default_aggregation")
+    assert bi_aggregation is not None
+    return bi_aggregation.compile(searcher)
+
+
+@pytest.fixture(name="compiled_aggregations_dir")
+def fixture_compiled_aggregations_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setattr(bi_manager, "path_compiled_aggregations", tmp_path)
+    return tmp_path
+
+
+# The loaded files are memoized by their aggregation id, so each case has its own.
+@pytest.mark.parametrize(
+    "aggr_id, dump",
+    [
+        pytest.param("compact", dump_compiled_aggregation, id="compact"),
+        pytest.param("pickled", lambda aggr: pickle.dumps(aggr.serialize()), id="pickled"),
+    ],
+)
+def test_load_compiled_branch(
+    compiled_aggregation: BICompiledAggregation,
+    compiled_aggregations_dir: Path,
+    aggr_id: str,
+    dump: Callable[[BICompiledAggregation], bytes],
+) -> None:
+    (compiled_aggregations_dir / aggr_id).write_bytes(dump(compiled_aggregation))
+
+    branch = bi_manager.load_compiled_branch(aggr_id, "Host heute_clone")
+
+    assert branch.serialize() == compiled_aggregation.branches[1].serialize()
+    with pytest.raises(MKGeneralException):
+        bi_manager.load_compiled_branch(aggr_id, "Host morgen")
@@ -95,10 +95,13 @@ def test_registered_configvars() -> None:
         "apache_process_tuning",
         "archive_orphans",
         "auth_by_http_header",
+        "bi_status_fetch",
         "builtin_icon_visibility",
         "bulk_discovery_default_settings",
         "check_mk_perfdata_with_times",
+        "check_mk_phase_times",
         "cluster_max_cachefile_age",
+        "compress_cache_files",
         "crash_report_target",
         "crash_report_url",
         "custom_service_attributes",
@@ -122,6 +125,9 @@ def test_registered_configvars() -> None:
         "housekeeping_interval",
         "sqlite_housekeeping_interval",
         "sqlite_freelist_size",
+        "sqlite_durability",
+        "sqlite_batch_size",
+        "sqlite_batch_delay",
         "user_security_notification_duration",
         "http_proxies",
         "inventory_check_autotrigger",
@@ -190,6 +196,10 @@ def test_registered_configvars() -> None:
         "ui_theme",
         "use_dns_cache",
         "snmp_backend_default",
+        "snmp_bulk_table_walks",
+        "snmp_max_concurrent_walks",
+        "snmp_scan_cache_max_age",
+        "snmp_walk_cache_max_age",
         "use_inline_snmp",
         "use_new_descriptions_for",
         "user_downtime_timeranges",
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import errno
+from pathlib import Path
+
+import pytest
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.piggyback.backend import (
+    cleanup_piggyback_files,
+    get_piggybacked_host_with_sources,
+    move_for_host_rename,
+    PiggybackMetaData,
+    PiggybackMetaDataIndex,
+    remove_source_status_file,
+    store_piggyback_raw_data,
+)
+from cmk.piggyback.backend import _index
+from cmk.piggyback.backend._inotify import INotify
+from cmk.piggyback.backend._segments import SEGMENT_MIN_HOSTS
+
+_REF_TIME = 1640000000.0
+
+_VMS = [HostName(f"vm{n:03d}") for n in range(SEGMENT_MIN_HOSTS)]
+
+
+def _store(source: str, hosts: list[HostName], timestamp: float, omd_root: Path) -> None:
+    store_piggyback_raw_data(
+        HostName(source),
+        {host: (b"payload",) for host in hosts},
+        message_timestamp=timestamp,
+        contact_timestamp=timestamp,
+        omd_root=omd_root,
+    )
+
+
+def _assert_up_to_date(index: PiggybackMetaDataIndex, omd_root: Path) -> None:
+    assert index.get_piggybacked_host_with_sources() == get_piggybacked_host_with_sources(omd_root)
+
+
+def test_index_follows_changes(tmp_path: Path) -> None:
+    _store("source1", [HostName("host1")], _REF_TIME - 10, tmp_path)
+    index = PiggybackMetaDataIndex(tmp_path)
+    _assert_up_to_date(index, tmp_path)
+
+    _store("source1", [HostName("host1"), HostName("host2")], _REF_TIME, tmp_path)
+    _store("source2", [HostName("host2")], _REF_TIME, tmp_path)
+    _assert_up_to_date(index, tmp_path)
+
+    remove_source_status_file(HostName("source2"), tmp_path)
+    _assert_up_to_date(index, tmp_path)
+
+    _store("vcenter", _VMS, _REF_TIME, tmp_path)
+    _store("vcenter", [HostName("host1")], _REF_TIME + 10, tmp_path)
+    _assert_up_to_date(index, tmp_path)
+
+    move_for_host_rename(tmp_path, "host2", "host3")
+    move_for_host_rename(tmp_path, "vcenter", "vcenter2")
+    _assert_up_to_date(index, tmp_path)
+
+    cleanup_piggyback_files(_REF_TIME + 5, tmp_path)
+    _assert_up_to_date(index, tmp_path)
+
+
+def test_get_sources_of(tmp_path: Path) -> None:
+    index = PiggybackMetaDataIndex(tmp_path)
+    assert not index.get_sources_of(HostName("host1"))
+
+    _store("source2", [HostName("host1")], _REF_TIME, tmp_path)
+    _store("source1", [HostName("host1"), *_VMS], _REF_TIME - 10, tmp_path)
+
+    assert index.get_sources_of(HostName("host1")) == [
+        PiggybackMetaData(
+            source=HostName("source1"),
+            piggybacked=HostName("host1"),
+            last_update=int(_REF_TIME - 10),
+            last_contact=int(_REF_TIME - 10),
+        ),
+        PiggybackMetaData(
+            source=HostName("source2"),
+            piggybacked=HostName("host1"),
+            last_update=int(_REF_TIME),
+            last_contact=int(_REF_TIME),
+        ),
+    ]
+
+
+def test_index_without_inotify_watches(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    def _add_watch(*args: object) -> None:
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(INotify, "add_watch", _add_watch)
+    index = PiggybackMetaDataIndex(tmp_path)
+    assert not index.is_watching
+
+    _store("source1", [HostName("host1")], _REF_TIME, tmp_path)
+    _assert_up_to_date(index, tmp_path)
+
+
+def test_index_with_too_many_folders(tmp_path: Path) -> None:
+    _store("source1", [HostName("host1")], _REF_TIME, tmp_path)
+    index = PiggybackMetaDataIndex(tmp_path, max_watches=1)
+    assert index.is_watching
+
+    _store("source1", [HostName("host2")], _REF_TIME, tmp_path)
+    index.update()
+    assert not index.is_watching
+
+    _store("source2", [HostName("host2"), *_VMS], _REF_TIME, tmp_path)
+    _assert_up_to_date(index, tmp_path)
+    assert [m.source for m in index.get_sources_of(HostName("host2"))] == [
+        HostName("source1"),
+        HostName("source2"),
+    ]
+
+
+def test_default_max_watches(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    max_user_watches = tmp_path / "max_user_watches"
+    monkeypatch.setattr(_index, "_MAX_USER_WATCHES", max_user_watches)
+    assert _index.default_max_watches() == 512
+
+    max_user_watches.write_text("524288\n")
+    assert _index.default_max_watches() == 32768
@@ -6,12 +6,14 @@
 # pylint: disable=protected-access
 
 import pprint
+from collections.abc import Sequence
 
 import cmk.utils.log
 import cmk.utils.paths
 from cmk.utils.hostaddress import HostAddress
 
 from cmk.piggyback import backend
+from cmk.piggyback.backend._segments import SEGMENT_MIN_HOSTS
 
 _TEST_HOST_NAME = HostAddress("test-host")
 
@@ -224,6 +226,152 @@ def test_get_source_and_piggyback_hosts() -> None:
     }
 
 
+_MANY_HOSTS = [HostAddress(f"vm{n:03d}") for n in range(SEGMENT_MIN_HOSTS)]
+
+
+def _store_many(
+    source: HostAddress,
+    payload: bytes,
+    timestamp: float,
+    hosts: Sequence[HostAddress] = _MANY_HOSTS,
+) -> None:
+    backend.store_piggyback_raw_data(
+        source,
+        {host: (payload,) for host in hosts},
+        message_timestamp=timestamp,
+        contact_timestamp=timestamp,
+        omd_root=cmk.utils.paths.omd_root,
+    )
+
+
+def test_store_many_hosts_in_segment() -> None:
+    _store_many(HostAddress("vcenter"), b"vm data", _REF_TIME)
+
+    assert not (cmk.utils.paths.omd_root / "tmp/check_mk/piggyback").exists()
+    stored = _get_only_raw_data_element(_MANY_HOSTS[42])
+    assert stored == backend.PiggybackMessage(
+        backend.PiggybackMetaData(
+            source=HostAddress("vcenter"),
+            piggybacked=_MANY_HOSTS[42],
+            last_update=int(_REF_TIME),
+            last_contact=int(_REF_TIME),
+        ),
+        b"vm data\n",
+    )
+    assert list(backend.get_piggybacked_host_with_sources(cmk.utils.paths.omd_root)) == _MANY_HOSTS
+
+
+def test_segment_replaces_files_of_source() -> None:
+    backend.store_piggyback_raw_data(
+        HostAddress("vcenter"),
+        {_MANY_HOSTS[0]: _PAYLOAD},
+        message_timestamp=_REF_TIME - 10.0,
+        contact_timestamp=_REF_TIME - 10.0,
+        omd_root=cmk.utils.paths.omd_root,
+    )
+    _store_many(HostAddress("vcenter"), b"vm data", _REF_TIME)
+    # once a source is in a segment, it stays there
+    _store_many(HostAddress("vcenter"), b"new data", _REF_TIME + 10.0, _MANY_HOSTS[:1])
+
+    stored = _get_only_raw_data_element(_MANY_HOSTS[0])
+    assert stored.raw_data == b"new data\n"
+    assert stored.meta.last_contact == int(_REF_TIME + 10.0)
+    assert _get_only_raw_data_element(_MANY_HOSTS[1]).meta.last_update == int(_REF_TIME)
+    assert not (cmk.utils.paths.omd_root / "tmp/check_mk/piggyback_sources/vcenter").exists()
+
+
+def test_segment_and_files_of_different_sources() -> None:
+    _store_many(HostAddress("vcenter"), b"vm data", _REF_TIME)
+    backend.store_piggyback_raw_data(
+        HostAddress("esx"),
+        {_MANY_HOSTS[0]: _PAYLOAD},
+        message_timestamp=_REF_TIME,
+        contact_timestamp=_REF_TIME,
+        omd_root=cmk.utils.paths.omd_root,
+    )
+
+    assert [
+        m.meta.source for m in backend.get_messages_for(_MANY_HOSTS[0], cmk.utils.paths.omd_root)
+    ] == [
+        HostAddress("esx"),
+        HostAddress("vcenter"),
+    ]
+
+
+def test_segment_remove_source_status_file() -> None:
+    _store_many(HostAddress("vcenter"), b"vm data", _REF_TIME)
+
+    assert backend.remove_source_status_file(HostAddress("vcenter"), cmk.utils.paths.omd_root)
+    assert not backend.remove_source_status_file(HostAddress("vcenter"), cmk.utils.paths.omd_root)
+    assert _get_only_raw_data_element(_MANY_HOSTS[0]).meta.last_contact is None
+
+
+def test_segment_is_compacted() -> None:
+    for n in range(20):
+        _store_many(HostAddress("vcenter"), b"%d" % n * 1000, _REF_TIME + n)
+
+    (segment,) = (cmk.utils.paths.omd_root / "tmp/check_mk/piggyback_segments").glob("*.segment")
+    assert segment.stat().st_size <= 2 * SEGMENT_MIN_HOSTS * 3001
+    assert _get_only_raw_data_element(_MANY_HOSTS[-1]).raw_data == b"19" * 1000 + b"\n"
+
+
+def test_watch_segment_after_compaction() -> None:
+    segments = cmk.utils.paths.omd_root / "tmp/check_mk/piggyback_segments"
+    (cmk.utils.paths.omd_root / "tmp/check_mk/piggyback").mkdir(parents=True, exist_ok=True)
+    _store_many(HostAddress("vcenter"), b"vm data", _REF_TIME)
+    (segment,) = segments.glob("*.segment")
+    watch = backend.watch_new_message_batches(cmk.utils.paths.omd_root, timeout=0)
+    assert not next(watch)
+
+    for n in range(20):
+        _store_many(HostAddress("vcenter"), b"x" * 10000, _REF_TIME + n + 1, _MANY_HOSTS[:1])
+
+    assert list(segments.glob("*.segment")) != [segment]
+    # Only the new payload, not the ones moved by the compaction.
+    assert [(m.meta.piggybacked, m.meta.last_update) for m in next(watch)] == [
+        (_MANY_HOSTS[0], int(_REF_TIME) + 20)
+    ]
+
+
+def test_watch_segment_stores_within_one_second() -> None:
+    (cmk.utils.paths.omd_root / "tmp/check_mk/piggyback").mkdir(parents=True, exist_ok=True)
+    _store_many(HostAddress("vcenter"), b"vm data", _REF_TIME)
+    watch = backend.watch_new_message_batches(cmk.utils.paths.omd_root, timeout=0)
+    assert not next(watch)
+
+    _store_many(HostAddress("vcenter"), b"first", _REF_TIME + 0.1, _MANY_HOSTS[:1])
+    assert [m.raw_data for m in next(watch)] == [b"first\n"]
+
+    _store_many(HostAddress("vcenter"), b"second", _REF_TIME + 0.2, _MANY_HOSTS[:1])
+    assert [m.raw_data for m in next(watch)] == [b"second\n"]
+
+
+def test_segment_cleanup() -> None:
+    _store_many(HostAddress("vcenter"), b"vm data", _REF_TIME - 10.0)
+    _store_many(HostAddress("vcenter"), b"vm data", _REF_TIME, _MANY_HOSTS[:1])
+
+    backend.cleanup_piggyback_files(_REF_TIME - 5.0, cmk.utils.paths.omd_root)
+    assert list(backend.get_piggybacked_host_with_sources(cmk.utils.paths.omd_root)) == [
+        _MANY_HOSTS[0]
+    ]
+
+    backend.cleanup_piggyback_files(_REF_TIME + 5.0, cmk.utils.paths.omd_root)
+    assert not backend.get_piggybacked_host_with_sources(cmk.utils.paths.omd_root)
+
+
+def test_segment_move_for_host_rename() -> None:
+    _store_many(HostAddress("vcenter"), b"vm data", _REF_TIME)
+
+    assert backend.move_for_host_rename(cmk.utils.paths.omd_root, "vm000", "renamed") == (
+        "piggyback-load",
+    )
+    assert backend.move_for_host_rename(cmk.utils.paths.omd_root, "vcenter", "vcenter2") == (
+        "piggyback-pig",
+    )
+    assert _get_only_raw_data_element(HostAddress("renamed")).meta.source == HostAddress("vcenter2")
+    assert not backend.get_messages_for(HostAddress("vm000"), cmk.utils.paths.omd_root)
+
+
 class TestPiggybackMetaData:
     def test_serialization_roundtrip(self) -> None:
         pmd = backend.PiggybackMetaData(
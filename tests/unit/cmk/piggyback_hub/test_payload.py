@@ -4,18 +4,36 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import logging
+from multiprocessing import Event as make_event
+from pathlib import Path
 from unittest.mock import Mock
 
+import pytest
+
 import cmk.utils.paths
 from cmk.utils.hostaddress import HostName
 
-from cmk.messaging import DeliveryTag
+from cmk.messaging import CMKConnectionError, DeliveryTag
 from cmk.piggyback.backend import (
     get_messages_for,
     PiggybackMessage,
     PiggybackMetaData,
 )
-from cmk.piggyback.hub.payload import PiggybackPayload, save_payload_on_message
+from cmk.piggyback.hub.config import PiggybackHubConfig
+from cmk.piggyback.hub.paths import create_paths
+from cmk.piggyback.hub.payload import (
+    load_batch_sites,
+    PAYLOAD_BATCH_ROUTE,
+    PAYLOAD_ROUTE,
+    PayloadBatcher,
+    PayloadBatchSupport,
+    PiggybackPayload,
+    PiggybackPayloadBatch,
+    save_batch_support_on_message,
+    save_payload_batch_on_message,
+    save_payload_on_message,
+    SendingPayloadProcess,
+)
 
 
 def test__on_message() -> None:
@@ -43,3 +61,148 @@ def test__on_message() -> None:
     ]
     actual_payload = get_messages_for(HostName("target"), cmk.utils.paths.omd_root)
     assert actual_payload == expected_payload
+
+
+def _payload(source: str, target: str, raw_data: bytes = b"line1\nline2") -> PiggybackPayload:
+    return PiggybackPayload(
+        source_host=HostName(source),
+        raw_data={HostName(target): [raw_data]},
+        message_timestamp=1640000020,
+        contact_timestamp=1640000000,
+    )
+
+
+def test_payload_batch_serialization_roundtrip() -> None:
+    payloads = [_payload("source", "target1"), _payload("source", "target2")]
+    batch = PiggybackPayloadBatch.from_payloads(payloads)
+
+    received = PiggybackPayloadBatch.model_validate_json(batch.model_dump_json())
+
+    assert received.messages == 2
+    assert received.payloads() == payloads
+
+
+def test__on_batch_message() -> None:
+    on_message = save_payload_batch_on_message(logging.getLogger("test"), cmk.utils.paths.omd_root)
+
+    on_message(
+        Mock(),
+        DeliveryTag(0),
+        PiggybackPayloadBatch.from_payloads(
+            [_payload("source", "target1"), _payload("source", "target2", b"other")]
+        ),
+    )
+
+    assert [
+        m.raw_data
+        for target in ("target1", "target2")
+        for m in get_messages_for(HostName(target), cmk.utils.paths.omd_root)
+    ] == [b"line1\nline2\n", b"other\n"]
+
+
+class TestPayloadBatcher:
+    def test_ready_after_max_delay(self) -> None:
+        batcher = PayloadBatcher(max_delay=1.0, max_size=1000)
+        batcher.add("site1", _payload("source", "target1"), now=0.0)
+        batcher.add("site2", _payload("source", "target2"), now=0.5)
+        batcher.add("site1", _payload("source", "target3"), now=0.5)
+
+        assert not list(batcher.ready(now=0.9))
+        assert [(site, batch.messages) for site, batch in batcher.ready(now=1.0)] == [("site1", 2)]
+        assert len(batcher) == 1
+
+    def test_ready_at_max_size(self) -> None:
+        batcher = PayloadBatcher(max_delay=1.0, max_size=10)
+        batcher.add("site1", _payload("source", "target1", b"0123456789"), now=0.0)
+
+        assert [site for site, _batch in batcher.ready(now=0.0)] == ["site1"]
+
+    def test_flush(self) -> None:
+        batcher = PayloadBatcher(max_delay=1.0, max_size=1000)
+        batcher.add("site1", _payload("source", "target1"), now=0.0)
+
+        assert [site for site, _batch in batcher.ready(now=0.0, flush=True)] == ["site1"]
+        assert not batcher
+
+    def test_failed_batch_is_kept(self) -> None:
+        batcher = PayloadBatcher(max_delay=1.0, max_size=1000)
+        batcher.add("site1", _payload("source", "target1"), now=0.0)
+
+        with pytest.raises(CMKConnectionError):
+            for _site, _batch in batcher.ready(now=1.0):
+                raise CMKConnectionError()
+
+        assert len(batcher) == 1
+        assert batcher.stats.batches == 0
+
+    def test_stats(self) -> None:
+        batcher = PayloadBatcher(max_delay=1.0, max_size=1000)
+        for n in range(10):
+            batcher.add("site1", _payload("source", f"target{n}", b"x" * 100), now=0.0)
+
+        ((_site, batch),) = batcher.ready(now=1.0)
+
+        assert batcher.stats.messages_per_batch == 10.0
+        assert batcher.stats.compression_ratio == 1000 / len(batch.frame) > 1
+
+
+def test_save_batch_support_on_message(tmp_path: Path) -> None:
+    on_message = save_batch_support_on_message(
+        logging.getLogger("test"), tmp_path, (reload_config := make_event())
+    )
+
+    on_message(Mock(), DeliveryTag(0), PayloadBatchSupport(site_id="new_site"))
+    assert reload_config.is_set()
+    assert load_batch_sites(create_paths(tmp_path)) == {"new_site"}
+
+    reload_config.clear()
+    on_message(Mock(), DeliveryTag(1), PayloadBatchSupport(site_id="new_site"))
+    assert not reload_config.is_set()
+
+
+class TestSendingPayloadProcess:
+    @pytest.fixture
+    def process(self, tmp_path: Path) -> SendingPayloadProcess:
+        return SendingPayloadProcess(
+            logging.getLogger("test"), tmp_path / "site", make_event(), lambda: "crash"
+        )
+
+    def test_announce_batch_support(self, process: SendingPayloadProcess) -> None:
+        channel = Mock()
+        config = PiggybackHubConfig(
+            targets={HostName("h1"): "site1", HostName("h2"): "site2", HostName("h3"): "site1"}
+        )
+
+        process._announce_batch_support(channel, config)
+
+        assert [
+            (call.args, call.kwargs["routing"].value)
+            for call in channel.publish_for_site.mock_calls
+        ] == [
+            (("site1", PayloadBatchSupport(site_id="site")), "batch_support"),
+            (("site2", PayloadBatchSupport(site_id="site")), "batch_support"),
+        ]
+
+    def test_publish_to_sites_of_mixed_versions(self, process: SendingPayloadProcess) -> None:
+        batch_channel, payload_channel = Mock(), Mock()
+        batcher = PayloadBatcher(max_delay=1.0, max_size=1000)
+        batcher.add("new_site", _payload("source", "target1"), now=0.0)
+        batcher.add("old_site", _payload("source", "target2"), now=0.0)
+        batcher.add("old_site", _payload("source", "target3"), now=0.0)
+
+        process._publish_batches(
+            batch_channel, payload_channel, batcher, frozenset({"new_site"}), flush=True
+        )
+
+        ((site_id, batch), kwargs) = batch_channel.publish_for_site.call_args
+        assert site_id == "new_site"
+        assert batch.payloads() == [_payload("source", "target1")]
+        assert kwargs["routing"] == PAYLOAD_BATCH_ROUTE
+        assert [
+            (call.args, call.kwargs["routing"])
+            for call in payload_channel.publish_for_site.mock_calls
+        ] == [
+            (("old_site", _payload("source", "target2")), PAYLOAD_ROUTE),
+            (("old_site", _payload("source", "target3")), PAYLOAD_ROUTE),
+        ]
+        assert not batcher
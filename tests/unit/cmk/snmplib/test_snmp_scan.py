@@ -6,6 +6,7 @@
 # pylint: disable=protected-access, redefined-outer-name
 
 import logging
+import time
 from collections.abc import Iterator
 from pathlib import Path
 
@@ -13,6 +14,7 @@ import pytest
 
 from tests.unit.conftest import FixPluginLegacy
 
+from cmk.ccc import store
 from cmk.ccc.exceptions import MKSNMPError, OnError
 
 from cmk.utils.hostaddress import HostAddress, HostName
@@ -266,3 +268,109 @@ def test_gather_available_raw_section_names_defaults(
         SectionName("snmp_info"),
         SectionName("snmp_uptime"),
     }
+
+
+class _CountingBackend(SNMPTestBackend):
+    def __init__(self, config: SNMPHostConfig, logger: logging.Logger) -> None:
+        super().__init__(config, logger)
+        self.requested: list[OID] = []
+
+    def get(self, /, oid, *, context):
+        self.requested.append(oid)
+        return {
+            snmp_scan.OID_SYS_DESCR: b"sys description",
+            snmp_scan.OID_SYS_OBJ: b".1.3.6.1.4.1.8072.3.2.10",
+        }.get(oid)
+
+
+def _scan(
+    backend: SNMPBackend, cache_dir: Path, max_age: float, *, in_new_process: bool = True
+) -> frozenset[SectionName]:
+    if in_new_process:
+        snmp_cache.cleanup_host_caches()
+    return snmp_scan.gather_available_raw_section_names(
+        [
+            (SectionName("pim"), [[(".1.2.3.4.0", "pim.*", True)]]),
+            (SectionName("pam"), [[(snmp_scan.OID_SYS_DESCR, "sys.*", True)]]),
+        ],
+        scan_config=snmp_scan.SNMPScanConfig(
+            on_error=OnError.RAISE,
+            missing_sys_description=False,
+            oid_cache_dir=cache_dir,
+            oid_cache_max_age=max_age,
+        ),
+        backend=backend,
+    )
+
+
+def test_snmp_scan_reuses_persisted_oids(tmp_path: Path) -> None:
+    backend = _CountingBackend(SNMPConfig, logger)
+    assert _scan(backend, tmp_path, 60) == {SectionName("pam")}
+    assert backend.requested == [snmp_scan.OID_SYS_DESCR, snmp_scan.OID_SYS_OBJ, ".1.2.3.4.0"]
+
+    backend.requested.clear()
+    assert _scan(backend, tmp_path, 60) == {SectionName("pam")}
+    # The failed get is not persisted.
+    assert backend.requested == [".1.2.3.4.0"]
+    assert len(snmp_cache.single_oid_cache().reused) == 2
+
+    # Without a maximum age, nothing is reused.
+    assert _scan(backend, tmp_path, 0) == {SectionName("pam")}
+    assert len(backend.requested) == 3
+
+
+def test_snmp_scan_refetches_outdated_oids(tmp_path: Path) -> None:
+    backend = _CountingBackend(SNMPConfig, logger)
+    _scan(backend, tmp_path, 60)
+    cache_file = tmp_path / f"{SNMPConfig.hostname}.{SNMPConfig.ipaddress}"
+    persisted = store.load_object_from_file(cache_file, default={})
+    persisted[snmp_scan.OID_SYS_DESCR] = (time.time() - 120, "sys description")
+    store.save_object_to_file(cache_file, persisted)
+
+    backend.requested.clear()
+    _scan(backend, tmp_path, 60)
+    assert backend.requested == [snmp_scan.OID_SYS_DESCR]
+
+
+def test_snmp_scan_refetches_outdated_oids_in_memory(tmp_path: Path) -> None:
+    backend = _CountingBackend(SNMPConfig, logger)
+    _scan(backend, tmp_path, 60)
+    (tmp_path / f"{SNMPConfig.hostname}.{SNMPConfig.ipaddress}").unlink()
+    snmp_cache.single_oid_cache().fetched_at[snmp_scan.OID_SYS_DESCR] -= 120
+
+    backend.requested.clear()
+    _scan(backend, tmp_path, 60, in_new_process=False)
+    assert backend.requested == [snmp_scan.OID_SYS_DESCR, ".1.2.3.4.0"]
+    assert snmp_cache.single_oid_cache().reused == {snmp_scan.OID_SYS_OBJ}
+
+
+def test_snmp_scan_ignores_legacy_oid_cache(tmp_path: Path) -> None:
+    cache_file = tmp_path / f"{SNMPConfig.hostname}.{SNMPConfig.ipaddress}"
+    store.save_object_to_file(cache_file, {snmp_scan.OID_SYS_DESCR: "legacy"})
+
+    backend = _CountingBackend(SNMPConfig, logger)
+    _scan(backend, tmp_path, 60)
+    assert snmp_scan.OID_SYS_DESCR in backend.requested
+
+
+def test_write_single_oid_cache_keeps_newest_oids(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(snmp_cache, "_MAX_PERSISTED_OIDS", 2)
+    snmp_cache.cleanup_host_caches()
+    snmp_cache.initialize_single_oid_cache(
+        SNMPConfig.hostname,
+        SNMPConfig.ipaddress,
+        from_disk=True,
+        cache_dir=tmp_path,
+    )
+    cache = snmp_cache.single_oid_cache()
+    cache.update({".1": "one", ".2": "two", ".3": "three"})
+    cache.fetched_at.update({".1": 1.0, ".3": 3.0})
+
+    snmp_cache.write_single_oid_cache(SNMPConfig.hostname, SNMPConfig.ipaddress, cache_dir=tmp_path)
+
+    persisted = store.load_object_from_file(
+        tmp_path / f"{SNMPConfig.hostname}.{SNMPConfig.ipaddress}", default={}
+    )
+    assert set(persisted) == {".2", ".3"}
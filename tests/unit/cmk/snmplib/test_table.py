@@ -7,7 +7,7 @@
 
 import dataclasses
 import logging
-from collections.abc import Sequence
+from collections.abc import Mapping, Sequence
 from functools import partial
 from typing import NoReturn
 
@@ -33,6 +33,7 @@ from cmk.snmplib import (
     SNMPContextConfig,
     SNMPContextTimeout,
     SNMPHostConfig,
+    SNMPRowInfo,
     SNMPTable,
     SNMPVersion,
     SpecialColumn,
@@ -135,6 +136,46 @@ def test_sanitize_snmp_encoding(
     ] == expected
 
 
+@pytest.mark.parametrize(
+    "columns, expected",
+    [
+        pytest.param(
+            [
+                (".1.2.1", [(".1.2.1.1", b"a1"), (".1.2.1.2", b"a2")], "string"),
+                (".1.2.2", [(".1.2.2.1", b"b1"), (".1.2.2.2", b"b2")], "string"),
+            ],
+            [([b"a1", b"a2"], "string"), ([b"b1", b"b2"], "string")],
+            id="aligned",
+        ),
+        pytest.param(
+            [
+                (
+                    ".1.2.1",
+                    [(".1.2.1.1", b"a1"), (".1.2.1.2", b"a2"), (".1.2.1.3", b"a3")],
+                    "string",
+                ),
+                (".1.2.2", [(".1.2.2.2", b"b2")], "binary"),
+            ],
+            [([b"a1", b"a2", b"a3"], "string"), ([b"", b"b2", b""], "binary")],
+            id="gaps",
+        ),
+        pytest.param(
+            [
+                (".1.2.1", [(".1.2.1.10", b"a10"), (".1.2.1.9", b"a9")], "string"),
+                (".1.2.2", [(".1.2.2.9", b"b9"), (".1.2.2.10.1", b"b10.1")], "string"),
+            ],
+            [([b"a9", b"a10", b""], "string"), ([b"b9", b"", b"b10.1"], "string")],
+            id="unsorted",
+        ),
+    ],
+)
+def test_sanitize_snmp_table_columns(
+    columns: _snmp_table._ResultColumnsUnsanitized,
+    expected: _snmp_table._ResultColumnsSanitized,
+) -> None:
+    assert _snmp_table._sanitize_snmp_table_columns(columns) == expected
+
+
 def test_use_advanced_snmp_version(monkeypatch: MonkeyPatch) -> None:
     ts = Scenario()
     ts.set_ruleset(
@@ -262,3 +303,53 @@ def test_walk_raises_on_timeout_without_snmpv3_context_stop_on_timeout() -> None
         )
 
     assert type(excinfo.value) is SNMPContextTimeout  # pylint: disable=unidiomatic-typecheck
+
+
+class _TableBackend(SNMPBackend):
+    def __init__(self, snmp_config: SNMPHostConfig, logger: logging.Logger) -> None:
+        super().__init__(snmp_config, logger)
+        self.walked: list[Sequence[str]] = []
+
+    def get(self, /, *args: object, **kw: object) -> NoReturn:
+        assert False
+
+    def walk(self, /, *args: object, **kw: object) -> NoReturn:
+        assert False
+
+    def walk_table(
+        self, /, oids: Sequence[str], *, context: str, **kw: object
+    ) -> Mapping[str, SNMPRowInfo]:
+        self.walked.append(oids)
+        return {oid: [(f"{oid}.{r}", b"C0FEFE") for r in (1, 2)] for oid in oids}
+
+
+def test_get_snmp_table_walks_missing_columns_at_once() -> None:
+    backend = _TableBackend(SNMPConfig, logger)
+    walk_cache: dict[tuple[str, str, bool], SNMPRowInfo] = {}
+    tree = BackendSNMPTree(
+        base=".1.2",
+        oids=[
+            BackendOIDSpec(SpecialColumn.END, "string", False),
+            BackendOIDSpec("1", "string", False),
+            BackendOIDSpec("2", "string", True),
+        ],
+    )
+
+    table = get_snmp_table(
+        section_name=None, tree=tree, walk_cache=walk_cache, backend=backend, log=logger.debug
+    )
+    assert table == [["1", "C0FEFE", "C0FEFE"], ["2", "C0FEFE", "C0FEFE"]]
+    # Parse functions get plain lists.
+    assert type(table) is list and all(type(row) is list for row in table)
+    assert backend.walked == [[".1.2.1", ".1.2.2"]]
+    assert {(oid, save) for oid, _ctx, save in walk_cache} == {(".1.2.1", False), (".1.2.2", True)}
+
+    # The columns in the walk cache are not walked again.
+    del walk_cache[next(key for key in walk_cache if key[0] == ".1.2.1")]
+    assert (
+        get_snmp_table(
+            section_name=None, tree=tree, walk_cache=walk_cache, backend=backend, log=logger.debug
+        )
+        == table
+    )
+    assert backend.walked == [[".1.2.1", ".1.2.2"], [".1.2.1"]]
@@ -16,6 +16,9 @@ from tests.testlib.base_configuration_scenario import Scenario
 from cmk.utils.hostaddress import HostName
 from cmk.utils.labels import BuiltinHostLabelsStore
 from cmk.utils.rulesets.ruleset_matcher import (
+    CompiledHostMatcher,
+    HostBitmap,
+    HostIndex,
     LabelManager,
     matches_tag_condition,
     RuleConditionsSpec,
@@ -889,3 +892,79 @@ def test_matches_tag_condition(
         )
         is expected_result
     )
+
+
+_COMPILED_MATCHER_HOSTS: Mapping[HostName, tuple[str, Mapping[TagGroupID, TagID], Mapping]] = {
+    HostName("web1"): ("/lan/", {TagGroupID("criticality"): TagID("prod")}, {"os": "linux"}),
+    HostName("web2"): ("/lan/", {TagGroupID("criticality"): TagID("test")}, {"os": "windows"}),
+    HostName("db1"): ("/dmz/", {TagGroupID("criticality"): TagID("prod")}, {"os": "linux"}),
+    HostName("printer"): ("/", {TagGroupID("criticality"): TagID("offline")}, {}),
+}
+
+
+@pytest.mark.parametrize(
+    "condition, expected",
+    [
+        ({}, {"web1", "web2", "db1", "printer"}),
+        ({"host_name": []}, set()),
+        ({"host_folder": "/lan/"}, {"web1", "web2"}),
+        ({"host_tags": {TagGroupID("criticality"): TagID("prod")}}, {"web1", "db1"}),
+        (
+            {"host_tags": {TagGroupID("criticality"): {"$ne": TagID("prod")}}},
+            {"web2", "printer"},
+        ),
+        (
+            {"host_tags": {TagGroupID("criticality"): {"$or": [TagID("test"), TagID("offline")]}}},
+            {"web2", "printer"},
+        ),
+        (
+            {"host_tags": {TagGroupID("criticality"): {"$nor": [TagID("test"), TagID("offline")]}}},
+            {"web1", "db1"},
+        ),
+        ({"host_label_groups": [("and", [("and", "os:linux")])]}, {"web1", "db1"}),
+        (
+            {"host_label_groups": [("and", [("and", "os:linux"), ("or", "os:windows")])]},
+            {"web1", "web2", "db1"},
+        ),
+        ({"host_label_groups": [("not", [("and", "os:linux")])]}, {"web2", "printer"}),
+        ({"host_name": ["web1", "unknown"]}, {"web1"}),
+        ({"host_name": ["web1", "invalid host!"]}, {"web1"}),
+        ({"host_name": {"$nor": ["invalid host!"]}}, {"web1", "web2", "db1", "printer"}),
+        ({"host_name": [{"$regex": "web"}, "db1"]}, {"web1", "web2", "db1"}),
+        ({"host_name": {"$nor": [{"$regex": "web"}]}}, {"db1", "printer"}),
+        (
+            {
+                "host_folder": "/lan/",
+                "host_tags": {TagGroupID("criticality"): TagID("prod")},
+                "host_name": [{"$regex": ".*1$"}],
+            },
+            {"web1"},
+        ),
+    ],
+)
+def test_compiled_host_matcher(condition: RuleConditionsSpec, expected: set[str]) -> None:
+    matcher = CompiledHostMatcher(
+        HostIndex(_COMPILED_MATCHER_HOSTS),
+        {hn: tags.items() for hn, (_path, tags, _labels) in _COMPILED_MATCHER_HOSTS.items()},
+        {hn: path for hn, (path, _tags, _labels) in _COMPILED_MATCHER_HOSTS.items()},
+        lambda hn: _COMPILED_MATCHER_HOSTS[hn][2],
+    )
+    assert set(matcher.to_hosts(matcher.match(condition, matcher.all_hosts))) == expected
+    assert set(
+        matcher.to_hosts(matcher.match(condition, matcher.to_bits([HostName("web1")])))
+    ) == expected & {"web1"}
+
+
+def test_host_bitmap() -> None:
+    index = HostIndex([HostName(f"host{n}") for n in range(20)])
+    bitmap = HostBitmap(
+        index, index.to_bits([HostName("host3"), HostName("host17"), HostName("x")])
+    )
+    assert len(bitmap) == 2
+    assert HostName("host3") in bitmap
+    assert HostName("host17") in bitmap
+    assert HostName("host4") not in bitmap
+    assert HostName("x") not in bitmap
+    assert bitmap == {"host3", "host17"}
+    assert HostBitmap(index, 0) == set()
+    assert HostName("host3") not in HostBitmap(index, 0)
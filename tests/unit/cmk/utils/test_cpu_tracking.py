@@ -7,7 +7,7 @@ import json
 
 import pytest
 
-from cmk.utils.cpu_tracking import Snapshot
+from cmk.utils.cpu_tracking import PhaseTimer, Snapshot
 
 
 def json_identity(serializable: object) -> object:
@@ -50,3 +50,37 @@ class TestCpuTracking:
 
     def test_json_serialization_now(self, now: Snapshot) -> None:
         assert Snapshot.deserialize(json_identity(now.serialize())) == now
+
+
+class TestPhaseTimer:
+    def test_disabled(self) -> None:
+        timer = PhaseTimer()
+        with timer.phase("parsing"):
+            pass
+        assert not timer.times
+
+    def test_accumulates(self) -> None:
+        timer = PhaseTimer()
+        timer.reset(enabled=True)
+        with timer.phase("parsing"):
+            pass
+        timer.add("parsing", 1.0)
+        timer.add("plugin:uptime", 2.0)
+        assert set(timer.times) == {"parsing", "plugin:uptime"}
+        assert 1.0 <= timer.times["parsing"] < 2.0
+        assert timer.times["plugin:uptime"] == 2.0
+
+    def test_measures_on_error(self) -> None:
+        timer = PhaseTimer()
+        timer.reset(enabled=True)
+        with pytest.raises(RuntimeError), timer.phase("checking"):
+            raise RuntimeError()
+        assert "checking" in timer.times
+
+    def test_reset(self) -> None:
+        timer = PhaseTimer()
+        timer.reset(enabled=True)
+        timer.add("parsing", 1.0)
+        timer.reset(enabled=False)
+        assert not timer.enabled
+        assert not timer.times